@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from typing import Dict
 
 """
@@ -13,3 +14,17 @@ def get_string_with_spacing(data: Dict[str, str]) -> str:
     """
     max_width = max([len(k) for k in data])
     return '\n'.join(('{} = {}'.format(k.ljust(max_width), v) for k, v in data.items())) + '\n'
+
+
+def get_dict_from_string_with_spacing(string: str) -> Dict[str, str]:
+    """
+    Gets a Dictionary of key/value pairs from a string written by get_string_with_spacing().
+    :param string: The string representation of the key/value pairs.
+    :return: An OrderedDictionary containing the key/value pairs.
+    """
+    data = OrderedDict()
+    for line in string.splitlines():
+        if line.strip():
+            key, value = line.split(' = ', 1)
+            data[key.strip()] = value
+    return data
@@ -1,4 +1,5 @@
 import abc
+from os import path
 
 """
 An Abstract Class for interacting with particular ResFinder/PointFinder databases (fasta files, etc).
@@ -47,3 +48,11 @@ class AbstractBlastDatabase:
         :return: A list of all database (fasta file) paths.
         """
         return [self.get_path(x) for x in self.get_database_names()]
+
+    def get_prebuilt_name(self, database_name):
+        """
+        Gets the name of the prebuilt BLAST database compiled from a particular database (fasta file).
+        :param database_name: The name of the database.
+        :return: The path of the database (fasta) file relative to the database directory, without the fasta suffix.
+        """
+        return path.relpath(self.get_path(database_name), self.database_dir)[:-len(self.fasta_suffix)]
@@ -0,0 +1,144 @@
+import logging
+import os
+from collections import Counter
+from os import path
+from typing import Dict, List, Set
+
+import Bio.SeqIO
+import numpy as np
+import pandas as pd
+from Bio import Align
+from Bio.SeqRecord import SeqRecord
+
+from staramr.blast.KmerIndex import KmerIndex
+
+logger = logging.getLogger('AlleleClusters')
+
+"""
+A Class for clustering near-identical alleles, so that BLAST can search the representative of each cluster first and
+only search the other alleles of the clusters which have hits.
+"""
+
+
+class AlleleClusters:
+    CLUSTER_IDENTITY = 99.0
+    SAMPLE_STRIDE = 50
+    MAX_CANDIDATES = 3
+    CLUSTERS_SUFFIX = '.clusters.tsv'
+    MEMBERS_SUFFIX = '.members.fsa'
+    REPRESENTATIVES_SUFFIX = '.fsa'
+
+    def __init__(self, clusters_dir: str) -> None:
+        """
+        Creates a new AlleleClusters.
+        :param clusters_dir: The directory storing the clusters.
+        """
+        self._clusters_dir = clusters_dir
+        self._members = {}
+
+        # Scores gaps and mismatches the same, with free end gaps where the representative is longer than the allele
+        self._aligner = Align.PairwiseAligner(mode='global', match_score=1, mismatch_score=-1, open_gap_score=-1,
+                                              extend_gap_score=-1, query_end_gap_score=0)
+
+    def build(self, fasta_files: Dict[str, str]) -> Dict[str, str]:
+        """
+        Clusters the alleles in each of the passed fasta files. Each allele either becomes the representative of a new
+        cluster, or joins the cluster of a (longer) representative it aligns to over its whole length with at least
+        CLUSTER_IDENTITY percent identity.
+        :param fasta_files: A map of {'database_name': 'fasta_file'} defining the databases to cluster.
+        :return: A map of {'database_name': 'representatives_fasta_file'}.
+        """
+        representative_files = {}
+        for database_name in sorted(fasta_files):
+            records = list(Bio.SeqIO.parse(fasta_files[database_name], 'fasta'))
+            representatives = self._cluster(records)
+
+            representative_files[database_name] = self._get_path(database_name, self.REPRESENTATIVES_SUFFIX)
+            os.makedirs(path.dirname(representative_files[database_name]), exist_ok=True)
+            Bio.SeqIO.write([record for record in records if representatives[record.id] == record.id],
+                            representative_files[database_name], 'fasta')
+            Bio.SeqIO.write([record for record in records if representatives[record.id] != record.id],
+                            self._get_path(database_name, self.MEMBERS_SUFFIX), 'fasta')
+            pd.DataFrame([[record.id, representatives[record.id]] for record in records],
+                         columns=['allele', 'representative']).to_csv(
+                self._get_path(database_name, self.CLUSTERS_SUFFIX), sep='\t', index=False)
+
+            logger.info("Clustered %s alleles in [%s] into %s representatives", len(records), database_name,
+                        len(set(representatives.values())))
+
+        self._members = {}
+        return representative_files
+
+    def _cluster(self, records):
+        """
+        Greedily clusters alleles, longest first.
+        :param records: The alleles as a list of Bio.SeqRecord.
+        :return: A map of {'allele_id': 'representative_allele_id'}.
+        """
+        representatives = {}
+        representative_sequences = []
+        sampled_kmers = {}
+
+        for record in sorted(records, key=lambda r: -len(r.seq)):
+            if record.id in representatives:
+                continue
+
+            sequence = str(record.seq).upper()
+            forward, reverse, ambiguous = KmerIndex.encode_sequence(sequence)
+
+            # Candidate representatives share at least one of the k-mers sampled from their sequence
+            candidates = Counter(number for kmer in set(forward[~ambiguous].tolist()) for number in
+                                 sampled_kmers.get(kmer, []))
+            for number, count in candidates.most_common(self.MAX_CANDIDATES):
+                representative_id, representative_sequence = representative_sequences[number]
+                if self._is_member(representative_sequence, sequence):
+                    representatives[record.id] = representative_id
+                    break
+            else:
+                representatives[record.id] = record.id
+                for position in range(0, len(forward), self.SAMPLE_STRIDE):
+                    if not ambiguous[position]:
+                        sampled_kmers.setdefault(int(forward[position]), []).append(len(representative_sequences))
+                representative_sequences.append((record.id, sequence))
+
+        return representatives
+
+    def _is_member(self, representative_sequence, sequence):
+        # Each mismatch or gap costs 2 from the score of a perfect match
+        max_differences = int(len(sequence) * (100.0 - self.CLUSTER_IDENTITY) / 100.0)
+        return self._aligner.score(representative_sequence, sequence) >= len(sequence) - 2 * max_differences
+
+    def _get_path(self, database_name, suffix):
+        return path.join(self._clusters_dir, database_name + suffix)
+
+    def exists(self) -> bool:
+        """
+        Whether or not the clusters have been built.
+        :return: True if the clusters exist, False otherwise.
+        """
+        return path.isdir(self._clusters_dir)
+
+    def get_representatives_path(self, database_name: str) -> str:
+        """
+        Gets the path to the BLAST database of the representatives of the clusters.
+        :param database_name: The name of the database.
+        :return: The path to the BLAST database, for use with 'blastn -db'.
+        """
+        return self._get_path(database_name, '')
+
+    def get_members(self, database_name: str, representative_ids: Set[str]) -> List[SeqRecord]:
+        """
+        Gets the alleles (other than the representatives) in the clusters of the passed representatives.
+        :param database_name: The name of the database.
+        :param representative_ids: The ids of the representatives.
+        :return: A list of the alleles as Bio.SeqRecord.
+        """
+        if database_name not in self._members:
+            clusters = pd.read_csv(self._get_path(database_name, self.CLUSTERS_SUFFIX), sep='\t', dtype=str)
+            cluster_representatives = dict(zip(clusters['allele'], clusters['representative']))
+            self._members[database_name] = [(cluster_representatives[record.id], record) for record in
+                                            Bio.SeqIO.parse(self._get_path(database_name, self.MEMBERS_SUFFIX),
+                                                            'fasta')]
+
+        return [record for representative_id, record in self._members[database_name] if
+                representative_id in representative_ids]
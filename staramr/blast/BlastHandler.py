@@ -1,13 +1,26 @@
 import logging
 import os
 import subprocess
-from concurrent.futures import ThreadPoolExecutor
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import as_completed
 from os import path
-from typing import Dict
+from typing import Dict, List
 
+import Bio.SeqIO
+import numpy as np
+import pandas as pd
 from Bio.Blast.Applications import NcbiblastnCommandline
+from Bio.Seq import reverse_complement
 
 from staramr.blast.AbstractBlastDatabase import AbstractBlastDatabase
+from staramr.blast.AlleleClusters import AlleleClusters
+from staramr.blast.BlastJobScheduler import BlastJobScheduler
+from staramr.blast.BlastResultsCache import BlastResultsCache
+from staramr.blast.ExactMatchFastPath import ExactMatchFastPath
+from staramr.blast.KmerPrescreen import KmerPrescreen
+from staramr.blast.PrebuiltBlastDatabases import PrebuiltBlastDatabases
+from staramr.blast.resfinder.ResfinderBlastDatabase import ResfinderBlastDatabase
 from staramr.exceptions.BlastProcessError import BlastProcessError
 
 logger = logging.getLogger('BlastHandler')
@@ -33,14 +46,82 @@ class BlastHandler:
     sseq
     qseq
     '''.strip().split('\n')]
+    BLAST_SEQUENCE_COLUMNS = ['sseq', 'qseq']
+
+    # Compact types for reading BLAST results. Ids are read as categories (while reading each chunk) and identities are
+    # kept as 64-bit floats, since they are reported as-is in the results
+    BLAST_COLUMN_DTYPES = {
+        'qseqid': 'category',
+        'sseqid': 'category',
+        'pident': np.float64,
+        'length': np.int32,
+        'qstart': np.int32,
+        'qend': np.int32,
+        'sstart': np.int32,
+        'send': np.int32,
+        'slen': np.int32,
+        'qlen': np.int32,
+        'sstrand': 'category',
+        'sseq': object,
+        'qseq': object,
+        'evalue': np.float64,
+    }
+    BLAST_STRING_COLUMNS = ['qseqid', 'sseqid', 'sstrand', 'sseq', 'qseq']
+    BLAST_READ_CHUNK_SIZE = 100000
+    PACK_SEPARATOR = '_'
+    BLAST_EVALUE = 0.001
+
+    # Searches of a pack of input files report e-values, which are re-scaled to each genome of the pack when the results
+    # are split out
+    EVALUE_COLUMN = 'evalue'
+
+    # BLAST reports percent identity rounded to 3 decimals, so thresholds passed to BLAST are lowered slightly to keep
+    # every hit which passes the thresholds after rounding
+    BLAST_THRESHOLD_MARGIN = 0.01
+    CACHED_BLAST_PRIORITY = 0
+    MAKEBLASTDB_PRIORITY = 1
+    BLAST_PRIORITY = 2
 
     def __init__(self, blast_database_objects_map: Dict[str, AbstractBlastDatabase], threads: int,
-                 output_directory: str) -> None:
+                 output_directory: str, combine_resfinder: bool = False,
+                 prebuilt_databases: Dict[str, PrebuiltBlastDatabases] = None,
+                 genomes_per_database: int = 1, write_blast_outputs: bool = True,
+                 blast_results_cache: BlastResultsCache = None, database_commits: Dict[str, str] = None,
+                 kmer_prescreen: KmerPrescreen = None, exact_match_fast_path: ExactMatchFastPath = None,
+                 resfinder_allele_clusters: AlleleClusters = None, pid_threshold: float = None,
+                 plength_thresholds: Dict[str, float] = None, genes_to_exclude: List[str] = None,
+                 blast_sequences: Dict[str, bool] = None) -> None:
         """
         Creates a new BlastHandler.
         :param blast_database_objects_map: A map containing the blast databases.
-        :param threads: The maximum number of threads to use, where one BLAST process gets assigned to one thread.
+        :param threads: The maximum number of threads to use. Threads are split between concurrent BLAST processes and
+                the threads given to each BLAST process.
         :param output_directory: The output directory to store BLAST results.
+        :param combine_resfinder: If True, search all ResFinder drug classes with a single BLAST per input file.
+        :param prebuilt_databases: A map containing the prebuilt BLAST databases for each of the blast databases. If
+                set, input files are searched against these instead of making a BLAST database from each input file.
+        :param genomes_per_database: The number of input files to pack into a single BLAST database (or query file),
+                so that each AMR gene file is searched once per pack instead of once per input file.
+        :param write_blast_outputs: If True, write BLAST results to files in the output directory. Otherwise, BLAST
+                results are parsed directly from the output of BLAST and kept in memory.
+        :param blast_results_cache: A cache of BLAST results to re-use instead of re-running BLAST (None to disable).
+        :param database_commits: A map of the commits of each of the blast databases, identifying cached results.
+        :param kmer_prescreen: A k-mer prescreen to skip BLAST jobs which cannot have hits passing the thresholds (None
+                to disable).
+        :param exact_match_fast_path: Exact matches to the ResFinder alleles to use in place of BLAST results where
+                they give the same results (None to disable).
+        :param resfinder_allele_clusters: Clusters of the ResFinder alleles. If set (along with prebuilt_databases),
+                ResFinder is searched in two stages, first against the representatives of the clusters and then against
+                the other alleles of the clusters with hits (None to disable).
+        :param pid_threshold: The percent identity threshold. If set (along with plength_thresholds), BLAST leaves out
+                hits which cannot pass the thresholds and only the hits passing the thresholds are kept as BLAST results
+                are read, instead of keeping every hit (None to keep every hit).
+        :param plength_thresholds: A map of the percent length overlap threshold for each of the blast databases.
+        :param genes_to_exclude: A list of gene IDs to leave out of the BLAST results along with the hits which do not
+                pass the thresholds.
+        :param blast_sequences: A map of whether or not BLAST reports the aligned sequences ('sseq' and 'qseq') for
+                each of the blast databases, which make up most of the BLAST output. Where they are not reported, these
+                columns of the results are empty (None to report them for all databases).
         """
         if threads is None:
             raise Exception("threads is None")
@@ -51,7 +132,30 @@ class BlastHandler:
             raise Exception("output_directory is None")
 
         self._output_directory = output_directory
+        self._combine_resfinder = combine_resfinder
+        self._prebuilt_databases = prebuilt_databases
+
+        if genomes_per_database < 1:
+            raise Exception("genomes_per_database=" + str(genomes_per_database) + " must be at least 1")
+
+        self._genomes_per_database = genomes_per_database
+        self._write_blast_outputs = write_blast_outputs
+        self._blast_results_cache = blast_results_cache
+        self._database_commits = database_commits if database_commits is not None else {}
+        self._kmer_prescreen = kmer_prescreen
+        self._exact_match_fast_path = exact_match_fast_path
+        self._resfinder_allele_clusters = resfinder_allele_clusters
+        self._pid_threshold = pid_threshold
+        self._plength_thresholds = plength_thresholds
+        self._genes_to_exclude = genes_to_exclude if genes_to_exclude is not None else []
+        self._blast_sequences = blast_sequences if blast_sequences is not None else {}
+        self._file_hashes = {}
+        self._genome_lengths = {}
+        self._database_sequence_lengths = {}
+        self._combined_resfinder_file = path.join(output_directory, 'resfinder-' +
+                                                  ResfinderBlastDatabase.COMBINED_DATABASE_NAME + '.fsa')
         self._input_genomes_tmp_dir = path.join(output_directory, 'input-genomes')
+        self._genome_packs_tmp_dir = path.join(output_directory, 'genome-packs')
 
         self._blast_database_objects_map = blast_database_objects_map
 
@@ -61,7 +165,7 @@ class BlastHandler:
         else:
             self._pointfinder_configured: bool = True
 
-        self._thread_pool_executor = None
+        self._job_scheduler = None
         self.reset()
 
     def reset(self):
@@ -69,36 +173,346 @@ class BlastHandler:
         Resets this BlastHandler.
         :return: None
         """
-        if self._thread_pool_executor is not None:
-            self._thread_pool_executor.shutdown()
-        self._thread_pool_executor = ThreadPoolExecutor(max_workers=self._threads)
+        if self._job_scheduler is not None:
+            self._job_scheduler.shutdown()
+        self._job_scheduler = None
         self._blast_map = {}
         self._future_blasts_map = {}
+        self._future_blasts_file_map = OrderedDict()
+        self._packed_genomes = {}
+        self._packed_genome_lengths = {}
+        self._skipped_blasts = []
+        self._exact_match_blasts = []
 
-        if path.exists(self._input_genomes_tmp_dir):
-            logger.debug("Directory [%s] already exists", self._input_genomes_tmp_dir)
-        else:
-            os.mkdir(self._input_genomes_tmp_dir)
+        for directory in [self._input_genomes_tmp_dir, self._genome_packs_tmp_dir]:
+            if path.exists(directory):
+                logger.debug("Directory [%s] already exists", directory)
+            else:
+                os.mkdir(directory)
 
     def run_blasts(self, files):
         """
-        Scans all files with BLAST against the ResFinder/PointFinder databases.
+        Scans all files with BLAST against the ResFinder/PointFinder databases. The BLAST jobs for each input file are
+        started as soon as the BLAST database for that file is made, so that making the databases for later files
+        overlaps with BLASTing earlier files.
         :param files: The files to scan.
         :return: None
         """
-        db_files = self._make_db_from_input_files(self._input_genomes_tmp_dir, files)
-        logger.debug("Done making blast databases for input files")
+        if self._genomes_per_database > 1:
+            files = self._pack_input_files(self._genome_packs_tmp_dir, files)
 
+        if self._prebuilt_databases:
+            logger.debug("Using prebuilt BLAST databases, skipping making blast databases for input files")
+            db_files = [path.abspath(file) for file in files]
+        else:
+            db_files = self._link_input_files(self._input_genomes_tmp_dir, files)
+
+        if self._combine_resfinder and not self._prebuilt_databases and not path.exists(
+                self._combined_resfinder_file):
+            number_alleles = self._blast_database_objects_map['resfinder'].write_combined_database(
+                self._combined_resfinder_file)
+            logger.info("Combined %s ResFinder alleles into a single query file", number_alleles)
+
+        blast_jobs = []
         for file in db_files:
             logger.info("Scheduling blasts for %s", path.basename(file))
 
             for name in self._blast_database_objects_map:
                 database_object = self._blast_database_objects_map[name]
-                self._schedule_blast(file, database_object)
+                blast_jobs.extend(self._schedule_blast(file, database_object))
+
+        self._submit_blast_jobs(db_files, blast_jobs)
+
+    def _get_blast_threads(self, number_jobs):
+        """
+        Gets the number of threads to give each BLAST process, so that all threads are in use even when there are
+        fewer BLAST jobs than threads.
+        :param number_jobs: The number of BLAST jobs.
+        :return: The number of threads for each BLAST process.
+        """
+        return max(1, self._threads // max(1, number_jobs))
+
+    def _submit_blast_jobs(self, db_files, blast_jobs):
+        """
+        Submits jobs to make the BLAST databases for the input files (unless using prebuilt databases) and the BLAST
+        jobs which depend on them. Databases are made in the order of the input files, and BLAST jobs which are ready
+        to run are started with the most expensive jobs first so that large genomes do not end up as stragglers at
+        the end of a run.
+        :param db_files: The input files to make BLAST databases for.
+        :param blast_jobs: A list of (cost, database name, job arguments) tuples.
+        :return: None
+        """
+        if self._blast_results_cache is not None:
+            cache_keys = [self._get_cache_key(*blast_job[0:4]) for cost, name, blast_job in blast_jobs]
+            cached = [self._blast_results_cache.contains(cache_key) for cache_key in cache_keys]
+            logger.info("Found cached results for %s of %s BLAST jobs", sum(cached), len(blast_jobs))
+        else:
+            cache_keys = [None] * len(blast_jobs)
+            cached = [False] * len(blast_jobs)
+
+        uncached_files = {blast_job[0] for (cost, name, blast_job), is_cached in zip(blast_jobs, cached) if
+                          not is_cached}
+        number_blasts = len(blast_jobs) - sum(cached)
+        blast_threads = self._get_blast_threads(number_blasts)
+        concurrent_jobs = max(1, self._threads // blast_threads)
+        logger.info("Running %s BLAST jobs, %s at a time with %s threads each", number_blasts, concurrent_jobs,
+                    blast_threads)
+
+        if self._job_scheduler is not None:
+            self._job_scheduler.shutdown()
+        self._job_scheduler = BlastJobScheduler(concurrent_jobs)
+
+        # The k-mer prescreen and exact match search of each input file run before making its BLAST database, so that
+        # BLAST jobs which depend on the database can use their results
+        future_dependencies = {}
+        file_searches = []
+        if self._kmer_prescreen is not None:
+            file_searches.append(self._kmer_prescreen.prescreen)
+        if self._exact_match_fast_path is not None:
+            file_searches.append(self._exact_match_fast_path.search)
+        for file_search in file_searches:
+            for order, file in enumerate(db_files):
+                if file in future_dependencies:
+                    future_dependencies[file] = self._job_scheduler.submit_after(future_dependencies[file],
+                                                                                 (self.MAKEBLASTDB_PRIORITY, order),
+                                                                                 file_search, file)
+                elif file in uncached_files:
+                    future_dependencies[file] = self._job_scheduler.submit((self.MAKEBLASTDB_PRIORITY, order),
+                                                                           file_search, file)
+
+        if not self._prebuilt_databases and uncached_files:
+            logger.info("Making BLAST databases for input files")
+            for order, file in enumerate(db_files):
+                if file in future_dependencies:
+                    future_dependencies[file] = self._job_scheduler.submit_after(future_dependencies[file],
+                                                                                 (self.MAKEBLASTDB_PRIORITY, order),
+                                                                                 self._make_blast_db, file)
+                elif file in uncached_files:
+                    future_dependencies[file] = self._job_scheduler.submit((self.MAKEBLASTDB_PRIORITY, order),
+                                                                           self._make_blast_db, file)
+
+        for (cost, name, blast_job), cache_key, is_cached in zip(blast_jobs, cache_keys, cached):
+            file = blast_job[0]
+            if is_cached:
+                future_blast = self._job_scheduler.submit((self.CACHED_BLAST_PRIORITY,), self._load_cached_blast,
+                                                          *blast_job, cache_key=cache_key)
+            elif file in future_dependencies:
+                future_blast = self._job_scheduler.submit_after(future_dependencies[file],
+                                                                (self.BLAST_PRIORITY, -cost), self._run_blast,
+                                                                *blast_job, blast_threads=blast_threads,
+                                                                cache_key=cache_key)
+            else:
+                future_blast = self._job_scheduler.submit((self.BLAST_PRIORITY, -cost), self._run_blast, *blast_job,
+                                                          blast_threads=blast_threads, cache_key=cache_key)
+            self._get_future_blasts_from_map(name).append(future_blast)
+            for genome_file_name in self._get_genome_file_names(path.basename(file)):
+                self._future_blasts_file_map.setdefault(genome_file_name, []).append(future_blast)
+
+    def _get_cache_key(self, file, blast_database, database_name, query):
+        """
+        Gets the key identifying the cached results of a BLAST job.
+        :param file: The input file (or pack of input files).
+        :param blast_database: The staramr.blast.AbstractBlastDatabase.
+        :param database_name: The name of the database (e.g., drug class).
+        :param query: The AMR genes query file.
+        :return: The key for the cached BLAST results.
+        """
+        name = blast_database.get_name()
+        key_fields = [
+            'genome=' + self._get_file_hash(file),
+            'database=' + name,
+            'database_commit=' + self._database_commits.get(name, ''),
+            'database_name=' + database_name,
+            'query=' + (self._get_file_hash(query) if path.exists(query) else ''),
+            'prebuilt=' + str(bool(self._prebuilt_databases)),
+            'evalue=' + str(self.BLAST_EVALUE),
+            'columns=' + ','.join(self._get_job_blast_columns(file, name)),
+        ]
+        if self._is_clustered(blast_database):
+            key_fields.append('clustered=True')
+        if self._pid_threshold is not None:
+            key_fields.append('thresholds=' + str(self._pid_threshold) + ',' + str(self._plength_thresholds[name]))
+            key_fields.append('genes_to_exclude=' + ','.join(sorted(self._genes_to_exclude)))
+        return self._blast_results_cache.get_key(key_fields)
+
+    def _get_file_hash(self, file):
+        if file not in self._file_hashes:
+            self._file_hashes[file] = BlastResultsCache.hash_file(file)
+        return self._file_hashes[file]
+
+    def _get_genome_length(self, file):
+        if file not in self._genome_lengths:
+            self._genome_lengths[file] = sum(len(record.seq) for record in Bio.SeqIO.parse(file, 'fasta'))
+        return self._genome_lengths[file]
+
+    def _get_search_genome_length(self, file):
+        """
+        Gets the genome length BLAST e-values are computed for. For a pack of input files, this is the length of the
+        shortest genome in the pack, so that the e-value cutoff keeps every hit a search of any one of the genomes would
+        keep. The e-values are then re-scaled to the length of each genome when the results are split.
+        :param file: The input file (or pack of input files).
+        :return: The genome length.
+        """
+        file_name = path.basename(file)
+        if file_name in self._packed_genome_lengths:
+            return min(self._packed_genome_lengths[file_name].values())
+        else:
+            return self._get_genome_length(file)
 
-    def _make_db_from_input_files(self, db_dir, files):
-        logger.info("Making BLAST databases for input files")
-        future_makeblastdbs = []
+    def _get_genome_evalue_scales(self, file_name):
+        """
+        Gets the factors converting the e-values of a search of a pack of input files into the e-values of a search of
+        each genome in the pack. E-values are proportional to the database size, which is the length of the shortest
+        genome in the pack for the search of the pack.
+        :param file_name: The name of the pack of input files.
+        :return: A map of {'genome_prefix': scale}.
+        """
+        genome_lengths = self._packed_genome_lengths[file_name]
+        search_genome_length = min(genome_lengths.values())
+        return {prefix: genome_length / search_genome_length for prefix, genome_length in genome_lengths.items()}
+
+    def _get_job_blast_columns(self, file, name):
+        """
+        Gets the columns BLAST reports for a BLAST job, which are followed by the e-value for a pack of input files.
+        :param file: The input file (or pack of input files).
+        :param name: The name of the blast database ('resfinder' or 'pointfinder').
+        :return: The list of BLAST columns.
+        """
+        blast_columns = self.get_blast_columns(name)
+        if path.basename(file) in self._packed_genomes:
+            return blast_columns + [self.EVALUE_COLUMN]
+        else:
+            return blast_columns
+
+    def _get_database_sequence_lengths(self, db):
+        """
+        Gets the lengths of the sequences (alleles) in a BLAST database.
+        :param db: The BLAST database.
+        :return: A np.ndarray of the lengths of the sequences.
+        """
+        if db not in self._database_sequence_lengths:
+            command = ['blastdbcmd', '-db', db, '-entry', 'all', '-outfmt', '%l']
+            logger.debug(' '.join(command))
+            try:
+                process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+                                         universal_newlines=True)
+            except subprocess.CalledProcessError as e:
+                raise BlastProcessError("Error running blastdbcmd", e)
+            self._database_sequence_lengths[db] = np.array(process.stdout.split(), dtype=np.int64)
+        return self._database_sequence_lengths[db]
+
+    def _get_shortest_allele_length(self, db):
+        allele_lengths = self._get_database_sequence_lengths(db)
+        return int(allele_lengths.min()) if len(allele_lengths) > 0 else 1
+
+    def _get_genome_query_options(self, genome_file, db):
+        """
+        Gets the BLAST options which make a search with the input file as the query against an AMR gene database report
+        the hits of a search with the AMR genes as the query against a database of the input file.
+        :param genome_file: The input file.
+        :param db: The BLAST database of AMR genes.
+        :return: A dictionary of the options for NcbiblastnCommandline.
+        """
+        # max_target_seqs caps the number of alleles reported for each contig, which must not leave out the best allele
+        # of large allele families. The search space is the one of the genome-as-database search for the shortest
+        # allele, so e-values are never larger than they would be in that search, and are re-scaled to the length of
+        # each allele once reported. The input file is not masked by DUST, as it is not when it is the database.
+        return {'max_target_seqs': max(1, len(self._get_database_sequence_lengths(db))),
+                'searchsp': self._get_search_genome_length(genome_file) * self._get_shortest_allele_length(db),
+                'dust': 'no'}
+
+    def _get_genome_file_names(self, file_name):
+        if file_name in self._packed_genomes:
+            return list(self._packed_genomes[file_name].values())
+        else:
+            return [file_name]
+
+    def _pack_input_files(self, pack_dir, files):
+        """
+        Packs the input files into fasta files of (at most) genomes_per_database genomes. Each contig id is prefixed with
+        the index of its genome in the pack so that BLAST results can be split back out to the individual genomes.
+        :param pack_dir: The directory to write the packed fasta files to.
+        :param files: The input files.
+        :return: A list of the packed fasta files.
+        """
+        logger.info("Packing %s input files into BLAST databases of %s genomes", len(files),
+                    self._genomes_per_database)
+        pack_files = []
+
+        for pack_number, pack_start in enumerate(range(0, len(files), self._genomes_per_database)):
+            pack_file = path.join(pack_dir, 'genome-pack-{}.fasta'.format(pack_number))
+            packed_genomes = OrderedDict()
+            packed_genome_lengths = OrderedDict()
+
+            with open(pack_file, 'w') as pack_handle:
+                for index, file in enumerate(files[pack_start:pack_start + self._genomes_per_database]):
+                    prefix = str(index)
+                    packed_genomes[prefix] = path.basename(file)
+                    packed_genome_lengths[prefix] = 0
+                    for record in Bio.SeqIO.parse(file, 'fasta'):
+                        pack_handle.write('>' + prefix + self.PACK_SEPARATOR + record.id + '\n' + str(record.seq) + '\n')
+                        packed_genome_lengths[prefix] += len(record.seq)
+
+            logger.debug("Packed %s into %s", list(packed_genomes.values()), pack_file)
+            self._packed_genomes[path.basename(pack_file)] = packed_genomes
+            self._packed_genome_lengths[path.basename(pack_file)] = packed_genome_lengths
+            pack_files.append(pack_file)
+
+        return pack_files
+
+    def _split_packed_blast_output(self, blast_out, genome_blast_outs, genome_evalue_scales=None):
+        """
+        Splits BLAST results from a pack of genomes into the BLAST results for each individual genome, removing the
+        genome prefix from the contig ids.
+        :param blast_out: The BLAST results for the pack of genomes.
+        :param genome_blast_outs: A map of {'genome_prefix': 'genome_blast_out'}.
+        :param genome_evalue_scales: A map of {'genome_prefix': scale} converting the e-values in the last column of the
+                BLAST results into the e-values for each genome. If set, hits above BLAST_EVALUE for their genome are
+                left out along with the e-value column (None to keep all hits).
+        :return: None
+        """
+        sseqid_index = self.BLAST_COLUMNS.index('sseqid')
+        genome_handles = {prefix: open(genome_blast_out, 'w') for prefix, genome_blast_out in
+                          genome_blast_outs.items()}
+        try:
+            with open(blast_out, 'r') as blast_handle:
+                for line in blast_handle:
+                    columns = line.rstrip('\n').split('\t')
+                    prefix, columns[sseqid_index] = columns[sseqid_index].split(self.PACK_SEPARATOR, 1)
+                    if genome_evalue_scales is not None:
+                        evalue = float(columns.pop())
+                        if evalue * genome_evalue_scales[prefix] > self.BLAST_EVALUE:
+                            continue
+                    genome_handles[prefix].write('\t'.join(columns) + '\n')
+        finally:
+            for genome_handle in genome_handles.values():
+                genome_handle.close()
+
+    def _split_packed_blast_table(self, blast_table, prefixes, genome_evalue_scales=None):
+        """
+        Splits a table of BLAST results from a pack of genomes into tables for each individual genome, removing the
+        genome prefix from the contig ids.
+        :param blast_table: The pd.DataFrame of BLAST results for the pack of genomes.
+        :param prefixes: The genome prefixes in the pack.
+        :param genome_evalue_scales: A map of {'genome_prefix': scale} converting the e-values in the EVALUE_COLUMN of
+                the BLAST results into the e-values for each genome. If set, hits above BLAST_EVALUE for their genome
+                are left out along with the e-value column (None to keep all hits).
+        :return: A map of {'genome_prefix': pd.DataFrame}.
+        """
+        split_ids = [sseqid.split(self.PACK_SEPARATOR, 1) for sseqid in blast_table['sseqid']]
+        genome_prefixes = pd.Series([prefix for prefix, contig in split_ids], index=blast_table.index, dtype=object)
+        blast_table = blast_table.assign(
+            sseqid=pd.Series([contig for prefix, contig in split_ids], index=blast_table.index, dtype=object))
+
+        if genome_evalue_scales is not None:
+            genome_evalues = blast_table[self.EVALUE_COLUMN] * genome_prefixes.map(genome_evalue_scales).astype(
+                np.float64)
+            blast_table = blast_table[genome_evalues <= self.BLAST_EVALUE].drop(columns=self.EVALUE_COLUMN)
+            genome_prefixes = genome_prefixes[blast_table.index]
+
+        return {prefix: blast_table[genome_prefixes == prefix] for prefix in prefixes}
+
+    def _link_input_files(self, db_dir, files):
         db_files = []
 
         for file in files:
@@ -107,33 +521,174 @@ class BlastHandler:
             os.symlink(path.abspath(file), destination)
             db_files.append(destination)
 
-            future_makeblastdbs.append(self._thread_pool_executor.submit(self._make_blast_db, destination))
-
-        # Blocks until all blast dbs are made. If an exception is raised, will raise same exception
-        try:
-            for future_blastdb in future_makeblastdbs:
-                future_blastdb.result()
-        except subprocess.CalledProcessError as e:
-            raise BlastProcessError("Error running makeblastdb", e)
-
         return db_files
 
+    def _get_queries(self, blast_database):
+        """
+        Gets the query files to BLAST for the passed database.
+        :param blast_database: The staramr.blast.AbstractBlastDatabase.
+        :return: A list of (database_name, query_file) tuples.
+        """
+        if self._combine_resfinder and blast_database.get_name() == 'resfinder':
+            return [(ResfinderBlastDatabase.COMBINED_DATABASE_NAME, self._combined_resfinder_file)]
+        else:
+            return [(database_name, blast_database.get_path(database_name)) for database_name in
+                    blast_database.get_database_names()]
+
     def _schedule_blast(self, file, blast_database):
-        database_names = blast_database.get_database_names()
-        logger.debug("%s databases: %s", blast_database.get_name(), database_names)
-        for database_name in database_names:
-            database = blast_database.get_path(database_name)
+        """
+        Schedules BLAST jobs for an input file against a particular database.
+        :param file: The input file (or pack of input files).
+        :param blast_database: The staramr.blast.AbstractBlastDatabase.
+        :return: A list of (cost, database name, job arguments) tuples, where the cost estimates the time to run the job.
+        """
+        blast_jobs = []
+        queries = self._get_queries(blast_database)
+        logger.debug("%s databases: %s", blast_database.get_name(), [name for name, query in queries])
+        for database_name, database in queries:
             file_name = os.path.basename(file)
+            blast_out = self._get_blast_out(file_name, database_name, blast_database)
+
+            if file_name in self._packed_genomes:
+                genome_blast_outs = OrderedDict()
+                for prefix, genome_file_name in self._packed_genomes[file_name].items():
+                    genome_blast_out = self._get_blast_out(genome_file_name, database_name, blast_database)
+                    genome_blast_outs[prefix] = genome_blast_out
+                    self._get_blast_map(blast_database.get_name()).setdefault(genome_file_name, {})[
+                        database_name] = genome_blast_out
+            else:
+                genome_blast_outs = None
+                self._get_blast_map(blast_database.get_name()).setdefault(file_name, {})[database_name] = blast_out
+
+            cost = path.getsize(file) * self._get_query_size(blast_database, database)
+            blast_jobs.append((cost, blast_database.get_name(),
+                               (file, blast_database, database_name, database, blast_out, genome_blast_outs)))
+
+        return blast_jobs
+
+    def _get_query_size(self, blast_database, query):
+        if path.exists(query):
+            return path.getsize(query)
+        else:
+            # combined query file which has only been compiled as a prebuilt database
+            return sum(path.getsize(database_path) for database_path in blast_database.get_database_paths())
+
+    def _get_blast_out(self, file_name, database_name, blast_database):
+        if not self._write_blast_outputs:
+            return None
+
+        blast_out = os.path.join(self._output_directory,
+                                 file_name + "." + database_name + "." + blast_database.get_name() + ".blast.tsv")
+        if os.path.exists(blast_out):
+            raise Exception("Error, blast_out [%s] already exists", blast_out)
+
+        return blast_out
+
+    def _run_blast(self, file, blast_database, database_name, database, blast_out, genome_blast_outs,
+                   blast_threads=1, cache_key=None):
+        blast_table = self._get_results_without_blast(file, blast_database, database_name)
+        if blast_table is not None:
+            # These results are not cached, since the cache stores hits which do not pass the thresholds
+            if blast_out is not None:
+                blast_table.to_csv(blast_out, sep='\t', header=False, index=False)
+            self._store_blast_results(file, blast_database, database_name, blast_table, blast_out, genome_blast_outs)
+            return
+
+        blast_columns = self._get_job_blast_columns(file, blast_database.get_name())
+        if self._is_clustered(blast_database):
+            blast_table = self._launch_blast_clustered(file, self._get_prebuilt_name(blast_database, database_name),
+                                                       blast_out, blast_threads,
+                                                       self._get_threshold_options(blast_database), blast_columns,
+                                                       self._get_hit_filter(blast_database))
+        elif self._prebuilt_databases:
+            prebuilt_database = self._get_prebuilt_database(blast_database, database_name)
+            blast_table = self._launch_blast_prebuilt(file, prebuilt_database, blast_out, blast_threads,
+                                                      self._get_threshold_options(blast_database), blast_columns,
+                                                      self._get_hit_filter(blast_database, genome_query=True))
+        else:
+            blast_table = self._launch_blast(database, file, blast_out, blast_threads,
+                                             self._get_threshold_options(blast_database), blast_columns,
+                                             self._get_hit_filter(blast_database))
+
+        if cache_key is not None:
+            if blast_table is None:
+                self._blast_results_cache.put_file(cache_key, blast_out)
+            else:
+                self._blast_results_cache.put(cache_key, blast_table)
+
+        self._store_blast_results(file, blast_database, database_name, blast_table, blast_out, genome_blast_outs)
+
+    def _get_results_without_blast(self, file, blast_database, database_name):
+        """
+        Gets the results of a BLAST job from the k-mer prescreen or the exact match fast path, when running BLAST would
+        not change the results.
+        :param file: The input file (or pack of input files).
+        :param blast_database: The staramr.blast.AbstractBlastDatabase.
+        :param database_name: The name of the database (e.g., drug class).
+        :return: A pd.DataFrame of results in place of the BLAST results, or None if BLAST needs to be run.
+        """
+        prebuilt_name = self._get_prebuilt_name(blast_database, database_name)
+        if self._kmer_prescreen is not None and not self._kmer_prescreen.should_search(file, blast_database.get_name(),
+                                                                                       prebuilt_name):
+            logger.debug("Skipping BLAST of [%s] against [%s], no hits can pass the thresholds", file, database_name)
+            self._skipped_blasts.append((file, database_name))
+            return pd.DataFrame(columns=self.BLAST_COLUMNS)
+
+        if self._exact_match_fast_path is not None and blast_database.get_name() == 'resfinder':
+            exact_match_table = self._exact_match_fast_path.get_hits(file, prebuilt_name)
+            if exact_match_table is not None:
+                logger.debug("Using %s exact matches in [%s] in place of BLAST against [%s]", len(exact_match_table),
+                             file, database_name)
+                self._exact_match_blasts.append((file, database_name))
+                return exact_match_table[self.BLAST_COLUMNS]
+
+        return None
+
+    def _load_cached_blast(self, file, blast_database, database_name, database, blast_out, genome_blast_outs,
+                           cache_key):
+        cache_file = self._blast_results_cache.get(cache_key)
+        if cache_file is None:
+            raise Exception("Cached BLAST results for [" + file + "] against [" + database_name +
+                            "] were removed from the cache during the run")
+
+        logger.debug("Using cached BLAST results for [%s] against [%s]", file, database_name)
+        blast_table = self.read_blast_table(cache_file, extra_columns=self._get_extra_columns(
+            self._get_job_blast_columns(file, blast_database.get_name())))
+        if blast_out is not None:
+            blast_table.to_csv(blast_out, sep='\t', header=False, index=False)
+
+        self._store_blast_results(file, blast_database, database_name, blast_table, blast_out, genome_blast_outs)
+
+    def _store_blast_results(self, file, blast_database, database_name, blast_table, blast_out, genome_blast_outs):
+        file_name = path.basename(file)
+        # Results which did not come from BLAST (e.g., exact matches) have no e-values to re-scale
+        if genome_blast_outs is not None and (blast_table is None or self.EVALUE_COLUMN in blast_table.columns):
+            genome_evalue_scales = self._get_genome_evalue_scales(file_name)
+        else:
+            genome_evalue_scales = None
 
-            blast_out = os.path.join(self._output_directory,
-                                     file_name + "." + database_name + "." + blast_database.get_name() + ".blast.tsv")
-            if os.path.exists(blast_out):
-                raise Exception("Error, blast_out [%s] already exists", blast_out)
+        if self._write_blast_outputs:
+            if genome_blast_outs is not None:
+                self._split_packed_blast_output(blast_out, genome_blast_outs, genome_evalue_scales)
+        else:
+            blast_map = self._get_blast_map(blast_database.get_name())
+            if genome_blast_outs is not None:
+                genome_blast_tables = self._split_packed_blast_table(blast_table, genome_blast_outs.keys(),
+                                                                     genome_evalue_scales)
+                for prefix, genome_file_name in self._packed_genomes[file_name].items():
+                    blast_map[genome_file_name][database_name] = genome_blast_tables[prefix]
+            else:
+                blast_map[file_name][database_name] = blast_table
 
-            self._get_blast_map(blast_database.get_name()).setdefault(file_name, {})[database_name] = blast_out
+    def _get_prebuilt_database(self, blast_database, database_name):
+        prebuilt_databases = self._prebuilt_databases[blast_database.get_name()]
+        return prebuilt_databases.get_path(self._get_prebuilt_name(blast_database, database_name))
 
-            future_blast = self._thread_pool_executor.submit(self._launch_blast, database, file, blast_out)
-            self._get_future_blasts_from_map(blast_database.get_name()).append(future_blast)
+    def _get_prebuilt_name(self, blast_database, database_name):
+        if database_name == ResfinderBlastDatabase.COMBINED_DATABASE_NAME:
+            return database_name
+        else:
+            return blast_database.get_prebuilt_name(database_name)
 
     def _get_blast_map(self, name):
         if name not in self._blast_map:
@@ -147,6 +702,27 @@ class BlastHandler:
 
         return self._future_blasts_map[name]
 
+    def get_number_skipped_blasts(self):
+        """
+        Gets the number of BLAST jobs skipped by the k-mer prescreen.
+        :return: The number of skipped BLAST jobs.
+        """
+        return len(self._skipped_blasts)
+
+    def get_number_exact_match_blasts(self):
+        """
+        Gets the number of BLAST jobs replaced by exact matches.
+        :return: The number of BLAST jobs replaced by exact matches.
+        """
+        return len(self._exact_match_blasts)
+
+    def get_number_blasts(self):
+        """
+        Gets the number of BLAST jobs which were scheduled.
+        :return: The number of BLAST jobs.
+        """
+        return sum(len(future_blasts) for future_blasts in self._future_blasts_map.values())
+
     def is_pointfinder_configured(self):
         """
         Whether or not PointFinder is being used.
@@ -154,41 +730,450 @@ class BlastHandler:
         """
         return self._pointfinder_configured
 
-    def get_resfinder_outputs(self):
+    def as_completed_files(self):
+        """
+        Gets the input file names as all of the BLAST jobs for each file complete, so that results for a file can be
+        processed while BLAST is still running on other files.
+        :return: A generator of input file names, in the order their BLAST jobs completed.
+        """
+        remaining_futures = OrderedDict(
+            (file_name, set(future_blasts)) for file_name, future_blasts in self._future_blasts_file_map.items())
+        future_file_names = {}
+        for file_name, future_blasts in remaining_futures.items():
+            for future_blast in future_blasts:
+                future_file_names.setdefault(future_blast, []).append(file_name)
+
+        for future_blast in as_completed(future_file_names):
+            # Forces any exceptions to be thrown if error with blasts
+            future_blast.result()
+            for file_name in future_file_names[future_blast]:
+                remaining_futures[file_name].remove(future_blast)
+                if not remaining_futures[file_name]:
+                    yield file_name
+
+    def get_resfinder_outputs(self, wait=True):
         """
         Gets the ResFinder output files in the form of a dictionary which looks like:
             { 'input_file_name' => 'blast_results_file.xml' }
+        :param wait: If True, waits for all BLAST jobs to complete. Otherwise, the output files may not exist yet.
         :return: A dictionary mapping input file names to ResFinder BLAST output files.
         """
 
-        # Forces any exceptions to be thrown if error with blasts
-        for future_blast in self._get_future_blasts_from_map('resfinder'):
-            future_blast.result()
+        if wait:
+            # Forces any exceptions to be thrown if error with blasts
+            for future_blast in self._get_future_blasts_from_map('resfinder'):
+                future_blast.result()
         return self._get_blast_map('resfinder')
 
-    def get_pointfinder_outputs(self):
+    def get_pointfinder_outputs(self, wait=True):
         """
         Gets the PointFinder output files in the form of a dictionary which looks like:
             { 'input_file_name' => 'blast_results_file.xml' }
+        :param wait: If True, waits for all BLAST jobs to complete. Otherwise, the output files may not exist yet.
         :return: A dictionary mapping input file names to PointFinder BLAST output files.
         """
         if (self.is_pointfinder_configured()):
-            # Forces any exceptions to be thrown if error with blasts
-            for future_blast in self._get_future_blasts_from_map('pointfinder'):
-                future_blast.result()
+            if wait:
+                # Forces any exceptions to be thrown if error with blasts
+                for future_blast in self._get_future_blasts_from_map('pointfinder'):
+                    future_blast.result()
             return self._get_blast_map('pointfinder')
         else:
             raise Exception("Error, pointfinder has not been configured")
 
-    def _launch_blast(self, query, db, output):
-        blast_out_format = '"6 ' + ' '.join(self.BLAST_COLUMNS) + '"'
-        blastn_command = NcbiblastnCommandline(query=query, db=db, evalue=0.001, outfmt=blast_out_format, out=output)
+    def get_blast_columns(self, name: str) -> List[str]:
+        """
+        Gets the columns BLAST reports for a blast database.
+        :param name: The name of the blast database ('resfinder' or 'pointfinder').
+        :return: The list of BLAST columns, in the order of BLAST_COLUMNS.
+        """
+        if self._blast_sequences.get(name, True):
+            return self.BLAST_COLUMNS
+        else:
+            return [column for column in self.BLAST_COLUMNS if column not in self.BLAST_SEQUENCE_COLUMNS]
+
+    @classmethod
+    def _get_extra_columns(cls, blast_columns):
+        if blast_columns is None:
+            return []
+        return [column for column in blast_columns if column not in cls.BLAST_COLUMNS]
+
+    @classmethod
+    def _get_blast_out_format(cls, blast_columns):
+        return '"6 ' + ' '.join(blast_columns if blast_columns is not None else cls.BLAST_COLUMNS) + '"'
+
+    def _get_threshold_options(self, blast_database):
+        """
+        Gets the BLAST options which leave out hits that cannot pass the thresholds. These are only lower bounds of the
+        thresholds, so the BLAST results must still be filtered by the thresholds.
+        :param blast_database: The staramr.blast.AbstractBlastDatabase.
+        :return: A dictionary of the options for NcbiblastnCommandline (empty if thresholds are not passed to BLAST).
+        """
+        if self._pid_threshold is None:
+            return {}
+
+        # plength is the alignment length over the gene length, and gaps in the gene (at most 100 - pid percent of the
+        # alignment) add to the alignment length without covering more of the gene
+        plength_threshold = self._plength_thresholds[blast_database.get_name()]
+        return {'perc_identity': max(0.0, self._pid_threshold - self.BLAST_THRESHOLD_MARGIN),
+                'qcov_hsp_perc': max(0.0, plength_threshold * self._pid_threshold / 100.0 - self.BLAST_THRESHOLD_MARGIN)}
+
+    @classmethod
+    def passes_thresholds(cls, blast_table, pid_threshold, plength_threshold, genes_to_exclude):
+        """
+        Finds the BLAST hits which pass the thresholds and are not excluded.
+        :param blast_table: A pd.DataFrame of BLAST results (or a chunk of them) with the AMR genes as the query.
+        :param pid_threshold: The percent identity threshold.
+        :param plength_threshold: The percent length overlap threshold.
+        :param genes_to_exclude: A list of gene IDs to exclude.
+        :return: A boolean pd.Series, which is True for the hits to keep.
+        """
+        plength = (blast_table.length / blast_table.qlen) * 100.0
+        return (blast_table.pident >= pid_threshold) & (plength >= plength_threshold) & ~blast_table.qseqid.isin(
+            genes_to_exclude)
+
+    def _get_hit_filter(self, blast_database, genome_query=False):
+        """
+        Gets a filter keeping the BLAST hits which pass the thresholds and are not excluded, which is the filter the
+        results are parsed with. It is applied as BLAST results are read, so that only the kept hits are held in memory.
+        :param blast_database: The staramr.blast.AbstractBlastDatabase.
+        :param genome_query: Whether or not the input file is the query, so that the AMR genes are the subject.
+        :return: A function taking a pd.DataFrame of BLAST results and returning the hits to keep (None if thresholds
+                are not set, so that every hit is kept).
+        """
+        if self._pid_threshold is None:
+            return None
+
+        pid_threshold = self._pid_threshold
+        plength_threshold = self._plength_thresholds[blast_database.get_name()]
+        genes_to_exclude = self._genes_to_exclude
+
+        def hit_filter(blast_table):
+            if genome_query:
+                amr_gene_table = pd.DataFrame({'qseqid': blast_table['sseqid'], 'pident': blast_table['pident'],
+                                               'length': blast_table['length'], 'qlen': blast_table['slen']})
+            else:
+                amr_gene_table = blast_table
+            return blast_table[
+                self.passes_thresholds(amr_gene_table, pid_threshold, plength_threshold, genes_to_exclude)]
+
+        return hit_filter
+
+    def _launch_blast(self, query, db, output, blast_threads=1, threshold_options=None, blast_columns=None,
+                      hit_filter=None):
+        """
+        Runs BLAST with the AMR genes as the query.
+        :param query: The AMR genes query file.
+        :param db: The BLAST database for the input file.
+        :param output: The file to write BLAST results to, or None to parse the results directly from BLAST.
+        :param blast_threads: The number of threads for BLAST.
+        :param threshold_options: The BLAST options leaving out hits which cannot pass the thresholds.
+        :param blast_columns: The columns for BLAST to report (None for BLAST_COLUMNS).
+        :param hit_filter: A function taking a pd.DataFrame of BLAST results and returning the hits to keep, applied as
+                the results are read when output is None (None to keep all hits).
+        :return: A pd.DataFrame of the BLAST results if output is None, otherwise None.
+        """
+        threshold_options = dict(threshold_options) if threshold_options is not None else {}
+        if path.basename(db) in self._packed_genomes:
+            threshold_options['dbsize'] = self._get_search_genome_length(db)
+
+        blast_out_format = self._get_blast_out_format(blast_columns)
+        if output is None:
+            blastn_command = NcbiblastnCommandline(query=query, db=db, evalue=self.BLAST_EVALUE,
+                                                   outfmt=blast_out_format, num_threads=blast_threads,
+                                                   **threshold_options)
+            return self._run_blast_command(blastn_command, hit_filter, blast_columns=blast_columns)
+
+        blastn_command = NcbiblastnCommandline(query=query, db=db, evalue=self.BLAST_EVALUE, outfmt=blast_out_format,
+                                               out=output, num_threads=blast_threads, **threshold_options)
         logger.debug(blastn_command)
         stdout, stderr = blastn_command()
         if stderr:
             raise Exception("error with [" + str(blastn_command) + "], stderr=" + stderr)
 
+    def _launch_blast_prebuilt(self, genome_file, db, output, blast_threads=1, threshold_options=None,
+                               blast_columns=None, hit_filter=None):
+        """
+        Runs BLAST with the input file as the query against a prebuilt AMR gene database. The number of alleles
+        reported, the search space and masking are set to report the hits of a search with the AMR genes as the query
+        against a database of the input file. A single search space is used for all alleles, so hits are also filtered
+        by their e-value for the length of their allele. Since -qcov_hsp_perc would filter on coverage of the input
+        file, it is left out of the threshold options, and coverage of the AMR genes is instead left to hit_filter.
+        :param genome_file: The input file.
+        :param db: The prebuilt BLAST database.
+        :param output: The file to write BLAST results to, or None to only return the results.
+        :param blast_threads: The number of threads for BLAST.
+        :param threshold_options: The BLAST options leaving out hits which cannot pass the thresholds.
+        :param blast_columns: The columns for BLAST to report (None for BLAST_COLUMNS).
+        :param hit_filter: A function taking a pd.DataFrame of BLAST results with the input file as the query and
+                returning the hits to keep, applied as the results are read (None to keep all hits).
+        :return: A pd.DataFrame of the BLAST results if output is None, otherwise None.
+        """
+        threshold_options = dict(threshold_options) if threshold_options is not None else {}
+        threshold_options.pop('qcov_hsp_perc', None)
+
+        blast_columns = blast_columns if blast_columns is not None else self.BLAST_COLUMNS
+        search_columns = blast_columns + [self.EVALUE_COLUMN] if self.EVALUE_COLUMN not in blast_columns else \
+            blast_columns
+        shortest_allele_length = self._get_shortest_allele_length(db)
+
+        def allele_evalue_filter(blast_table):
+            # With the input file as the query, slen is the length of the allele
+            evalues = blast_table[self.EVALUE_COLUMN] * (blast_table['slen'] / shortest_allele_length)
+            blast_table = blast_table.assign(**{self.EVALUE_COLUMN: evalues})[evalues <= self.BLAST_EVALUE]
+            return hit_filter(blast_table) if hit_filter is not None else blast_table
+
+        blast_out_format = self._get_blast_out_format(search_columns)
+        blastn_command = NcbiblastnCommandline(query=genome_file, db=db, evalue=self.BLAST_EVALUE,
+                                               outfmt=blast_out_format, num_threads=blast_threads,
+                                               **self._get_genome_query_options(genome_file, db),
+                                               **threshold_options)
+        blast_table = self.reorient_genome_query_table(self._run_blast_command(blastn_command, allele_evalue_filter,
+                                                                               blast_columns=search_columns))
+        if self.EVALUE_COLUMN not in blast_columns:
+            blast_table = blast_table.drop(columns=self.EVALUE_COLUMN)
+
+        if output is None:
+            return blast_table
+        else:
+            blast_table.to_csv(output, sep='\t', header=False, index=False)
+
+    def _is_clustered(self, blast_database):
+        return self._resfinder_allele_clusters is not None and self._prebuilt_databases and \
+               blast_database.get_name() == 'resfinder'
+
+    def _launch_blast_clustered(self, genome_file, database_name, output, blast_threads=1, threshold_options=None,
+                                blast_columns=None, hit_filter=None):
+        """
+        Runs BLAST in two stages: first with the input file as the query against the prebuilt database of the cluster
+        representatives, then with the other alleles of the clusters which had hits as the query against a temporary
+        database of the regions of the input file around those hits. The second stage uses the length of the input
+        file as the database size, so e-values are the ones of a search against a database of the whole input file.
+        :param genome_file: The input file.
+        :param database_name: The name of the prebuilt database.
+        :param output: The file to write BLAST results to, or None to only return the results.
+        :param blast_threads: The number of threads for BLAST.
+        :param threshold_options: The BLAST options leaving out hits which cannot pass the thresholds. These are only
+                applied to the second stage, since a representative may miss the thresholds where other alleles in its
+                cluster pass them.
+        :param blast_columns: The columns for BLAST to report (None for BLAST_COLUMNS).
+        :param hit_filter: A function taking a pd.DataFrame of BLAST results and returning the hits to keep. This is
+                applied once the clusters with hits are found (None to keep all hits).
+        :return: A pd.DataFrame of the BLAST results if output is None, otherwise None.
+        """
+        threshold_options = threshold_options if threshold_options is not None else {}
+        blast_table = self._launch_blast_prebuilt(genome_file, self._resfinder_allele_clusters.get_representatives_path(
+            database_name), None, blast_threads, blast_columns=blast_columns)
+
+        members = self._resfinder_allele_clusters.get_members(database_name, set(blast_table['qseqid']))
+        if hit_filter is not None:
+            blast_table = hit_filter(blast_table)
+        if members:
+            logger.debug("Searching %s alleles in clusters with hits in [%s] against [%s]", len(members),
+                         database_name, genome_file)
+            flank = 2 * max(len(record.seq) for record in members)
+            regions = self.get_hit_regions(blast_table, flank)
+
+            with tempfile.TemporaryDirectory(dir=self._output_directory) as regions_dir:
+                members_file = path.join(regions_dir, 'members.fasta')
+                Bio.SeqIO.write(members, members_file, 'fasta')
+                regions_file = path.join(regions_dir, 'regions.fasta')
+                region_contigs = self._write_regions(genome_file, regions, regions_file)
+                self._make_blast_db(regions_file)
+
+                blast_out_format = self._get_blast_out_format(blast_columns)
+                blastn_command = NcbiblastnCommandline(query=members_file, db=regions_file, evalue=self.BLAST_EVALUE,
+                                                       outfmt=blast_out_format, num_threads=blast_threads,
+                                                       dbsize=self._get_search_genome_length(genome_file),
+                                                       **threshold_options)
+                members_table = self.remap_region_table(
+                    self._run_blast_command(blastn_command, hit_filter, blast_columns=blast_columns), region_contigs)
+
+            blast_table = pd.concat([blast_table, members_table], ignore_index=True)
+
+        if output is None:
+            return blast_table
+        else:
+            blast_table.to_csv(output, sep='\t', header=False, index=False)
+
+    @classmethod
+    def get_hit_regions(cls, blast_table, flank):
+        """
+        Gets the (merged) regions of the contigs around BLAST hits.
+        :param blast_table: A pd.DataFrame of BLAST results with the AMR genes as the query.
+        :param flank: The number of bases on either side of each hit to include in its region.
+        :return: A map of {'contig_id': [(start, end), ...]}, with 1-based, inclusive coordinates of the regions.
+        """
+        regions = OrderedDict()
+        hits = sorted(zip(blast_table['sseqid'], blast_table[['sstart', 'send']].min(axis=1),
+                          blast_table[['sstart', 'send']].max(axis=1)))
+        for contig, start, end in hits:
+            start, end = max(1, start - flank), end + flank
+            contig_regions = regions.setdefault(contig, [])
+            if contig_regions and start <= contig_regions[-1][1] + 1:
+                contig_regions[-1] = (contig_regions[-1][0], max(end, contig_regions[-1][1]))
+            else:
+                contig_regions.append((start, end))
+        return regions
+
+    def _write_regions(self, genome_file, regions, regions_file):
+        """
+        Writes the regions of the contigs of an input file to a fasta file.
+        :param genome_file: The input file.
+        :param regions: A map of {'contig_id': [(start, end), ...]} of the regions, from get_hit_regions().
+        :param regions_file: The fasta file to write the regions to.
+        :return: A map of {'region_id': (contig_id, offset, contig_length)} to convert region coordinates to contig
+                coordinates.
+        """
+        region_contigs = OrderedDict()
+        with open(regions_file, 'w') as regions_handle:
+            for record in Bio.SeqIO.parse(genome_file, 'fasta'):
+                for start, end in regions.get(record.id, []):
+                    region_id = 'region' + str(len(region_contigs))
+                    region_contigs[region_id] = (record.id, start - 1, len(record.seq))
+                    regions_handle.write('>' + region_id + '\n' + str(record.seq[start - 1:end]) + '\n')
+        return region_contigs
+
+    @classmethod
+    def remap_region_table(cls, blast_table, region_contigs):
+        """
+        Converts BLAST results against regions of contigs into BLAST results against the whole contigs.
+        :param blast_table: A pd.DataFrame of BLAST results with regions of contigs as the subject.
+        :param region_contigs: A map of {'region_id': (contig_id, offset, contig_length)}.
+        :return: A pd.DataFrame of the BLAST results against the contigs.
+        """
+        contig_ids = [region_contigs[region_id][0] for region_id in blast_table['sseqid']]
+        offsets = np.array([region_contigs[region_id][1] for region_id in blast_table['sseqid']], dtype=np.int64)
+        contig_lengths = np.array([region_contigs[region_id][2] for region_id in blast_table['sseqid']],
+                                  dtype=np.int64)
+
+        columns = cls.BLAST_COLUMNS + cls._get_extra_columns(blast_table.columns)
+        return blast_table.assign(sseqid=pd.Series(contig_ids, index=blast_table.index, dtype=object),
+                                  sstart=blast_table['sstart'] + offsets, send=blast_table['send'] + offsets,
+                                  slen=contig_lengths)[columns]
+
+    def _run_blast_command(self, blastn_command, hit_filter=None, blast_columns=None):
+        """
+        Runs BLAST, parsing the tabular results as they are written to stdout instead of writing them to a file.
+        :param blastn_command: The Bio.Blast.Applications.NcbiblastnCommandline to run.
+        :param hit_filter: A function taking a pd.DataFrame of BLAST results and returning the pd.DataFrame of the hits
+                to keep (None to keep all hits).
+        :param blast_columns: The columns BLAST reports (None for BLAST_COLUMNS).
+        :return: A pd.DataFrame of the BLAST results.
+        """
+        logger.debug(blastn_command)
+        with tempfile.TemporaryFile(mode='w+') as stderr_handle:
+            process = subprocess.Popen(str(blastn_command), shell=True, stdout=subprocess.PIPE, stderr=stderr_handle,
+                                       universal_newlines=True)
+            try:
+                blast_table = self.read_blast_table(process.stdout, hit_filter=hit_filter,
+                                                    extra_columns=self._get_extra_columns(blast_columns))
+            finally:
+                process.stdout.close()
+                process.wait()
+
+            stderr_handle.seek(0)
+            stderr = stderr_handle.read()
+
+        if process.returncode != 0 or stderr:
+            raise Exception("error with [" + str(blastn_command) + "], stderr=" + stderr)
+
+        return blast_table
+
+    @classmethod
+    def read_blast_table(cls, blast_results, hit_filter=None, chunk_size=None, extra_columns=None):
+        """
+        Reads tabular BLAST results. The results are read in chunks of compact types, so that only the hits kept by
+        hit_filter are held in memory along with a single chunk of the results.
+        :param blast_results: A file name or file handle containing the BLAST results, with either all of BLAST_COLUMNS
+                or all but the trailing BLAST_SEQUENCE_COLUMNS, followed by extra_columns.
+        :param hit_filter: A function taking a pd.DataFrame of BLAST results and returning the pd.DataFrame of the hits
+                to keep (None to keep all hits).
+        :param chunk_size: The number of hits to read at a time (None for BLAST_READ_CHUNK_SIZE).
+        :param extra_columns: The columns reported after the BLAST_COLUMNS, e.g., EVALUE_COLUMN (None for no columns).
+        :return: A pd.DataFrame of the BLAST results, with empty sequences where they were not reported.
+        """
+        extra_columns = extra_columns if extra_columns is not None else []
+        # The positions of extra columns depend on whether the sequences were reported, so only the columns before the
+        # sequences are typed as they are read, and the rest once the columns of each chunk are known
+        if extra_columns:
+            typed_columns = [column for column in cls.BLAST_COLUMNS if column not in cls.BLAST_SEQUENCE_COLUMNS]
+        else:
+            typed_columns = cls.BLAST_COLUMNS
+        dtype = {index: cls.BLAST_COLUMN_DTYPES[column] for index, column in enumerate(typed_columns)}
+        try:
+            chunks = pd.read_csv(blast_results, sep='\t', header=None, index_col=False, dtype=dtype,
+                                 chunksize=chunk_size if chunk_size is not None else cls.BLAST_READ_CHUNK_SIZE)
+        except pd.errors.EmptyDataError:
+            chunks = []
+
+        blast_tables = []
+        for chunk in chunks:
+            blast_columns = cls.BLAST_COLUMNS[:len(chunk.columns) - len(extra_columns)]
+            chunk.columns = blast_columns + extra_columns
+            if extra_columns:
+                chunk = chunk.astype(dtype={column: cls.BLAST_COLUMN_DTYPES[column] for column in
+                                            blast_columns[len(typed_columns):] + extra_columns})
+            if hit_filter is not None:
+                chunk = hit_filter(chunk)
+            blast_tables.append(chunk)
+
+        if blast_tables:
+            blast_table = pd.concat(blast_tables, ignore_index=True)
+        else:
+            blast_table = cls._empty_blast_table(extra_columns)
+            if hit_filter is not None:
+                blast_table = hit_filter(blast_table)
+
+        blast_table = blast_table.reindex(columns=cls.BLAST_COLUMNS + [column for column in blast_table.columns if
+                                                                       column not in cls.BLAST_COLUMNS],
+                                          fill_value='')
+        return blast_table.astype(dtype={column: np.unicode_ for column in cls.BLAST_STRING_COLUMNS})
+
+    @classmethod
+    def _empty_blast_table(cls, extra_columns=None):
+        columns = cls.BLAST_COLUMNS + (extra_columns if extra_columns is not None else [])
+        return pd.DataFrame({column: pd.Series(dtype=cls.BLAST_COLUMN_DTYPES[column]) for column in columns},
+                            columns=columns)
+
+    @classmethod
+    def reorient_genome_query_table(cls, blast_table):
+        """
+        Converts BLAST results where the input genome was the query and the AMR genes were the database into results
+        as if the AMR genes were the query and the input genome was the database. That is, 'q*' columns describe the
+        AMR gene (always on the plus strand) and 's*' columns describe the genome contig.
+        :param blast_table: A pd.DataFrame of BLAST results with the input genome as the query. Columns after the
+                BLAST_COLUMNS (e.g., EVALUE_COLUMN) are kept as-is.
+        :return: A pd.DataFrame of BLAST results with the AMR genes as the query.
+        """
+        minus = blast_table['sstart'] > blast_table['send']
+        extra_columns = cls._get_extra_columns(blast_table.columns)
+
+        genome_start = blast_table['qstart'].where(~minus, blast_table['qend'])
+        genome_end = blast_table['qend'].where(~minus, blast_table['qstart'])
+
+        return pd.DataFrame(OrderedDict([
+            ('qseqid', blast_table['sseqid']),
+            ('sseqid', blast_table['qseqid']),
+            ('pident', blast_table['pident']),
+            ('length', blast_table['length']),
+            ('qstart', blast_table[['sstart', 'send']].min(axis=1)),
+            ('qend', blast_table[['sstart', 'send']].max(axis=1)),
+            ('sstart', genome_start),
+            ('send', genome_end),
+            ('slen', blast_table['qlen']),
+            ('qlen', blast_table['slen']),
+            ('sstrand', pd.Series(np.where(minus, 'minus', 'plus'), index=blast_table.index)),
+            ('sseq', pd.Series([reverse_complement(seq) if is_minus else seq for seq, is_minus in
+                                zip(blast_table['qseq'], minus)], index=blast_table.index, dtype=object)),
+            ('qseq', pd.Series([reverse_complement(seq) if is_minus else seq for seq, is_minus in
+                                zip(blast_table['sseq'], minus)], index=blast_table.index, dtype=object)),
+        ] + [(column, blast_table[column]) for column in extra_columns]), columns=cls.BLAST_COLUMNS + extra_columns)
+
     def _make_blast_db(self, path):
         command = ['makeblastdb', '-in', path, '-dbtype', 'nucl', '-parse_seqids']
         logger.debug(' '.join(command))
-        subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        try:
+            subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        except subprocess.CalledProcessError as e:
+            raise BlastProcessError("Error running makeblastdb", e)
@@ -0,0 +1,121 @@
+import configparser
+import io
+import logging
+import zipfile
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from staramr.blast.BlastHandler import BlastHandler
+
+logger = logging.getLogger('BlastHitsArchive')
+
+"""
+A Class for storing the raw (unfiltered) BLAST hits from a search, so that results can be re-analyzed with different
+thresholds or reporting options without re-running BLAST.
+"""
+
+
+class BlastHitsArchive:
+    SETTINGS_FILE = 'settings.ini'
+    SETTINGS_SECTION = 'BlastHitsArchive'
+    FILES_FILE = 'files.txt'
+    HITS_FILE = 'hits.tsv'
+    HITS_COLUMNS = ['file', 'blast_database', 'database_name'] + BlastHandler.BLAST_COLUMNS
+
+    def __init__(self, archive_file: str) -> None:
+        """
+        Creates a new BlastHitsArchive.
+        :param archive_file: The archive file.
+        """
+        self._archive_file = archive_file
+        self._settings = None
+        self._files = None
+        self._hits = None
+
+    def write(self, files: List[str], blast_maps: Dict[str, Dict], settings: Dict[str, str]) -> None:
+        """
+        Writes the BLAST hits to the archive file.
+        :param files: The names of the input files which were searched.
+        :param blast_maps: A map of {'blast_database' => blast_map}, where blast_map is of the form
+                { 'input_file_name' => { 'database_name' => blast results file or pd.DataFrame } }.
+        :param settings: Settings to store with the BLAST hits (e.g., the database commits).
+        :return: None
+        """
+        config = configparser.ConfigParser()
+        config[self.SETTINGS_SECTION] = settings
+
+        number_hits = 0
+        with zipfile.ZipFile(self._archive_file, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            with io.StringIO() as settings_handle:
+                config.write(settings_handle)
+                archive.writestr(self.SETTINGS_FILE, settings_handle.getvalue())
+
+            archive.writestr(self.FILES_FILE, ''.join(file + '\n' for file in files))
+
+            with io.TextIOWrapper(archive.open(self.HITS_FILE, 'w'), encoding='utf-8') as hits_handle:
+                hits_handle.write('\t'.join(self.HITS_COLUMNS) + '\n')
+                for blast_database, blast_map in blast_maps.items():
+                    for file, databases in blast_map.items():
+                        for database_name, blast_out in sorted(databases.items()):
+                            if isinstance(blast_out, pd.DataFrame):
+                                blast_table = blast_out
+                            else:
+                                blast_table = BlastHandler.read_blast_table(blast_out)
+
+                            blast_table = blast_table[BlastHandler.BLAST_COLUMNS].copy()
+                            blast_table.insert(0, 'database_name', database_name)
+                            blast_table.insert(0, 'blast_database', blast_database)
+                            blast_table.insert(0, 'file', file)
+                            blast_table.to_csv(hits_handle, sep='\t', header=False, index=False)
+                            number_hits += len(blast_table)
+
+        logger.info("Wrote %s BLAST hits to [%s]", number_hits, self._archive_file)
+
+    def _read(self):
+        if self._hits is None:
+            with zipfile.ZipFile(self._archive_file, 'r') as archive:
+                config = configparser.ConfigParser()
+                config.read_string(archive.read(self.SETTINGS_FILE).decode('utf-8'))
+                self._settings = OrderedDict(config[self.SETTINGS_SECTION])
+
+                self._files = archive.read(self.FILES_FILE).decode('utf-8').splitlines()
+
+                with archive.open(self.HITS_FILE) as hits_handle:
+                    self._hits = pd.read_csv(hits_handle, sep='\t', index_col=False).astype(
+                        dtype={'file': np.unicode_, 'database_name': np.unicode_, 'qseqid': np.unicode_,
+                               'sseqid': np.unicode_})
+
+    def get_settings(self) -> Dict[str, str]:
+        """
+        Gets the settings stored with the BLAST hits.
+        :return: The settings as an OrderedDict of key/value pairs.
+        """
+        self._read()
+        return self._settings
+
+    def get_files(self) -> List[str]:
+        """
+        Gets the names of the input files which were searched.
+        :return: The names of the input files.
+        """
+        self._read()
+        return self._files
+
+    def get_blast_map(self, blast_database: str) -> Dict[str, Dict[str, pd.DataFrame]]:
+        """
+        Gets the BLAST hits for a particular database, in the same form as staramr.blast.BlastHandler.
+        :param blast_database: The name of the database ('resfinder' or 'pointfinder').
+        :return: A map of the form { 'input_file_name' => { 'database_name' => pd.DataFrame } }.
+        """
+        self._read()
+        blast_map = OrderedDict((file, {}) for file in self._files)
+
+        hits = self._hits[self._hits['blast_database'] == blast_database]
+        for (file, database_name), blast_table in hits.groupby(['file', 'database_name'], sort=False):
+            blast_map.setdefault(file, {})[database_name] = blast_table[BlastHandler.BLAST_COLUMNS].reset_index(
+                drop=True)
+
+        return blast_map
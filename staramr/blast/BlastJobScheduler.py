@@ -0,0 +1,114 @@
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future, wait
+
+logger = logging.getLogger('BlastJobScheduler')
+
+"""
+Class for running BLAST-related jobs on a fixed number of threads, in order of priority and respecting dependencies
+between jobs.
+"""
+
+
+class BlastJobScheduler:
+
+    def __init__(self, threads: int) -> None:
+        """
+        Creates a new BlastJobScheduler and starts its worker threads.
+        :param threads: The number of worker threads.
+        """
+        if threads < 1:
+            raise Exception("threads=" + str(threads) + " must be at least 1")
+
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._futures = []
+        self._futures_lock = threading.Lock()
+
+        self._workers = [threading.Thread(target=self._work, daemon=True) for i in range(threads)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, priority, fn, *args, **kwargs) -> Future:
+        """
+        Submits a job to run as soon as a worker thread is free. Jobs with a lower priority value run first, and jobs
+        with the same priority run in the order they were submitted.
+        :param priority: The priority of the job (any value that can be compared, such as a tuple).
+        :param fn: The function to run.
+        :param args: The arguments to the function.
+        :param kwargs: The keyword arguments to the function.
+        :return: A concurrent.futures.Future for the result of the job.
+        """
+        future = self._create_future()
+        self._enqueue(priority, fn, args, kwargs, future)
+        return future
+
+    def submit_after(self, dependency: Future, priority, fn, *args, **kwargs) -> Future:
+        """
+        Submits a job to run once another job has completed. If the other job fails, this job fails with the same
+        exception without being run.
+        :param dependency: The future for the job to wait on.
+        :param priority: The priority of the job (any value that can be compared, such as a tuple).
+        :param fn: The function to run.
+        :param args: The arguments to the function.
+        :param kwargs: The keyword arguments to the function.
+        :return: A concurrent.futures.Future for the result of the job.
+        """
+        future = self._create_future()
+
+        def enqueue_when_done(completed_dependency):
+            if completed_dependency.exception() is not None:
+                future.set_exception(completed_dependency.exception())
+            else:
+                self._enqueue(priority, fn, args, kwargs, future)
+
+        dependency.add_done_callback(enqueue_when_done)
+        return future
+
+    def shutdown(self, wait_for_jobs: bool = True) -> None:
+        """
+        Stops the worker threads.
+        :param wait_for_jobs: If True, waits for all submitted jobs to finish first. Otherwise, jobs which have not
+                started are cancelled.
+        :return: None
+        """
+        with self._futures_lock:
+            futures = list(self._futures)
+
+        if wait_for_jobs:
+            wait(futures)
+        else:
+            for future in futures:
+                future.cancel()
+
+        for worker in self._workers:
+            self._queue.put((float('inf'), next(self._counter), None, None, None, None))
+        for worker in self._workers:
+            worker.join()
+
+    def _create_future(self):
+        future: Future = Future()
+        with self._futures_lock:
+            self._futures.append(future)
+        return future
+
+    def _enqueue(self, priority, fn, args, kwargs, future):
+        self._queue.put((priority, next(self._counter), fn, args, kwargs, future))
+
+    def _work(self):
+        while True:
+            priority, order, fn, args, kwargs, future = self._queue.get()
+            if fn is None:
+                break
+            elif not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                logger.debug("Job %s failed: %s", fn, e)
+                future.set_exception(e)
+            else:
+                future.set_result(result)
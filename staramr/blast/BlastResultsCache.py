@@ -0,0 +1,191 @@
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from os import path
+from typing import Dict, List
+
+import pandas as pd
+
+logger = logging.getLogger('BlastResultsCache')
+
+"""
+A Class for storing BLAST results on disk so that they can be re-used the next time the same genome is searched
+against the same database.
+"""
+
+
+class BlastResultsCache:
+    CACHE_SUFFIX = '.blast.tsv.gz'
+
+    def __init__(self, cache_dir: str) -> None:
+        """
+        Creates a new BlastResultsCache.
+        :param cache_dir: The directory storing the cached BLAST results.
+        """
+        self._cache_dir = cache_dir
+
+    def get_key(self, components: List[str]) -> str:
+        """
+        Gets the key for a set of BLAST results.
+        :param components: A list of strings identifying the BLAST results (e.g., the hash of the input genome, the
+                database name and commit and the BLAST parameters).
+        :return: The key for the BLAST results.
+        """
+        return hashlib.sha256('\0'.join(components).encode('utf-8')).hexdigest()
+
+    def _get_cache_file(self, key):
+        return path.join(self._cache_dir, key[0:2], key + self.CACHE_SUFFIX)
+
+    def contains(self, key: str) -> bool:
+        """
+        Whether or not BLAST results are cached for the passed key.
+        :param key: The key for the BLAST results.
+        :return: True if the BLAST results are cached, False otherwise.
+        """
+        return path.exists(self._get_cache_file(key))
+
+    def get(self, key: str) -> str:
+        """
+        Gets the cached BLAST results for the passed key, marking them as recently used.
+        :param key: The key for the BLAST results.
+        :return: The (gzip-compressed) file of tabular BLAST results, or None if the results are not cached.
+        """
+        cache_file = self._get_cache_file(key)
+        try:
+            os.utime(cache_file)
+        except FileNotFoundError:
+            return None
+
+        return cache_file
+
+    def put(self, key: str, blast_table: pd.DataFrame) -> None:
+        """
+        Stores a table of BLAST results in the cache.
+        :param key: The key for the BLAST results.
+        :param blast_table: The pd.DataFrame of BLAST results.
+        :return: None
+        """
+        with self._open_cache_file(key) as cache_handle:
+            blast_table.to_csv(cache_handle, sep='\t', header=False, index=False)
+
+    def put_file(self, key: str, blast_file: str) -> None:
+        """
+        Stores a file of tabular BLAST results in the cache.
+        :param key: The key for the BLAST results.
+        :param blast_file: The file of tabular BLAST results.
+        :return: None
+        """
+        with open(blast_file, 'r') as blast_handle, self._open_cache_file(key) as cache_handle:
+            shutil.copyfileobj(blast_handle, cache_handle)
+
+    @contextmanager
+    def _open_cache_file(self, key):
+        # Writes to a temporary file first so that partially written results are never read from the cache
+        cache_file = self._get_cache_file(key)
+        cache_file_dir = path.dirname(cache_file)
+        os.makedirs(cache_file_dir, exist_ok=True)
+        tmp_fd, tmp_file = tempfile.mkstemp(dir=cache_file_dir, suffix='.tmp')
+        os.close(tmp_fd)
+
+        try:
+            with gzip.open(tmp_file, 'wt') as cache_handle:
+                yield cache_handle
+            os.replace(tmp_file, cache_file)
+        finally:
+            if path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def _get_cache_files(self):
+        cache_files = []
+        if path.exists(self._cache_dir):
+            for root, dirs, files in os.walk(self._cache_dir):
+                for file in files:
+                    if file.endswith(self.CACHE_SUFFIX):
+                        cache_file = path.join(root, file)
+                        try:
+                            stat = os.stat(cache_file)
+                        except FileNotFoundError:
+                            continue
+                        cache_files.append((stat.st_mtime, stat.st_size, cache_file))
+        return cache_files
+
+    def info(self) -> Dict[str, str]:
+        """
+        Gets information on the cached BLAST results.
+        :return: Cache information as an OrderedDict of key/value pairs.
+        """
+        cache_files = self._get_cache_files()
+
+        data = OrderedDict()
+        data['cache_dir'] = self._cache_dir
+        data['cache_entries'] = str(len(cache_files))
+        data['cache_size_mb'] = "%0.2f" % (sum(size for mtime, size, file in cache_files) / (1024 * 1024))
+        return data
+
+    def prune(self, max_size: int) -> int:
+        """
+        Removes the least recently used BLAST results until the cache is no larger than the passed size.
+        :param max_size: The maximum size of the cache, in bytes.
+        :return: The number of BLAST results removed.
+        """
+        cache_files = sorted(self._get_cache_files())
+        total_size = sum(size for mtime, size, file in cache_files)
+
+        removed = 0
+        for mtime, size, cache_file in cache_files:
+            if total_size <= max_size:
+                break
+
+            logger.debug("Removing cached BLAST results [%s]", cache_file)
+            try:
+                os.remove(cache_file)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            removed += 1
+
+        logger.debug("Removed %s cached BLAST results from [%s]", removed, self._cache_dir)
+        return removed
+
+    def clear(self) -> None:
+        """
+        Removes all cached BLAST results.
+        :return: None
+        """
+        if path.exists(self._cache_dir):
+            shutil.rmtree(self._cache_dir)
+
+    def get_cache_dir(self) -> str:
+        """
+        Gets the directory storing the cached BLAST results.
+        :return: The directory storing the cached BLAST results.
+        """
+        return self._cache_dir
+
+    @classmethod
+    def hash_file(cls, file: str) -> str:
+        """
+        A Class Method to get a hash of the contents of a file.
+        :param file: The file.
+        :return: The hash of the contents of the file.
+        """
+        file_hash = hashlib.sha256()
+        with open(file, 'rb') as file_handle:
+            for block in iter(lambda: file_handle.read(1024 * 1024), b''):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    @classmethod
+    def get_default_cache_directory(cls) -> str:
+        """
+        A Class Method to get the default directory for cached BLAST results.
+        :return: The default directory for cached BLAST results.
+        """
+        cache_home = os.environ.get('XDG_CACHE_HOME', path.join(path.expanduser('~'), '.cache'))
+        return path.join(cache_home, 'staramr', 'blast')
+
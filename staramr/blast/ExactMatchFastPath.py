@@ -0,0 +1,285 @@
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+
+import Bio.SeqIO
+import numpy as np
+import pandas as pd
+from Bio.Seq import reverse_complement
+
+from staramr.blast.KmerIndex import KmerIndex
+from staramr.blast.resfinder.ResfinderBlastDatabase import ResfinderBlastDatabase
+
+logger = logging.getLogger('ExactMatchFastPath')
+
+"""
+A Class for finding exact, full-length matches of the ResFinder alleles in a genome, which are used in place of BLAST
+results when the k-mer index shows that BLAST could not find any other hits which would change the results.
+"""
+
+
+class ExactMatchFastPath:
+    # A longer allele is reported instead of the best (exact) hit when it is more than this many bases longer and has a
+    # percent identity and percent length overlap above these thresholds (see BlastResultsParser)
+    LONGER_ALLELE_LENGTH = 10
+    LONGER_ALLELE_THRESHOLD = 99.0
+    NUCLEOTIDES = set('ACGT')
+
+    def __init__(self, resfinder_database: ResfinderBlastDatabase, kmer_index: KmerIndex, pid_threshold: float,
+                 plength_threshold: float, genes_to_exclude: List[str] = []) -> None:
+        """
+        Creates a new ExactMatchFastPath.
+        :param resfinder_database: The staramr.blast.resfinder.ResfinderBlastDatabase.
+        :param kmer_index: The KmerIndex of the prebuilt ResFinder databases.
+        :param pid_threshold: The percent identity threshold.
+        :param plength_threshold: The percent length overlap threshold for ResFinder.
+        :param genes_to_exclude: A list of gene IDs excluded from the results.
+        """
+        self._kmer_index = kmer_index
+        self._pid_threshold = pid_threshold
+        self._plength_threshold = plength_threshold
+        self._genes_to_exclude = list(genes_to_exclude)
+        self._genome_hits = {}
+
+        self._database_names = [resfinder_database.get_prebuilt_name(name) for name in
+                                sorted(resfinder_database.get_database_names())]
+
+        # Alleles which are in multiple drug classes are only searched for once
+        self._alleles = OrderedDict()
+        combined_sequences = {}
+        for name, database_name in zip(sorted(resfinder_database.get_database_names()), self._database_names):
+            for record in Bio.SeqIO.parse(resfinder_database.get_path(name), 'fasta'):
+                sequence = str(record.seq).upper()
+                combined_sequences.setdefault(record.id, sequence)
+                if record.id in self._genes_to_exclude or len(sequence) < KmerIndex.KMER_SIZE or not set(
+                        sequence) <= self.NUCLEOTIDES:
+                    continue
+                self._alleles.setdefault((record.id, sequence), []).append(database_name)
+
+        # The combined query file only has the first copy of alleles with the same id
+        self._combined_alleles = {(allele_id, sequence) for allele_id, sequence in self._alleles if
+                                  combined_sequences[allele_id] == sequence}
+
+        self._build_anchors()
+
+    def _build_anchors(self):
+        """
+        Builds a multi-pattern index of the alleles (on both strands), keyed by the first k-mer of each pattern. Each
+        genome position with the k-mer of an anchor is then checked for a full match to the patterns with that anchor.
+        :return: None
+        """
+        anchors = []
+        self._patterns = []
+        for allele_index, (allele_id, sequence) in enumerate(self._alleles):
+            strand_sequences = [('plus', sequence)]
+            if reverse_complement(sequence) != sequence:
+                strand_sequences.append(('minus', reverse_complement(sequence)))
+
+            for strand, strand_sequence in strand_sequences:
+                forward, reverse, ambiguous = KmerIndex.encode_sequence(strand_sequence[0:KmerIndex.KMER_SIZE])
+                anchors.append((forward[0], reverse[0]))
+                self._patterns.append((allele_index, strand, strand_sequence))
+
+        anchors = np.array(anchors, dtype=np.uint32).reshape(-1, 2)
+        self._anchors = anchors[:, 0]
+        self._canonical_anchors = anchors.min(axis=1)
+        self._allele_keys = list(self._alleles)
+
+    def _find_matches(self, sequences, forward_kmers, sorted_kmers, kmer_order, contig_offsets):
+        """
+        Finds the exact matches of the alleles in a genome.
+        :param sequences: The sequences of the contigs.
+        :param forward_kmers: The k-mers at each position of the genome.
+        :param sorted_kmers: The sorted canonical k-mers of the genome, without those containing characters other than
+                A, C, G or T.
+        :param kmer_order: The position in the genome of each of the sorted k-mers.
+        :param contig_offsets: The index of the first k-mer of each contig.
+        :return: A sorted list of (allele index, contig number, position, strand) matches.
+        """
+        first = np.searchsorted(sorted_kmers, self._canonical_anchors, side='left')
+        last = np.searchsorted(sorted_kmers, self._canonical_anchors, side='right')
+
+        matches = []
+        for pattern_index in np.flatnonzero(last > first):
+            allele_index, strand, strand_sequence = self._patterns[pattern_index]
+            positions = kmer_order[first[pattern_index]:last[pattern_index]]
+            positions = positions[forward_kmers[positions] == self._anchors[pattern_index]]
+            contig_numbers = np.searchsorted(contig_offsets, positions, side='right') - 1
+            for contig_number, position in zip(contig_numbers, positions - contig_offsets[contig_numbers]):
+                if sequences[contig_number].startswith(strand_sequence, position):
+                    matches.append((allele_index, int(contig_number), int(position), strand))
+
+        return sorted(matches, key=lambda match: (match[1], match[2], self._allele_keys[match[0]][0]))
+
+    def search(self, genome_file: str) -> None:
+        """
+        Finds the exact matches in a genome and decides which BLAST jobs they can replace.
+        :param genome_file: The genome (fasta) file.
+        :return: None
+        """
+        contigs = []
+        sequences = []
+        forward_kmers = []
+        genome_kmers = []
+        genome_ambiguous = []
+        for record in Bio.SeqIO.parse(genome_file, 'fasta'):
+            sequence = str(record.seq).upper()
+            forward, reverse, ambiguous = KmerIndex.encode_sequence(sequence)
+            contigs.append((record.id, len(sequence), len(forward)))
+            sequences.append(sequence)
+            forward_kmers.append(forward)
+            genome_kmers.append(np.minimum(forward, reverse))
+            genome_ambiguous.append(ambiguous)
+
+        forward_kmers = np.concatenate(forward_kmers) if forward_kmers else np.array([], dtype=np.uint32)
+        genome_kmers = np.concatenate(genome_kmers) if genome_kmers else np.array([], dtype=np.uint32)
+        genome_ambiguous = np.concatenate(genome_ambiguous) if genome_ambiguous else np.array([], dtype=bool)
+        contig_offsets = np.concatenate([[0], np.cumsum([number_kmers for _, _, number_kmers in contigs])]).astype(
+            np.int64)
+
+        # Sorts the k-mers of the genome once, so that each database only needs to look up its own k-mers
+        kmer_order = np.argsort(genome_kmers, kind='stable')
+        kmer_order = kmer_order[~genome_ambiguous[kmer_order]]
+        sorted_kmers = genome_kmers[kmer_order]
+        matches = self._find_matches(sequences, forward_kmers, sorted_kmers, kmer_order, contig_offsets)
+
+        database_hits = OrderedDict()
+        complete = {}
+        for database_name in self._database_names:
+            database_matches = [match for match in matches if
+                                database_name in self._alleles[self._allele_keys[match[0]]]]
+            complete[database_name] = self._is_complete(database_name, database_matches, sorted_kmers, kmer_order,
+                                                        genome_ambiguous, contig_offsets)
+            database_hits[database_name] = self._create_hits_table(database_matches, contigs) if complete[
+                database_name] else None
+
+        if all(complete.values()):
+            combined_matches = [match for match in matches if self._allele_keys[match[0]] in self._combined_alleles]
+            database_hits[ResfinderBlastDatabase.COMBINED_DATABASE_NAME] = self._create_hits_table(combined_matches,
+                                                                                                   contigs)
+        else:
+            database_hits[ResfinderBlastDatabase.COMBINED_DATABASE_NAME] = None
+
+        logger.debug("Found %s exact matches in [%s], replacing BLAST for %s", len(matches), genome_file,
+                     [name for name, hits in database_hits.items() if hits is not None])
+        self._genome_hits[genome_file] = database_hits
+
+    def _is_complete(self, database_name, matches, sorted_kmers, kmer_order, genome_ambiguous, contig_offsets):
+        """
+        Whether or not the exact matches give the same results as BLAST for a database (drug class). This is the case
+        when, according to the k-mer index:
+            1. No allele can have a BLAST hit passing the thresholds outside of the exact matches.
+            2. No allele which is more than LONGER_ALLELE_LENGTH bases longer than the exact matches in a region can have
+               a BLAST hit there with a percent identity and overlap above LONGER_ALLELE_THRESHOLD, which would be
+               reported instead.
+            3. Exact matches are too far apart for a single BLAST hit (or chain of overlapping hits) to join them into
+               one region.
+        Any other BLAST hits then overlap an exact match, and are grouped with it into the same region.
+        :param database_name: The name of the database.
+        :param matches: The exact matches to alleles in the database.
+        :param sorted_kmers: The sorted canonical k-mers of the genome, without those containing characters other than
+                A, C, G or T.
+        :param kmer_order: The position in the genome of each of the sorted k-mers.
+        :param genome_ambiguous: Whether or not each k-mer of the genome contains characters other than A, C, G or T.
+        :param contig_offsets: The index of the first k-mer of each contig.
+        :return: True if the exact matches can be used in place of BLAST results, False otherwise.
+        """
+        allele_ids, allele_lengths = self._kmer_index.get_alleles(database_name)
+        included = ~np.isin(allele_ids, self._genes_to_exclude)
+        if not included.any():
+            return True
+
+        # Groups overlapping exact matches into regions of (contig, start, end, longest allele length)
+        regions = []
+        for contig_number, position, length in sorted(
+                (contig_number, position, len(self._allele_keys[allele_index][1])) for
+                allele_index, contig_number, position, strand in matches):
+            if regions and regions[-1][0] == contig_number and position < regions[-1][2]:
+                contig, start, end, longest = regions[-1]
+                regions[-1] = (contig, start, max(end, position + length), max(longest, length))
+            else:
+                regions.append((contig_number, position, position + length, length))
+
+        min_shared_kmers = KmerIndex.get_min_shared_kmers(allele_lengths, self._pid_threshold,
+                                                          self._plength_threshold)
+        if regions:
+            masked = self._get_masked_kmers(regions, genome_ambiguous, contig_offsets)
+            shared_kmers = self._kmer_index.get_shared_kmers(database_name, sorted_kmers, masked[kmer_order])
+        else:
+            shared_kmers = self._kmer_index.get_shared_kmers(database_name, sorted_kmers)
+
+        if np.any(included & (shared_kmers >= min_shared_kmers)):
+            return False
+        elif not regions:
+            return True
+
+        # A BLAST hit passing the thresholds can span at most qlen * 100 / pid bases of a contig
+        max_hit_span = allele_lengths[included].max() * 100.0 / self._pid_threshold
+        for (contig, start, end, longest), (next_contig, next_start, next_end, next_longest) in zip(regions,
+                                                                                                    regions[1:]):
+            if contig == next_contig and next_start - end < 2 * max_hit_span:
+                return False
+
+        longer_min_shared_kmers = KmerIndex.get_min_shared_kmers(
+            allele_lengths, max(self._pid_threshold, self.LONGER_ALLELE_THRESHOLD),
+            max(self._plength_threshold, self.LONGER_ALLELE_THRESHOLD))
+        for region in regions:
+            longer_alleles = included & (allele_lengths > region[3] + self.LONGER_ALLELE_LENGTH)
+            if longer_alleles.any():
+                # Other regions are too far away to be part of a hit overlapping this region
+                masked = self._get_masked_kmers([other for other in regions if other != region], genome_ambiguous,
+                                                contig_offsets)
+                shared_kmers = self._kmer_index.get_shared_kmers(database_name, sorted_kmers, masked[kmer_order])
+                if np.any(longer_alleles & (shared_kmers >= longer_min_shared_kmers)):
+                    return False
+
+        return True
+
+    def _get_masked_kmers(self, regions, genome_ambiguous, contig_offsets):
+        """
+        Gets the k-mers of a genome which overlap any of the passed regions, or contain characters other than A, C, G or
+        T.
+        :param regions: A list of (contig number, start, end, ...) tuples.
+        :param genome_ambiguous: Whether or not each k-mer of the genome contains characters other than A, C, G or T.
+        :param contig_offsets: The index of the first k-mer of each contig.
+        :return: A boolean array of the masked k-mers.
+        """
+        k = KmerIndex.KMER_SIZE
+        masked = np.zeros(len(genome_ambiguous) + 1, dtype=np.int64)
+        for region in regions:
+            contig_number, start, end = region[0:3]
+            contig_kmers = contig_offsets[contig_number + 1] - contig_offsets[contig_number]
+            masked[contig_offsets[contig_number] + max(0, start - k + 1)] += 1
+            masked[contig_offsets[contig_number] + min(contig_kmers, end)] -= 1
+        return (np.cumsum(masked[:-1]) > 0) | genome_ambiguous
+
+    def _create_hits_table(self, matches, contigs):
+        """
+        Creates a table of the exact matches, as they would be reported by BLAST with the alleles as the query.
+        :param matches: The exact matches.
+        :param contigs: A list of (contig id, contig length, number of k-mers) for the contigs in the genome.
+        :return: A pd.DataFrame of the hits.
+        """
+        rows = []
+        for allele_index, contig_number, position, strand in matches:
+            allele_id, sequence = self._allele_keys[allele_index]
+            contig_id, contig_length, contig_kmers = contigs[contig_number]
+            length = len(sequence)
+            start, end = (position + 1, position + length) if strand == 'plus' else (position + length, position + 1)
+            rows.append([allele_id, contig_id, 100.0, length, 1, length, start, end, contig_length, length, strand,
+                         sequence, sequence])
+
+        return pd.DataFrame(rows, columns=['qseqid', 'sseqid', 'pident', 'length', 'qstart', 'qend', 'sstart', 'send',
+                                           'slen', 'qlen', 'sstrand', 'sseq', 'qseq'])
+
+    def get_hits(self, genome_file: str, database_name: str) -> Optional[pd.DataFrame]:
+        """
+        Gets the exact matches of a genome to use in place of the BLAST results for a database.
+        :param genome_file: The genome (fasta) file.
+        :param database_name: The name of the prebuilt database (drug class, or the combined ResFinder database).
+        :return: A pd.DataFrame of the hits, or None if BLAST is needed for the database.
+        """
+        if genome_file not in self._genome_hits:
+            self.search(genome_file)
+
+        return self._genome_hits[genome_file].get(database_name)
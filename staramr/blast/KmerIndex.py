@@ -0,0 +1,258 @@
+import logging
+import os
+from os import path
+from typing import Dict, Set
+
+import Bio.SeqIO
+import numpy as np
+
+logger = logging.getLogger('KmerIndex')
+
+"""
+A Class for an index of the k-mers in the ResFinder/PointFinder alleles, used to quickly rule out the databases
+(fasta files) which cannot have any BLAST hits passing the thresholds in a genome.
+"""
+
+
+class KmerIndex:
+    KMER_SIZE = 16
+    INDEX_FILE = 'kmer-index.npz'
+
+    # Maps each nucleotide to a 2-bit code, with 4 for anything other than A, C, G or T
+    NUCLEOTIDE_CODES = np.array([{'A': 0, 'C': 1, 'G': 2, 'T': 3}.get(chr(i).upper(), 4) for i in range(256)],
+                                dtype=np.uint8)
+
+    def __init__(self, index_dir: str) -> None:
+        """
+        Creates a new KmerIndex.
+        :param index_dir: The directory storing the index.
+        """
+        self._index_file = path.join(index_dir, self.INDEX_FILE)
+        self._index = None
+        self._database_names = None
+        self._database_kmers = {}
+
+    def build(self, fasta_files: Dict[str, str]) -> None:
+        """
+        Builds the index from the alleles in the passed fasta files.
+        :param fasta_files: A map of {'database_name': 'fasta_file'} defining the databases to index.
+        :return: None
+        """
+        database_names = sorted(fasta_files)
+        kmers = []
+        offsets = [0]
+        allele_ids = []
+        allele_lengths = []
+        allele_ambiguous_kmers = []
+        allele_databases = []
+
+        for database_index, database_name in enumerate(database_names):
+            for record in Bio.SeqIO.parse(fasta_files[database_name], 'fasta'):
+                allele_kmers, number_ambiguous = self.get_sequence_kmers(str(record.seq))
+                kmers.append(allele_kmers)
+                offsets.append(offsets[-1] + len(allele_kmers))
+                allele_ids.append(record.id)
+                allele_lengths.append(len(record.seq))
+                allele_ambiguous_kmers.append(number_ambiguous)
+                allele_databases.append(database_index)
+
+        logger.info("Indexing %s k-mers from %s alleles in %s databases", offsets[-1], len(allele_lengths),
+                    len(database_names))
+
+        os.makedirs(path.dirname(self._index_file), exist_ok=True)
+        np.savez_compressed(self._index_file, kmer_size=np.array([self.KMER_SIZE]),
+                            database_names=np.array(database_names, dtype=np.unicode_),
+                            kmers=np.concatenate(kmers) if kmers else np.array([], dtype=np.uint32),
+                            offsets=np.array(offsets, dtype=np.int64),
+                            allele_ids=np.array(allele_ids, dtype=np.unicode_),
+                            allele_lengths=np.array(allele_lengths, dtype=np.int64),
+                            allele_ambiguous_kmers=np.array(allele_ambiguous_kmers, dtype=np.int64),
+                            allele_databases=np.array(allele_databases, dtype=np.int64))
+        self._index = None
+        self._database_names = None
+        self._database_kmers = {}
+
+    def exists(self) -> bool:
+        """
+        Whether or not the index has been built.
+        :return: True if the index exists, False otherwise.
+        """
+        return path.exists(self._index_file)
+
+    def _load(self):
+        if self._index is None:
+            with np.load(self._index_file) as index:
+                self._index = {key: index[key] for key in index.files}
+            if self._index['kmer_size'][0] != self.KMER_SIZE:
+                raise Exception("k-mer index [" + self._index_file + "] has k-mer size " + str(
+                    self._index['kmer_size'][0]) + ", expected " + str(self.KMER_SIZE))
+            if 'allele_ids' not in self._index:
+                raise Exception("k-mer index [" + self._index_file + "] is out of date. Perhaps try rebuilding with "
+                                                                      "'staramr db update'")
+            self._database_names = set(self._index['database_names'].tolist())
+        return self._index
+
+    def _get_database_alleles(self, database_name):
+        index = self._load()
+        if database_name not in self._database_names:
+            raise Exception("No database [" + database_name + "] in k-mer index [" + self._index_file + "]")
+
+        # Alleles are stored in the order of their databases
+        database_index = index['database_names'].tolist().index(database_name)
+        return (np.searchsorted(index['allele_databases'], database_index, side='left'),
+                np.searchsorted(index['allele_databases'], database_index, side='right'))
+
+    def get_database_names(self) -> Set[str]:
+        """
+        Gets the names of the indexed databases.
+        :return: The set of database names.
+        """
+        self._load()
+        return self._database_names
+
+    def get_databases_with_hits(self, genome_kmers: np.ndarray, pid_threshold: float,
+                                plength_threshold: float) -> Set[str]:
+        """
+        Gets the databases which could have a BLAST hit passing the thresholds in a genome. A database is only left
+        out if none of its alleles shares enough k-mers with the genome for any alignment passing the thresholds, so
+        BLAST hits passing the thresholds are never missed.
+        :param genome_kmers: The sorted, unique k-mers of the genome, from get_file_kmers().
+        :param pid_threshold: The percent identity threshold.
+        :param plength_threshold: The percent length overlap threshold.
+        :return: The set of database names which may have hits.
+        """
+        index = self._load()
+        kmers = index['kmers']
+        offsets = index['offsets']
+
+        if len(genome_kmers) > 0:
+            positions = np.minimum(np.searchsorted(genome_kmers, kmers), len(genome_kmers) - 1)
+            present = genome_kmers[positions] == kmers
+        else:
+            present = np.zeros(len(kmers), dtype=bool)
+
+        # k-mers containing non-ACGT characters are counted as shared so that they never rule out an allele
+        present_cumulative = np.concatenate([[0], np.cumsum(present, dtype=np.int64)])
+        shared_kmers = present_cumulative[offsets[1:]] - present_cumulative[offsets[:-1]] + index[
+            'allele_ambiguous_kmers']
+
+        min_shared_kmers = self.get_min_shared_kmers(index['allele_lengths'], pid_threshold, plength_threshold)
+        allele_has_hits = shared_kmers >= min_shared_kmers
+
+        database_names = index['database_names']
+        return set(database_names[np.unique(index['allele_databases'][allele_has_hits])].tolist())
+
+    def get_alleles(self, database_name: str) -> (np.ndarray, np.ndarray):
+        """
+        Gets the alleles in a database.
+        :param database_name: The name of the database.
+        :return: A tuple of (array of allele ids, array of allele lengths).
+        """
+        index = self._load()
+        start, end = self._get_database_alleles(database_name)
+        return index['allele_ids'][start:end], index['allele_lengths'][start:end]
+
+    def get_shared_kmers(self, database_name: str, genome_kmers: np.ndarray,
+                         genome_masked: np.ndarray = None) -> np.ndarray:
+        """
+        Counts the k-mer positions in each allele of a database which are shared with a genome.
+        :param database_name: The name of the database.
+        :param genome_kmers: The sorted k-mers of the genome (possibly repeated).
+        :param genome_masked: A boolean array of the k-mers in genome_kmers to leave out (None to use all k-mers).
+        :return: The number of shared k-mer positions for each allele, in the order of get_alleles(). k-mers containing
+                characters other than A, C, G or T are counted as shared.
+        """
+        index = self._load()
+        start, end = self._get_database_alleles(database_name)
+        offsets = index['offsets'][start:end + 1]
+
+        # Looks up each distinct k-mer of the database once, in sorted order
+        if database_name not in self._database_kmers:
+            self._database_kmers[database_name] = np.unique(index['kmers'][offsets[0]:offsets[-1]],
+                                                            return_inverse=True)
+        database_kmers, allele_kmers_inverse = self._database_kmers[database_name]
+
+        first = np.searchsorted(genome_kmers, database_kmers, side='left')
+        last = np.searchsorted(genome_kmers, database_kmers, side='right')
+        if genome_masked is None:
+            present = (last > first)[allele_kmers_inverse]
+        else:
+            unmasked_cumulative = np.concatenate([[0], np.cumsum(~genome_masked, dtype=np.int64)])
+            present = (unmasked_cumulative[last] > unmasked_cumulative[first])[allele_kmers_inverse]
+
+        present_cumulative = np.concatenate([[0], np.cumsum(present, dtype=np.int64)])
+        return present_cumulative[offsets[1:] - offsets[0]] - present_cumulative[offsets[:-1] - offsets[0]] + index[
+            'allele_ambiguous_kmers'][start:end]
+
+    @classmethod
+    def get_min_shared_kmers(cls, allele_lengths: np.ndarray, pid_threshold: float,
+                             plength_threshold: float) -> np.ndarray:
+        """
+        Gets the minimum number of k-mer positions in each allele which are shared with any alignment passing the
+        thresholds. An alignment of length L with at most e mismatches/gaps has at least L - k + 1 - k * e windows of k
+        identical columns, each of which is a k-mer shared between the allele and the genome.
+        :param allele_lengths: The lengths of the alleles.
+        :param pid_threshold: The percent identity threshold.
+        :param plength_threshold: The percent length overlap threshold.
+        :return: The minimum number of shared k-mers for each allele (0 where no minimum can be guaranteed).
+        """
+        k = cls.KMER_SIZE
+        max_difference_rate = (100.0 - pid_threshold) / 100.0
+        min_alignment_lengths = np.ceil(allele_lengths * plength_threshold / 100.0 - 1e-9)
+
+        # Increasing with alignment length when k * max_difference_rate < 1, so the shortest alignment is the minimum
+        if k * max_difference_rate >= 1:
+            return np.zeros(len(allele_lengths), dtype=np.int64)
+        min_shared = np.floor(min_alignment_lengths * (1 - k * max_difference_rate) - k + 1 - 1e-9)
+        return np.maximum(min_shared, 0).astype(np.int64)
+
+    @classmethod
+    def get_file_kmers(cls, fasta_file: str) -> np.ndarray:
+        """
+        Gets the k-mers (on either strand) in a fasta file.
+        :param fasta_file: The fasta file.
+        :return: A sorted array of the unique k-mers in the file.
+        """
+        kmers = [cls.get_sequence_kmers(str(record.seq))[0] for record in Bio.SeqIO.parse(fasta_file, 'fasta')]
+        if not kmers:
+            return np.array([], dtype=np.uint32)
+        return np.unique(np.concatenate(kmers))
+
+    @classmethod
+    def get_sequence_kmers(cls, sequence: str) -> (np.ndarray, int):
+        """
+        Gets the canonical (the smaller of the forward and reverse complement) 2-bit encoded k-mers at each position of
+        a sequence, leaving out k-mers containing characters other than A, C, G or T.
+        :param sequence: The sequence.
+        :return: A tuple of (array of k-mers, number of k-mers left out).
+        """
+        forward, reverse_complement, ambiguous = cls.encode_sequence(sequence)
+        kmers = np.minimum(forward, reverse_complement)[~ambiguous]
+        return kmers, int(ambiguous.sum())
+
+    @classmethod
+    def encode_sequence(cls, sequence: str) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        Gets the 2-bit encoded k-mers starting at each position of a sequence.
+        :param sequence: The sequence.
+        :return: A tuple of (array of forward k-mers, array of reverse complement k-mers, boolean array of whether or not
+                each k-mer contains characters other than A, C, G or T).
+        """
+        k = cls.KMER_SIZE
+        codes = cls.NUCLEOTIDE_CODES[np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)]
+        number_kmers = max(0, len(codes) - k + 1)
+
+        bases = (codes & 3).astype(np.uint32)
+        forward = np.zeros(number_kmers, dtype=np.uint32)
+        reverse_complement = np.zeros(number_kmers, dtype=np.uint32)
+        if number_kmers == 0:
+            return forward, reverse_complement, np.zeros(0, dtype=bool)
+
+        for i in range(k):
+            forward = (forward << 2) | bases[i:i + number_kmers]
+            reverse_complement = (reverse_complement << 2) | (3 - bases[k - 1 - i:k - 1 - i + number_kmers])
+
+        ambiguous_cumulative = np.concatenate([[0], np.cumsum(codes > 3, dtype=np.int64)])
+        ambiguous = (ambiguous_cumulative[k:] - ambiguous_cumulative[:-k]) > 0
+
+        return forward, reverse_complement, ambiguous
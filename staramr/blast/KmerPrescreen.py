@@ -0,0 +1,59 @@
+import logging
+from typing import Dict
+
+from staramr.blast.KmerIndex import KmerIndex
+
+logger = logging.getLogger('KmerPrescreen')
+
+"""
+A Class for deciding which BLAST jobs can be skipped because a genome shares too few k-mers with a database for any
+BLAST hit to pass the thresholds.
+"""
+
+
+class KmerPrescreen:
+
+    def __init__(self, kmer_indexes: Dict[str, KmerIndex], pid_threshold: float,
+                 plength_thresholds: Dict[str, float]) -> None:
+        """
+        Creates a new KmerPrescreen.
+        :param kmer_indexes: A map of {'blast_database_name': KmerIndex} (e.g., for 'resfinder' and 'pointfinder').
+        :param pid_threshold: The percent identity threshold.
+        :param plength_thresholds: A map of {'blast_database_name': percent length overlap threshold}.
+        """
+        self._kmer_indexes = kmer_indexes
+        self._pid_threshold = pid_threshold
+        self._plength_thresholds = plength_thresholds
+        self._genome_databases = {}
+
+    def prescreen(self, genome_file: str) -> None:
+        """
+        Finds the databases a genome could have BLAST hits against which pass the thresholds.
+        :param genome_file: The genome (fasta) file.
+        :return: None
+        """
+        # Checks all blast databases at once so that the k-mers of each genome are only read once and are never kept in
+        # memory
+        genome_kmers = KmerIndex.get_file_kmers(genome_file)
+        self._genome_databases[genome_file] = {
+            name: index.get_databases_with_hits(genome_kmers, self._pid_threshold, self._plength_thresholds[name])
+            for name, index in self._kmer_indexes.items()}
+        logger.debug("k-mer prescreen of [%s] found possible hits in %s", genome_file,
+                     self._genome_databases[genome_file])
+
+    def should_search(self, genome_file: str, blast_database_name: str, database_name: str) -> bool:
+        """
+        Whether or not a genome needs to be searched against a database.
+        :param genome_file: The genome (fasta) file.
+        :param blast_database_name: The name of the blast database (e.g., 'resfinder').
+        :param database_name: The name of the indexed database (fasta file) within the blast database.
+        :return: False if no BLAST hit against the database can pass the thresholds, True otherwise.
+        """
+        kmer_index = self._kmer_indexes.get(blast_database_name)
+        if kmer_index is None or database_name not in kmer_index.get_database_names():
+            return True
+
+        if genome_file not in self._genome_databases:
+            self.prescreen(genome_file)
+
+        return database_name in self._genome_databases[genome_file][blast_database_name]
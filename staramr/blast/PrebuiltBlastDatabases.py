@@ -0,0 +1,179 @@
+import configparser
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import OrderedDict
+from os import path
+from typing import Dict
+
+from staramr.blast.AbstractBlastDatabase import AbstractBlastDatabase
+from staramr.blast.AlleleClusters import AlleleClusters
+from staramr.blast.KmerIndex import KmerIndex
+from staramr.exceptions.BlastProcessError import BlastProcessError
+
+logger = logging.getLogger('PrebuiltBlastDatabases')
+
+"""
+A Class for building and accessing BLAST databases (with a k-mer index and clusters of alleles) compiled from the
+ResFinder/PointFinder fasta files.
+"""
+
+
+class PrebuiltBlastDatabases:
+    MANIFEST_FILE = 'manifest.ini'
+    MANIFEST_SECTION = 'BlastDatabases'
+    CLUSTERS_DIR = 'allele-clusters'
+
+    def __init__(self, blastdb_dir: str) -> None:
+        """
+        Creates a new PrebuiltBlastDatabases.
+        :param blastdb_dir: The directory storing the compiled BLAST databases.
+        """
+        self._blastdb_dir = blastdb_dir
+        self._manifest_file = path.join(blastdb_dir, self.MANIFEST_FILE)
+
+    def build(self, fasta_files: Dict[str, str], commit: str) -> None:
+        """
+        Compiles the passed fasta files into BLAST databases, replacing any previously built databases (and clusters of
+        alleles).
+        :param fasta_files: A map of {'database_name': 'fasta_file'} defining the databases to build.
+        :param commit: The commit of the database repository the fasta files came from.
+        :return: None
+        """
+        self.remove()
+        os.makedirs(self._blastdb_dir)
+
+        logger.info("Building %s BLAST databases in [%s]", len(fasta_files), self._blastdb_dir)
+        for database_name in sorted(fasta_files):
+            self._make_blast_db(fasta_files[database_name], self._get_blastdb_path(database_name))
+
+        self.get_kmer_index().build(fasta_files)
+
+        manifest = OrderedDict()
+        manifest['commit'] = commit
+        manifest['databases'] = ','.join(sorted(fasta_files))
+
+        config = configparser.ConfigParser()
+        config[self.MANIFEST_SECTION] = manifest
+        with open(self._manifest_file, 'w') as file_handle:
+            config.write(file_handle)
+
+    def build_allele_clusters(self, fasta_files: Dict[str, str]) -> AlleleClusters:
+        """
+        Clusters near-identical alleles in the passed fasta files and compiles BLAST databases of the cluster
+        representatives. Clusters are only used by clustered searches, so they are built on the first such search
+        instead of along with the BLAST databases.
+        :param fasta_files: A map of {'database_name': 'fasta_file'} defining the databases to cluster.
+        :return: The AlleleClusters.
+        """
+        # Builds in a temporary directory first so that partially built clusters are never used
+        tmp_clusters_dir = tempfile.mkdtemp(dir=self._blastdb_dir, prefix=self.CLUSTERS_DIR + '.')
+        try:
+            allele_clusters = AlleleClusters(tmp_clusters_dir)
+            representative_files = allele_clusters.build(fasta_files)
+            for database_name in sorted(representative_files):
+                self._make_blast_db(representative_files[database_name],
+                                    allele_clusters.get_representatives_path(database_name))
+            os.rename(tmp_clusters_dir, path.join(self._blastdb_dir, self.CLUSTERS_DIR))
+        finally:
+            if path.exists(tmp_clusters_dir):
+                shutil.rmtree(tmp_clusters_dir)
+
+        return self.get_allele_clusters()
+
+    def _make_blast_db(self, fasta_file, blastdb_path):
+        blastdb_path_dir = path.dirname(blastdb_path)
+        if not path.exists(blastdb_path_dir):
+            os.makedirs(blastdb_path_dir)
+
+        command = ['makeblastdb', '-in', fasta_file, '-dbtype', 'nucl', '-parse_seqids', '-out', blastdb_path]
+        logger.debug(' '.join(command))
+        try:
+            subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        except subprocess.CalledProcessError as e:
+            raise BlastProcessError("Error running makeblastdb", e)
+
+    def _get_blastdb_path(self, database_name):
+        return path.join(self._blastdb_dir, database_name)
+
+    def _read_manifest(self):
+        config = configparser.ConfigParser()
+        config.read(self._manifest_file)
+        if self.MANIFEST_SECTION not in config:
+            return None
+        else:
+            return OrderedDict(config[self.MANIFEST_SECTION])
+
+    def is_at_commit(self, commit: str) -> bool:
+        """
+        Whether or not the BLAST databases have been built from the passed database repository commit.
+        :param commit: The commit.
+        :return: True if the BLAST databases exist and were built from the passed commit, False otherwise.
+        """
+        manifest = self._read_manifest()
+        return manifest is not None and manifest['commit'] == commit
+
+    def get_path(self, database_name: str) -> str:
+        """
+        Gets the path to a particular compiled BLAST database.
+        :param database_name: The name of the database (the path of the fasta file relative to the database
+                repository, without the fasta suffix).
+        :return: The path to the BLAST database, for use with 'blastn -db'.
+        """
+        manifest = self._read_manifest()
+        if manifest is None:
+            raise Exception("No BLAST databases built in [" + self._blastdb_dir + "]")
+        elif database_name not in manifest['databases'].split(','):
+            raise Exception("No BLAST database [" + database_name + "] built in [" + self._blastdb_dir + "]")
+        else:
+            return self._get_blastdb_path(database_name)
+
+    def get_kmer_index(self) -> KmerIndex:
+        """
+        Gets the index of the k-mers in the fasta files the BLAST databases were compiled from.
+        :return: The KmerIndex.
+        """
+        return KmerIndex(self._blastdb_dir)
+
+    def get_allele_clusters(self) -> AlleleClusters:
+        """
+        Gets the clusters of near-identical alleles in the fasta files the BLAST databases were compiled from.
+        :return: The AlleleClusters.
+        """
+        return AlleleClusters(path.join(self._blastdb_dir, self.CLUSTERS_DIR))
+
+    def get_blastdb_dir(self) -> str:
+        """
+        Gets the directory storing the compiled BLAST databases.
+        :return: The directory storing the compiled BLAST databases.
+        """
+        return self._blastdb_dir
+
+    def remove(self) -> None:
+        """
+        Removes the compiled BLAST databases.
+        :return: None
+        """
+        if path.exists(self._blastdb_dir):
+            shutil.rmtree(self._blastdb_dir)
+
+    @classmethod
+    def find_fasta_files(cls, database_dir: str) -> Dict[str, str]:
+        """
+        A Class Method to find all fasta files within a database repository.
+        :param database_dir: The database repository directory.
+        :return: A map of {'database_name': 'fasta_file'}, where database_name is the path of the fasta file relative
+                to the database directory, without the fasta suffix.
+        """
+        fasta_files = {}
+        for root, dirs, files in os.walk(database_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for file in files:
+                if file.endswith(AbstractBlastDatabase.fasta_suffix):
+                    fasta_file = path.join(root, file)
+                    database_name = path.relpath(fasta_file, database_dir)[:-len(AbstractBlastDatabase.fasta_suffix)]
+                    fasta_files[database_name] = fasta_file
+
+        return fasta_files
@@ -46,6 +46,14 @@ class PointfinderBlastDatabase(AbstractBlastDatabase):
         """
         return self._pointfinder_info.get_resistance_codons(gene, codon_mutations)
 
+    def get_resistance_positions(self, gene):
+        """
+        Gets the positions of known resistance mutations in a gene.
+        :param gene: The gene.
+        :return: A set of the positions (codon positions, or nucleotide positions for RNA genes) of resistance mutations.
+        """
+        return self._pointfinder_info.get_resistance_positions(gene)
+
     def get_phenotype(self, gene, codon_mutation):
         """
         Gets the phenotype for a given gene and codon mutation from PointFinder.
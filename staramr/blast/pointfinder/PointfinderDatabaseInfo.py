@@ -12,7 +12,29 @@ class PointfinderDatabaseInfo:
         Creates a new PointfinderDatabaseInfo.
         :param database_info_dataframe: A pd.DataFrame containing the information in PointFinder.
         """
-        self._pointfinder_info = database_info_dataframe
+        self._resistance_index = self._index_resistances(database_info_dataframe)
+
+        self._resistance_positions = {}
+        for gene, position, reference in self._resistance_index:
+            self._resistance_positions.setdefault(gene, set()).add(position)
+
+    @classmethod
+    def _index_resistances(cls, database_info_dataframe):
+        """
+        Compiles the PointFinder information into an index of the resistance mutations.
+        :param database_info_dataframe: A pd.DataFrame containing the information in PointFinder.
+        :return: A map of {(gene, position, reference residue): [(resistant residues, phenotype), ...]}.
+        """
+        resistance_index = {}
+        for gene, position, reference, resistant, phenotype in zip(database_info_dataframe['#Gene_ID'],
+                                                                   database_info_dataframe['Codon_pos'],
+                                                                   database_info_dataframe['Ref_codon'],
+                                                                   database_info_dataframe['Res_codon'],
+                                                                   database_info_dataframe['Resistance']):
+            if isinstance(resistant, str):
+                resistance_index.setdefault((gene, position, reference), []).append((resistant, phenotype))
+
+        return resistance_index
 
     @classmethod
     def from_file(cls, file):
@@ -35,21 +57,37 @@ class PointfinderDatabaseInfo:
         return cls(database_info_dataframe)
 
     def _get_resistance_codon_match(self, gene, codon_mutation):
-        table = self._pointfinder_info
+        """
+        Looks up the phenotype of a mutation in the index of resistance mutations.
+        :param gene: The gene.
+        :param codon_mutation: The codon mutation.
+        :return: The phenotype of the mutation, or None if it is not a resistance mutation.
+        """
+        entries = self._resistance_index.get((gene, codon_mutation.get_mutation_position(),
+                                              codon_mutation.get_database_amr_gene_mutation()), [])
 
-        matches = table[(table['#Gene_ID'] == gene)
-                        & (table['Codon_pos'] == codon_mutation.get_mutation_position())
-                        & (table['Ref_codon'] == codon_mutation.get_database_amr_gene_mutation())
-                        & (table['Res_codon'].str.contains(codon_mutation.get_input_genome_mutation(), regex=False))]
+        # The resistant residues are a comma-separated list, which is matched by substring
+        input_genome_mutation = codon_mutation.get_input_genome_mutation()
+        matches = [phenotype for resistant, phenotype in entries if input_genome_mutation in resistant]
 
-        if len(matches.index) > 1:
+        if len(matches) > 1:
             raise Exception("Error, multiple matches for gene=" + str(gene) + ", codon_mutation=" + str(codon_mutation))
+        elif matches:
+            return matches[0]
         else:
-            return matches
+            return None
 
     def _get_resistance_nucleotide_match(self, gene, nucleotide_mutations):
         return self._get_resistance_codon_match(gene, nucleotide_mutations)
 
+    def get_resistance_positions(self, gene):
+        """
+        Gets the positions of known resistance mutations in a gene.
+        :param gene: The gene.
+        :return: A set of the positions (codon positions, or nucleotide positions for RNA genes) of resistance mutations.
+        """
+        return self._resistance_positions.get(gene, set())
+
     def get_phenotype(self, gene, codon_mutation):
         """
         Gets the phenotype for a given gene and codon mutation from PointFinder.
@@ -57,10 +95,10 @@ class PointfinderDatabaseInfo:
         :param codon_mutation: The codon mutation.
         :return: A string describing the phenotype.
         """
-        match = self._get_resistance_codon_match(gene, codon_mutation)
+        phenotype = self._get_resistance_codon_match(gene, codon_mutation)
 
-        if len(match.index) > 0:
-            return match['Resistance'].iloc[0]
+        if phenotype is not None:
+            return phenotype
         else:
             raise Exception("Error, no match for gene=" + str(gene) + ", codon_mutation=" + str(codon_mutation))
 
@@ -74,8 +112,7 @@ class PointfinderDatabaseInfo:
         resistance_mutations = []
 
         for codon_mutation in codon_mutations:
-            match = self._get_resistance_codon_match(gene, codon_mutation)
-            if len(match.index) > 0:
+            if self._get_resistance_codon_match(gene, codon_mutation) is not None:
                 resistance_mutations.append(codon_mutation)
 
         return resistance_mutations
@@ -90,8 +127,7 @@ class PointfinderDatabaseInfo:
         resistance_mutations = []
 
         for nucleotide_mutation in nucleotide_mutations:
-            match = self._get_resistance_nucleotide_match(gene, nucleotide_mutation)
-            if len(match.index) > 0:
+            if self._get_resistance_nucleotide_match(gene, nucleotide_mutation) is not None:
                 resistance_mutations.append(nucleotide_mutation)
 
         return resistance_mutations
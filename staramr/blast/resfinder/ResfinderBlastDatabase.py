@@ -1,5 +1,8 @@
 import logging
 import os
+from collections import OrderedDict
+
+import Bio.SeqIO
 
 from staramr.blast.AbstractBlastDatabase import AbstractBlastDatabase
 
@@ -11,6 +14,7 @@ A Class for pulling information from the ResFinder database.
 
 
 class ResfinderBlastDatabase(AbstractBlastDatabase):
+    COMBINED_DATABASE_NAME = 'all-classes'
 
     def __init__(self, database_dir):
         """
@@ -18,6 +22,7 @@ class ResfinderBlastDatabase(AbstractBlastDatabase):
         :param database_dir: The specific ResFinder database (drug class) directory.
         """
         super().__init__(database_dir)
+        self._allele_database_names = None
 
     def get_database_names(self):
         return [f[:-len(self.fasta_suffix)] for f in os.listdir(self.database_dir) if
@@ -28,3 +33,40 @@ class ResfinderBlastDatabase(AbstractBlastDatabase):
 
     def get_name(self):
         return 'resfinder'
+
+    def get_allele_database_names(self):
+        """
+        Gets a map linking every ResFinder allele id to the names of the databases (drug classes) it is found in.
+        :return: A dictionary of the form { 'allele_id' => ['database_name', ...] }.
+        """
+        if self._allele_database_names is None:
+            allele_database_names = OrderedDict()
+            for database_name in sorted(self.get_database_names()):
+                for record in Bio.SeqIO.parse(self.get_path(database_name), 'fasta'):
+                    database_names = allele_database_names.setdefault(record.id, [])
+                    if database_name not in database_names:
+                        database_names.append(database_name)
+            self._allele_database_names = allele_database_names
+
+        return self._allele_database_names
+
+    def write_combined_database(self, file):
+        """
+        Writes every allele from all ResFinder databases (drug classes) to a single fasta file. Alleles found in
+        multiple drug classes are only written once.
+        :param file: The fasta file to write to.
+        :return: The number of alleles written.
+        """
+        written_sequences = {}
+        records = []
+        for database_name in sorted(self.get_database_names()):
+            for record in Bio.SeqIO.parse(self.get_path(database_name), 'fasta'):
+                if record.id not in written_sequences:
+                    written_sequences[record.id] = str(record.seq).upper()
+                    records.append(record)
+                elif written_sequences[record.id] != str(record.seq).upper():
+                    logger.warning("Allele [%s] in [%s] differs from an allele with the same id in another drug class. "
+                                   "Only the first copy will be searched.", record.id, database_name)
+
+        logger.debug("Writing %s ResFinder alleles to %s", len(records), file)
+        return Bio.SeqIO.write(records, file, 'fasta')
@@ -13,18 +13,35 @@ Class used to store/parse AMR BLAST hits/hsps.
 
 
 class AMRHitHSP:
+    # Fields are read out of the BLAST record once, so that hits don't keep a reference to the (much larger) record
+    __slots__ = ['_file', '_genome_id', '_amr_gene_id', '_amr_gene_length', '_hsp_length', '_pid', '_plength',
+                 '_genome_contig_id', '_genome_contig_start', '_genome_contig_end', '_genome_contig_strand',
+                 '_amr_gene_start', '_amr_gene_end', '_amr_gene_seq', '_genome_contig_hsp_seq']
 
     def __init__(self, file, blast_record):
         """
         Creates a new AMRHitHSP.
         :param file: The particular file this BLAST hit came from.
-        :param blast_record: The Bio.Blast.Record this hit came from.
+        :param blast_record: The BLAST record (a dict or pd.Series of the BLAST columns) this hit came from.
         """
         __metaclass__ = abc.ABCMeta
         self._file = file
 
         if blast_record is not None:
-            self._blast_record = blast_record
+            self._genome_id = os.path.splitext(file)[0] if file is not None else None
+            self._amr_gene_id = blast_record.get('qseqid')
+            self._amr_gene_length = blast_record.get('qlen')
+            self._hsp_length = blast_record.get('length')
+            self._pid = blast_record.get('pident')
+            self._plength = blast_record.get('plength')
+            self._genome_contig_id = self._parse_contig_id(blast_record.get('sseqid'))
+            self._genome_contig_start = blast_record.get('sstart')
+            self._genome_contig_end = blast_record.get('send')
+            self._genome_contig_strand = blast_record.get('sstrand')
+            self._amr_gene_start = blast_record.get('qstart')
+            self._amr_gene_end = blast_record.get('qend')
+            self._amr_gene_seq = blast_record.get('qseq')
+            self._genome_contig_hsp_seq = blast_record.get('sseq')
 
             if self.get_genome_contig_start() > self.get_genome_contig_end() and self.get_genome_contig_strand() != 'minus':
                 raise InvalidPositionException(
@@ -36,40 +53,51 @@ class AMRHitHSP:
                     "amr gene start = {} > amr gene end = {}".format(self.get_amr_gene_start(),
                                                                      self.get_amr_gene_end()))
 
+    @staticmethod
+    def _parse_contig_id(sseqid):
+        """
+        Parses the contig id out of a BLAST subject sequence id.
+        :param sseqid: The BLAST subject sequence id.
+        :return: The contig id (None if there is no sequence id).
+        """
+        if sseqid is None:
+            return None
+        return re.search(r'^(\S+)', sseqid).group(1)
+
     def get_amr_gene_length(self):
         """
         Gets the amr gene length.
         :return: The amr gene length.
         """
-        return self._blast_record['qlen']
+        return self._amr_gene_length
 
     def get_hsp_length(self):
         """
         Gets the BLAST HSP length.
         :return: The BLAST HSP length.
         """
-        return self._blast_record['length']
+        return self._hsp_length
 
     def get_pid(self):
         """
         Gets the percent identity of the HSP.
         :return: The HSP percent identity.
         """
-        return self._blast_record['pident']
+        return self._pid
 
     def get_plength(self):
         """
         Gets the percent length of the HSP to the AMR gene.
         :return: The percent length of the HSP to the AMR gene.
         """
-        return self._blast_record['plength']
+        return self._plength
 
     def get_amr_gene_id(self):
         """
         Gets the hit id.
         :return: The hit id.
         """
-        return self._blast_record['qseqid']
+        return self._amr_gene_id
 
     @abc.abstractmethod
     def get_amr_gene_name(self):
@@ -91,57 +119,56 @@ class AMRHitHSP:
         Gets genome id for the file.
         :return: The genome id for the file
         """
-        return os.path.splitext(self._file)[0]
+        return self._genome_id
 
     def get_genome_contig_id(self):
         """
         Gets the particular id from the genome input file.
         :return: The contig id.
         """
-        re_search = re.search(r'^(\S+)', self._blast_record['sseqid'])
-        return re_search.group(1)
+        return self._genome_contig_id
 
     def get_genome_contig_start(self) -> int:
         """
         Gets the start of the HSP in the genome input file.
         :return: The start of the HSP.
         """
-        return self._blast_record['sstart']
+        return self._genome_contig_start
 
     def get_genome_contig_end(self) -> int:
         """
         Gets the end of the HSP in the genome input file.
         :return: The end of the HSP.
         """
-        return self._blast_record['send']
+        return self._genome_contig_end
 
     def get_amr_gene_start(self):
         """
         Gets the start of the hsp to the resistance gene.
         :return: The start of the resistance gene hsp.
         """
-        return self._blast_record['qstart']
+        return self._amr_gene_start
 
     def get_amr_gene_end(self):
         """
         Gets the end of the hsp to the resistance gene.
         :return: The end of the resistance gene hsp.
         """
-        return self._blast_record['qend']
+        return self._amr_gene_end
 
     def get_amr_gene_seq(self):
         """
         Gets the amr gene from the HSP.
         :return: The amr gene (as a string) from the HSP.
         """
-        return self._blast_record['qseq']
+        return self._amr_gene_seq
 
     def get_genome_contig_hsp_seq(self):
         """
         Gets the genome sequence from the HSP.
         :return: The genome sequence (as a string) from the HSP.
         """
-        return self._blast_record['sseq']
+        return self._genome_contig_hsp_seq
 
     def get_genome_seq_in_amr_gene_strand(self):
         """
@@ -155,14 +182,18 @@ class AMRHitHSP:
         Gets the genome contig strand for the BLAST hit.
         :return: The genome contig strand for the BLAST hit.
         """
-        return self._blast_record['sstrand']
+        return self._genome_contig_strand
 
-    def get_seq_record(self):
+    def get_seq_record(self, genome_contig_hsp_seq=None):
         """
         Gets a SeqRecord for this hit.
+        :param genome_contig_hsp_seq: The genome sequence of the hit, where it was not reported by BLAST (None to use
+                the sequence from the HSP).
         :return: A SeqRecord for this hit.
         """
-        return SeqRecord(Seq(self.get_genome_contig_hsp_seq()), id=self.get_amr_gene_id(),
+        if genome_contig_hsp_seq is None:
+            genome_contig_hsp_seq = self.get_genome_contig_hsp_seq()
+        return SeqRecord(Seq(genome_contig_hsp_seq), id=self.get_amr_gene_id(),
                          description=(
                              'isolate: {}, contig: {}, contig_start: {}, contig_end: {}, resistance_gene_start: {},'
                              ' resistance_gene_end: {}, hsp/length: {}/{}, pid: {:0.2f}%, plength: {:0.2f}%').format(
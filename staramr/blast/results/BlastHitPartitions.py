@@ -1,11 +1,10 @@
 import logging
-from typing import Dict
 from typing import List
-from typing import Optional
 from typing import Tuple
-from typing import Any
 from collections import OrderedDict
 
+import numpy as np
+
 logger = logging.getLogger('BlastHits')
 
 from staramr.blast.results.AMRHitHSP import AMRHitHSP
@@ -22,7 +21,11 @@ class BlastHitPartitions:
         """
         Creates a new object to store BLAST hit partitions.
         """
-        self._partitions = OrderedDict()
+        self._hits = []
+        self._contig_numbers = OrderedDict()
+        self._hit_contigs = []
+        self._hit_starts = []
+        self._hit_ends = []
 
     def append(self, hit: AMRHitHSP) -> None:
         """
@@ -35,61 +38,63 @@ class BlastHitPartitions:
                 "Unsupported condition: strand=plus and contig start > contig end for hit (contig=" + hit.get_genome_contig_id() + ", start=" +
                 str(hit.get_genome_contig_start()) + ", end=" + str(hit.get_genome_contig_end()) + ")")
 
-        partition = self._get_existing_partition(hit)
-        if (partition is None):
-            self._create_new_parition(hit)
-        else:
-            self._add_hit_partition(hit, partition)
-
-    def _add_hit_partition(self, hit: AMRHitHSP, partition: Dict[str, Any]) -> None:
-        start, end = self._stranded_ends(hit)
-
-        if start < partition['start']:
-            partition['start'] = start
-
-        if end > partition['end']:
-            partition['end'] = end
-
-        partition['hits'].append(hit)
-
-    def _get_existing_partition(self, hit: AMRHitHSP) -> Optional[Dict[str, Any]]:
-        partition_name = hit.get_genome_contig_id()
-
-        if partition_name in self._partitions:
-            contig_partitions_list = self._partitions[partition_name]
-            for partition in contig_partitions_list:
-                if self._hit_in_parition(hit, partition):
-                    return partition
-
-        return None
-
-    def _hit_in_parition(self, hit: AMRHitHSP, partition: Dict[str, Any]) -> bool:
-        pstart, pend = partition['start'], partition['end']
         start, end = self._stranded_ends(hit)
+        self._hits.append(hit)
+        self._hit_contigs.append(self._contig_numbers.setdefault(hit.get_genome_contig_id(), len(self._contig_numbers)))
+        self._hit_starts.append(start)
+        self._hit_ends.append(end)
 
-        return (pstart < start < pend) or (pstart < end < pend) or (start <= pstart and end >= pend)
-
-    def _create_new_parition(self, hit: AMRHitHSP) -> None:
-        start, end = self._stranded_ends(hit)
+    def get_hits_nonoverlapping_regions(self) -> List[List[AMRHitHSP]]:
+        """
+        Gets BLAST hits divided up into separate lists for non-overlapping regions. Regions are ordered by contig (in
+        the order the contigs were first added) and then by the first hit added to each region, and hits within a
+        region are in the order they were added.
+        :return: A list of BLAST hits divided up into non-overlapping regions.
+        """
+        partition_numbers = self.get_partition_numbers(np.array(self._hit_contigs, dtype=np.int64),
+                                                       np.array(self._hit_starts, dtype=np.int64),
+                                                       np.array(self._hit_ends, dtype=np.int64))
 
-        contig_name = hit.get_genome_contig_id()
-        partition = {
-            'start': start,
-            'end': end,
-            'hits': [hit]
-        }
+        partitions = OrderedDict()
+        for partition_number, contig_number, hit in zip(partition_numbers.tolist(), self._hit_contigs, self._hits):
+            partitions.setdefault(partition_number, (contig_number, []))[1].append(hit)
 
-        if contig_name in self._partitions:
-            self._partitions[contig_name].append(partition)
-        else:
-            self._partitions[contig_name] = [partition]
+        # Sorting is stable, so regions on the same contig stay in the order of their first hit
+        return [hits for contig_number, hits in sorted(partitions.values(), key=lambda partition: partition[0])]
 
-    def get_hits_nonoverlapping_regions(self) -> List[List[AMRHitHSP]]:
+    @classmethod
+    def get_partition_numbers(cls, groups: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
         """
-        Gets BLAST hits divided up into separate lists for non-overlapping regions..
-        :return: A list of BLAST hits divided up into non-overlapping regions.
+        Divides up BLAST hits into non-overlapping regions by sorting the hits by start and sweeping along each contig,
+        keeping the running maximum end of the current region. A hit starting before the running maximum end overlaps
+        the region (hits which only share an end coordinate do not overlap).
+        :param groups: An integer array identifying the contig of each hit (hits are only partitioned with other hits
+                in the same group).
+        :param starts: The start coordinates of the hits (start <= end).
+        :param ends: The end coordinates of the hits.
+        :return: An array of the region number of each hit.
         """
-        return [p['hits'] for name in self._partitions for p in self._partitions[name]]
+        if len(groups) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        order = np.lexsort((starts, groups))
+        sorted_groups = np.asarray(groups, dtype=np.int64)[order]
+        sorted_starts = np.asarray(starts, dtype=np.int64)[order]
+        sorted_ends = np.asarray(ends, dtype=np.int64)[order]
+
+        # Offsets each group past the coordinates of the previous groups so that a single running maximum never
+        # carries over from one group to the next
+        span = max(sorted_starts.max(), sorted_ends.max()) - min(sorted_starts.min(), sorted_ends.min()) + 1
+        offsets = (sorted_groups - sorted_groups[0]) * span
+        running_max_ends = np.maximum.accumulate(sorted_ends + offsets)
+
+        new_partitions = np.ones(len(order), dtype=bool)
+        new_partitions[1:] = (sorted_groups[1:] != sorted_groups[:-1]) | (
+                sorted_starts[1:] + offsets[1:] >= running_max_ends[:-1])
+
+        partition_numbers = np.empty(len(order), dtype=np.int64)
+        partition_numbers[order] = np.cumsum(new_partitions) - 1
+        return partition_numbers
 
     def _stranded_ends(self, hit: AMRHitHSP) -> Tuple[int, int]:
         """
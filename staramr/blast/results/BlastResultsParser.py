@@ -9,6 +9,8 @@ import pandas as pd
 
 from staramr.blast.BlastHandler import BlastHandler
 from staramr.blast.results.BlastHitPartitions import BlastHitPartitions
+from staramr.blast.results.IndexedFasta import IndexedFasta
+from staramr.exceptions.InvalidPositionException import InvalidPositionException
 
 logger = logging.getLogger('BlastResultsParser')
 
@@ -56,24 +58,83 @@ class BlastResultsParser:
         results = []
 
         for file in self._file_blast_map:
+            results.extend(self.parse_file_results(file))
+
+        return self.create_results_dataframe(results)
+
+    def parse_file_results(self, file, genome_file=None, databases=None):
+        """
+        Parses the BLAST files for a single input file. This can be run as soon as the BLAST results for the input
+        file are ready, without waiting for the other input files.
+        :param file: The name of the input file.
+        :param genome_file: The path to the input file, to read the sequences of hits from where BLAST did not report
+                them (None if not available).
+        :param databases: A map of {'database_name': BLAST results} for the input file (None to use the results in the
+                file_blast_map).
+        :return: A list of result rows for the input file, which can be passed to create_results_dataframe().
+        """
+        results = []
+        if databases is None:
             databases = self._file_blast_map[file]
-            hit_seq_records = []
-            for database_name, blast_out in sorted(databases.items()):
+        reported_hits = []
+        blast_tables = []
+        for database_name, blast_out in sorted(databases.items()):
+            if isinstance(blast_out, pd.DataFrame):
+                logger.debug("Blast results for [%s] in [%s]", file, database_name)
+            elif (blast_out is None or not os.path.exists(blast_out)):
+                raise Exception("Blast output [" + str(blast_out) + "] does not exist")
+            else:
                 logger.debug(str(blast_out))
-                if (not os.path.exists(blast_out)):
-                    raise Exception("Blast output [" + blast_out + "] does not exist")
-                self._handle_blast_hit(file, database_name, blast_out, results, hit_seq_records)
-
-            if self._output_dir:
-                out_file = self._get_out_file_name(file)
-                if hit_seq_records:
-                    logger.debug("Writting hits to %s", out_file)
-                    Bio.SeqIO.write(hit_seq_records, out_file, 'fasta')
-                else:
-                    logger.debug("No hits found, skipping writing output file to %s", out_file)
+            blast_tables.extend(self._get_blast_tables(database_name, blast_out))
+
+        for database_name, blast_record in self._select_hits(blast_tables):
+            hit = self._create_hit(file, database_name, blast_record)
+            blast_results = self._get_result_rows(hit, database_name)
+            if blast_results is not None:
+                logger.debug("record = %s", blast_results)
+                results.extend(blast_results)
+                reported_hits.append(hit)
+
+        if self._output_dir:
+            out_file = self._get_out_file_name(file)
+            if reported_hits:
+                logger.debug("Writting hits to %s", out_file)
+                Bio.SeqIO.write(self._get_hit_seq_records(reported_hits, genome_file), out_file, 'fasta')
             else:
-                logger.debug("No output directory defined for blast hits, skipping writing file")
+                logger.debug("No hits found, skipping writing output file to %s", out_file)
+        else:
+            logger.debug("No output directory defined for blast hits, skipping writing file")
 
+        return results
+
+    def _get_hit_seq_records(self, hits, genome_file):
+        """
+        Gets SeqRecords for the reported hits, cutting the sequences of hits out of the input file where BLAST did not
+        report them.
+        :param hits: The reported hits.
+        :param genome_file: The path to the input file (None if not available).
+        :return: A list of SeqRecords for the hits.
+        """
+        if genome_file is None or all(hit.get_genome_contig_hsp_seq() for hit in hits):
+            return [hit.get_seq_record() for hit in hits]
+
+        seq_records = []
+        with IndexedFasta(genome_file) as genome_fasta:
+            for hit in hits:
+                if hit.get_genome_contig_hsp_seq():
+                    seq_records.append(hit.get_seq_record())
+                else:
+                    start, end = sorted([hit.get_genome_contig_start(), hit.get_genome_contig_end()])
+                    seq_records.append(hit.get_seq_record(
+                        genome_fasta.fetch(hit.get_genome_contig_id(), start, end, hit.get_genome_contig_strand())))
+        return seq_records
+
+    def create_results_dataframe(self, results):
+        """
+        Creates a pd.DataFrame from result rows.
+        :param results: A list of result rows, from parse_file_results().
+        :return: A pd.DataFrame containing the AMR matches from BLAST.
+        """
         return pd.DataFrame(results, columns=self.COLUMNS).sort_values(by=self.SORT_COLUMNS).set_index(self.INDEX)
 
     @abc.abstractmethod
@@ -85,54 +146,113 @@ class BlastResultsParser:
         """
         pass
 
-    def _handle_blast_hit(self, in_file, database_name, blast_file, results, hit_seq_records):
-        blast_table = pd.read_csv(blast_file, sep='\t', header=None, names=BlastHandler.BLAST_COLUMNS, index_col=False).astype(
-            dtype={'qseqid': np.unicode_, 'sseqid': np.unicode_})
-        partitions = BlastHitPartitions()
-
-        blast_table['plength'] = (blast_table.length / blast_table.qlen) * 100.0
-        blast_table = blast_table[
-            (blast_table.pident >= self._pid_threshold) & (blast_table.plength >= self._plength_threshold) &
-            ~blast_table.qseqid.isin(self._genes_to_exclude)]
-        blast_table.sort_values(by=self.BLAST_SORT_COLUMNS, inplace=True)
-        for index, blast_record in blast_table.iterrows():
-            partitions.append(self._create_hit(in_file, database_name, blast_record))
-
-        for hits_non_overlapping in partitions.get_hits_nonoverlapping_regions():
-            for hit in self._select_hits_to_include(hits_non_overlapping):
-                blast_results = self._get_result_rows(hit, database_name)
-                if blast_results is not None:
-                    logger.debug("record = %s", blast_results)
-                    results.extend(blast_results)
-                    hit_seq_records.append(hit.get_seq_record())
-
-    def _select_hits_to_include(self, hits):
-        hits_to_include = []
-
-        if len(hits) >= 1:
-            sorted_hits_pid_first = sorted(hits, key=lambda x: (
-                x.get_pid(), x.get_plength(), x.get_amr_gene_length(), x.get_amr_gene_id()), reverse=True)
-            sorted_hits_length_first = sorted(hits, key=lambda x: (
-                x.get_amr_gene_length(), x.get_pid(), x.get_plength(), x.get_amr_gene_id()), reverse=True)
-
-            if self._report_all:
-                hits_to_include = sorted_hits_pid_first
-            else:
-                first_hit_pid = sorted_hits_pid_first[0]
-                first_hit_length = sorted_hits_length_first[0]
-
-                if first_hit_pid == first_hit_length:
-                    hits_to_include.append(first_hit_length)
-                # if the top length hit is significantly longer, and the pid is not too much below the top pid hit (nor percent overlap too much below top pid hit), use the longer hit
-                elif (first_hit_length.get_amr_gene_length() - first_hit_pid.get_amr_gene_length()) > 10 and (
-                        first_hit_length.get_pid() - first_hit_pid.get_pid()) > -1 and (
-                        first_hit_length.get_plength() - first_hit_pid.get_plength()) > -1:
-                    hits_to_include.append(first_hit_length)
-                # otherwise, prefer the top pid hit, even if it's shorter than the longest hit
-                else:
-                    hits_to_include.append(first_hit_pid)
+    def _get_blast_tables(self, database_name, blast_out):
+        """
+        Reads the BLAST results for a database, keeping the hits which pass the thresholds.
+        :param database_name: The name of the database the BLAST results came from.
+        :param blast_out: The BLAST results as a pd.DataFrame or file.
+        :return: A list of (database_name, pd.DataFrame) tuples for each individual database (e.g., drug class).
+        """
+        if isinstance(blast_out, pd.DataFrame):
+            blast_table = self._filter_blast_table(blast_out)
+        else:
+            blast_table = BlastHandler.read_blast_table(blast_out, hit_filter=self._filter_blast_table)
+
+        return self._split_blast_table(database_name, blast_table)
+
+    def _filter_blast_table(self, blast_table):
+        """
+        Keeps the BLAST hits which pass the thresholds and are not excluded.
+        :param blast_table: The pd.DataFrame of BLAST results (or a chunk of them).
+        :return: A pd.DataFrame of the hits passing the thresholds, with the percent length of each hit.
+        """
+        blast_table = blast_table.assign(plength=(blast_table.length / blast_table.qlen) * 100.0)
+        return blast_table[BlastHandler.passes_thresholds(blast_table, self._pid_threshold, self._plength_threshold,
+                                                          self._genes_to_exclude)]
+
+    def _split_blast_table(self, database_name, blast_table):
+        """
+        Splits up a table of BLAST results into tables for each individual database (e.g., drug class).
+        :param database_name: The name of the database the BLAST results came from.
+        :param blast_table: The pd.DataFrame of BLAST results.
+        :return: A list of (database_name, pd.DataFrame) tuples.
+        """
+        return [(database_name, blast_table)]
+
+    def _select_hits(self, blast_tables):
+        """
+        Selects the hits to report from the BLAST results for an input file. Hits in each database are divided up into
+        non-overlapping regions of each contig, and the top hit of each region is chosen (or all hits, ordered by pid,
+        if reporting all hits). This works on whole tables at once, so that hit objects only need to be created for
+        the reported hits.
+        :param blast_tables: A list of (database_name, pd.DataFrame) tuples of the BLAST results passing the thresholds.
+        :return: A list of (database_name, dict) tuples of the BLAST records to report, in the order of the
+                databases, then the contigs and regions by their first hit (in BLAST_SORT_COLUMNS order).
+        """
+        if not blast_tables:
+            return []
+
+        columns = blast_tables[0][1].columns
+        hits = pd.concat([blast_table.sort_values(by=self.BLAST_SORT_COLUMNS).assign(
+            database=database_index, rank=np.arange(len(blast_table.index))) for
+            database_index, (database_name, blast_table) in enumerate(blast_tables)], ignore_index=True)
+        if hits.empty:
+            return []
+
+        self._check_positions(hits)
+        hits['row'] = hits.index
+
+        plus = (hits['sstrand'] == 'plus').to_numpy()
+        hits['start'] = np.where(plus, hits['sstart'], hits['send'])
+        hits['end'] = np.where(plus, hits['send'], hits['sstart'])
+        hits['contig'] = hits['sseqid'].str.extract(r'^(\S+)', expand=False)
+        contigs = hits.groupby(['database', 'contig'], sort=False)
+        hits['partition'] = BlastHitPartitions.get_partition_numbers(contigs.ngroup().to_numpy(),
+                                                                     hits['start'].to_numpy(), hits['end'].to_numpy())
+
+        # Orders the regions (and contigs) by their first hit, which is the order they are made in BlastHitPartitions
+        hits['contig_rank'] = contigs['rank'].transform('min')
+        hits['partition_rank'] = hits.groupby('partition')['rank'].transform('min')
+
+        hits_pid_first = hits.sort_values(by=['partition', 'pident', 'plength', 'qlen', 'qseqid', 'rank'],
+                                          ascending=[True, False, False, False, False, True], kind='mergesort')
+        if self._report_all:
+            selected_hits = hits_pid_first.assign(order=np.arange(len(hits_pid_first.index)))
+        else:
+            hits_length_first = hits.sort_values(by=['partition', 'qlen', 'pident', 'plength', 'qseqid', 'rank'],
+                                                 ascending=[True, False, False, False, False, True], kind='mergesort')
+            first_hits_pid = hits_pid_first.drop_duplicates('partition').set_index('partition')
+            first_hits_length = hits_length_first.drop_duplicates('partition').set_index('partition').loc[
+                first_hits_pid.index]
+
+            # if the top length hit is significantly longer, and the pid is not too much below the top pid hit (nor
+            # percent overlap too much below top pid hit), use the longer hit, otherwise prefer the top pid hit, even if
+            # it's shorter than the longest hit
+            use_length = ((first_hits_length['qlen'] - first_hits_pid['qlen']) > 10) & (
+                    (first_hits_length['pident'] - first_hits_pid['pident']) > -1) & (
+                                 (first_hits_length['plength'] - first_hits_pid['plength']) > -1)
+            selected_rows = np.where(use_length, first_hits_length['row'], first_hits_pid['row'])
+            selected_hits = hits.loc[selected_rows].assign(order=0)
+
+        selected_hits = selected_hits.sort_values(by=['database', 'contig_rank', 'partition_rank', 'order'],
+                                                  kind='mergesort')
+
+        return [(blast_tables[database_index][0], blast_record) for database_index, blast_record in
+                zip(selected_hits['database'], selected_hits[columns].to_dict('records'))]
+
+    def _check_positions(self, hits):
+        invalid_contig = (hits['sstart'] > hits['send']) & (hits['sstrand'] != 'minus')
+        if invalid_contig.any():
+            hit = hits[invalid_contig].iloc[0]
+            raise InvalidPositionException(
+                "contig start = {} > contig end = {} and strand is {}".format(hit['sstart'], hit['send'],
+                                                                              hit['sstrand']))
 
-        return hits_to_include
+        invalid_amr_gene = hits['qstart'] > hits['qend']
+        if invalid_amr_gene.any():
+            hit = hits[invalid_amr_gene].iloc[0]
+            raise InvalidPositionException(
+                "amr gene start = {} > amr gene end = {}".format(hit['qstart'], hit['qend']))
 
     @abc.abstractmethod
     def _create_hit(self, file, database_name, blast_record):
@@ -0,0 +1,133 @@
+import logging
+import mmap
+from collections import OrderedDict
+
+from Bio.Seq import reverse_complement
+
+logger = logging.getLogger('IndexedFasta')
+
+"""
+A Class for reading regions of sequences from a fasta file through a memory-mapped, faidx-style index, without loading
+the sequences into memory.
+"""
+
+
+class IndexedFasta:
+
+    def __init__(self, fasta_file: str) -> None:
+        """
+        Creates a new IndexedFasta and indexes the passed fasta file.
+        :param fasta_file: The fasta file.
+        """
+        self._fasta_file = fasta_file
+        self._handle = open(fasta_file, 'rb')
+        try:
+            self._data = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be memory-mapped
+            self._data = b''
+        self._index = self._build_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the fasta file.
+        :return: None
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._handle.close()
+
+    def _build_index(self):
+        """
+        Builds an index of {'sequence_id': [length, offset, line_bases, line_width]} like 'samtools faidx'. line_bases
+        and line_width are None for sequences whose lines (other than the last) are not all the same length, which are
+        read by removing newlines from the whole sequence instead.
+        :return: The index.
+        """
+        index = OrderedDict()
+        entry = None
+        line_lengths = set()
+        last_line = None
+        position = 0
+
+        def finish(entry, line_lengths, last_line):
+            if entry is not None and (len(line_lengths) > 1 or (
+                    last_line is not None and entry[2] is not None and last_line[0] > entry[2])):
+                entry[2] = entry[3] = None
+
+        data_length = len(self._data)
+        while position < data_length:
+            line_end = self._data.find(b'\n', position)
+            line_end = data_length if line_end < 0 else line_end + 1
+            line = self._data[position:line_end]
+
+            if line.startswith(b'>'):
+                finish(entry, line_lengths, last_line)
+                sequence_id = line[1:].split(None, 1)[0].decode() if line[1:].strip() else ''
+                entry = [0, line_end, None, None]
+                line_lengths = set()
+                last_line = None
+                index[sequence_id] = entry
+            elif entry is not None:
+                bases = len(line.rstrip(b'\r\n'))
+                if last_line is not None:
+                    # Only the last line of a sequence may be shorter
+                    line_lengths.add(last_line)
+                if entry[2] is None and bases > 0:
+                    entry[2] = bases
+                    entry[3] = len(line)
+                entry[0] += bases
+                last_line = (bases, len(line))
+
+            position = line_end
+        finish(entry, line_lengths, last_line)
+
+        return index
+
+    def get_length(self, sequence_id: str) -> int:
+        """
+        Gets the length of a sequence.
+        :param sequence_id: The id of the sequence.
+        :return: The length of the sequence.
+        """
+        return self._get_entry(sequence_id)[0]
+
+    def _get_entry(self, sequence_id):
+        if sequence_id not in self._index:
+            raise Exception("No sequence [" + sequence_id + "] in [" + self._fasta_file + "]")
+        return self._index[sequence_id]
+
+    def fetch(self, sequence_id: str, start: int, end: int, strand: str = 'plus') -> str:
+        """
+        Gets a region of a sequence.
+        :param sequence_id: The id of the sequence.
+        :param start: The 1-based start of the region.
+        :param end: The 1-based, inclusive end of the region.
+        :param strand: The strand of the region ('plus' or 'minus'), where regions on the minus strand are reverse
+                complemented.
+        :return: The sequence of the region.
+        """
+        length, offset, line_bases, line_width = self._get_entry(sequence_id)
+        if start < 1 or end > length or start > end:
+            raise Exception("Region " + str(start) + "-" + str(end) + " is outside of [" + sequence_id + "] of length " +
+                            str(length) + " in [" + self._fasta_file + "]")
+
+        if line_bases is None:
+            sequence = self._read_sequence(offset)[start - 1:end]
+        else:
+            start_offset = offset + ((start - 1) // line_bases) * line_width + (start - 1) % line_bases
+            end_offset = offset + ((end - 1) // line_bases) * line_width + (end - 1) % line_bases + 1
+            sequence = self._data[start_offset:end_offset].replace(b'\n', b'').replace(b'\r', b'').decode()
+
+        return reverse_complement(sequence) if strand == 'minus' else sequence
+
+    def _read_sequence(self, offset):
+        end_offset = self._data.find(b'\n>', offset)
+        end_offset = len(self._data) if end_offset < 0 else end_offset
+        return self._data[offset:end_offset].replace(b'\n', b'').replace(b'\r', b'').decode()
@@ -3,6 +3,7 @@ from os import path
 
 from staramr.blast.results.BlastResultsParser import BlastResultsParser
 from staramr.blast.results.pointfinder.PointfinderHitHSP import PointfinderHitHSP
+from staramr.blast.results.pointfinder.PointfinderMutationCache import PointfinderMutationCache
 from staramr.blast.results.pointfinder.nucleotide.PointfinderHitHSPRNA import PointfinderHitHSPRNA
 
 logger = logging.getLogger('BlastResultsParserPointfinder')
@@ -29,7 +30,7 @@ class BlastResultsParserPointfinder(BlastResultsParser):
     SORT_COLUMNS = ['Isolate ID', 'Gene']
 
     def __init__(self, file_blast_map, blast_database, pid_threshold, plength_threshold, report_all=False,
-                 output_dir=None, genes_to_exclude=[]):
+                 output_dir=None, genes_to_exclude=[], mutation_cache=None):
         """
         Creates a new BlastResultsParserPointfinder.
         :param file_blast_map: A map/dictionary linking input files to BLAST results files.
@@ -39,9 +40,19 @@ class BlastResultsParserPointfinder(BlastResultsParser):
         :param report_all: Whether or not to report all blast hits.
         :param output_dir: The directory where output files are being written.
         :param genes_to_exclude: A list of gene IDs to exclude from the results.
+        :param mutation_cache: A staramr.blast.results.pointfinder.PointfinderMutationCache storing the resistance
+                mutations of alignments seen before (None to use a new cache).
         """
         super().__init__(file_blast_map, blast_database, pid_threshold, plength_threshold, report_all,
                          output_dir=output_dir, genes_to_exclude=genes_to_exclude)
+        self._mutation_cache = mutation_cache if mutation_cache is not None else PointfinderMutationCache()
+
+    def get_mutation_cache(self):
+        """
+        Gets the cache of resistance mutations used by this parser.
+        :return: The staramr.blast.results.pointfinder.PointfinderMutationCache.
+        """
+        return self._mutation_cache
 
     def _create_hit(self, file, database_name, blast_record):
         logger.debug("database_name=%s", database_name)
@@ -50,7 +61,16 @@ class BlastResultsParserPointfinder(BlastResultsParser):
         else:
             return PointfinderHitHSP(file, blast_record)
 
-    def _get_result(self, hit, db_mutation):
+    def _get_phenotype(self, gene, db_mutation):
+        """
+        Gets the phenotype to report for a resistance mutation.
+        :param gene: The gene.
+        :param db_mutation: The resistance mutation.
+        :return: The phenotype, or None if phenotypes are not reported.
+        """
+        return None
+
+    def _get_result(self, hit, db_mutation, phenotype):
         return [hit.get_genome_id(),
                 hit.get_amr_gene_id() + " (" + db_mutation.get_mutation_string_short() + ")",
                 db_mutation.get_type(),
@@ -64,11 +84,18 @@ class BlastResultsParserPointfinder(BlastResultsParser):
                 hit.get_genome_contig_end()
                 ]
 
-    def _get_result_rows(self, hit, database_name):
-        database_mutations = hit.get_mutations()
-
+    def _get_resistance_mutations(self, hit, database_name):
+        """
+        Gets the resistance mutations in the alignment of a hit, along with their phenotypes.
+        :param hit: The PointfinderHitHSP.
+        :param database_name: The name of the PointFinder database the hit is from.
+        :return: A list of (resistance mutation, phenotype) tuples.
+        """
         gene = hit.get_amr_gene_name()
 
+        # Only mismatches at positions of known resistance mutations can be reported
+        database_mutations = hit.get_mutations(self._blast_database.get_resistance_positions(gene))
+
         for x in database_mutations:
             logger.debug("database_mutations: position=%s, mutation=%s", x.get_mutation_position(), x.get_mutation_string())
 
@@ -78,14 +105,26 @@ class BlastResultsParserPointfinder(BlastResultsParser):
             database_resistance_mutations = self._blast_database.get_resistance_codons(gene, database_mutations)
         logger.debug("database_resistance_mutations=%s", database_resistance_mutations)
 
-        if len(database_resistance_mutations) == 0:
+        return [(db_mutation, self._get_phenotype(gene, db_mutation)) for db_mutation in
+                database_resistance_mutations]
+
+    def _get_result_rows(self, hit, database_name):
+        # Isolates often share identical alignments to a gene, which then have the same resistance mutations
+        key = PointfinderMutationCache.get_key(database_name, hit.get_amr_gene_name(), hit.get_amr_gene_start(),
+                                               hit.get_amr_gene_seq(), hit.get_genome_contig_hsp_seq())
+        resistance_mutations = self._mutation_cache.get(key)
+        if resistance_mutations is None:
+            resistance_mutations = self._get_resistance_mutations(hit, database_name)
+            self._mutation_cache.put(key, resistance_mutations)
+
+        if len(resistance_mutations) == 0:
             logger.debug("No mutations for id=[%s], file=[%s]", hit.get_amr_gene_id(), hit.get_file())
         else:
             results = []
-            for db_mutation in database_resistance_mutations:
+            for db_mutation, phenotype in resistance_mutations:
                 logger.debug("multiple resistance mutations for [%s]: mutations=[%s], file=[%s]",
-                             hit.get_amr_gene_id(), database_resistance_mutations, hit.get_file())
-                results.append(self._get_result(hit, db_mutation))
+                             hit.get_amr_gene_id(), resistance_mutations, hit.get_file())
+                results.append(self._get_result(hit, db_mutation, phenotype))
 
             return results
 
@@ -26,7 +26,7 @@ class BlastResultsParserPointfinderResistance(BlastResultsParserPointfinder):
     '''.strip().split('\n')]
 
     def __init__(self, file_blast_map, arg_drug_table, blast_database, pid_threshold, plength_threshold,
-                 report_all=False, output_dir=None, genes_to_exclude=[]):
+                 report_all=False, output_dir=None, genes_to_exclude=[], mutation_cache=None):
         """
         Creates a new BlastResultsParserPointfinderResistance.
         :param file_blast_map: A map/dictionary linking input files to BLAST results files.
@@ -37,22 +37,26 @@ class BlastResultsParserPointfinderResistance(BlastResultsParserPointfinder):
         :param report_all: Whether or not to report all blast hits.
         :param output_dir: The directory where output files are being written.
         :param genes_to_exclude: A list of gene IDs to exclude from the results.
+        :param mutation_cache: A staramr.blast.results.pointfinder.PointfinderMutationCache storing the resistance
+                mutations of alignments seen before (None to use a new cache).
         """
         super().__init__(file_blast_map, blast_database, pid_threshold, plength_threshold, report_all,
-                         output_dir=output_dir, genes_to_exclude=genes_to_exclude)
+                         output_dir=output_dir, genes_to_exclude=genes_to_exclude, mutation_cache=mutation_cache)
         self._arg_drug_table = arg_drug_table
 
-    def _get_result(self, hit, db_mutation):
-        drug = self._arg_drug_table.get_drug(self._blast_database.get_organism(), hit.get_amr_gene_id(),
+    def _get_phenotype(self, gene, db_mutation):
+        drug = self._arg_drug_table.get_drug(self._blast_database.get_organism(), gene,
                                              db_mutation.get_mutation_position())
-        gene_name = hit.get_amr_gene_id() + " (" + db_mutation.get_mutation_string_short() + ")"
 
         if drug is None:
-            drug = 'unknown[' + gene_name + ']'
+            drug = 'unknown[' + gene + " (" + db_mutation.get_mutation_string_short() + ")" + ']'
 
+        return drug
+
+    def _get_result(self, hit, db_mutation, phenotype):
         return [hit.get_genome_id(),
-                gene_name,
-                drug,
+                hit.get_amr_gene_id() + " (" + db_mutation.get_mutation_string_short() + ")",
+                phenotype,
                 db_mutation.get_type(),
                 db_mutation.get_mutation_position(),
                 db_mutation.get_mutation_string(),
@@ -1,5 +1,7 @@
 import logging
 
+import numpy as np
+
 from staramr.blast.results.AMRHitHSP import AMRHitHSP
 from staramr.blast.results.pointfinder.codon.CodonMutationPosition import CodonMutationPosition
 
@@ -11,6 +13,7 @@ Class storing a PointFinder BLAST hit/hsp.
 
 
 class PointfinderHitHSP(AMRHitHSP):
+    __slots__ = []
 
     def __init__(self, file, blast_record):
         """
@@ -25,25 +28,52 @@ class PointfinderHitHSP(AMRHitHSP):
         Gets the particular gene name for the PointFinder hit.
         :return: The gene name.
         """
-        return self._blast_record['qseqid']
+        return self.get_amr_gene_id()
 
     def _get_match_positions(self):
-        amr_seq = self.get_amr_gene_seq()
-        genome_seq = self.get_genome_contig_hsp_seq()
+        """
+        Gets the positions of the mismatches between the amr gene and genome sequences of the HSP.
+        :return: A np.ndarray of the positions (0-based indexes of the BLAST match strings) of the mismatches.
+        """
+        amr_seq = np.frombuffer(self.get_amr_gene_seq().encode(), dtype=np.uint8)
+        genome_seq = np.frombuffer(self.get_genome_contig_hsp_seq().encode(), dtype=np.uint8)
+        length = min(len(amr_seq), len(genome_seq))
+
+        return np.flatnonzero(amr_seq[:length] != genome_seq[:length])
+
+    def _get_mutation_match_positions(self, start, resistance_positions):
+        """
+        Gets the positions of the mismatches to build mutations for, one for each codon with mismatches.
+        :param start: The start of the HSP in the amr gene.
+        :param resistance_positions: The codon positions of known resistance mutations in the gene (None for all
+                positions).
+        :return: A list of the positions (0-based indexes of the BLAST match strings) of the mismatches.
+        """
+        match_positions = self._get_match_positions()
+
+        # Mismatches in the same codon give the same codon mutation, so only the first mismatch of each codon is kept
+        codon_starts, first_mismatches = np.unique((start + match_positions + 2) // 3, return_index=True)
+        match_positions = match_positions[first_mismatches]
+
+        if resistance_positions is not None:
+            match_positions = match_positions[np.isin(codon_starts, list(resistance_positions))]
 
-        return [i for i, (x, y) in enumerate(zip(amr_seq, genome_seq)) if x != y]
+        return match_positions.tolist()
 
-    def _get_mutation_positions(self, start):
+    def _get_mutation_positions(self, start, resistance_positions=None):
         amr_seq = self.get_amr_gene_seq()
         genome_seq = self.get_genome_contig_hsp_seq()
 
         # @formatter:off
-        return [CodonMutationPosition(i, amr_seq, genome_seq, start) for i in self._get_match_positions()]
+        return [CodonMutationPosition(i, amr_seq, genome_seq, start) for i in
+                self._get_mutation_match_positions(start, resistance_positions)]
         # @formatter:on
 
-    def get_mutations(self):
+    def get_mutations(self, resistance_positions=None):
         """
         Gets a list of NucleotideMutationPosition for the individual mutations.
+        :param resistance_positions: The positions of known resistance mutations in the gene, to only build mutations
+                which can be resistance mutations (None for mutations at all positions).
         :return: A list of NucleotideMutationPosition.
         """
-        return self._get_mutation_positions(self.get_amr_gene_start())
+        return self._get_mutation_positions(self.get_amr_gene_start(), resistance_positions)
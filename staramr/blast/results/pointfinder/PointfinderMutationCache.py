@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from os import path
+from typing import Any, List, Tuple
+
+logger = logging.getLogger('PointfinderMutationCache')
+
+"""
+A Class storing the resistance mutations found in PointFinder alignments, so that the mutations of an alignment seen
+before (e.g., in another isolate of an outbreak) can be re-used instead of calling them again.
+"""
+
+
+class PointfinderMutationCache:
+    DEFAULT_MAX_SIZE = 10000
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """
+        Creates a new PointfinderMutationCache.
+        :param max_size: The maximum number of alignments to store. The least recently used alignments are removed
+                once the cache grows beyond this size.
+        """
+        if max_size < 1:
+            raise Exception("max_size=" + str(max_size) + " must be at least 1")
+
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._number_hits = 0
+        self._number_misses = 0
+
+        # The alignments used and stored since the last call to get_changes() (None when changes are not recorded)
+        self._used_keys = None
+        self._new_entries = None
+        self._changes_number_hits = 0
+        self._changes_number_misses = 0
+
+    @classmethod
+    def get_key(cls, database_name: str, gene: str, amr_gene_start: int, amr_gene_seq: str,
+                genome_seq: str) -> Tuple[str, str, int, bytes]:
+        """
+        Gets the key for the alignment of a PointFinder BLAST hit.
+        :param database_name: The name of the PointFinder database the gene is in.
+        :param gene: The gene.
+        :param amr_gene_start: The start of the alignment in the gene.
+        :param amr_gene_seq: The aligned sequence of the gene.
+        :param genome_seq: The aligned sequence of the genome.
+        :return: The key for the alignment.
+        """
+        # A fingerprint of the aligned sequences keeps the keys small, no matter the length of the gene
+        fingerprint = hashlib.sha1(amr_gene_seq.encode() + b'\0' + genome_seq.encode()).digest()
+        return database_name, gene, int(amr_gene_start), fingerprint
+
+    def get(self, key: Tuple) -> Any:
+        """
+        Gets the resistance mutations stored for the passed alignment, marking them as recently used.
+        :param key: The key for the alignment.
+        :return: The resistance mutations, or None if the alignment is not stored.
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self._number_misses += 1
+        else:
+            self._number_hits += 1
+            self._entries.move_to_end(key)
+            if self._used_keys is not None:
+                self._used_keys[key] = None
+
+        return value
+
+    def put(self, key: Tuple, value: Any) -> None:
+        """
+        Stores the resistance mutations for the passed alignment.
+        :param key: The key for the alignment.
+        :param value: The resistance mutations.
+        :return: None
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if self._new_entries is not None:
+            self._new_entries[key] = value
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def record_changes(self) -> None:
+        """
+        Starts recording the alignments used and stored in this cache (e.g., in another process), so that only these
+        changes have to be sent back with get_changes().
+        :return: None
+        """
+        self._used_keys = OrderedDict()
+        self._new_entries = OrderedDict()
+        self._changes_number_hits = self._number_hits
+        self._changes_number_misses = self._number_misses
+
+    def get_changes(self) -> Tuple[List[Tuple], List[Tuple[Tuple, Any]], int, int]:
+        """
+        Gets the changes to this cache since record_changes() or the last call to get_changes(), and starts recording
+        new changes.
+        :return: A tuple of (keys of the alignments used, (key, resistance mutations) of the alignments stored, number of
+                cache hits, number of cache misses), to pass to apply_changes() of another cache.
+        """
+        changes = (list(self._used_keys), list(self._new_entries.items()),
+                   self._number_hits - self._changes_number_hits, self._number_misses - self._changes_number_misses)
+        self.record_changes()
+        return changes
+
+    def apply_changes(self, changes: Tuple[List[Tuple], List[Tuple[Tuple, Any]], int, int]) -> None:
+        """
+        Applies the changes recorded by another cache (e.g., in another process) to this cache. Alignments already in
+        this cache are only marked as recently used if the other cache used them.
+        :param changes: The changes, from get_changes() of the other cache.
+        :return: None
+        """
+        used_keys, new_entries, number_hits, number_misses = changes
+        for key in used_keys:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+        for key, value in new_entries:
+            if key not in self._entries:
+                self.put(key, value)
+
+        self._number_hits += number_hits
+        self._number_misses += number_misses
+
+    def get_number_hits(self) -> int:
+        """
+        Gets the number of alignments which were found in the cache.
+        :return: The number of cache hits.
+        """
+        return self._number_hits
+
+    def get_number_misses(self) -> int:
+        """
+        Gets the number of alignments which were not found in the cache.
+        :return: The number of cache misses.
+        """
+        return self._number_misses
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self, file: str) -> None:
+        """
+        Writes the stored alignments to a file, to re-use them in later runs.
+        :param file: The file to write to.
+        :return: None
+        """
+        file_dir = path.dirname(file)
+        if file_dir:
+            os.makedirs(file_dir, exist_ok=True)
+
+        # Writes to a temporary file first so that a partially written cache is never loaded
+        tmp_fd, tmp_file = tempfile.mkstemp(dir=file_dir if file_dir else None, suffix='.tmp')
+        try:
+            with os.fdopen(tmp_fd, 'wb') as handle:
+                pickle.dump(list(self._entries.items()), handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, file)
+        finally:
+            if path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    @classmethod
+    def load(cls, file: str, max_size: int = DEFAULT_MAX_SIZE) -> 'PointfinderMutationCache':
+        """
+        Loads the alignments written to a file by a previous run.
+        :param file: The file to load from.
+        :param max_size: The maximum number of alignments to store.
+        :return: A new PointfinderMutationCache, which is empty if the file does not exist or cannot be read.
+        """
+        cache = cls(max_size)
+
+        try:
+            with open(file, 'rb') as handle:
+                entries = pickle.load(handle)
+        except FileNotFoundError:
+            return cache
+        except Exception as e:
+            logger.warning("Could not load PointFinder mutation cache [%s]: %s", file, e)
+            return cache
+
+        for key, value in entries:
+            cache.put(key, value)
+
+        logger.debug("Loaded %s alignments from PointFinder mutation cache [%s]", len(cache), file)
+        return cache
@@ -1,6 +1,8 @@
 import math
 
 import Bio.Seq
+import numpy as np
+from Bio.Data import CodonTable
 
 from staramr.blast.results.pointfinder.MutationPosition import MutationPosition
 
@@ -10,6 +12,10 @@ A Class defining a codon-based mutation for PointFinder.
 
 
 class CodonMutationPosition(MutationPosition):
+    # Amino acids of the codons of the standard table. Other codons (e.g., with ambiguous bases such as N, or partial
+    # codons) are translated with Bio.Seq.translate the first time they are seen and added to this table.
+    _CODON_AMINO_ACIDS = dict(CodonTable.unambiguous_dna_by_name['Standard'].forward_table,
+                              **{codon: '*' for codon in CodonTable.unambiguous_dna_by_name['Standard'].stop_codons})
 
     def __init__(self, match_position, database_amr_gene_string, input_genome_blast_string, database_amr_gene_start):
         """
@@ -27,6 +33,34 @@ class CodonMutationPosition(MutationPosition):
         self._database_amr_gene_codon = self._find_codon(database_amr_gene_string, match_position, frame_shift)
         self._input_genome_codon = self._find_codon(input_genome_blast_string, match_position, frame_shift)
 
+        self._database_amr_gene_amino_acid = self.translate_codon(self._database_amr_gene_codon)
+        self._input_genome_amino_acid = self.translate_codon(self._input_genome_codon)
+
+    @classmethod
+    def translate_codon(cls, codon):
+        """
+        Translates a codon into an amino acid with the standard table. If there is an indel, returns 'X'.
+        :param codon: The codon.
+        :return: The amino acid.
+        """
+        codon = codon.upper()
+        amino_acid = cls._CODON_AMINO_ACIDS.get(codon)
+        if amino_acid is None:
+            amino_acid = 'X' if '-' in codon else Bio.Seq.translate(codon, table='Standard')
+            cls._CODON_AMINO_ACIDS[codon] = amino_acid
+        return amino_acid
+
+    @classmethod
+    def translate_codons(cls, codons):
+        """
+        Translates many codons into amino acids with the standard table, translating each distinct codon once.
+        :param codons: A sequence of codons.
+        :return: A np.ndarray of the amino acids ('X' for codons with indels).
+        """
+        unique_codons, codon_indexes = np.unique(np.asarray(codons, dtype=str), return_inverse=True)
+        amino_acids = np.array([cls.translate_codon(codon) for codon in unique_codons], dtype=object)
+        return amino_acids[codon_indexes]
+
     def _find_codon(self, nucleotides, match_position, frame_shift):
         codon_start_index = match_position - frame_shift
         return nucleotides[codon_start_index:(codon_start_index + 3)].upper()
@@ -50,20 +84,14 @@ class CodonMutationPosition(MutationPosition):
         Gets the corresponding amino acid from the amr gene. If there is an indel, returns 'X'.
         :return: The amino acid from the amr gene.
         """
-        if '-' in self.get_database_amr_gene_codon():
-            return 'X'
-        else:
-            return Bio.Seq.translate(self.get_database_amr_gene_codon(), table='Standard')
+        return self._database_amr_gene_amino_acid
 
     def get_input_genome_amino_acid(self):
         """
         Gets the corresponding amino acid from the genome.  If there is an indel returns 'X'.
         :return: The amino acid from the genome.
         """
-        if '-' in self.get_input_genome_codon():
-            return 'X'
-        else:
-            return Bio.Seq.translate(self.get_input_genome_codon(), table='Standard')
+        return self._input_genome_amino_acid
 
     def get_input_genome_codon(self):
         """
@@ -1,8 +1,11 @@
+import numpy as np
+
 from staramr.blast.results.pointfinder.PointfinderHitHSP import PointfinderHitHSP
 from staramr.blast.results.pointfinder.nucleotide.NucleotideMutationPosition import NucleotideMutationPosition
 
 
 class PointfinderHitHSPRNA(PointfinderHitHSP):
+    __slots__ = []
 
     def __init__(self, file, blast_record):
         """
@@ -12,10 +15,19 @@ class PointfinderHitHSPRNA(PointfinderHitHSP):
         """
         super().__init__(file, blast_record)
 
-    def _get_mutation_positions(self, start):
+    def _get_mutation_match_positions(self, start, resistance_positions):
+        match_positions = self._get_match_positions()
+
+        if resistance_positions is not None:
+            match_positions = match_positions[np.isin(start + match_positions, list(resistance_positions))]
+
+        return match_positions.tolist()
+
+    def _get_mutation_positions(self, start, resistance_positions=None):
         amr_seq = self.get_amr_gene_seq()
         genome_seq = self.get_genome_contig_hsp_seq()
 
         # @formatter:off
-        return [NucleotideMutationPosition(i, amr_seq, genome_seq, start) for i in self._get_match_positions()]
+        return [NucleotideMutationPosition(i, amr_seq, genome_seq, start) for i in
+                self._get_mutation_match_positions(start, resistance_positions)]
         # @formatter:on
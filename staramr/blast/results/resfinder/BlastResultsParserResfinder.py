@@ -1,5 +1,6 @@
 from os import path
 
+from staramr.blast.resfinder.ResfinderBlastDatabase import ResfinderBlastDatabase
 from staramr.blast.results.BlastResultsParser import BlastResultsParser
 from staramr.blast.results.resfinder.ResfinderHitHSP import ResfinderHitHSP
 
@@ -37,6 +38,23 @@ class BlastResultsParserResfinder(BlastResultsParser):
         super().__init__(file_blast_map, blast_database, pid_threshold, plength_threshold, report_all,
                          output_dir=output_dir, genes_to_exclude=genes_to_exclude)
 
+    def _split_blast_table(self, database_name, blast_table):
+        if database_name != ResfinderBlastDatabase.COMBINED_DATABASE_NAME:
+            return super()._split_blast_table(database_name, blast_table)
+
+        allele_database_names = self._blast_database.get_allele_database_names()
+        unknown_alleles = set(blast_table['qseqid']) - set(allele_database_names)
+        if unknown_alleles:
+            raise Exception("Could not find drug class for alleles " + str(sorted(unknown_alleles)))
+
+        database_alleles = {}
+        for allele in blast_table['qseqid'].unique():
+            for name in allele_database_names[allele]:
+                database_alleles.setdefault(name, []).append(allele)
+
+        return [(name, blast_table[blast_table['qseqid'].isin(database_alleles[name])]) for name in
+                sorted(database_alleles)]
+
     def _create_hit(self, file, database_name, blast_record):
         return ResfinderHitHSP(file, blast_record)
 
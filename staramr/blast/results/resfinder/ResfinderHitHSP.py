@@ -1,5 +1,7 @@
 import logging
 import re
+from typing import Dict
+from typing import Tuple
 
 from staramr.blast.results.AMRHitHSP import AMRHitHSP
 
@@ -11,6 +13,10 @@ A Class storing a ResFinder-specific BLAST hit/HSP.
 
 
 class ResfinderHitHSP(AMRHitHSP):
+    __slots__ = ['_gene', '_gene_variant', '_accession']
+
+    # Maps allele ids to (gene, variant, accession), so each allele is only split up once for all hits
+    _allele_names: Dict[str, Tuple[str, str, str]] = {}
 
     def __init__(self, file, blast_record):
         """
@@ -22,14 +28,25 @@ class ResfinderHitHSP(AMRHitHSP):
         """
         super().__init__(file, blast_record)
 
-        logger.debug("record=%s", self._blast_record)
+        logger.debug("record=%s", blast_record)
+
+        self._gene, self._gene_variant, self._accession = self._split_allele_id(self.get_amr_gene_id())
 
-        re_search = re.search(r'^([^_]+)_([^_]+)_(\S+)', self.get_amr_gene_id())
-        if not re_search:
-            raise Exception("Could not split up seq name for [" + self.get_amr_gene_id() + "]")
-        self._gene = re_search.group(1)
-        self._gene_variant = re_search.group(2)
-        self._accession = re_search.group(3)
+    @classmethod
+    def _split_allele_id(cls, allele_id: str) -> Tuple[str, str, str]:
+        """
+        Splits up a ResFinder allele id into the gene name, variant number and accession.
+        :param allele_id: The allele id.
+        :return: A tuple of (gene, variant, accession).
+        """
+        allele_names = cls._allele_names.get(allele_id)
+        if allele_names is None:
+            re_search = re.search(r'^([^_]+)_([^_]+)_(\S+)', allele_id)
+            if not re_search:
+                raise Exception("Could not split up seq name for [" + allele_id + "]")
+            allele_names = re_search.groups()
+            cls._allele_names[allele_id] = allele_names
+        return allele_names
 
     def get_amr_gene_name(self):
         """
@@ -1,10 +1,14 @@
 import logging
 import shutil
+import tempfile
+from os import path
 from collections import OrderedDict
 from typing import Dict
 
 from staramr.databases.BlastDatabaseRepository import BlastDatabaseRepository, BlastDatabaseRepositoryStripGitDir
 from staramr.blast.AbstractBlastDatabase import AbstractBlastDatabase
+from staramr.blast.AlleleClusters import AlleleClusters
+from staramr.blast.PrebuiltBlastDatabases import PrebuiltBlastDatabases
 from staramr.blast.resfinder.ResfinderBlastDatabase import ResfinderBlastDatabase
 from staramr.blast.pointfinder.PointfinderBlastDatabase import PointfinderBlastDatabase
 
@@ -48,25 +52,76 @@ class BlastDatabaseRepositories:
         else:
             self._database_repositories[database_name] = database_repository
 
-    def build(self, commits: Dict[str, str] = None):
+    def build(self, commits: Dict[str, str] = None, prebuilt_databases: bool = False):
         """
         Downloads and builds new databases.
         :param commits: A map of {'database_name' : 'commit'} defining the particular commits to build.
+        :param prebuilt_databases: Whether or not to also compile the databases into BLAST databases (and a k-mer
+            index), which requires makeblastdb.
         :return: None
         """
         for database_name in self._database_repositories:
             commit = commits.get(database_name) if commits else None
             self._database_repositories[database_name].build(commit)
+            if prebuilt_databases:
+                self._build_prebuilt_databases(database_name)
 
-    def update(self, commits: Dict[str, str] = None):
+    def update(self, commits: Dict[str, str] = None, prebuilt_databases: bool = False):
         """
         Updates an existing database to the latest revisions (or passed specific revisions).
         :param commits: A map of {'database_name' : 'commit'} defining the particular commits to update to.
+        :param prebuilt_databases: Whether or not to also compile the databases into BLAST databases (and a k-mer
+            index), which requires makeblastdb. Otherwise, any previously compiled databases are left as-is and are
+            only used while they match the database commit.
         :return: None
         """
         for database_name in self._database_repositories:
             commit = commits.get(database_name) if commits else None
             self._database_repositories[database_name].update(commit)
+            if prebuilt_databases:
+                self._build_prebuilt_databases(database_name)
+
+    def _build_prebuilt_databases(self, database_name: str) -> None:
+        """
+        Compiles the fasta files of a database repository into BLAST databases.
+        :param database_name: The name of the database.
+        :return: None
+        """
+        repo = self._database_repositories[database_name]
+
+        with tempfile.TemporaryDirectory() as combined_dir:
+            repo.get_prebuilt_databases().build(self._get_prebuilt_fasta_files(database_name, combined_dir),
+                                                repo.get_commit())
+
+    def build_allele_clusters(self, database_name: str) -> AlleleClusters:
+        """
+        Clusters near-identical alleles in the fasta files of a database repository, for searching the prebuilt BLAST
+        databases of the cluster representatives first.
+        :param database_name: The name of the database.
+        :return: The AlleleClusters.
+        """
+        repo = self._database_repositories[database_name]
+
+        with tempfile.TemporaryDirectory() as combined_dir:
+            return repo.get_prebuilt_databases().build_allele_clusters(
+                self._get_prebuilt_fasta_files(database_name, combined_dir))
+
+    def _get_prebuilt_fasta_files(self, database_name, combined_dir):
+        """
+        Gets the fasta files of a database repository to compile, including the combined ResFinder file.
+        :param database_name: The name of the database.
+        :param combined_dir: A directory to write the combined ResFinder file to.
+        :return: A map of {'database_name': 'fasta_file'}.
+        """
+        repo = self._database_repositories[database_name]
+        fasta_files = PrebuiltBlastDatabases.find_fasta_files(repo.get_git_dir())
+
+        if database_name == 'resfinder':
+            combined_file = path.join(combined_dir, ResfinderBlastDatabase.COMBINED_DATABASE_NAME + '.fsa')
+            ResfinderBlastDatabase(repo.get_git_dir()).write_combined_database(combined_file)
+            fasta_files[ResfinderBlastDatabase.COMBINED_DATABASE_NAME] = combined_file
+
+        return fasta_files
 
     def remove(self):
         """
@@ -117,6 +172,23 @@ class BlastDatabaseRepositories:
 
         return True
 
+    def get_prebuilt_databases(self, name: str) -> PrebuiltBlastDatabases:
+        """
+        Gets the BLAST databases compiled for the given database name.
+        :param name: The database name.
+        :return: The PrebuiltBlastDatabases for the given database name.
+        """
+        return self._database_repositories[name].get_prebuilt_databases()
+
+    def is_prebuilt_databases_current(self, name: str) -> bool:
+        """
+        Whether or not the BLAST databases compiled for the given database name match the current database commit.
+        :param name: The database name.
+        :return: True if the compiled BLAST databases exist and are up to date, False otherwise.
+        """
+        repo = self._database_repositories[name]
+        return repo.get_prebuilt_databases().is_at_commit(repo.get_commit())
+
     def is_dist(self):
         """
         Whether or not we are building distributable versions of the blast database repositories (that is, should we strip out the .git directories).
@@ -8,6 +8,7 @@ from typing import Dict
 
 import git
 
+from staramr.blast.PrebuiltBlastDatabases import PrebuiltBlastDatabases
 from staramr.exceptions.DatabaseErrorException import DatabaseErrorException
 from staramr.exceptions.DatabaseNotFoundException import DatabaseNotFoundException
 
@@ -32,6 +33,7 @@ class BlastDatabaseRepository:
         self._git_repository_url = git_repository_url
 
         self._git_dir = path.join(database_root_dir, database_name)
+        self._prebuilt_databases = PrebuiltBlastDatabases(path.join(database_root_dir, database_name + '-blastdb'))
 
     def build(self, commit: str = None) -> None:
         """
@@ -81,6 +83,7 @@ class BlastDatabaseRepository:
         :return: None
         """
         shutil.rmtree(self._git_dir)
+        self._prebuilt_databases.remove()
 
     def is_at_commit(self, commit: str = None) -> bool:
         """
@@ -88,7 +91,14 @@ class BlastDatabaseRepository:
         :param commit: The commit to check.
         :return: True if the database is at the specified commit, otherwise False.
         """
-        return self.info()[self._get_info_name('commit')] == commit
+        return self.get_commit() == commit
+
+    def get_commit(self) -> str:
+        """
+        Gets the current commit of this database repo.
+        :return: The current commit.
+        """
+        return self.info()[self._get_info_name('commit')]
 
     def info(self) -> Dict[str,str]:
         """
@@ -129,6 +139,13 @@ class BlastDatabaseRepository:
         """
         return self._git_dir
 
+    def get_prebuilt_databases(self) -> PrebuiltBlastDatabases:
+        """
+        Gets the BLAST databases compiled from the fasta files in this database repo.
+        :return: The PrebuiltBlastDatabases.
+        """
+        return self._prebuilt_databases
+
 
 """
 A Class used to handle interactions with the BLAST database repositories, stripping out the .git directory.
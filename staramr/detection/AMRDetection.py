@@ -1,7 +1,15 @@
+import logging
+import multiprocessing
+import queue
+from os import path
+
 from staramr.blast.results.pointfinder.BlastResultsParserPointfinder import BlastResultsParserPointfinder
+from staramr.blast.results.pointfinder.PointfinderMutationCache import PointfinderMutationCache
 from staramr.blast.results.resfinder.BlastResultsParserResfinder import BlastResultsParserResfinder
 from staramr.results.AMRDetectionSummary import AMRDetectionSummary
 
+logger = logging.getLogger('AMRDetection')
+
 """
 A Class to handle scanning files for AMR genes.
 """
@@ -10,7 +18,8 @@ A Class to handle scanning files for AMR genes.
 class AMRDetection:
 
     def __init__(self, resfinder_database, amr_detection_handler, pointfinder_database=None,
-                 include_negative_results=False, output_dir=None, genes_to_exclude=[]):
+                 include_negative_results=False, output_dir=None, genes_to_exclude=[], parse_processes=1,
+                 pointfinder_mutation_cache=None):
         """
         Builds a new AMRDetection object.
         :param resfinder_database: The staramr.blast.resfinder.ResfinderBlastDatabase for the particular ResFinder database.
@@ -19,6 +28,10 @@ class AMRDetection:
         :param include_negative_results:  If True, include files lacking AMR genes in the resulting summary table.
         :param output_dir: The directory where output fasta files are to be written into (None for no output fasta files).
         :param genes_to_exclude: A list of gene IDs to exclude from the results.
+        :param parse_processes: The number of processes to parse the BLAST results of input files in (1 to parse them
+                in this process).
+        :param pointfinder_mutation_cache: A staramr.blast.results.pointfinder.PointfinderMutationCache storing the
+                resistance mutations of PointFinder alignments seen before (None to use a new cache).
         """
         self._resfinder_database = resfinder_database
         self._amr_detection_handler = amr_detection_handler
@@ -33,27 +46,42 @@ class AMRDetection:
         self._output_dir = output_dir
 
         self._genes_to_exclude = genes_to_exclude
+        self._parse_processes = parse_processes
+
+        if pointfinder_mutation_cache is None:
+            self._pointfinder_mutation_cache = PointfinderMutationCache()
+        else:
+            self._pointfinder_mutation_cache = pointfinder_mutation_cache
 
     def _create_amr_summary(self, files, resfinder_dataframe, pointfinder_dataframe):
         amr_detection_summary = AMRDetectionSummary(files, resfinder_dataframe,
                                                     pointfinder_dataframe)
         return amr_detection_summary.create_summary(self._include_negative_results)
 
-    def _create_resfinder_dataframe(self, resfinder_blast_map, pid_threshold, plength_threshold, report_all):
+    def _create_resfinder_parser(self, resfinder_blast_map, pid_threshold, plength_threshold, report_all):
         resfinder_parser = BlastResultsParserResfinder(resfinder_blast_map, self._resfinder_database, pid_threshold,
                                                        plength_threshold, report_all, output_dir=self._output_dir,
                                                        genes_to_exclude=self._genes_to_exclude)
-        return resfinder_parser.parse_results()
+        return resfinder_parser
 
-    def _create_pointfinder_dataframe(self, pointfinder_blast_map, pid_threshold, plength_threshold, report_all):
+    def _create_pointfinder_parser(self, pointfinder_blast_map, pid_threshold, plength_threshold, report_all):
         pointfinder_parser = BlastResultsParserPointfinder(pointfinder_blast_map, self._pointfinder_database,
                                                            pid_threshold, plength_threshold, report_all,
                                                            output_dir=self._output_dir,
-                                                           genes_to_exclude=self._genes_to_exclude)
-        return pointfinder_parser.parse_results()
+                                                           genes_to_exclude=self._genes_to_exclude,
+                                                           mutation_cache=self._pointfinder_mutation_cache)
+        return pointfinder_parser
+
+    def _create_results_dataframe(self, parser, file_names, file_results):
+        # Combines results in the order of the input files so that results do not depend on the order BLAST jobs
+        # completed
+        results = []
+        for file in file_names:
+            results.extend(file_results[file])
+        return parser.create_results_dataframe(results)
 
     def run_amr_detection(self, files, pid_threshold, plength_threshold_resfinder, plength_threshold_pointfinder,
-                          report_all=False):
+                          report_all=False, results_journal=None):
         """
         Scans the passed files for AMR genes.
         :param files: The files to scan.
@@ -61,24 +89,162 @@ class AMRDetection:
         :param plength_threshold_resfinder: The percent length overlap for BLAST results (resfinder).
         :param plength_threshold_pointfinder: The percent length overlap for BLAST results (pointfinder).
         :param report_all: Whether or not to report all blast hits.
+        :param results_journal: A staramr.results.ResultsJournal to record the results of each file in, and to load
+                the results of files which were already complete from (None to disable).
+        :return: None
+        """
+        if results_journal is not None:
+            completed_files = results_journal.get_completed_files()
+            files_to_scan = [file for file in files if path.basename(file) not in completed_files]
+            if len(files_to_scan) < len(files):
+                logger.info("Skipping %s files already complete in the results journal",
+                            len(files) - len(files_to_scan))
+        else:
+            files_to_scan = files
+
+        if files_to_scan:
+            self._amr_detection_handler.run_blasts(files_to_scan)
+            completed_files = self._amr_detection_handler.as_completed_files()
+        else:
+            completed_files = []
+
+        resfinder_blast_map = self._amr_detection_handler.get_resfinder_outputs(wait=False)
+        if self._has_pointfinder:
+            pointfinder_blast_map = self._amr_detection_handler.get_pointfinder_outputs(wait=False)
+        else:
+            pointfinder_blast_map = None
+
+        # Parses the results for each file as soon as its BLAST jobs are done, while other files are still running
+        self._parse_blast_results(files, resfinder_blast_map, pointfinder_blast_map, completed_files, pid_threshold,
+                                  plength_threshold_resfinder, plength_threshold_pointfinder, report_all,
+                                  results_journal)
+
+    def run_amr_detection_from_blast_results(self, files, resfinder_blast_map, pointfinder_blast_map, pid_threshold,
+                                             plength_threshold_resfinder, plength_threshold_pointfinder,
+                                             report_all=False):
+        """
+        Detects AMR genes from existing BLAST results (e.g., from a staramr.blast.BlastHitsArchive), without running
+        BLAST.
+        :param files: The files which were scanned.
+        :param resfinder_blast_map: A map of { 'input_file_name' => { 'database_name' => BLAST results } } for ResFinder.
+        :param pointfinder_blast_map: A map of { 'input_file_name' => { 'database_name' => BLAST results } } for
+                PointFinder (None if PointFinder is not used).
+        :param pid_threshold: The percent identity threshold for BLAST results.
+        :param plength_threshold_resfinder: The percent length overlap for BLAST results (resfinder).
+        :param plength_threshold_pointfinder: The percent length overlap for BLAST results (pointfinder).
+        :param report_all: Whether or not to report all blast hits.
         :return: None
         """
-        self._amr_detection_handler.run_blasts(files)
+        self._parse_blast_results(files, resfinder_blast_map, pointfinder_blast_map, list(resfinder_blast_map),
+                                  pid_threshold, plength_threshold_resfinder, plength_threshold_pointfinder,
+                                  report_all)
+
+    def _parse_blast_results(self, files, resfinder_blast_map, pointfinder_blast_map, completed_files, pid_threshold,
+                             plength_threshold_resfinder, plength_threshold_pointfinder, report_all,
+                             results_journal=None):
+        resfinder_parser = self._create_resfinder_parser(resfinder_blast_map, pid_threshold,
+                                                         plength_threshold_resfinder, report_all)
+        if self._has_pointfinder:
+            pointfinder_parser = self._create_pointfinder_parser(pointfinder_blast_map, pid_threshold,
+                                                                 plength_threshold_pointfinder, report_all)
+        else:
+            pointfinder_parser = None
+
+        file_names = [path.basename(file) for file in files]
+        genome_files = {path.basename(file): file for file in files}
+
+        resfinder_results = {}
+        pointfinder_results = {}
+        if results_journal is not None:
+            for file in results_journal.get_completed_files().intersection(file_names):
+                resfinder_results[file], pointfinder_results[file] = results_journal.get_results(file)
+
+        if self._parse_processes > 1:
+            parsed_files = self._parse_files_in_processes(resfinder_blast_map, pointfinder_blast_map, completed_files,
+                                                          genome_files, pid_threshold, plength_threshold_resfinder,
+                                                          plength_threshold_pointfinder, report_all)
+        else:
+            parsed_files = (_parse_file_results(resfinder_parser, pointfinder_parser, file, genome_files.get(file)) for
+                            file in completed_files)
+
+        for file, file_resfinder_results, file_pointfinder_results in parsed_files:
+            resfinder_results[file] = file_resfinder_results
+            pointfinder_results[file] = file_pointfinder_results
+            if results_journal is not None:
+                results_journal.add(file, resfinder_results[file], pointfinder_results[file])
 
-        resfinder_blast_map = self._amr_detection_handler.get_resfinder_outputs()
-        self._resfinder_dataframe = self._create_resfinder_dataframe(resfinder_blast_map, pid_threshold,
-                                                                     plength_threshold_resfinder, report_all)
+        self._resfinder_dataframe = self._create_results_dataframe(resfinder_parser, file_names, resfinder_results)
 
         if self._has_pointfinder:
-            pointfinder_blast_map = self._amr_detection_handler.get_pointfinder_outputs()
-            self._pointfinder_dataframe = self._create_pointfinder_dataframe(pointfinder_blast_map, pid_threshold,
-                                                                             plength_threshold_pointfinder, report_all)
+            self._pointfinder_dataframe = self._create_results_dataframe(pointfinder_parser, file_names,
+                                                                       pointfinder_results)
         else:
             self._pointfinder_dataframe = None
 
         self._summary_dataframe = self._create_amr_summary(files, self._resfinder_dataframe,
                                                            self._pointfinder_dataframe)
 
+    def _parse_files_in_processes(self, resfinder_blast_map, pointfinder_blast_map, completed_files, genome_files,
+                                  pid_threshold, plength_threshold_resfinder, plength_threshold_pointfinder,
+                                  report_all):
+        """
+        Parses the BLAST results of each input file in a pool of processes, as soon as the BLAST jobs of the file are
+        complete. Each process is sent parsers without any BLAST results (along with a snapshot of the PointFinder
+        mutation cache) once when it starts, then the BLAST results of each file it parses. Only the changes made to a
+        process' cache while parsing a file are sent back. The processes are started from a fresh server (or spawned)
+        rather than forked, since BLAST jobs are running in threads of this process.
+        :return: An iterator of (file, ResFinder result rows, PointFinder result rows) tuples, in the order the files
+                are parsed.
+        """
+        resfinder_parser = self._create_resfinder_parser({}, pid_threshold, plength_threshold_resfinder, report_all)
+        if self._has_pointfinder:
+            pointfinder_parser = self._create_pointfinder_parser({}, pid_threshold, plength_threshold_pointfinder,
+                                                                 report_all)
+        else:
+            pointfinder_parser = None
+
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        parsed_files = queue.Queue()
+        number_pending = 0
+        with multiprocessing.get_context(start_method).Pool(self._parse_processes, initializer=_init_parse_process,
+                                                            initargs=(resfinder_parser, pointfinder_parser)) as pool:
+            for file in completed_files:
+                pool.apply_async(_parse_file_results_in_process,
+                                 (file, genome_files.get(file), resfinder_blast_map[file],
+                                  pointfinder_blast_map[file] if pointfinder_parser is not None else None),
+                                 callback=parsed_files.put, error_callback=parsed_files.put)
+                number_pending += 1
+
+                # Passes along files which are already parsed while waiting on BLAST for the others
+                while True:
+                    try:
+                        parsed_file = parsed_files.get_nowait()
+                    except queue.Empty:
+                        break
+                    number_pending -= 1
+                    yield self._merge_parsed_file(parsed_file)
+
+            while number_pending > 0:
+                number_pending -= 1
+                yield self._merge_parsed_file(parsed_files.get())
+
+    def _merge_parsed_file(self, parsed_file):
+        if isinstance(parsed_file, BaseException):
+            raise parsed_file
+
+        file, resfinder_results, pointfinder_results, pointfinder_mutation_cache_changes = parsed_file
+        if pointfinder_mutation_cache_changes is not None:
+            self._pointfinder_mutation_cache.apply_changes(pointfinder_mutation_cache_changes)
+
+        return file, resfinder_results, pointfinder_results
+
+    def get_pointfinder_mutation_cache(self):
+        """
+        Gets the cache of resistance mutations of the PointFinder alignments parsed so far.
+        :return: The staramr.blast.results.pointfinder.PointfinderMutationCache.
+        """
+        return self._pointfinder_mutation_cache
+
     def get_resfinder_results(self):
         """
         Gets a pd.DataFrame for the ResFinder results.
@@ -99,3 +265,67 @@ class AMRDetection:
         :return: A pd.DataFrame for a summary table of the results.
         """
         return self._summary_dataframe
+
+
+def _parse_file_results(resfinder_parser, pointfinder_parser, file, genome_file, resfinder_databases=None,
+                        pointfinder_databases=None):
+    """
+    Parses the BLAST results for a single input file. This is a module-level function so that it can be run in a pool
+    of processes.
+    :param resfinder_parser: The parser for the ResFinder results.
+    :param pointfinder_parser: The parser for the PointFinder results (None if PointFinder is not used).
+    :param file: The name of the input file.
+    :param genome_file: The path to the input file (None if not available).
+    :param resfinder_databases: A map of {'database_name': BLAST results} for ResFinder (None to use the results in the
+            parser).
+    :param pointfinder_databases: A map of {'database_name': BLAST results} for PointFinder (None to use the results in
+            the parser).
+    :return: A tuple of (file, ResFinder result rows, PointFinder result rows).
+    """
+    logger.debug("BLAST complete for %s, parsing results", file)
+    resfinder_results = resfinder_parser.parse_file_results(file, genome_file, resfinder_databases)
+    if pointfinder_parser is not None:
+        pointfinder_results = pointfinder_parser.parse_file_results(file, genome_file, pointfinder_databases)
+    else:
+        pointfinder_results = []
+
+    return file, resfinder_results, pointfinder_results
+
+
+# The parsers of a process in a pool, sent once when the process starts instead of with every file
+_process_resfinder_parser = None
+_process_pointfinder_parser = None
+
+
+def _init_parse_process(resfinder_parser, pointfinder_parser):
+    """
+    Sets up a process in a pool for parsing BLAST results.
+    :param resfinder_parser: The parser for the ResFinder results.
+    :param pointfinder_parser: The parser for the PointFinder results (None if PointFinder is not used). Its
+            PointfinderMutationCache is a snapshot of the cache of the main process.
+    :return: None
+    """
+    global _process_resfinder_parser, _process_pointfinder_parser
+
+    _process_resfinder_parser = resfinder_parser
+    _process_pointfinder_parser = pointfinder_parser
+    if pointfinder_parser is not None:
+        pointfinder_parser.get_mutation_cache().record_changes()
+
+
+def _parse_file_results_in_process(file, genome_file, resfinder_databases, pointfinder_databases):
+    """
+    Parses the BLAST results for a single input file in a pool of processes, with the parsers of the process.
+    :param file: The name of the input file.
+    :param genome_file: The path to the input file (None if not available).
+    :param resfinder_databases: A map of {'database_name': BLAST results} for ResFinder.
+    :param pointfinder_databases: A map of {'database_name': BLAST results} for PointFinder.
+    :return: A tuple of (file, ResFinder result rows, PointFinder result rows, PointFinder mutation cache changes),
+            where the changes are the ones made while parsing this file, to apply to the cache of the main process.
+    """
+    parsed_file = _parse_file_results(_process_resfinder_parser, _process_pointfinder_parser, file, genome_file,
+                                      resfinder_databases, pointfinder_databases)
+    if _process_pointfinder_parser is not None:
+        return parsed_file + (_process_pointfinder_parser.get_mutation_cache().get_changes(),)
+    else:
+        return parsed_file + (None,)
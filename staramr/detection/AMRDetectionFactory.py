@@ -14,7 +14,8 @@ class AMRDetectionFactory:
         pass
 
     def build(self, resfinder_database, blast_handler, pointfinder_database, include_negatives,
-              include_resistances=False, output_dir=None, genes_to_exclude=[]):
+              include_resistances=False, output_dir=None, genes_to_exclude=[], parse_processes=1,
+              pointfinder_mutation_cache=None):
         """
         Builds a new AMRDetection object.
         :param resfinder_database: The staramr.blast.resfinder.ResfinderBlastDatabase for the particular ResFinder database.
@@ -24,13 +25,20 @@ class AMRDetectionFactory:
         :param include_resistances: If True, include predicted drug resistances in output.
         :param output_dir: The directory where output files are being written.
         :param genes_to_exclude: A list of gene IDs to exclude from the results.
+        :param parse_processes: The number of processes to parse the BLAST results of input files in.
+        :param pointfinder_mutation_cache: A staramr.blast.results.pointfinder.PointfinderMutationCache storing the
+                resistance mutations of PointFinder alignments seen before (None to use a new cache).
         :return: A new AMRDetection object.
         """
 
         if include_resistances:
             return AMRDetectionResistance(resfinder_database, ARGDrugTableResfinder(), blast_handler,
                                           ARGDrugTablePointfinder(), pointfinder_database, include_negatives,
-                                          output_dir=output_dir, genes_to_exclude=genes_to_exclude)
+                                          output_dir=output_dir, genes_to_exclude=genes_to_exclude,
+                                          parse_processes=parse_processes,
+                                          pointfinder_mutation_cache=pointfinder_mutation_cache)
         else:
             return AMRDetection(resfinder_database, blast_handler, pointfinder_database, include_negatives,
-                                output_dir=output_dir, genes_to_exclude=genes_to_exclude)
+                                output_dir=output_dir, genes_to_exclude=genes_to_exclude,
+                                parse_processes=parse_processes,
+                                pointfinder_mutation_cache=pointfinder_mutation_cache)
@@ -12,7 +12,8 @@ A Class to handle scanning files for AMR genes and also include pheneotypes/resi
 class AMRDetectionResistance(AMRDetection):
 
     def __init__(self, resfinder_database, arg_drug_table_resfinder, amr_detection_handler, arg_drug_table_pointfinder,
-                 pointfinder_database=None, include_negative_results=False, output_dir=None, genes_to_exclude=[]):
+                 pointfinder_database=None, include_negative_results=False, output_dir=None, genes_to_exclude=[],
+                 parse_processes=1, pointfinder_mutation_cache=None):
         """
         Builds a new AMRDetectionResistance.
         :param resfinder_database: The staramr.blast.resfinder.ResfinderBlastDatabase for the particular ResFinder database.
@@ -23,28 +24,34 @@ class AMRDetectionResistance(AMRDetection):
         :param include_negative_results:  If True, include files lacking AMR genes in the resulting summary table.
         :param output_dir: The directory where output fasta files are to be written into (None for no output fasta files).
         :param genes_to_exclude: A list of gene IDs to exclude from the results.
+        :param parse_processes: The number of processes to parse the BLAST results of input files in (1 to parse them
+                in this process).
+        :param pointfinder_mutation_cache: A staramr.blast.results.pointfinder.PointfinderMutationCache storing the
+                resistance mutations of PointFinder alignments seen before (None to use a new cache).
         """
         super().__init__(resfinder_database, amr_detection_handler, pointfinder_database, include_negative_results,
-                         output_dir=output_dir, genes_to_exclude=genes_to_exclude)
+                         output_dir=output_dir, genes_to_exclude=genes_to_exclude, parse_processes=parse_processes,
+                         pointfinder_mutation_cache=pointfinder_mutation_cache)
         self._arg_drug_table_resfinder = arg_drug_table_resfinder
         self._arg_drug_table_pointfinder = arg_drug_table_pointfinder
 
-    def _create_resfinder_dataframe(self, resfinder_blast_map, pid_threshold, plength_threshold, report_all):
+    def _create_resfinder_parser(self, resfinder_blast_map, pid_threshold, plength_threshold, report_all):
         resfinder_parser = BlastResultsParserResfinderResistance(resfinder_blast_map, self._arg_drug_table_resfinder,
                                                                  self._resfinder_database, pid_threshold,
                                                                  plength_threshold, report_all,
                                                                  output_dir=self._output_dir,
                                                                  genes_to_exclude=self._genes_to_exclude)
-        return resfinder_parser.parse_results()
+        return resfinder_parser
 
-    def _create_pointfinder_dataframe(self, pointfinder_blast_map, pid_threshold, plength_threshold, report_all):
+    def _create_pointfinder_parser(self, pointfinder_blast_map, pid_threshold, plength_threshold, report_all):
         pointfinder_parser = BlastResultsParserPointfinderResistance(pointfinder_blast_map,
                                                                      self._arg_drug_table_pointfinder,
                                                                      self._pointfinder_database,
                                                                      pid_threshold, plength_threshold, report_all,
                                                                      output_dir=self._output_dir,
-                                                                     genes_to_exclude=self._genes_to_exclude)
-        return pointfinder_parser.parse_results()
+                                                                     genes_to_exclude=self._genes_to_exclude,
+                                                                     mutation_cache=self._pointfinder_mutation_cache)
+        return pointfinder_parser
 
     def _create_amr_summary(self, files, resfinder_dataframe, pointfinder_dataframe):
         amr_detection_summary = AMRDetectionSummaryResistance(files, resfinder_dataframe, pointfinder_dataframe)
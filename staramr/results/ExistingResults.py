@@ -0,0 +1,94 @@
+import logging
+from os import path
+from typing import Dict, Set
+
+import pandas as pd
+
+from staramr.Utils import get_dict_from_string_with_spacing
+
+logger = logging.getLogger('ExistingResults')
+
+"""
+A Class for reading the results written to an existing output directory, so that results for new files can be merged
+into them.
+"""
+
+
+class ExistingResults:
+    INDEX = 'Isolate ID'
+    BLANK = '-'
+    SORT_COLUMNS = ['Isolate ID', 'Gene']
+    NUMERIC_COLUMNS = ['Position', '%Identity', '%Overlap', 'Start', 'End']
+
+    def __init__(self, output_files: Dict[str, str]) -> None:
+        """
+        Creates a new ExistingResults.
+        :param output_files: A dictionary of the existing output files with keys 'summary', 'resfinder', 'pointfinder'
+                and 'settings'.
+        """
+        self._output_files = output_files
+
+    def get_settings(self) -> Dict[str, str]:
+        """
+        Gets the settings the existing results were generated with.
+        :return: The settings as an OrderedDict of key/value pairs.
+        """
+        with open(self._output_files['settings'], 'r') as settings_handle:
+            return get_dict_from_string_with_spacing(settings_handle.read())
+
+    def has_pointfinder(self) -> bool:
+        """
+        Whether or not the existing results include PointFinder results.
+        :return: True if there are existing PointFinder results, False otherwise.
+        """
+        return self._output_files['pointfinder'] is not None and path.exists(self._output_files['pointfinder'])
+
+    def _read_table(self, name):
+        table_file = self._output_files[name]
+        if table_file is None or not path.exists(table_file):
+            return None
+
+        table = pd.read_csv(table_file, sep='\t', dtype=str, keep_default_na=False, na_values=[self.BLANK])
+        for column in self.NUMERIC_COLUMNS:
+            if column in table.columns:
+                table[column] = pd.to_numeric(table[column])
+        return table.set_index(self.INDEX)
+
+    def get_isolate_ids(self) -> Set[str]:
+        """
+        Gets the isolate IDs which are already part of the existing results.
+        :return: The set of isolate IDs.
+        """
+        isolate_ids = set()
+        for name in ['summary', 'resfinder', 'pointfinder']:
+            table = self._read_table(name)
+            if table is not None:
+                isolate_ids.update(table.index.tolist())
+        return isolate_ids
+
+    def _merge_table(self, name, dataframe, sort_columns):
+        existing_dataframe = self._read_table(name)
+        if existing_dataframe is None:
+            return dataframe
+        elif existing_dataframe.columns.tolist() != dataframe.columns.tolist():
+            raise Exception("Columns in [" + self._output_files[name] + "] " + str(
+                existing_dataframe.columns.tolist()) + " do not match new results " + str(dataframe.columns.tolist()))
+
+        merged_dataframe = pd.concat([existing_dataframe, dataframe]).reset_index()
+        return merged_dataframe.sort_values(by=sort_columns, kind='mergesort').set_index(self.INDEX)
+
+    def merge(self, resfinder_dataframe: pd.DataFrame, pointfinder_dataframe: pd.DataFrame,
+              summary_dataframe: pd.DataFrame) -> (pd.DataFrame, pd.DataFrame, pd.DataFrame):
+        """
+        Merges new results into the existing results.
+        :param resfinder_dataframe: The pd.DataFrame of new ResFinder results.
+        :param pointfinder_dataframe: The pd.DataFrame of new PointFinder results (None if PointFinder was not used).
+        :param summary_dataframe: The pd.DataFrame of the new summary results.
+        :return: A tuple of the merged (resfinder, pointfinder, summary) pd.DataFrames.
+        """
+        resfinder_dataframe = self._merge_table('resfinder', resfinder_dataframe, self.SORT_COLUMNS)
+        if pointfinder_dataframe is not None:
+            pointfinder_dataframe = self._merge_table('pointfinder', pointfinder_dataframe, self.SORT_COLUMNS)
+        summary_dataframe = self._merge_table('summary', summary_dataframe, [self.INDEX])
+
+        return resfinder_dataframe, pointfinder_dataframe, summary_dataframe
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+from collections import OrderedDict
+from os import path
+from typing import Dict, List, Set
+
+import numpy as np
+
+logger = logging.getLogger('ResultsJournal')
+
+"""
+An append-only journal of the results for each genome, so that a search which is interrupted can be resumed without
+re-processing the genomes which were already complete.
+"""
+
+
+class ResultsJournal:
+
+    def __init__(self, journal_file: str, settings: Dict[str, str]) -> None:
+        """
+        Creates a new ResultsJournal.
+        :param journal_file: The journal file.
+        :param settings: The settings affecting the results (e.g., database commits and thresholds). A journal can
+                only be resumed with the same settings it was started with.
+        """
+        self._journal_file = journal_file
+        self._settings = OrderedDict(settings)
+        self._results = OrderedDict()
+        self._handle = None
+
+    def open(self, resume: bool = False, ignored_settings: List[str] = None) -> None:
+        """
+        Opens the journal for adding results.
+        :param resume: If True, loads the results already in an existing journal. Otherwise, the journal must not exist.
+        :param ignored_settings: A list of settings which may differ from the settings an existing journal was started
+                with (None to require all settings to match).
+        :return: None
+        """
+        if path.exists(self._journal_file):
+            if not resume:
+                raise Exception("Results journal [" + self._journal_file + "] already exists")
+            self._load(ignored_settings if ignored_settings is not None else [])
+            self._handle = open(self._journal_file, 'a')
+        else:
+            self._handle = open(self._journal_file, 'w')
+            self._write_entry({'settings': self._settings})
+
+    def close(self) -> None:
+        """
+        Closes the journal.
+        :return: None
+        """
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _load(self, ignored_settings):
+        with open(self._journal_file, 'r') as handle:
+            content = handle.read()
+
+        lines = content.split('\n')
+        if lines[-1] != '':
+            # The last entry was only partially written (e.g., the search was killed while writing it)
+            logger.warning("Ignoring incomplete last entry in results journal [%s]", self._journal_file)
+            with open(self._journal_file, 'r+') as handle:
+                handle.truncate(len(content.encode('utf-8')) - len(lines[-1].encode('utf-8')))
+        lines = lines[:-1]
+
+        if not lines:
+            raise Exception("Results journal [" + self._journal_file + "] is missing settings")
+
+        journal_settings = json.loads(lines[0])['settings']
+        differences = [key + ': [' + str(journal_settings.get(key)) + '] != [' + str(self._settings.get(key)) + ']'
+                       for key in sorted(set(journal_settings) | set(self._settings)) if
+                       key not in ignored_settings and journal_settings.get(key) != self._settings.get(key)]
+        if differences:
+            raise Exception("Cannot resume from results journal [" + self._journal_file + "] with different settings (" +
+                            ', '.join(differences) + ")")
+
+        for line in lines[1:]:
+            entry = json.loads(line)
+            self._results[entry['file']] = (entry['resfinder'], entry['pointfinder'])
+
+        logger.info("Loaded results for %s files from results journal [%s]", len(self._results), self._journal_file)
+
+    def _write_entry(self, entry):
+        self._handle.write(json.dumps(entry, default=self._to_json) + '\n')
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    @classmethod
+    def _to_json(cls, value):
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError("Object of type " + type(value).__name__ + " is not JSON serializable")
+
+    def get_completed_files(self) -> Set[str]:
+        """
+        Gets the names of the files which have results in the journal.
+        :return: The set of file names.
+        """
+        return set(self._results)
+
+    def get_results(self, file: str) -> (List[List], List[List]):
+        """
+        Gets the results for a file from the journal.
+        :param file: The file name.
+        :return: A tuple of (resfinder result rows, pointfinder result rows).
+        """
+        return self._results[file]
+
+    def add(self, file: str, resfinder_results: List[List], pointfinder_results: List[List]) -> None:
+        """
+        Adds the results for a file to the journal, making sure they are written to disk before returning.
+        :param file: The file name.
+        :param resfinder_results: The ResFinder result rows for the file.
+        :param pointfinder_results: The PointFinder result rows for the file.
+        :return: None
+        """
+        self._write_entry({'file': file, 'resfinder': resfinder_results, 'pointfinder': pointfinder_results})
+        self._results[file] = (resfinder_results, pointfinder_results)
@@ -0,0 +1,138 @@
+"""
+Classes for interacting with the cache of BLAST results.
+"""
+import argparse
+import logging
+import sys
+
+from staramr.SubCommand import SubCommand
+from staramr.Utils import get_string_with_spacing
+from staramr.blast.BlastResultsCache import BlastResultsCache
+from staramr.exceptions.CommandParseException import CommandParseException
+
+"""
+Base class for interacting with the BLAST results cache.
+"""
+
+logger = logging.getLogger('Cache')
+
+
+class Cache(SubCommand):
+
+    def __init__(self, subparser, script_name):
+        """
+        Builds a SubCommand for interacting with the BLAST results cache.
+        :param subparser: The subparser to use.  Generated from argparse.ArgumentParser.add_subparsers().
+        :param script_name: The name of the script being run.
+        """
+        super().__init__(subparser, script_name)
+
+    def _setup_args(self, arg_parser):
+        arg_parser = self._subparser.add_parser('cache', help='Inspect and prune the cache of BLAST results')
+        subparser = arg_parser.add_subparsers(dest='cache_command',
+                                              help='Subcommand for the cache of BLAST results.')
+
+        Info(subparser, self._script_name + " cache")
+        Prune(subparser, self._script_name + " cache")
+
+        return arg_parser
+
+    def _add_cache_dir_argument(self, arg_parser):
+        self._default_cache_dir = BlastResultsCache.get_default_cache_directory()
+        arg_parser.add_argument('--dir', action='store', dest='cache_dir', type=str,
+                                help='The directory storing cached BLAST results [' + self._default_cache_dir + '].',
+                                default=self._default_cache_dir, required=False)
+
+    def run(self, args):
+        super(Cache, self).run(args)
+
+        if args.cache_command is None:
+            self._root_arg_parser.print_help()
+
+
+"""
+Class for printing information about the BLAST results cache.
+"""
+
+
+class Info(Cache):
+
+    def __init__(self, subparser, script_name):
+        """
+        Creates a SubCommand for printing information about the BLAST results cache.
+        :param subparser: The subparser to use.  Generated from argparse.ArgumentParser.add_subparsers().
+        :param script_name: The name of the script being run.
+        """
+        super().__init__(subparser, script_name)
+
+    def _setup_args(self, arg_parser):
+        name = self._script_name
+        epilog = ("Example:\n"
+                  "\t" + name + " info\n"
+                                "\t\tPrints information about the default cache of BLAST results")
+        arg_parser = self._subparser.add_parser('info',
+                                                epilog=epilog,
+                                                formatter_class=argparse.RawTextHelpFormatter,
+                                                help='Prints information on the cache of BLAST results.')
+        self._add_cache_dir_argument(arg_parser)
+
+        return arg_parser
+
+    def run(self, args):
+        super(Info, self).run(args)
+
+        sys.stdout.write(get_string_with_spacing(BlastResultsCache(args.cache_dir).info()))
+
+
+"""
+Class for removing results from the BLAST results cache.
+"""
+
+
+class Prune(Cache):
+
+    def __init__(self, subparser, script_name):
+        """
+        Creates a SubCommand for removing results from the BLAST results cache.
+        :param subparser: The subparser to use.  Generated from argparse.ArgumentParser.add_subparsers().
+        :param script_name: The name of the script being run.
+        """
+        super().__init__(subparser, script_name)
+
+    def _setup_args(self, arg_parser):
+        name = self._script_name
+        epilog = ("Example:\n"
+                  "\t" + name + " prune --max-size 1024\n"
+                                "\t\tRemoves the least recently used BLAST results until the cache is at most 1024 MB\n\n" +
+                  "\t" + name + " prune --all\n" +
+                  "\t\tRemoves all cached BLAST results")
+        arg_parser = self._subparser.add_parser('prune',
+                                                epilog=epilog,
+                                                formatter_class=argparse.RawTextHelpFormatter,
+                                                help='Removes the least recently used results from the cache of BLAST '
+                                                     'results.')
+        self._add_cache_dir_argument(arg_parser)
+        arg_parser.add_argument('--max-size', action='store', dest='max_size', type=int,
+                                help='The maximum size of the cache in MB [None].', default=None, required=False)
+        arg_parser.add_argument('--all', action='store_true', dest='all',
+                                help='Remove all cached BLAST results [False].', required=False)
+
+        return arg_parser
+
+    def run(self, args):
+        super(Prune, self).run(args)
+
+        blast_results_cache = BlastResultsCache(args.cache_dir)
+
+        if args.all:
+            if args.max_size is not None:
+                raise CommandParseException("Cannot use --max-size with --all", self._root_arg_parser)
+            logger.info("Removing all cached BLAST results in [%s]", args.cache_dir)
+            blast_results_cache.clear()
+        elif args.max_size is None:
+            raise CommandParseException("Must set one of --max-size or --all", self._root_arg_parser, print_help=True)
+        elif args.max_size < 0:
+            raise CommandParseException("--max-size must be at least 0", self._root_arg_parser)
+        else:
+            removed = blast_results_cache.prune(args.max_size * 1024 * 1024)
+            logger.info("Removed %s cached BLAST results from [%s]", removed, args.cache_dir)
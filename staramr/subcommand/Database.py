@@ -3,6 +3,7 @@ Classes for interacting with the (ResFinder/PointFinder) databases used to detec
 """
 import argparse
 import logging
+import shutil
 import sys
 from os import path, mkdir
 
@@ -49,6 +50,16 @@ class Database(SubCommand):
         if args.db_command is None:
             self._root_arg_parser.print_help()
 
+    def _add_prebuilt_databases_argument(self, arg_parser):
+        arg_parser.add_argument('--prebuilt-databases', action='store_true', dest='prebuilt_databases',
+                                help='Also compile the databases into BLAST databases and a k-mer index, for use with '
+                                     '"search --prebuilt-databases". Requires makeblastdb [False].', required=False)
+
+    def _check_prebuilt_databases(self, args):
+        if args.prebuilt_databases and shutil.which('makeblastdb') is None:
+            raise CommandParseException("--prebuilt-databases requires makeblastdb, which was not found on the PATH",
+                                        self._root_arg_parser)
+
 
 """
 Class for building a new database.
@@ -85,10 +96,12 @@ class Build(Database):
                                 help='The specific git commit for the resfinder database [latest].', required=False)
         arg_parser.add_argument('--pointfinder-commit', action='store', dest='pointfinder_commit', type=str,
                                 help='The specific git commit for the pointfinder database [latest].', required=False)
+        self._add_prebuilt_databases_argument(arg_parser)
         return arg_parser
 
     def run(self, args):
         super(Build, self).run(args)
+        self._check_prebuilt_databases(args)
 
         if path.exists(args.destination):
             if args.destination == self._default_dir:
@@ -104,7 +117,8 @@ class Build(Database):
             database_repos = AMRDatabasesManager.create_default_manager().get_database_repos()
         else:
             database_repos = AMRDatabasesManager(args.destination).get_database_repos()
-        database_repos.build({'resfinder': args.resfinder_commit, 'pointfinder': args.pointfinder_commit})
+        database_repos.build({'resfinder': args.resfinder_commit, 'pointfinder': args.pointfinder_commit},
+                             prebuilt_databases=args.prebuilt_databases)
         if not AMRDatabasesManager.is_database_repos_default_commits(database_repos):
             logger.warning(
                 "Built non-default ResFinder/PointFinder database version. This may lead to " +
@@ -145,12 +159,14 @@ class Update(Database):
                                 help='The specific git commit for the resfinder database [latest].', required=False)
         arg_parser.add_argument('--pointfinder-commit', action='store', dest='pointfinder_commit', type=str,
                                 help='The specific git commit for the pointfinder database [latest].', required=False)
+        self._add_prebuilt_databases_argument(arg_parser)
         arg_parser.add_argument('directories', nargs='*')
 
         return arg_parser
 
     def run(self, args):
         super(Update, self).run(args)
+        self._check_prebuilt_databases(args)
 
         if len(args.directories) == 0:
             if not args.update_default:
@@ -163,7 +179,8 @@ class Update(Database):
                         force_use_git=True)
 
                     database_repos.update(
-                        {'resfinder': args.resfinder_commit, 'pointfinder': args.pointfinder_commit})
+                        {'resfinder': args.resfinder_commit, 'pointfinder': args.pointfinder_commit},
+                        prebuilt_databases=args.prebuilt_databases)
 
                     if not AMRDatabasesManager.is_database_repos_default_commits(database_repos):
                         logger.warning(
@@ -176,7 +193,8 @@ class Update(Database):
         else:
             for directory in args.directories:
                 database_repos = AMRDatabasesManager(directory).get_database_repos()
-                database_repos.update({'resfinder': args.resfinder_commit, 'pointfinder': args.pointfinder_commit})
+                database_repos.update({'resfinder': args.resfinder_commit, 'pointfinder': args.pointfinder_commit},
+                                      prebuilt_databases=args.prebuilt_databases)
                 if not AMRDatabasesManager.is_database_repos_default_commits(database_repos):
                     logger.warning(
                         "Updated to non-default ResFinder/PointFinder database version [%s]. This may lead to " +
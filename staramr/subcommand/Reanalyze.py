@@ -0,0 +1,128 @@
+import argparse
+import datetime
+import logging
+import multiprocessing
+from os import path
+
+from staramr.blast.BlastHitsArchive import BlastHitsArchive
+from staramr.databases.AMRDatabasesManager import AMRDatabasesManager
+from staramr.detection.AMRDetectionFactory import AMRDetectionFactory
+from staramr.exceptions.CommandParseException import CommandParseException
+from staramr.subcommand.Search import Search
+
+logger = logging.getLogger("Reanalyze")
+
+"""
+Class for re-analyzing the BLAST hits stored by a previous search, without re-running BLAST.
+"""
+
+
+class Reanalyze(Search):
+
+    def __init__(self, subparser, script_name, version):
+        """
+        Creates a new Reanalyze sub-command instance.
+        :param subparser: The subparser to use.  Generated from argparse.ArgumentParser.add_subparsers().
+        :param script_name: The name of the script being run.
+        :param version: The version of this software.
+        """
+        super().__init__(subparser, script_name, version)
+
+    def _setup_args(self, arg_parser):
+        name = self._script_name
+        epilog = ("Example:\n"
+                  "\t" + name + " search --output-blast-archive hits.zip -o out *.fasta\n"
+                                "\t" + name + " reanalyze --pid-threshold 95 -o out-pid95 hits.zip\n"
+                                              "\t\tSearches *.fasta storing the raw BLAST hits in hits.zip, then re-analyzes the hits with a percent identity threshold of 95 into the out-pid95/ directory.")
+
+        arg_parser = self._subparser.add_parser('reanalyze',
+                                                epilog=epilog,
+                                                formatter_class=argparse.RawTextHelpFormatter,
+                                                help='Re-analyze BLAST hits stored by "search --output-blast-archive"')
+
+        self._default_database_dir = AMRDatabasesManager.get_default_database_directory()
+        cpu_count = multiprocessing.cpu_count()
+
+        arg_parser.add_argument('-d', '--database', action='store', dest='database', type=str,
+                                help='The directory containing the resfinder/pointfinder databases [' + self._default_database_dir + '].',
+                                default=self._default_database_dir, required=False)
+        arg_parser.add_argument('-n', '--nprocs', action='store', dest='nprocs', type=int,
+                                help='The number of processing cores to use for parsing the BLAST hits [' + str(
+                                    cpu_count) + '].',
+                                default=cpu_count, required=False)
+
+        self._add_results_args(arg_parser)
+
+        arg_parser.add_argument('archive', help='The BLAST hits archive written by "search --output-blast-archive".')
+
+        return arg_parser
+
+    def _check_database_commits(self, args, database_repos, archive_settings):
+        """
+        Checks that the databases are the same as the ones the BLAST hits were generated with.
+        :param args: The command-line arguments.
+        :param database_repos: The database repos object.
+        :param archive_settings: The settings stored in the BLAST hits archive.
+        :return: None
+        """
+        database_info = database_repos.info()
+        for database_name in ['resfinder', 'pointfinder']:
+            commit_key = database_name + '_db_commit'
+            if commit_key in archive_settings and archive_settings[commit_key] != database_info.get(commit_key):
+                raise CommandParseException(
+                    "BLAST hits in [" + args.archive + "] were generated with " + database_name + " commit [" +
+                    archive_settings[commit_key] + "] but the database in [" + args.database + "] is at commit [" +
+                    str(database_info.get(commit_key)) + "]", self._root_arg_parser)
+
+    def run(self, args):
+        # Skip Search.run(), which would check the (non-existent) input files
+        super(Search, self).run(args)
+
+        if not path.exists(args.archive):
+            raise CommandParseException('BLAST hits archive [' + args.archive + '] does not exist',
+                                        self._root_arg_parser)
+
+        database_repos = self._get_database_repos(args)
+
+        blast_hits_archive = BlastHitsArchive(args.archive)
+        archive_settings = blast_hits_archive.get_settings()
+        self._check_database_commits(args, database_repos, archive_settings)
+
+        resfinder_database = database_repos.build_blast_database('resfinder')
+        pointfinder_organism = archive_settings.get('pointfinder_organism')
+        if pointfinder_organism:
+            pointfinder_database = database_repos.build_blast_database('pointfinder',
+                                                                       {'organism': pointfinder_organism})
+            pointfinder_blast_map = blast_hits_archive.get_blast_map('pointfinder')
+        else:
+            logger.info("No PointFinder results stored in [%s]. Will only re-analyze ResFinder results",
+                        args.archive)
+            pointfinder_database = None
+            pointfinder_blast_map = None
+
+        output_files = self._get_output_files(args)
+        exclude_genes = self._get_genes_to_exclude(args)
+        include_resistances = not args.exclude_resistance_phenotypes
+
+        start_time = datetime.datetime.now()
+
+        amr_detection_factory = AMRDetectionFactory()
+        amr_detection = amr_detection_factory.build(resfinder_database, None, pointfinder_database,
+                                                    include_negatives=not args.exclude_negatives,
+                                                    include_resistances=include_resistances,
+                                                    output_dir=output_files['hits_dir'],
+                                                    genes_to_exclude=exclude_genes,
+                                                    parse_processes=args.nprocs)
+        amr_detection.run_amr_detection_from_blast_results(blast_hits_archive.get_files(),
+                                                           blast_hits_archive.get_blast_map('resfinder'),
+                                                           pointfinder_blast_map, args.pid_threshold,
+                                                           args.plength_threshold_resfinder,
+                                                           args.plength_threshold_pointfinder, args.report_all_blast)
+
+        end_time = datetime.datetime.now()
+        settings = self._get_settings(database_repos, start_time, end_time, include_resistances)
+        settings.update(self._get_reporting_settings(args, pointfinder_organism, exclude_genes))
+        settings['blast_hits_archive'] = path.abspath(args.archive)
+
+        self._write_results(amr_detection.get_resfinder_results(), amr_detection.get_pointfinder_results(),
+                            amr_detection.get_summary_results(), settings, output_files, pointfinder_organism)
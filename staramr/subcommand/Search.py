@@ -4,6 +4,7 @@ import logging
 import multiprocessing
 import sys
 import tempfile
+from collections import OrderedDict
 from os import path, mkdir
 
 import numpy as np
@@ -12,13 +13,20 @@ import pandas as pd
 from staramr.SubCommand import SubCommand
 from staramr.Utils import get_string_with_spacing
 from staramr.blast.BlastHandler import BlastHandler
+from staramr.blast.BlastHitsArchive import BlastHitsArchive
+from staramr.blast.BlastResultsCache import BlastResultsCache
+from staramr.blast.ExactMatchFastPath import ExactMatchFastPath
+from staramr.blast.KmerPrescreen import KmerPrescreen
 from staramr.blast.pointfinder.PointfinderBlastDatabase import PointfinderBlastDatabase
 from staramr.blast.resfinder.ResfinderBlastDatabase import ResfinderBlastDatabase
+from staramr.blast.results.pointfinder.PointfinderMutationCache import PointfinderMutationCache
 from staramr.databases.AMRDatabasesManager import AMRDatabasesManager
 from staramr.databases.exclude.ExcludeGenesList import ExcludeGenesList
 from staramr.databases.resistance.ARGDrugTable import ARGDrugTable
 from staramr.detection.AMRDetectionFactory import AMRDetectionFactory
 from staramr.exceptions.CommandParseException import CommandParseException
+from staramr.results.ExistingResults import ExistingResults
+from staramr.results.ResultsJournal import ResultsJournal
 
 logger = logging.getLogger("Search")
 
@@ -30,6 +38,16 @@ Class for searching for AMR resistance genes.
 class Search(SubCommand):
     BLANK = '-'
     TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    DEFAULT_CACHE_MAX_SIZE_MB = 10240
+    RESULTS_JOURNAL_FILE = 'journal.jsonl'
+
+    # Settings in the results journal which only change how BLAST is run, not the results, so they may differ when
+    # adding new files with --incremental (but not when resuming a search with --resume)
+    RESULTS_JOURNAL_BLAST_SETTINGS = ['combine_resfinder', 'prebuilt_databases', 'genome_pack_size',
+                                      'clustered_resfinder']
+
+    # Parsing BLAST results takes much less time than BLAST, so gets one of every this many processing cores
+    CORES_PER_PARSE_PROCESS = 4
 
     def __init__(self, subparser, script_name, version):
         """
@@ -55,6 +73,7 @@ class Search(SubCommand):
                                                 help='Search for AMR genes')
 
         self._default_database_dir = AMRDatabasesManager.get_default_database_directory()
+        self._default_cache_dir = BlastResultsCache.get_default_cache_directory()
         cpu_count = multiprocessing.cpu_count()
 
         arg_parser.add_argument('--pointfinder-organism', action='store', dest='pointfinder_organism', type=str,
@@ -69,6 +88,72 @@ class Search(SubCommand):
                                 help='The number of processing cores to use [' + str(cpu_count) + '].',
                                 default=cpu_count, required=False)
 
+        blast_group = arg_parser.add_argument_group('BLAST options')
+        blast_group.add_argument('--combine-resfinder', action='store_true', dest='combine_resfinder',
+                                 help='Search all ResFinder drug classes with a single BLAST per genome [False].',
+                                 required=False)
+        blast_group.add_argument('--prebuilt-databases', action='store_true', dest='prebuilt_databases',
+                                 help='Search genomes against the BLAST databases compiled by "db build '
+                                      '--prebuilt-databases" or "db update --prebuilt-databases" instead of making a '
+                                      'BLAST database for each genome [False].',
+                                 required=False)
+        blast_group.add_argument('--genome-pack-size', action='store', dest='genome_pack_size', type=int,
+                                 help='The number of genomes to pack into a single BLAST database, so that each '
+                                      'ResFinder/PointFinder file is searched once per pack of genomes [1].',
+                                 default=1, required=False)
+        blast_group.add_argument('--kmer-prescreen', action='store_true', dest='kmer_prescreen',
+                                 help='Skip BLASTing genomes against ResFinder/PointFinder files which share too few '
+                                      'k-mers with the genome for any hit to pass the thresholds, using the k-mer '
+                                      'index compiled by "db build/update --prebuilt-databases" [False].',
+                                 required=False)
+        blast_group.add_argument('--exact-match-fast-path', action='store_true', dest='exact_match_fast_path',
+                                 help='Find exact, full-length matches to ResFinder alleles without BLAST, and only '
+                                      'BLAST drug classes where the k-mer index shows that BLAST could find other '
+                                      'hits. Requires --prebuilt-databases [False].',
+                                 required=False)
+        blast_group.add_argument('--clustered-resfinder', action='store_true', dest='clustered_resfinder',
+                                 help='Search ResFinder against the representatives of clusters of near-identical '
+                                      'alleles first, and then only against the other alleles of clusters with hits. '
+                                      'Requires --prebuilt-databases [False].',
+                                 required=False)
+        blast_group.add_argument('--blast-cache', action='store_true', dest='blast_cache',
+                                 help='Re-use cached BLAST results for genomes which have been searched before, and '
+                                      'cache the BLAST results of new genomes. The PointFinder mutations of '
+                                      'alignments are also cached, to re-use for identical alignments [False].',
+                                 required=False)
+        blast_group.add_argument('--blast-cache-dir', action='store', dest='blast_cache_dir', type=str,
+                                 help='The directory storing cached BLAST results [' + self._default_cache_dir + '].',
+                                 default=self._default_cache_dir, required=False)
+        blast_group.add_argument('--blast-cache-max-size', action='store', dest='blast_cache_max_size', type=int,
+                                 help='The maximum size of the BLAST results cache in MB. The least recently used '
+                                      'results are removed once the cache grows beyond this size [' + str(
+                                     self.DEFAULT_CACHE_MAX_SIZE_MB) + '].',
+                                 default=self.DEFAULT_CACHE_MAX_SIZE_MB, required=False)
+
+        output_group = self._add_results_args(arg_parser)
+        output_group.add_argument('--output-blast-dir', action='store', dest='blast_output_dir', type=str,
+                                  help="The name of a directory to keep the intermediate BLAST files in, for debugging. By default BLAST results are parsed directly from BLAST without being written to disk. [None]",
+                                  default=None, required=False)
+        output_group.add_argument('--resume', action='store_true', dest='resume',
+                                  help="Resume an interrupted search into an existing '--output-dir', skipping the files which were already complete. Must be run with the same files, databases and options as the interrupted search. [False]",
+                                  required=False)
+        output_group.add_argument('--incremental', action='store_true', dest='incremental',
+                                  help="Scan only the files which are not already part of the results in an existing '--output-dir', and merge the new results into the existing output files. The databases, thresholds and reporting options must match those in the existing 'settings.txt'. [False]",
+                                  required=False)
+        output_group.add_argument('--output-blast-archive', action='store', dest='blast_archive', type=str,
+                                  help="The name of a file to store the raw BLAST hits in, so that results can be re-analyzed with 'reanalyze' without re-running BLAST. Can be used with '--output-dir'. [None]",
+                                  default=None, required=False)
+
+        arg_parser.add_argument('files', nargs='+')
+
+        return arg_parser
+
+    def _add_results_args(self, arg_parser):
+        """
+        Adds the arguments controlling how BLAST results are filtered and reported.
+        :param arg_parser: The argparse.ArgumentParser.
+        :return: The argument group for output files.
+        """
         threshold_group = arg_parser.add_argument_group('BLAST Thresholds')
         threshold_group.add_argument('--pid-threshold', action='store', dest='pid_threshold', type=float,
                                      help='The percent identity threshold [98.0].', default=98.0, required=False)
@@ -125,9 +210,7 @@ class Search(SubCommand):
                                   help="The name of the directory to contain the BLAST hit files. Not be be used with '--output-dir'. [None]",
                                   default=None, required=False)
 
-        arg_parser.add_argument('files', nargs='+')
-
-        return arg_parser
+        return output_group
 
     def _print_dataframes_to_excel(self, outfile_path, summary_dataframe, resfinder_dataframe, pointfinder_dataframe,
                                    settings_dataframe):
@@ -190,15 +273,175 @@ class Search(SubCommand):
         file_handle.write(get_string_with_spacing(settings))
         file_handle.close()
 
+    def _get_settings(self, database_repos, start_time, end_time, include_resistances):
+        """
+        Gets the settings used to generate results.
+        :param database_repos: The database repos object.
+        :param start_time: The time generating the results started.
+        :param end_time: The time generating the results finished.
+        :param include_resistances: Whether or not to include resistance phenotypes in output.
+        :return: The settings as an OrderedDict of key/value pairs.
+        """
+        time_difference = end_time - start_time
+        time_difference_minutes = "%0.2f" % (time_difference.total_seconds() / 60)
+
+        logger.info("Finished. Took %s minutes.", time_difference_minutes)
+
+        settings = database_repos.info()
+        settings['command_line'] = ' '.join(sys.argv)
+        settings['version'] = self._version
+        settings['start_time'] = start_time.strftime(self.TIME_FORMAT)
+        settings['end_time'] = end_time.strftime(self.TIME_FORMAT)
+        settings['total_minutes'] = time_difference_minutes
+        settings.move_to_end('total_minutes', last=False)
+        settings.move_to_end('end_time', last=False)
+        settings.move_to_end('start_time', last=False)
+        settings.move_to_end('version', last=False)
+        settings.move_to_end('command_line', last=False)
+
+        if include_resistances:
+            arg_drug_table = ARGDrugTable()
+            info = arg_drug_table.get_resistance_table_info()
+            settings.update(info)
+            logger.info(
+                "Predicting AMR resistance phenotypes is enabled. The predictions are for microbiological " +
+                "resistance and *not* clinical resistance. These results are continually being improved and " +
+                "we welcome any feedback.")
+
+        return settings
+
+    def _get_reporting_settings(self, args, pointfinder_organism, genes_to_exclude):
+        """
+        Gets the thresholds and reporting options used to generate results.
+        :param args: The command-line arguments.
+        :param pointfinder_organism: The PointFinder organism (None if PointFinder is not used).
+        :param genes_to_exclude: A list of gene IDs excluded from the results.
+        :return: The settings as an OrderedDict of key/value pairs.
+        """
+        settings = OrderedDict()
+        settings['pointfinder_organism'] = str(pointfinder_organism)
+        settings['pid_threshold'] = str(args.pid_threshold)
+        settings['plength_threshold_resfinder'] = str(args.plength_threshold_resfinder)
+        settings['plength_threshold_pointfinder'] = str(args.plength_threshold_pointfinder)
+        settings['report_all_blast'] = str(args.report_all_blast)
+        settings['exclude_negatives'] = str(args.exclude_negatives)
+        settings['exclude_resistance_phenotypes'] = str(args.exclude_resistance_phenotypes)
+        settings['genes_to_exclude'] = ','.join(sorted(genes_to_exclude))
+        return settings
+
+    def _check_existing_settings(self, existing_results, database_repos, settings, pointfinder_organism):
+        """
+        Checks that existing results were generated with the same databases, thresholds and reporting options as new
+        results.
+        :param existing_results: The staramr.results.ExistingResults.
+        :param database_repos: The database repos object.
+        :param settings: The thresholds and reporting options for the new results.
+        :param pointfinder_organism: The PointFinder organism for the new results (None if PointFinder is not used).
+        :return: None
+        """
+        if existing_results.has_pointfinder() != bool(pointfinder_organism):
+            raise CommandParseException(
+                "Cannot merge into existing results, PointFinder must be used for both the existing and new results " +
+                "or for neither", self._root_arg_parser)
+
+        try:
+            existing_settings = existing_results.get_settings()
+        except FileNotFoundError as e:
+            raise CommandParseException("Cannot merge into existing results, no settings file: " + str(e),
+                                        self._root_arg_parser)
+
+        settings_to_match = OrderedDict(
+            (key, value) for key, value in database_repos.info().items() if key.endswith('_db_commit'))
+        settings_to_match.update(settings)
+
+        for key, value in settings_to_match.items():
+            if key not in existing_settings:
+                raise CommandParseException(
+                    "Cannot merge into existing results, [" + key + "] is not recorded in the existing settings",
+                    self._root_arg_parser)
+            elif existing_settings[key] != value:
+                raise CommandParseException(
+                    "Cannot merge into existing results, [" + key + "] is [" + existing_settings[key] +
+                    "] in the existing settings but [" + value + "] for this search", self._root_arg_parser)
+
+    def _write_blast_hits_archive(self, blast_hits_archive, files, database_repos, pointfinder_database,
+                                  blast_handler):
+        """
+        Writes the raw BLAST hits to an archive which can be re-analyzed later.
+        :param blast_hits_archive: The archive file.
+        :param files: The list of files which were scanned.
+        :param database_repos: The database repos object.
+        :param pointfinder_database: The pointfinder database (None if PointFinder was not used).
+        :param blast_handler: The staramr.blast.BlastHandler which ran BLAST.
+        :return: None
+        """
+        archive_settings = database_repos.info()
+        archive_settings['version'] = self._version
+        archive_settings.move_to_end('version', last=False)
+
+        blast_maps = OrderedDict([('resfinder', blast_handler.get_resfinder_outputs())])
+        if pointfinder_database is not None:
+            archive_settings['pointfinder_organism'] = pointfinder_database.get_organism()
+            blast_maps['pointfinder'] = blast_handler.get_pointfinder_outputs()
+
+        logger.info("Writing BLAST hits archive to [%s]", blast_hits_archive)
+        BlastHitsArchive(blast_hits_archive).write([path.basename(file) for file in files], blast_maps,
+                                                   archive_settings)
+
+    def _split_processing_cores(self, nprocs):
+        """
+        Splits the processing cores between BLAST and parsing the BLAST results, which run at the same time.
+        :param nprocs: The number of processing cores to use.
+        :return: A tuple of (number of processes to parse BLAST results in, number of threads for BLAST), where 1
+                process means parsing in this process.
+        """
+        parse_processes = max(1, nprocs // self.CORES_PER_PARSE_PROCESS)
+        return parse_processes, max(1, nprocs - parse_processes)
+
+    def _get_blast_thresholds(self, pid_threshold, plength_threshold_resfinder, plength_threshold_pointfinder,
+                              genes_to_exclude, blast_hits_archive):
+        """
+        Gets the thresholds to pass to BLAST, so that BLAST leaves out hits which cannot pass them and only the hits
+        passing them are kept as BLAST results are read.
+        :param pid_threshold: The pid threshold.
+        :param plength_threshold_resfinder: The plength threshold for resfinder.
+        :param plength_threshold_pointfinder: The plength threshold for pointfinder.
+        :param genes_to_exclude: A list of gene IDs to exclude from the results.
+        :param blast_hits_archive: A file to write the raw BLAST hits to, which must keep every hit for re-analysis with
+                other thresholds (None if not archiving hits).
+        :return: A dictionary of the threshold arguments for the BlastHandler.
+        """
+        if blast_hits_archive:
+            return {}
+        return {'pid_threshold': pid_threshold,
+                'plength_thresholds': {'resfinder': plength_threshold_resfinder,
+                                       'pointfinder': plength_threshold_pointfinder},
+                'genes_to_exclude': genes_to_exclude}
+
+    def _get_blast_sequences(self, blast_hits_archive):
+        """
+        Gets whether or not BLAST reports the aligned sequences for each database. These are always needed to find
+        PointFinder mutations, but are only needed for ResFinder to write hit sequences, which are instead cut out of
+        the input files.
+        :param blast_hits_archive: A file to write the raw BLAST hits to, which must keep the hit sequences for
+                re-analysis (None if not archiving hits).
+        :return: A map of {'database': whether or not to report sequences}.
+        """
+        return {'resfinder': bool(blast_hits_archive), 'pointfinder': True}
+
     def _generate_results(self, database_repos, resfinder_database, pointfinder_database, nprocs, include_negatives,
                           include_resistances, hits_output, pid_threshold, plength_threshold_resfinder,
-                          plength_threshold_pointfinder, report_all_blast, genes_to_exclude, files):
+                          plength_threshold_pointfinder, report_all_blast, genes_to_exclude, files,
+                          combine_resfinder=False, prebuilt_databases=None, genome_pack_size=1,
+                          blast_output_dir=None, blast_results_cache=None, blast_hits_archive=None,
+                          results_journal=None, kmer_prescreen=None, exact_match_fast_path=None,
+                          resfinder_allele_clusters=None):
         """
         Runs AMR detection and generates results.
         :param database_repos: The database repos object.
         :param resfinder_database: The resfinder database.
         :param pointfinder_database: The pointfinder database.
-        :param nprocs: The number of processing cores to use for BLAST.
+        :param nprocs: The number of processing cores to use, split between BLAST and parsing the BLAST results.
         :param include_negatives: Whether or not to include negative results in output.
         :param include_resistances: Whether or not to include resistance phenotypes in output.
         :param hits_output: Output directory for hit files.
@@ -208,67 +451,121 @@ class Search(SubCommand):
         :param report_all_blast: Whether or not to report all BLAST results.
         :param genes_to_exclude: A list of gene IDs to exclude from the results.
         :param files: The list of files to scan.
+        :param combine_resfinder: Whether or not to search all ResFinder drug classes with a single BLAST per file.
+        :param prebuilt_databases: A map of prebuilt BLAST databases to search against (None to build BLAST databases
+                from the input files).
+        :param genome_pack_size: The number of genomes to pack into a single BLAST database.
+        :param blast_output_dir: A directory to keep the intermediate BLAST files in (None to parse BLAST results
+                without writing them to disk).
+        :param blast_results_cache: A staramr.blast.BlastResultsCache to re-use BLAST results from (None to disable).
+        :param blast_hits_archive: A file to write the raw BLAST hits to, for re-analysis (None to disable).
+        :param results_journal: A staramr.results.ResultsJournal to record the results of each file in (None to
+                disable).
+        :param kmer_prescreen: A staramr.blast.KmerPrescreen to skip BLAST jobs which cannot have hits passing the
+                thresholds (None to disable).
+        :param exact_match_fast_path: A staramr.blast.ExactMatchFastPath to use exact matches in place of BLAST
+                results (None to disable).
+        :param resfinder_allele_clusters: A staramr.blast.AlleleClusters of the ResFinder alleles, to search the
+                representatives of the clusters first (None to disable).
         :return: A dictionary containing the results as dict['results'] and settings as dict['settings'].
         """
         results = {'results': None, 'settings': None}
 
-        with tempfile.TemporaryDirectory() as blast_out:
+        with tempfile.TemporaryDirectory() as blast_tmp_dir:
             start_time = datetime.datetime.now()
 
-            blast_handler = BlastHandler({'resfinder': resfinder_database, 'pointfinder': pointfinder_database}, nprocs, blast_out)
+            blast_out = blast_output_dir if blast_output_dir else blast_tmp_dir
+            database_info = database_repos.info()
+            database_commits = {name: database_info[name + '_db_commit'] for name in ['resfinder', 'pointfinder'] if
+                                name + '_db_commit' in database_info}
+            parse_processes, blast_threads = self._split_processing_cores(nprocs)
+            logger.debug("Using %s processing cores for BLAST and %s for parsing BLAST results", blast_threads,
+                         parse_processes)
+            blast_handler = BlastHandler({'resfinder': resfinder_database, 'pointfinder': pointfinder_database},
+                                         blast_threads,
+                                         blast_out, combine_resfinder=combine_resfinder,
+                                         prebuilt_databases=prebuilt_databases,
+                                         genomes_per_database=genome_pack_size,
+                                         write_blast_outputs=blast_output_dir is not None,
+                                         blast_results_cache=blast_results_cache, database_commits=database_commits,
+                                         kmer_prescreen=kmer_prescreen,
+                                         exact_match_fast_path=exact_match_fast_path,
+                                         resfinder_allele_clusters=resfinder_allele_clusters,
+                                         blast_sequences=self._get_blast_sequences(blast_hits_archive),
+                                         **self._get_blast_thresholds(pid_threshold, plength_threshold_resfinder,
+                                                                      plength_threshold_pointfinder, genes_to_exclude,
+                                                                      blast_hits_archive))
+
+            pointfinder_mutation_cache_file = None
+            pointfinder_mutation_cache = None
+            if blast_results_cache is not None and pointfinder_database is not None:
+                pointfinder_mutation_cache_file = self._get_pointfinder_mutation_cache_file(
+                    blast_results_cache, pointfinder_database, database_commits, include_resistances)
+                pointfinder_mutation_cache = PointfinderMutationCache.load(pointfinder_mutation_cache_file)
 
             amr_detection_factory = AMRDetectionFactory()
             amr_detection = amr_detection_factory.build(resfinder_database, blast_handler, pointfinder_database,
                                                         include_negatives=include_negatives,
                                                         include_resistances=include_resistances,
                                                         output_dir=hits_output,
-                                                        genes_to_exclude=genes_to_exclude)
+                                                        genes_to_exclude=genes_to_exclude,
+                                                        parse_processes=parse_processes,
+                                                        pointfinder_mutation_cache=pointfinder_mutation_cache)
             amr_detection.run_amr_detection(files, pid_threshold, plength_threshold_resfinder,
-                                            plength_threshold_pointfinder, report_all_blast)
+                                            plength_threshold_pointfinder, report_all_blast,
+                                            results_journal=results_journal)
 
             results['results'] = amr_detection
 
+            if kmer_prescreen is not None:
+                logger.info("k-mer prescreen skipped %s of %s BLAST jobs", blast_handler.get_number_skipped_blasts(),
+                            blast_handler.get_number_blasts())
+
+            if exact_match_fast_path is not None:
+                logger.info("Exact matches replaced %s of %s BLAST jobs",
+                            blast_handler.get_number_exact_match_blasts(), blast_handler.get_number_blasts())
+
+            if pointfinder_database is not None:
+                pointfinder_mutation_cache = amr_detection.get_pointfinder_mutation_cache()
+                logger.info("Re-used the PointFinder mutations of %s of %s alignments",
+                            pointfinder_mutation_cache.get_number_hits(),
+                            pointfinder_mutation_cache.get_number_hits() + pointfinder_mutation_cache.get_number_misses())
+                if pointfinder_mutation_cache_file is not None:
+                    pointfinder_mutation_cache.save(pointfinder_mutation_cache_file)
+
+            if blast_hits_archive:
+                self._write_blast_hits_archive(blast_hits_archive, files, database_repos, pointfinder_database,
+                                               blast_handler)
+
             end_time = datetime.datetime.now()
-            time_difference = end_time - start_time
-            time_difference_minutes = "%0.2f" % (time_difference.total_seconds() / 60)
-
-            logger.info("Finished. Took %s minutes.", time_difference_minutes)
-
-            settings = database_repos.info()
-            settings['command_line'] = ' '.join(sys.argv)
-            settings['version'] = self._version
-            settings['start_time'] = start_time.strftime(self.TIME_FORMAT)
-            settings['end_time'] = end_time.strftime(self.TIME_FORMAT)
-            settings['total_minutes'] = time_difference_minutes
-            settings.move_to_end('total_minutes', last=False)
-            settings.move_to_end('end_time', last=False)
-            settings.move_to_end('start_time', last=False)
-            settings.move_to_end('version', last=False)
-            settings.move_to_end('command_line', last=False)
-
-            if include_resistances:
-                arg_drug_table = ARGDrugTable()
-                info = arg_drug_table.get_resistance_table_info()
-                settings.update(info)
-                logger.info(
-                    "Predicting AMR resistance phenotypes is enabled. The predictions are for microbiological " +
-                    "resistance and *not* clinical resistance. These results are continually being improved and " +
-                    "we welcome any feedback.")
+            settings = self._get_settings(database_repos, start_time, end_time, include_resistances)
 
             results['settings'] = settings
 
         return results
 
-    def run(self, args):
-        super(Search, self).run(args)
-
-        if (len(args.files) == 0):
-            raise CommandParseException("Must pass a fasta file to process", self._root_arg_parser, print_help=True)
-
-        for file in args.files:
-            if not path.exists(file):
-                raise CommandParseException('File [' + file + '] does not exist', self._root_arg_parser)
+    def _get_pointfinder_mutation_cache_file(self, blast_results_cache, pointfinder_database, database_commits,
+                                             include_resistances):
+        """
+        Gets the file in the BLAST results cache storing the PointFinder mutations of alignments from previous runs.
+        :param blast_results_cache: The staramr.blast.BlastResultsCache.
+        :param pointfinder_database: The pointfinder database.
+        :param database_commits: A map of the database names to the commits of the databases.
+        :param include_resistances: Whether or not resistance phenotypes are included in the results.
+        :return: The file storing the PointFinder mutations.
+        """
+        # Mutations and phenotypes depend on the PointFinder database and on the drug tables shipped with this software
+        key = blast_results_cache.get_key(
+            ['pointfinder_mutations', self._version, pointfinder_database.get_organism(),
+             database_commits.get('pointfinder', ''), str(include_resistances)])
+        return path.join(blast_results_cache.get_cache_dir(), 'pointfinder_mutations', key + '.pickle')
 
+    def _get_database_repos(self, args):
+        """
+        Gets the database repos object for the database passed on the command-line.
+        :param args: The command-line arguments.
+        :return: The database repos object.
+        """
         if not path.isdir(args.database):
             if args.database == self._default_database_dir:
                 raise CommandParseException(
@@ -289,16 +586,33 @@ class Search(SubCommand):
             logger.warning("Using non-default ResFinder/PointFinder. This may lead to differences in the detected " +
                            "AMR genes depending on how the database files are structured.")
 
-        resfinder_database = database_repos.build_blast_database('resfinder')
-        if (args.pointfinder_organism):
-            if args.pointfinder_organism not in PointfinderBlastDatabase.get_available_organisms():
-                raise CommandParseException("The only Pointfinder organism(s) currently supported are " + str(
-                    PointfinderBlastDatabase.get_available_organisms()), self._root_arg_parser)
-            pointfinder_database = database_repos.build_blast_database('pointfinder', {'organism': args.pointfinder_organism})
-        else:
-            logger.info("No --pointfinder-organism specified. Will not search the PointFinder databases")
-            pointfinder_database = None
+        return database_repos
+
+    def _get_kmer_indexes(self, database_repos, database_names):
+        """
+        Gets the k-mer indexes compiled with the prebuilt BLAST databases.
+        :param database_repos: The database repos object.
+        :param database_names: The names of the databases (e.g., 'resfinder').
+        :return: A map of {'database_name': staramr.blast.KmerIndex}.
+        """
+        kmer_indexes = {}
+        for database_name in database_names:
+            kmer_index = database_repos.get_prebuilt_databases(database_name).get_kmer_index()
+            if not database_repos.is_prebuilt_databases_current(database_name) or not kmer_index.exists():
+                raise CommandParseException(
+                    "k-mer index for " + database_name + " is missing or out of date. Perhaps try rebuilding " +
+                    "with 'staramr db update --prebuilt-databases'", self._root_arg_parser)
+            kmer_indexes[database_name] = kmer_index
+        return kmer_indexes
 
+    def _get_output_files(self, args, resume=False):
+        """
+        Gets the output files from the command-line arguments, creating any output directories.
+        :param args: The command-line arguments.
+        :param resume: Whether or not to resume writing to an existing --output-dir.
+        :return: A dictionary of output files with keys 'summary', 'resfinder', 'pointfinder', 'settings', 'excel'
+                and 'hits_dir' (None if a file is not to be written).
+        """
         hits_output_dir = None
         output_summary = None
         output_resfinder = None
@@ -306,14 +620,15 @@ class Search(SubCommand):
         output_excel = None
         output_settings = None
         if args.output_dir:
-            if path.exists(args.output_dir):
+            if path.exists(args.output_dir) and not resume:
                 raise CommandParseException("Output directory [" + args.output_dir + "] already exists",
                                             self._root_arg_parser)
             elif args.output_summary or args.output_resfinder or args.output_pointfinder or args.output_excel or \
                     args.hits_output_dir:
                 raise CommandParseException('You cannot use --output-[type] with --output-dir', self._root_arg_parser)
             else:
-                mkdir(args.output_dir)
+                if not path.exists(args.output_dir):
+                    mkdir(args.output_dir)
 
                 hits_output_dir = path.join(args.output_dir, 'hits')
                 output_resfinder = path.join(args.output_dir, "resfinder.tsv")
@@ -322,7 +637,8 @@ class Search(SubCommand):
                 output_settings = path.join(args.output_dir, "settings.txt")
                 output_excel = path.join(args.output_dir, 'results.xlsx')
 
-                mkdir(hits_output_dir)
+                if not path.exists(hits_output_dir):
+                    mkdir(hits_output_dir)
 
                 logger.info("--output-dir set. All files will be output to [%s]", args.output_dir)
         elif args.output_summary or args.output_excel:
@@ -349,6 +665,38 @@ class Search(SubCommand):
             raise CommandParseException('You must set one of --output-dir, --output-summary, or --output-excel',
                                         self._root_arg_parser)
 
+        return {'summary': output_summary, 'resfinder': output_resfinder, 'pointfinder': output_pointfinder,
+                'settings': output_settings, 'excel': output_excel, 'hits_dir': hits_output_dir}
+
+    def _get_results_journal_settings(self, args, database_repos, genes_to_exclude):
+        """
+        Gets the settings which affect the results recorded in the results journal.
+        :param args: The command-line arguments.
+        :param database_repos: The database repos object.
+        :param genes_to_exclude: A list of gene IDs to exclude from the results.
+        :return: The settings as an OrderedDict of key/value pairs.
+        """
+        database_info = database_repos.info()
+
+        settings = OrderedDict()
+        settings['version'] = self._version
+        for name in ['resfinder', 'pointfinder']:
+            if name + '_db_commit' in database_info:
+                settings[name + '_db_commit'] = database_info[name + '_db_commit']
+        settings.update(self._get_reporting_settings(args, args.pointfinder_organism, genes_to_exclude))
+        settings['combine_resfinder'] = str(args.combine_resfinder)
+        settings['prebuilt_databases'] = str(args.prebuilt_databases)
+        settings['genome_pack_size'] = str(args.genome_pack_size)
+        settings['clustered_resfinder'] = str(args.clustered_resfinder)
+
+        return settings
+
+    def _get_genes_to_exclude(self, args):
+        """
+        Gets the genes to exclude from the results from the command-line arguments.
+        :param args: The command-line arguments.
+        :return: A list of gene IDs to exclude from the results.
+        """
         if args.no_exclude_genes:
             logger.info("--no-exclude-genes enabled. Will not exclude any ResFinder/PointFinder genes.")
             exclude_genes = []
@@ -362,64 +710,258 @@ class Search(SubCommand):
                     args.exclude_genes_file)
                 exclude_genes = ExcludeGenesList(args.exclude_genes_file).tolist()
 
-        results = self._generate_results(database_repos=database_repos,
-                                         resfinder_database=resfinder_database,
-                                         pointfinder_database=pointfinder_database,
-                                         nprocs=args.nprocs,
-                                         include_negatives=not args.exclude_negatives,
-                                         include_resistances=not args.exclude_resistance_phenotypes,
-                                         hits_output=hits_output_dir,
-                                         pid_threshold=args.pid_threshold,
-                                         plength_threshold_resfinder=args.plength_threshold_resfinder,
-                                         plength_threshold_pointfinder=args.plength_threshold_pointfinder,
-                                         report_all_blast=args.report_all_blast,
-                                         genes_to_exclude=exclude_genes,
-                                         files=args.files)
+        return exclude_genes
+
+    def run(self, args):
+        super(Search, self).run(args)
+
+        if (len(args.files) == 0):
+            raise CommandParseException("Must pass a fasta file to process", self._root_arg_parser, print_help=True)
+
+        for file in args.files:
+            if not path.exists(file):
+                raise CommandParseException('File [' + file + '] does not exist', self._root_arg_parser)
+
+        if args.genome_pack_size < 1:
+            raise CommandParseException("--genome-pack-size must be at least 1", self._root_arg_parser)
+
+        database_repos = self._get_database_repos(args)
+
+        resfinder_database = database_repos.build_blast_database('resfinder')
+        if (args.pointfinder_organism):
+            if args.pointfinder_organism not in PointfinderBlastDatabase.get_available_organisms():
+                raise CommandParseException("The only Pointfinder organism(s) currently supported are " + str(
+                    PointfinderBlastDatabase.get_available_organisms()), self._root_arg_parser)
+            pointfinder_database = database_repos.build_blast_database('pointfinder', {'organism': args.pointfinder_organism})
+        else:
+            logger.info("No --pointfinder-organism specified. Will not search the PointFinder databases")
+            pointfinder_database = None
+
+        prebuilt_databases = None
+        if args.prebuilt_databases:
+            prebuilt_databases = {}
+            database_names = ['resfinder', 'pointfinder'] if pointfinder_database else ['resfinder']
+            for database_name in database_names:
+                if not database_repos.is_prebuilt_databases_current(database_name):
+                    raise CommandParseException(
+                        "Prebuilt BLAST databases for " + database_name + " are missing or out of date. Perhaps try " +
+                        "rebuilding with 'staramr db update --prebuilt-databases'", self._root_arg_parser)
+                prebuilt_databases[database_name] = database_repos.get_prebuilt_databases(database_name)
+            logger.info("--prebuilt-databases enabled. Will search against prebuilt BLAST databases")
+
+        for option, enabled in [('--resume', args.resume), ('--incremental', args.incremental)]:
+            if not enabled:
+                continue
+            elif not args.output_dir:
+                raise CommandParseException(option + " requires --output-dir", self._root_arg_parser)
+            elif args.blast_archive:
+                raise CommandParseException(option + " cannot be used with --output-blast-archive",
+                                            self._root_arg_parser)
+            elif not path.exists(args.output_dir):
+                logger.info("%s set but --output-dir [%s] does not exist. Starting a new search", option,
+                            args.output_dir)
+
+        existing_output_dir = args.output_dir is not None and path.exists(args.output_dir)
+        kmer_prescreen = None
+        if args.kmer_prescreen:
+            if args.blast_archive:
+                raise CommandParseException("--kmer-prescreen cannot be used with --output-blast-archive, which must "
+                                            "store all BLAST hits", self._root_arg_parser)
+
+            database_names = ['resfinder', 'pointfinder'] if pointfinder_database else ['resfinder']
+            kmer_indexes = self._get_kmer_indexes(database_repos, database_names)
+            kmer_prescreen = KmerPrescreen(kmer_indexes, args.pid_threshold,
+                                           {'resfinder': args.plength_threshold_resfinder,
+                                            'pointfinder': args.plength_threshold_pointfinder})
+            logger.info("--kmer-prescreen enabled. Will skip BLAST jobs which cannot have hits passing the thresholds")
+
+        exclude_genes = self._get_genes_to_exclude(args)
+
+        exact_match_fast_path = None
+        if args.exact_match_fast_path:
+            if not args.prebuilt_databases:
+                raise CommandParseException("--exact-match-fast-path requires --prebuilt-databases",
+                                            self._root_arg_parser)
+            elif args.blast_archive:
+                raise CommandParseException("--exact-match-fast-path cannot be used with --output-blast-archive, "
+                                            "which must store all BLAST hits", self._root_arg_parser)
+            elif args.report_all_blast:
+                raise CommandParseException("--exact-match-fast-path cannot be used with --report-all-blast",
+                                            self._root_arg_parser)
+
+            kmer_indexes = self._get_kmer_indexes(database_repos, ['resfinder'])
+            exact_match_fast_path = ExactMatchFastPath(resfinder_database, kmer_indexes['resfinder'],
+                                                       args.pid_threshold, args.plength_threshold_resfinder,
+                                                       exclude_genes)
+            logger.info("--exact-match-fast-path enabled. Will use exact matches to ResFinder alleles in place of "
+                        "BLAST where possible")
+
+        resfinder_allele_clusters = None
+        if args.clustered_resfinder:
+            if not args.prebuilt_databases:
+                raise CommandParseException("--clustered-resfinder requires --prebuilt-databases",
+                                            self._root_arg_parser)
+            elif args.blast_archive:
+                raise CommandParseException("--clustered-resfinder cannot be used with --output-blast-archive, which "
+                                            "must store all BLAST hits", self._root_arg_parser)
+
+            resfinder_allele_clusters = prebuilt_databases['resfinder'].get_allele_clusters()
+            if not resfinder_allele_clusters.exists():
+                logger.info("Clustering ResFinder alleles for --clustered-resfinder. This is only done on the first "
+                            "clustered search after 'staramr db build/update --prebuilt-databases'")
+                resfinder_allele_clusters = database_repos.build_allele_clusters('resfinder')
+            logger.info("--clustered-resfinder enabled. Will search ResFinder against the representatives of clusters "
+                        "of alleles first")
+
+        output_files = self._get_output_files(args, resume=args.resume or args.incremental)
+
+        files = args.files
+        existing_results = None
+        if args.incremental and existing_output_dir:
+            existing_results = ExistingResults(output_files)
+            self._check_existing_settings(existing_results, database_repos,
+                                          self._get_reporting_settings(args, args.pointfinder_organism, exclude_genes),
+                                          args.pointfinder_organism)
+
+            existing_isolate_ids = existing_results.get_isolate_ids()
+            files = [file for file in args.files if
+                     path.splitext(path.basename(file))[0] not in existing_isolate_ids]
+            logger.info("--incremental set. Skipping %s files already in the results in [%s]",
+                        len(args.files) - len(files), args.output_dir)
+            if not files:
+                logger.info("No new files to scan. Existing results are unchanged")
+                return
+
+        if args.blast_output_dir:
+            if path.exists(args.blast_output_dir):
+                raise CommandParseException("--output-blast-dir [" + args.blast_output_dir + "] already exists",
+                                            self._root_arg_parser)
+            else:
+                logger.info("--output-blast-dir set. Intermediate BLAST files will be kept in [%s]",
+                            args.blast_output_dir)
+                mkdir(args.blast_output_dir)
+
+        blast_results_cache = None
+        if args.blast_cache:
+            if args.blast_cache_max_size < 0:
+                raise CommandParseException("--blast-cache-max-size must be at least 0", self._root_arg_parser)
+            blast_results_cache = BlastResultsCache(args.blast_cache_dir)
+            logger.info("--blast-cache enabled. Will re-use BLAST results cached in [%s]", args.blast_cache_dir)
+
+        results_journal = None
+        if args.output_dir:
+            results_journal = ResultsJournal(path.join(args.output_dir, self.RESULTS_JOURNAL_FILE),
+                                             self._get_results_journal_settings(args, database_repos, exclude_genes))
+            try:
+                results_journal.open(resume=args.resume or args.incremental,
+                                     ignored_settings=self.RESULTS_JOURNAL_BLAST_SETTINGS if args.incremental else None)
+            except Exception as e:
+                raise CommandParseException(str(e), self._root_arg_parser)
+
+        try:
+            results = self._generate_results(database_repos=database_repos,
+                                             resfinder_database=resfinder_database,
+                                             pointfinder_database=pointfinder_database,
+                                             nprocs=args.nprocs,
+                                             include_negatives=not args.exclude_negatives,
+                                             include_resistances=not args.exclude_resistance_phenotypes,
+                                             hits_output=output_files['hits_dir'],
+                                             pid_threshold=args.pid_threshold,
+                                             plength_threshold_resfinder=args.plength_threshold_resfinder,
+                                             plength_threshold_pointfinder=args.plength_threshold_pointfinder,
+                                             report_all_blast=args.report_all_blast,
+                                             genes_to_exclude=exclude_genes,
+                                             files=files,
+                                             combine_resfinder=args.combine_resfinder,
+                                             prebuilt_databases=prebuilt_databases,
+                                             genome_pack_size=args.genome_pack_size,
+                                             blast_output_dir=args.blast_output_dir,
+                                             blast_results_cache=blast_results_cache,
+                                             blast_hits_archive=args.blast_archive,
+                                             results_journal=results_journal,
+                                             kmer_prescreen=kmer_prescreen,
+                                             exact_match_fast_path=exact_match_fast_path,
+                                             resfinder_allele_clusters=resfinder_allele_clusters)
+        finally:
+            if results_journal is not None:
+                results_journal.close()
+
         amr_detection = results['results']
         settings = results['settings']
 
-        if output_resfinder:
-            logger.info("Writing resfinder to [%s]", output_resfinder)
-            with open(output_resfinder, 'w') as fh:
-                self._print_dataframe_to_text_file_handle(amr_detection.get_resfinder_results(), fh)
+        if blast_results_cache is not None:
+            removed = blast_results_cache.prune(args.blast_cache_max_size * 1024 * 1024)
+            if removed > 0:
+                logger.info("Removed %s least recently used results from the BLAST results cache", removed)
+
+        settings.update(self._get_reporting_settings(args, args.pointfinder_organism, exclude_genes))
+
+        resfinder_dataframe = amr_detection.get_resfinder_results()
+        pointfinder_dataframe = amr_detection.get_pointfinder_results()
+        summary_dataframe = amr_detection.get_summary_results()
+        if existing_results is not None:
+            logger.info("Merging results for %s new files into the existing results in [%s]", len(files),
+                        args.output_dir)
+            resfinder_dataframe, pointfinder_dataframe, summary_dataframe = existing_results.merge(
+                resfinder_dataframe, pointfinder_dataframe, summary_dataframe)
+
+        self._write_results(resfinder_dataframe, pointfinder_dataframe, summary_dataframe, settings, output_files,
+                            args.pointfinder_organism)
+
+    def _write_results(self, resfinder_dataframe, pointfinder_dataframe, summary_dataframe, settings, output_files,
+                       pointfinder_organism):
+        """
+        Writes the AMR detection results to the output files.
+        :param resfinder_dataframe: The pd.DataFrame of ResFinder results.
+        :param pointfinder_dataframe: The pd.DataFrame of PointFinder results (None if PointFinder was not used).
+        :param summary_dataframe: The pd.DataFrame of summary results.
+        :param settings: The settings used to generate the results.
+        :param output_files: The dictionary of output files, from _get_output_files().
+        :param pointfinder_organism: The PointFinder organism (None if PointFinder was not used).
+        :return: None
+        """
+        if output_files['resfinder']:
+            logger.info("Writing resfinder to [%s]", output_files['resfinder'])
+            with open(output_files['resfinder'], 'w') as fh:
+                self._print_dataframe_to_text_file_handle(resfinder_dataframe, fh)
         else:
             logger.info("--output-dir or --output-resfinder unset. No resfinder file will be written")
 
-        if args.pointfinder_organism and output_pointfinder:
-            logger.info("Writing pointfinder to [%s]", output_pointfinder)
-            with open(output_pointfinder, 'w') as fh:
-                self._print_dataframe_to_text_file_handle(amr_detection.get_pointfinder_results(), fh)
+        if pointfinder_organism and output_files['pointfinder']:
+            logger.info("Writing pointfinder to [%s]", output_files['pointfinder'])
+            with open(output_files['pointfinder'], 'w') as fh:
+                self._print_dataframe_to_text_file_handle(pointfinder_dataframe, fh)
         else:
             logger.info("--output-dir or --output-pointfinder unset. No pointfinder file will be written")
 
-        if output_summary:
-            logger.info("Writing summary to [%s]", output_summary)
-            with open(output_summary, 'w') as fh:
-                self._print_dataframe_to_text_file_handle(amr_detection.get_summary_results(), fh)
+        if output_files['summary']:
+            logger.info("Writing summary to [%s]", output_files['summary'])
+            with open(output_files['summary'], 'w') as fh:
+                self._print_dataframe_to_text_file_handle(summary_dataframe, fh)
         else:
             logger.info("--output-dir or --output-summary unset. No summary file will be written")
 
-        if output_settings:
-            logger.info("Writing settings to [%s]", output_settings)
-            self._print_settings_to_file(settings, output_settings)
+        if output_files['settings']:
+            logger.info("Writing settings to [%s]", output_files['settings'])
+            self._print_settings_to_file(settings, output_files['settings'])
         else:
             logger.info("--output-dir or --output-settings unset. No settings file will be written")
 
-        if output_excel:
-            logger.info("Writing Excel to [%s]", output_excel)
+        if output_files['excel']:
+            logger.info("Writing Excel to [%s]", output_files['excel'])
             settings_dataframe = pd.DataFrame.from_dict(settings, orient='index')
             settings_dataframe.index.name = 'Key'
             settings_dataframe.set_axis(['Value'], axis='columns', inplace=True)
 
-            self._print_dataframes_to_excel(output_excel,
-                                            amr_detection.get_summary_results(),
-                                            amr_detection.get_resfinder_results(),
-                                            amr_detection.get_pointfinder_results(),
+            self._print_dataframes_to_excel(output_files['excel'],
+                                            summary_dataframe,
+                                            resfinder_dataframe,
+                                            pointfinder_dataframe,
                                             settings_dataframe)
         else:
             logger.info("--output-dir or --output-excel unset. No excel file will be written")
 
-        if hits_output_dir:
-            logger.info("BLAST hits are stored in [%s]", hits_output_dir)
+        if output_files['hits_dir']:
+            logger.info("BLAST hits are stored in [%s]", output_files['hits_dir'])
         else:
             logger.info("--output-dir or --output-hits-dir not set. No BLAST hits will be saved.")
@@ -45,6 +45,37 @@ class BlastDatabaseRepositoriesIT(unittest.TestCase):
         self.assertEqual(str(pointfinder_repo_head), self.POINTFINDER_VALID_COMMIT,
                          'Pointfinder commits invalid')
 
+        # Verify prebuilt databases are only built when requested
+        self.assertFalse(self.database_repositories.is_prebuilt_databases_current('resfinder'),
+                         'Resfinder prebuilt databases should not be built')
+
+    def testBuildPrebuiltDatabases(self):
+        self.database_repositories.build(
+            {'resfinder': self.RESFINDER_VALID_COMMIT, 'pointfinder': self.POINTFINDER_VALID_COMMIT},
+            prebuilt_databases=True)
+
+        self.assertTrue(self.database_repositories.is_prebuilt_databases_current('resfinder'),
+                        'Resfinder prebuilt databases not built')
+        self.assertTrue(self.database_repositories.is_prebuilt_databases_current('pointfinder'),
+                        'Pointfinder prebuilt databases not built')
+
+        resfinder_prebuilt = self.database_repositories.get_prebuilt_databases('resfinder')
+        self.assertTrue(path.exists(resfinder_prebuilt.get_path('beta-lactam') + '.nsq'),
+                        'No beta-lactam BLAST database')
+        self.assertTrue(path.exists(resfinder_prebuilt.get_path('all-classes') + '.nsq'),
+                        'No combined ResFinder BLAST database')
+
+        pointfinder_prebuilt = self.database_repositories.get_prebuilt_databases('pointfinder')
+        self.assertTrue(path.exists(pointfinder_prebuilt.get_path(path.join('salmonella', 'gyrA')) + '.nsq'),
+                        'No gyrA BLAST database')
+        self.assertFalse(resfinder_prebuilt.get_allele_clusters().exists(),
+                         'Clusters should only be built for clustered searches')
+
+        allele_clusters = self.database_repositories.build_allele_clusters('resfinder')
+        self.assertTrue(allele_clusters.exists(), 'Clusters not built')
+        self.assertTrue(path.exists(allele_clusters.get_representatives_path('all-classes') + '.nsq'),
+                        'No BLAST database of combined ResFinder representatives')
+
     def testUpdate(self):
         # Build database
         self.database_repositories.build(
@@ -52,7 +83,8 @@ class BlastDatabaseRepositoriesIT(unittest.TestCase):
 
         # Update database
         self.database_repositories.update(
-            {'resfinder': self.RESFINDER_VALID_COMMIT2, 'pointfinder': self.POINTFINDER_VALID_COMMIT2})
+            {'resfinder': self.RESFINDER_VALID_COMMIT2, 'pointfinder': self.POINTFINDER_VALID_COMMIT2},
+            prebuilt_databases=True)
 
         # Verify correct commits
         resfinder_repo_head = git.Repo(self.database_repositories.get_repo_dir('resfinder')).commit('HEAD')
@@ -62,6 +94,12 @@ class BlastDatabaseRepositoriesIT(unittest.TestCase):
         self.assertEqual(str(pointfinder_repo_head), self.POINTFINDER_VALID_COMMIT2,
                          'Pointfinder commits invalid')
 
+        # Verify prebuilt databases were rebuilt
+        self.assertTrue(self.database_repositories.is_prebuilt_databases_current('resfinder'),
+                        'Resfinder prebuilt databases not updated')
+        self.assertTrue(self.database_repositories.is_prebuilt_databases_current('pointfinder'),
+                        'Pointfinder prebuilt databases not updated')
+
     def testInfo(self):
         # Build database
         self.database_repositories.build(
@@ -23,6 +23,7 @@ class AMRDetectionIT(unittest.TestCase):
 
     def setUp(self):
         blast_databases_repositories = AMRDatabasesManager.create_default_manager().get_database_repos()
+        self.blast_databases_repositories = blast_databases_repositories
         self.resfinder_dir = blast_databases_repositories.get_repo_dir('resfinder')
         self.pointfinder_dir = blast_databases_repositories.get_repo_dir('pointfinder')
 
@@ -113,6 +114,223 @@ class AMRDetectionIT(unittest.TestCase):
         self.assertEqual(expected_records['blaIMP-42_1_AB753456'].seq, records['blaIMP-42_1_AB753456'].seq,
                          "records don't match")
 
+    def testResfinderCombinedSameResults(self):
+        files = [path.join(self.test_data_dir, "beta-lactam-blaIMP-42-mut-2.fsa"),
+                 path.join(self.test_data_dir, "test-aminoglycoside.fsa"),
+                 path.join(self.test_data_dir, "16S_gyrA_beta-lactam.fsa")]
+        self.amr_detection.run_amr_detection(files, 99, 90, 90)
+        expected_results = self.amr_detection.get_resfinder_results()
+
+        blast_out_combined = tempfile.TemporaryDirectory()
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': None}, 2,
+                                     blast_out_combined.name, combine_resfinder=True)
+        amr_detection = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table, blast_handler,
+                                               self.pointfinder_drug_table, None, output_dir=self.outdir.name)
+        amr_detection.run_amr_detection(files, 99, 90, 90)
+        combined_results = amr_detection.get_resfinder_results()
+        blast_out_combined.cleanup()
+
+        self.assertEqual(2, len(combined_results.index), 'Wrong number of rows in result')
+        pd.testing.assert_frame_equal(expected_results.sort_values(by=['Isolate ID', 'Gene']),
+                                      combined_results.sort_values(by=['Isolate ID', 'Gene']))
+
+    def testResfinderCombinedBetaLactam2MutationsSuccess(self):
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': None}, 2,
+                                     self.blast_out.name, combine_resfinder=True)
+        amr_detection = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table, blast_handler,
+                                               self.pointfinder_drug_table, None, output_dir=self.outdir.name)
+
+        file = path.join(self.test_data_dir, "beta-lactam-blaIMP-42-mut-2.fsa")
+        amr_detection.run_amr_detection([file], 99, 90, 90)
+
+        resfinder_results = amr_detection.get_resfinder_results()
+        self.assertEqual(len(resfinder_results.index), 1, 'Wrong number of rows in result')
+
+        result = resfinder_results[resfinder_results['Gene'] == 'blaIMP-42']
+        self.assertEqual(len(result.index), 1, 'Wrong number of results detected')
+        self.assertAlmostEqual(result['%Identity'].iloc[0], 99.73, places=2, msg='Wrong pid')
+        self.assertEqual(result['Predicted Phenotype'].iloc[0],
+                         'ampicillin, amoxicillin/clavulanic acid, cefoxitin, ceftriaxone, meropenem',
+                         'Wrong phenotype')
+
+    def testPrebuiltDatabasesSameResults(self):
+        pointfinder_database = PointfinderBlastDatabase(self.pointfinder_dir, 'salmonella')
+        files = [path.join(self.test_data_dir, "beta-lactam-blaIMP-42-mut-2.fsa"),
+                 path.join(self.test_data_dir, "16S-rc_gyrA-rc_beta-lactam.fsa"),
+                 path.join(self.test_data_dir, "gyrA-A67P-rc.fsa")]
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': pointfinder_database}, 2,
+                                     self.blast_out.name)
+        amr_detection = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table, blast_handler,
+                                               self.pointfinder_drug_table, pointfinder_database)
+        amr_detection.run_amr_detection(files, 99, 90, 90)
+
+        for combine_resfinder in [False, True]:
+            blast_out_prebuilt = tempfile.TemporaryDirectory()
+            prebuilt_databases = {
+                'resfinder': self.blast_databases_repositories.get_prebuilt_databases('resfinder'),
+                'pointfinder': self.blast_databases_repositories.get_prebuilt_databases('pointfinder')
+            }
+            blast_handler = BlastHandler({'resfinder': self.resfinder_database,
+                                          'pointfinder': pointfinder_database}, 2, blast_out_prebuilt.name,
+                                         combine_resfinder=combine_resfinder, prebuilt_databases=prebuilt_databases)
+            amr_detection_prebuilt = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table,
+                                                            blast_handler, self.pointfinder_drug_table,
+                                                            pointfinder_database)
+            amr_detection_prebuilt.run_amr_detection(files, 99, 90, 90)
+            blast_out_prebuilt.cleanup()
+
+            pd.testing.assert_frame_equal(amr_detection.get_resfinder_results().sort_values(by=['Isolate ID', 'Gene']),
+                                          amr_detection_prebuilt.get_resfinder_results().sort_values(
+                                              by=['Isolate ID', 'Gene']))
+            pd.testing.assert_frame_equal(amr_detection.get_pointfinder_results(),
+                                          amr_detection_prebuilt.get_pointfinder_results())
+
+    def testPrebuiltDatabasesLargeAlleleFamilySameResults(self):
+        # An allele of the largest family of beta-lactam alleles, where the genome as a query has hits to more alleles
+        # than BLAST reports by default
+        alleles = list(SeqIO.parse(self.resfinder_database.get_path('beta-lactam'), 'fasta'))
+        families = {}
+        for allele in alleles:
+            families.setdefault(allele.id.split('-')[0], []).append(allele)
+        family = max(families.values(), key=len)
+
+        genome_dir = tempfile.TemporaryDirectory()
+        genome_file = path.join(genome_dir.name, 'large-family.fsa')
+        with open(genome_file, 'w') as genome_handle:
+            genome_handle.write('>contig1\n' + str(family[0].seq) + '\n')
+        files = [genome_file]
+
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': None}, 2,
+                                     self.blast_out.name)
+        amr_detection = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table, blast_handler,
+                                               self.pointfinder_drug_table)
+        amr_detection.run_amr_detection(files, 99, 90, 90)
+
+        blast_out_prebuilt = tempfile.TemporaryDirectory()
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': None}, 2,
+                                     blast_out_prebuilt.name, prebuilt_databases={
+                'resfinder': self.blast_databases_repositories.get_prebuilt_databases('resfinder')})
+        amr_detection_prebuilt = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table,
+                                                        blast_handler, self.pointfinder_drug_table)
+        amr_detection_prebuilt.run_amr_detection(files, 99, 90, 90)
+        blast_out_prebuilt.cleanup()
+        genome_dir.cleanup()
+
+        self.assertEqual(1, len(amr_detection.get_resfinder_results().index), 'Wrong number of rows in result')
+        pd.testing.assert_frame_equal(amr_detection.get_resfinder_results(),
+                                      amr_detection_prebuilt.get_resfinder_results())
+
+    def testGenomePacksSameResults(self):
+        pointfinder_database = PointfinderBlastDatabase(self.pointfinder_dir, 'salmonella')
+        files = [path.join(self.test_data_dir, "beta-lactam-blaIMP-42-mut-2.fsa"),
+                 path.join(self.test_data_dir, "16S-rc_gyrA-rc_beta-lactam.fsa"),
+                 path.join(self.test_data_dir, "test-seq-id.fsa"),
+                 path.join(self.test_data_dir, "gyrA-A67P-rc.fsa"),
+                 path.join(self.test_data_dir, "non-match.fsa")]
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': pointfinder_database}, 2,
+                                     self.blast_out.name)
+        amr_detection = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table, blast_handler,
+                                               self.pointfinder_drug_table, pointfinder_database)
+        amr_detection.run_amr_detection(files, 99, 90, 90)
+
+        blast_out_packs = tempfile.TemporaryDirectory()
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': pointfinder_database}, 2,
+                                     blast_out_packs.name, genomes_per_database=2)
+        amr_detection_packs = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table,
+                                                     blast_handler, self.pointfinder_drug_table, pointfinder_database)
+        amr_detection_packs.run_amr_detection(files, 99, 90, 90)
+        blast_out_packs.cleanup()
+
+        pd.testing.assert_frame_equal(amr_detection.get_resfinder_results(),
+                                      amr_detection_packs.get_resfinder_results())
+        pd.testing.assert_frame_equal(amr_detection.get_pointfinder_results(),
+                                      amr_detection_packs.get_pointfinder_results())
+        pd.testing.assert_frame_equal(amr_detection.get_summary_results(),
+                                      amr_detection_packs.get_summary_results())
+
+        result = amr_detection_packs.get_resfinder_results().loc['test-seq-id']
+        self.assertEqual("1", result['Contig'], "Incorrect contig id")
+
+    def testParseProcessesSameResults(self):
+        pointfinder_database = PointfinderBlastDatabase(self.pointfinder_dir, 'salmonella')
+        files = [path.join(self.test_data_dir, "beta-lactam-blaIMP-42-mut-2.fsa"),
+                 path.join(self.test_data_dir, "16S-rc_gyrA-rc_beta-lactam.fsa"),
+                 path.join(self.test_data_dir, "test-seq-id.fsa"),
+                 path.join(self.test_data_dir, "gyrA-A67P-rc.fsa"),
+                 path.join(self.test_data_dir, "non-match.fsa")]
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': pointfinder_database}, 2,
+                                     self.blast_out.name)
+        amr_detection = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table, blast_handler,
+                                               self.pointfinder_drug_table, pointfinder_database)
+        amr_detection.run_amr_detection(files, 99, 90, 90)
+
+        blast_out_processes = tempfile.TemporaryDirectory()
+        hits_out_processes = tempfile.TemporaryDirectory()
+        blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': pointfinder_database}, 2,
+                                     blast_out_processes.name, write_blast_outputs=False)
+        amr_detection_processes = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table,
+                                                         blast_handler, self.pointfinder_drug_table,
+                                                         pointfinder_database, output_dir=hits_out_processes.name,
+                                                         parse_processes=3)
+        amr_detection_processes.run_amr_detection(files, 99, 90, 90)
+        blast_out_processes.cleanup()
+
+        pd.testing.assert_frame_equal(amr_detection.get_resfinder_results(),
+                                      amr_detection_processes.get_resfinder_results())
+        pd.testing.assert_frame_equal(amr_detection.get_pointfinder_results(),
+                                      amr_detection_processes.get_pointfinder_results())
+        pd.testing.assert_frame_equal(amr_detection.get_summary_results(),
+                                      amr_detection_processes.get_summary_results())
+
+        hit_file = path.join(hits_out_processes.name, 'resfinder_beta-lactam-blaIMP-42-mut-2.fsa')
+        self.assertTrue(path.exists(hit_file), "Hits should be written by the parsing processes")
+        hits_out_processes.cleanup()
+
+    def testPointfinderMutationCacheSameResults(self):
+        pointfinder_database = PointfinderBlastDatabase(self.pointfinder_dir, 'salmonella')
+        files = [path.join(self.test_data_dir, "gyrA-A67P.fsa"),
+                 path.join(self.test_data_dir, "gyrA-A67P-rc.fsa"),
+                 path.join(self.test_data_dir, "gyrA-A67T.fsa")]
+
+        for parse_processes in [1, 2]:
+            blast_out = tempfile.TemporaryDirectory()
+            blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': pointfinder_database},
+                                         2, blast_out.name)
+            amr_detection = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table, blast_handler,
+                                                   self.pointfinder_drug_table, pointfinder_database,
+                                                   parse_processes=parse_processes)
+            amr_detection.run_amr_detection(files, 99, 99, 90)
+            blast_out.cleanup()
+
+            pointfinder_results = amr_detection.get_pointfinder_results()
+            self.assertEqual(['gyrA (A67P)', 'gyrA (A67P)'], pointfinder_results['Gene'].tolist(),
+                             'Wrong results for parse_processes=' + str(parse_processes))
+            self.assertEqual(['ciprofloxacin I/R, nalidixic acid', 'ciprofloxacin I/R, nalidixic acid'],
+                             pointfinder_results['Predicted Phenotype'].tolist(), 'Wrong phenotypes')
+            self.assertEqual(['gyrA-A67P', 'gyrA-A67P-rc'], pointfinder_results.index.tolist(), 'Wrong files')
+
+            mutation_cache = amr_detection.get_pointfinder_mutation_cache()
+            self.assertEqual(3, mutation_cache.get_number_hits() + mutation_cache.get_number_misses(),
+                             'Wrong number of alignments')
+            self.assertEqual(2, len(mutation_cache), 'Wrong number of distinct alignments')
+
+            # Re-uses the cache of the previous run, as with --blast-cache
+            blast_out = tempfile.TemporaryDirectory()
+            blast_handler = BlastHandler({'resfinder': self.resfinder_database, 'pointfinder': pointfinder_database},
+                                         2, blast_out.name)
+            amr_detection = AMRDetectionResistance(self.resfinder_database, self.resfinder_drug_table, blast_handler,
+                                                   self.pointfinder_drug_table, pointfinder_database,
+                                                   parse_processes=parse_processes,
+                                                   pointfinder_mutation_cache=mutation_cache)
+            amr_detection.run_amr_detection(files, 99, 99, 90)
+            blast_out.cleanup()
+
+            self.assertEqual(pointfinder_results['Gene'].tolist(),
+                             amr_detection.get_pointfinder_results()['Gene'].tolist(),
+                             'Wrong results with re-used cache for parse_processes=' + str(parse_processes))
+            self.assertEqual(4, mutation_cache.get_number_hits(), 'Should re-use all alignments')
+            self.assertEqual(2, len(mutation_cache), 'Wrong number of distinct alignments')
+
     def testResfinderBetaLactam2MutationsSuccessNoPredictedPhenotype(self):
         amr_detection = AMRDetection(self.resfinder_database, self.blast_handler, self.pointfinder_database,
                                      output_dir=self.outdir.name)
@@ -100,3 +100,22 @@ class PointfinderDatabaseInfoTest(unittest.TestCase):
 
     def testGetResfinderPhenotypeMissingFail(self):
         self.assertRaises(Exception, self.database.get_phenotype, 'gyrA', self.mutation_missing)
+
+    def testGetResistanceCodonsMultipleMatchesFail(self):
+        pandas_pointfinder_table = pd.DataFrame([
+            ['gyrA', 'gyrA', 1, 1, 'ATC', 'I', 'F', 'Quinolones', 15848289],
+            ['gyrA', 'gyrA', 1, 1, 'ATC', 'I', 'F,L', 'Quinolones', 15848289],
+            ['gyrA', 'gyrA', 1, 2, 'GAT', 'D', float('nan'), 'Quinolones', 15848289],
+        ],
+            columns=(
+                '#Gene_ID', 'Gene_name', 'No of mutations needed', 'Codon_pos', 'Ref_nuc', 'Ref_codon', 'Res_codon',
+                'Resistance', 'PMID'))
+        database = PointfinderDatabaseInfo.from_pandas_table(pandas_pointfinder_table)
+
+        self.assertRaises(Exception, database.get_resistance_codons, 'gyrA', [self.mutation1])
+        self.assertEqual([], database.get_resistance_codons('gyrA', [self.mutation2]),
+                         "Should not match mutations without resistant codons")
+
+    def testGetResistancePositions(self):
+        self.assertEqual({1, 2}, self.database.get_resistance_positions('gyrA'), 'Wrong resistance positions')
+        self.assertEqual(set(), self.database.get_resistance_positions('parC'), 'Should be no resistance positions')
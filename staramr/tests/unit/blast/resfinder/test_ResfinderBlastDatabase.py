@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+from os import path
+
+from Bio import SeqIO
+
+from staramr.blast.resfinder.ResfinderBlastDatabase import ResfinderBlastDatabase
+
+
+class ResfinderBlastDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.database_dir = tempfile.TemporaryDirectory()
+
+        with open(path.join(self.database_dir.name, 'beta-lactam.fsa'), 'w') as fh:
+            fh.write(">blaIMP-42_1_AB753456\nATCG\n>blaTEM-1_1_AB1\nGGCC\n")
+        with open(path.join(self.database_dir.name, 'aminoglycoside.fsa'), 'w') as fh:
+            fh.write(">aadA1_1_JQ414041\nTTAA\n>blaTEM-1_1_AB1\nGGCC\n")
+
+        self.database = ResfinderBlastDatabase(self.database_dir.name)
+
+    def tearDown(self):
+        self.database_dir.cleanup()
+
+    def testGetAlleleDatabaseNames(self):
+        allele_database_names = self.database.get_allele_database_names()
+
+        self.assertEqual(3, len(allele_database_names), 'Wrong number of alleles')
+        self.assertEqual(['beta-lactam'], allele_database_names['blaIMP-42_1_AB753456'], 'Wrong drug classes')
+        self.assertEqual(['aminoglycoside'], allele_database_names['aadA1_1_JQ414041'], 'Wrong drug classes')
+        self.assertEqual(['aminoglycoside', 'beta-lactam'], allele_database_names['blaTEM-1_1_AB1'],
+                         'Wrong drug classes')
+
+    def testWriteCombinedDatabase(self):
+        combined_file = path.join(self.database_dir.name, 'combined.fasta')
+
+        number_alleles = self.database.write_combined_database(combined_file)
+
+        records = list(SeqIO.parse(combined_file, 'fasta'))
+        self.assertEqual(3, number_alleles, 'Wrong number of alleles written')
+        self.assertEqual(['aadA1_1_JQ414041', 'blaTEM-1_1_AB1', 'blaIMP-42_1_AB753456'], [r.id for r in records],
+                         'Alleles should only be written once')
+
+
+if __name__ == '__main__':
+    unittest.main()
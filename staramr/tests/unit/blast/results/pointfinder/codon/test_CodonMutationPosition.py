@@ -405,3 +405,24 @@ class CodonMutationPositionTest(unittest.TestCase):
         self.assertEqual(mutation.get_database_amr_gene_mutation(), 'X', 'Incorrect database amino acid')
         self.assertEqual(mutation.get_input_genome_mutation(), 'I', 'Incorrect query amino acid')
         self.assertEqual(mutation.get_mutation_string_short(), 'X1I', 'Incorrect string')
+
+    def testMutationPositionAmbiguousBase(self):
+        mutation_position = 2
+        # @formatter:off
+        database_amr_gene_string = "GCT"
+        input_genome_string   = "gcn"
+        #@formatter:on
+        amr_gene_start = 1
+
+        mutation = CodonMutationPosition(mutation_position, database_amr_gene_string, input_genome_string,
+                                         amr_gene_start)
+
+        self.assertEqual(mutation.get_input_genome_codon(), 'GCN', 'Incorrect query codon')
+        self.assertEqual(mutation.get_database_amr_gene_mutation(), 'A', 'Incorrect database amino acid')
+        self.assertEqual(mutation.get_input_genome_mutation(), 'A', 'Incorrect query amino acid')
+
+    def testTranslateCodons(self):
+        amino_acids = CodonMutationPosition.translate_codons(['ATG', 'atg', 'A-G', 'NNN', 'TAA', 'GCN'])
+
+        self.assertEqual(['M', 'M', 'X', 'X', '*', 'A'], amino_acids.tolist(), 'Incorrect amino acids')
+        self.assertEqual(0, len(CodonMutationPosition.translate_codons([])), 'Should be no amino acids')
@@ -3,6 +3,7 @@ import unittest
 import pandas as pd
 
 from staramr.blast.results.pointfinder.PointfinderHitHSP import PointfinderHitHSP
+from staramr.blast.results.pointfinder.nucleotide.PointfinderHitHSPRNA import PointfinderHitHSPRNA
 from staramr.exceptions.InvalidPositionException import InvalidPositionException
 
 
@@ -22,3 +23,25 @@ class PointfinderHitHSPTest(unittest.TestCase):
         blast_record = pd.Series({'sstart': 1, 'send': 10, 'qstart': 10, 'qend': 1, 'sstrand': 'plus'})
 
         self.assertRaises(InvalidPositionException, PointfinderHitHSP, None, blast_record)
+
+    def testGetMutationsOnePerCodon(self):
+        blast_record = pd.Series({'sstart': 1, 'send': 9, 'qstart': 1, 'qend': 9, 'sstrand': 'plus',
+                                  'qseq': 'ATCGATCGA', 'sseq': 'TTCCACCGA'})
+        hit = PointfinderHitHSP(file=None, blast_record=blast_record)
+
+        mutations = hit.get_mutations()
+
+        self.assertEqual([1, 2], [m.get_codon_start() for m in mutations], 'Should be one mutation per codon')
+        self.assertEqual('CAC', mutations[1].get_input_genome_codon(), 'Wrong codon')
+        self.assertEqual([2], [m.get_codon_start() for m in hit.get_mutations({2, 3})],
+                         'Should only be mutations at resistance positions')
+
+    def testGetMutationsRNA(self):
+        blast_record = pd.Series({'sstart': 1, 'send': 9, 'qstart': 11, 'qend': 19, 'sstrand': 'plus',
+                                  'qseq': 'ATCGATCGA', 'sseq': 'TTCCACCGA'})
+        hit = PointfinderHitHSPRNA(file=None, blast_record=blast_record)
+
+        self.assertEqual([11, 14, 16], [m.get_nucleotide_position() for m in hit.get_mutations()],
+                         'Wrong mutations')
+        self.assertEqual([16], [m.get_nucleotide_position() for m in hit.get_mutations({16, 20})],
+                         'Should only be mutations at resistance positions')
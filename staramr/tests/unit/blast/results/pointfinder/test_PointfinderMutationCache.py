@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+from os import path
+
+from staramr.blast.results.pointfinder.PointfinderMutationCache import PointfinderMutationCache
+
+
+class PointfinderMutationCacheTest(unittest.TestCase):
+
+    def testGetKeySameAlignment(self):
+        key1 = PointfinderMutationCache.get_key('gyrA', 'gyrA', 1, 'ATGGCC', 'ATGCCC')
+        key2 = PointfinderMutationCache.get_key('gyrA', 'gyrA', 1, 'ATGGCC', 'ATGCCC')
+        key3 = PointfinderMutationCache.get_key('gyrA', 'gyrA', 4, 'ATGGCC', 'ATGCCC')
+        key4 = PointfinderMutationCache.get_key('gyrA', 'gyrA', 1, 'ATGGCC', 'ATGGCC')
+
+        self.assertEqual(key1, key2, "Identical alignments should have the same key")
+        self.assertNotEqual(key1, key3, "Alignments at different starts should have different keys")
+        self.assertNotEqual(key1, key4, "Different alignments should have different keys")
+
+    def testGetPutStatistics(self):
+        cache = PointfinderMutationCache()
+
+        self.assertIsNone(cache.get('key1'), "Should not find alignment")
+        cache.put('key1', [])
+        self.assertEqual([], cache.get('key1'), "Should find alignment without mutations")
+
+        self.assertEqual(1, cache.get_number_hits(), "Wrong number of hits")
+        self.assertEqual(1, cache.get_number_misses(), "Wrong number of misses")
+
+    def testPutRemovesLeastRecentlyUsed(self):
+        cache = PointfinderMutationCache(max_size=2)
+        cache.put('key1', ['mutation1'])
+        cache.put('key2', ['mutation2'])
+        cache.get('key1')
+        cache.put('key3', ['mutation3'])
+
+        self.assertEqual(2, len(cache), "Wrong number of alignments")
+        self.assertEqual(['mutation1'], cache.get('key1'), "Recently used alignment should be kept")
+        self.assertIsNone(cache.get('key2'), "Least recently used alignment should be removed")
+
+    def testInvalidMaxSizeFail(self):
+        self.assertRaises(Exception, PointfinderMutationCache, 0)
+
+    def testGetApplyChanges(self):
+        cache = PointfinderMutationCache(max_size=3)
+        cache.put('key1', ['mutation1'])
+        cache.put('key2', ['mutation2'])
+        cache.get('key1')
+
+        process_cache = PointfinderMutationCache(max_size=3)
+        process_cache.put('key1', ['mutation1'])
+        process_cache.put('key2', ['mutation2'])
+        process_cache.record_changes()
+        process_cache.get('key2')
+        process_cache.get('key3')
+        process_cache.put('key3', ['mutation3'])
+
+        used_keys, new_entries, number_hits, number_misses = process_cache.get_changes()
+        self.assertEqual(['key2'], used_keys, "Should only send the alignments used")
+        self.assertEqual([('key3', ['mutation3'])], new_entries, "Should only send the alignments stored")
+        self.assertEqual((1, 1), (number_hits, number_misses), "Should only send the new statistics")
+        self.assertEqual(([], [], 0, 0), process_cache.get_changes(), "Should start recording new changes")
+
+        cache.apply_changes((used_keys, new_entries, number_hits, number_misses))
+        cache.put('key4', ['mutation4'])
+
+        self.assertEqual(['mutation3'], cache.get('key3'), "Should merge alignments")
+        self.assertEqual(['mutation2'], cache.get('key2'), "Alignment used in the other cache should be kept")
+        self.assertIsNone(cache.get('key1'), "Least recently used alignment should be removed")
+        self.assertEqual(4, cache.get_number_hits(), "Wrong number of hits")
+        self.assertEqual(2, cache.get_number_misses(), "Wrong number of misses")
+
+    def testSaveLoad(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_file = path.join(cache_dir, 'mutations', 'cache.pickle')
+            cache = PointfinderMutationCache()
+            key = PointfinderMutationCache.get_key('gyrA', 'gyrA', 1, 'ATGGCC', 'ATGCCC')
+            cache.put(key, [('mutation1', 'ciprofloxacin')])
+            cache.save(cache_file)
+
+            loaded_cache = PointfinderMutationCache.load(cache_file)
+
+            self.assertEqual([('mutation1', 'ciprofloxacin')], loaded_cache.get(key), "Should load alignment")
+            self.assertEqual(1, loaded_cache.get_number_hits(), "Should start new statistics")
+
+    def testLoadMissingFile(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = PointfinderMutationCache.load(path.join(cache_dir, 'cache.pickle'))
+
+            self.assertEqual(0, len(cache), "Should load an empty cache")
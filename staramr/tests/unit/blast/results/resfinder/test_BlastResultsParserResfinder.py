@@ -0,0 +1,111 @@
+import tempfile
+import unittest
+from os import path
+from unittest.mock import MagicMock
+
+import Bio.SeqIO
+import pandas as pd
+from Bio.Seq import reverse_complement
+
+from staramr.blast.BlastHandler import BlastHandler
+from staramr.blast.resfinder.ResfinderBlastDatabase import ResfinderBlastDatabase
+from staramr.blast.results.resfinder.BlastResultsParserResfinder import BlastResultsParserResfinder
+
+
+class BlastResultsParserResfinderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.resfinder_database = ResfinderBlastDatabase(None)
+        self.resfinder_database.get_allele_database_names = MagicMock(return_value={
+            'blaIMP-42_1_AB753456': ['beta-lactam'],
+            'aadA1_1_JQ414041': ['aminoglycoside'],
+            'blaTEM-1_1_AB1': ['aminoglycoside', 'beta-lactam'],
+        })
+        self.parser = BlastResultsParserResfinder({}, self.resfinder_database, 98, 60)
+
+        self.blast_table = pd.DataFrame([['blaIMP-42_1_AB753456', 'contig1'],
+                                         ['aadA1_1_JQ414041', 'contig2'],
+                                         ['blaTEM-1_1_AB1', 'contig3']], columns=['qseqid', 'sseqid'])
+
+    def testSplitBlastTableSingleDatabase(self):
+        split_tables = self.parser._split_blast_table('beta-lactam', self.blast_table)
+
+        self.assertEqual(1, len(split_tables), 'Table should not be split')
+        self.assertEqual('beta-lactam', split_tables[0][0], 'Wrong database name')
+        self.assertEqual(3, len(split_tables[0][1].index), 'Wrong number of rows')
+
+    def testSplitBlastTableCombined(self):
+        split_tables = dict(
+            self.parser._split_blast_table(ResfinderBlastDatabase.COMBINED_DATABASE_NAME, self.blast_table))
+
+        self.assertEqual(['aminoglycoside', 'beta-lactam'], sorted(split_tables), 'Wrong drug classes')
+        self.assertEqual(['aadA1_1_JQ414041', 'blaTEM-1_1_AB1'], split_tables['aminoglycoside']['qseqid'].tolist(),
+                         'Wrong aminoglycoside alleles')
+        self.assertEqual(['blaIMP-42_1_AB753456', 'blaTEM-1_1_AB1'], split_tables['beta-lactam']['qseqid'].tolist(),
+                         'Wrong beta-lactam alleles')
+
+    def testSplitBlastTableCombinedUnknownAllele(self):
+        blast_table = pd.DataFrame([['unknown_1_X', 'contig1']], columns=['qseqid', 'sseqid'])
+
+        self.assertRaises(Exception, self.parser._split_blast_table, ResfinderBlastDatabase.COMBINED_DATABASE_NAME,
+                          blast_table)
+
+    def _hit(self, gene, contig, pid, length, qlen, sstart, send, strand='plus'):
+        return [gene, contig, pid, length, 1, length, sstart, send, 10000, qlen, strand, '', '']
+
+    def testSelectHits(self):
+        blast_table = pd.DataFrame([self._hit('blaIMP-42_1_AB753456', 'contig1 description', 99.0, 800, 800, 1, 800),
+                                    self._hit('blaTEM-1_1_AB1', 'contig1', 100.0, 780, 780, 10, 789),
+                                    self._hit('blaIMP-42_1_AB753456', 'contig1', 100.0, 800, 800, 3000, 2201,
+                                              'minus'),
+                                    self._hit('aadA1_1_JQ414041', 'contig1', 99.5, 850, 850, 2100, 2949)],
+                                   columns=BlastHandler.BLAST_COLUMNS)
+        blast_table = blast_table.assign(plength=(blast_table.length / blast_table.qlen) * 100.0)
+
+        selected_hits = self.parser._select_hits([('beta-lactam', blast_table)])
+
+        self.assertEqual([('beta-lactam', 'blaTEM-1_1_AB1'), ('beta-lactam', 'aadA1_1_JQ414041')],
+                         [(database_name, record['qseqid']) for database_name, record in selected_hits],
+                         'Should prefer the top pid hit, and the top length hit if it is more than 10 bases longer')
+
+    def testSelectHitsReportAll(self):
+        blast_table = pd.DataFrame([self._hit('blaIMP-42_1_AB753456', 'contig1', 99.0, 800, 800, 1, 800),
+                                    self._hit('blaTEM-1_1_AB1', 'contig1', 100.0, 780, 780, 10, 789),
+                                    self._hit('aadA1_1_JQ414041', 'contig2', 99.5, 800, 800, 1, 800)],
+                                   columns=BlastHandler.BLAST_COLUMNS)
+        blast_table = blast_table.assign(plength=(blast_table.length / blast_table.qlen) * 100.0)
+        parser = BlastResultsParserResfinder({}, self.resfinder_database, 98, 60, report_all=True)
+
+        selected_hits = parser._select_hits([('beta-lactam', blast_table), ('aminoglycoside', blast_table.iloc[0:1])])
+
+        self.assertEqual([('beta-lactam', 'blaTEM-1_1_AB1'), ('beta-lactam', 'blaIMP-42_1_AB753456'),
+                          ('beta-lactam', 'aadA1_1_JQ414041'), ('aminoglycoside', 'blaIMP-42_1_AB753456')],
+                         [(database_name, record['qseqid']) for database_name, record in selected_hits],
+                         'Should report all hits, ordered by pid within each region')
+        self.assertEqual([], parser._select_hits([('beta-lactam', blast_table.iloc[0:0])]), 'Should be no hits')
+
+    def testParseFileResultsHitSequencesFromGenome(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            contig1 = 'AAAAATTTCCGGGCATCG' * 4
+            genome_file = path.join(output_dir, 'genome.fasta')
+            with open(genome_file, 'w') as fh:
+                fh.write('>contig1\n' + contig1[:50] + '\n' + contig1[50:] + '\n')
+
+            blast_table = pd.DataFrame([['blaIMP-42_1_AB753456', 'contig1', 100.0, 18, 1, 18, 11, 28, 72, 18, 'plus',
+                                         '', ''],
+                                        ['aadA1_1_JQ414041', 'contig1', 100.0, 18, 1, 18, 70, 53, 72, 18, 'minus',
+                                         '', '']], columns=BlastHandler.BLAST_COLUMNS)
+            parser = BlastResultsParserResfinder({'genome.fasta': {'beta-lactam': blast_table}},
+                                                 self.resfinder_database, 98, 60, output_dir=output_dir)
+
+            parser.parse_file_results('genome.fasta', genome_file)
+
+            hit_sequences = {record.id: str(record.seq) for record in
+                             Bio.SeqIO.parse(path.join(output_dir, 'resfinder_genome.fasta'), 'fasta')}
+            self.assertEqual({'blaIMP-42_1_AB753456': contig1[10:28],
+                              'aadA1_1_JQ414041': reverse_complement(contig1[52:70])}, hit_sequences,
+                             'Wrong hit sequences')
+
+
+if __name__ == '__main__':
+    unittest.main()
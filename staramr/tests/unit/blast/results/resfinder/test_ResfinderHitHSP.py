@@ -0,0 +1,42 @@
+import unittest
+
+import pandas as pd
+
+from staramr.blast.results.resfinder.ResfinderHitHSP import ResfinderHitHSP
+
+
+class ResfinderHitHSPTest(unittest.TestCase):
+
+    def testBuildResfinderHitHSP(self):
+        blast_record = pd.Series(
+            {'qseqid': 'blaCTX-M-55_1_GQ456159', 'sseqid': 'contig1 description', 'sstart': 1, 'send': 10,
+             'qstart': 1, 'qend': 10, 'sstrand': 'plus', 'qlen': 10, 'length': 10, 'pident': 100.0,
+             'plength': 100.0})
+
+        hit = ResfinderHitHSP('genome.fasta', blast_record)
+
+        self.assertEqual('genome', hit.get_genome_id(), "Wrong genome id")
+        self.assertEqual('contig1', hit.get_genome_contig_id(), "Wrong contig id")
+        self.assertEqual('blaCTX-M-55', hit.get_amr_gene_name(), "Wrong gene name")
+        self.assertEqual('blaCTX-M-55_1', hit.get_amr_gene_name_with_variant(), "Wrong gene name with variant")
+        self.assertEqual('GQ456159', hit.get_amr_gene_accession(), "Wrong accession")
+        self.assertIsNone(hit.get_genome_contig_hsp_seq(), "Should be no hit sequence")
+        self.assertFalse(hasattr(hit, '__dict__'), "Hits should only store their fields")
+
+    def testBuildResfinderHitHSPSharesAlleleNames(self):
+        blast_record = pd.Series(
+            {'qseqid': 'blaTEM-1B_1_JF910132', 'sseqid': 'contig1', 'sstart': 1, 'send': 10, 'qstart': 1, 'qend': 10,
+             'sstrand': 'plus'})
+
+        hit1 = ResfinderHitHSP('genome1.fasta', blast_record)
+        hit2 = ResfinderHitHSP('genome2.fasta', blast_record)
+
+        self.assertIs(hit1.get_amr_gene_name(), hit2.get_amr_gene_name(), "Should share allele names")
+        self.assertEqual('JF910132', hit2.get_amr_gene_accession(), "Wrong accession")
+
+    def testBuildResfinderHitHSPFailInvalidAlleleId(self):
+        blast_record = pd.Series(
+            {'qseqid': 'blaTEM', 'sseqid': 'contig1', 'sstart': 1, 'send': 10, 'qstart': 1, 'qend': 10,
+             'sstrand': 'plus'})
+
+        self.assertRaises(Exception, ResfinderHitHSP, 'genome.fasta', blast_record)
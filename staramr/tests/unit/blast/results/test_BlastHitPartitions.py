@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import MagicMock
 
+import numpy as np
+
 from staramr.blast.results.AMRHitHSP import AMRHitHSP
 from staramr.blast.results.BlastHitPartitions import BlastHitPartitions
 from staramr.exceptions.InvalidPositionException import InvalidPositionException
@@ -8,12 +10,12 @@ from staramr.exceptions.InvalidPositionException import InvalidPositionException
 
 class BlastHitPartitionsTest(unittest.TestCase):
 
+    def _create_hit(self, contig_id, start, end, strand):
+        return AMRHitHSP(None, {'sseqid': contig_id, 'sstart': start, 'send': end, 'sstrand': strand, 'qstart': 1,
+                                'qend': 1})
+
     def testSinglePartition(self):
-        hit1 = AMRHitHSP(None, None)
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -27,11 +29,7 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertEqual(10, return_list[0][0].get_genome_contig_end(), "Should have correct contig end")
 
     def testSinglePartitionMinus(self):
-        hit1 = AMRHitHSP(None, None)
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=10)
-        hit1.get_genome_contig_end = MagicMock(return_value=1)
-        hit1.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit1 = self._create_hit("contig1", 10, 1, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -45,7 +43,8 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertEqual(1, return_list[0][0].get_genome_contig_end(), "Should have correct contig end")
 
     def testSinglePartitionPlusFailMinusCoords(self):
-        hit1 = AMRHitHSP(None, None)
+        # AMRHitHSP rejects these coordinates itself, so the hit is a mock
+        hit1 = MagicMock(spec=AMRHitHSP)
         hit1.get_genome_contig_id = MagicMock(return_value="contig1")
         hit1.get_genome_contig_start = MagicMock(return_value=10)
         hit1.get_genome_contig_end = MagicMock(return_value=1)
@@ -56,12 +55,7 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertRaises(InvalidPositionException, parts.append, hit1)
 
     def testSinglePartitionIdenticalHits(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -79,12 +73,7 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionIdenticalHitsMinusStrand(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=10)
-        hit1.get_genome_contig_end = MagicMock(return_value=1)
-        hit1.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit1 = self._create_hit("contig1", 10, 1, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -102,19 +91,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionSameLocationOppositeStrands(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 10, 1, 'minus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=10)
-        hit1.get_genome_contig_end = MagicMock(return_value=1)
-        hit1.get_genome_contig_strand = MagicMock(return_value='minus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=10)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 1, 10, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -132,19 +111,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndGreater(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=11)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 1, 11, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -162,19 +131,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndGreaterMinus(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=11)
-        hit2.get_genome_contig_end = MagicMock(return_value=1)
-        hit2.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit2 = self._create_hit("contig1", 11, 1, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -192,19 +151,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndGreaterStartGreater(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=2)
-        hit2.get_genome_contig_end = MagicMock(return_value=11)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 2, 11, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -222,19 +171,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndGreaterStartGreaterMinus(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=11)
-        hit2.get_genome_contig_end = MagicMock(return_value=2)
-        hit2.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit2 = self._create_hit("contig1", 11, 2, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -252,19 +191,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndLesser(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=9)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 1, 9, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -282,19 +211,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndLesserMinus(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=9)
-        hit2.get_genome_contig_end = MagicMock(return_value=1)
-        hit2.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit2 = self._create_hit("contig1", 9, 1, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -312,19 +231,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndLesserStartLesser(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=2)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 2, 10, 'plus')
 
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=9)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 1, 9, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -342,19 +251,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndLesserStartLesserMinus(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 2, 10, 'plus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=2)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=9)
-        hit2.get_genome_contig_end = MagicMock(return_value=1)
-        hit2.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit2 = self._create_hit("contig1", 9, 1, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -372,19 +271,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndGreaterStartLesser(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 2, 10, 'plus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=2)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=11)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 1, 11, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -402,19 +291,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHitEndGreaterStartLesserMinus(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 2, 10, 'plus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=2)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=11)
-        hit2.get_genome_contig_end = MagicMock(return_value=1)
-        hit2.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit2 = self._create_hit("contig1", 11, 1, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -432,19 +311,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHit2InHit1(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=2)
-        hit2.get_genome_contig_end = MagicMock(return_value=9)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 2, 9, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -462,19 +331,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHit2InHit1Minus(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=9)
-        hit2.get_genome_contig_end = MagicMock(return_value=2)
-        hit2.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit2 = self._create_hit("contig1", 9, 2, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -492,19 +351,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHit2EdgeWithinHit1Lesser(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=5)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit1 = self._create_hit("contig1", 5, 10, 'plus')
 
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=6)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 1, 6, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -522,19 +371,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHit2EdgeSameHit1Lesser(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 5, 10, 'plus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=5)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=5)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 1, 5, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -558,19 +397,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertEqual([5], [x.get_genome_contig_end() for x in return_list[1]], "Should have correct contig ends")
 
     def testSinglePartitionHit2EdgeWithinHit1Greater(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=5)
-        hit1.get_genome_contig_end = MagicMock(return_value=11)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 5, 11, 'plus')
 
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=10)
-        hit2.get_genome_contig_end = MagicMock(return_value=15)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 10, 15, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -588,19 +417,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
                          "Should have correct contig ends")
 
     def testSinglePartitionHit2EdgeSameHit1Greater(self):
-        hit1 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 5, 10, 'plus')
 
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=5)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=10)
-        hit2.get_genome_contig_end = MagicMock(return_value=15)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 10, 15, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -624,19 +443,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertEqual([15], [x.get_genome_contig_end() for x in return_list[1]], "Should have correct contig ends")
 
     def testTwoPartitionsHit2EdgeHit1Lesser(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=5)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit1 = self._create_hit("contig1", 5, 10, 'plus')
 
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=4)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 1, 4, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -660,19 +469,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertEqual([4], [x.get_genome_contig_end() for x in return_list[1]], "Should have correct contig ends")
 
     def testTwoPartitionsHit2EdgeHit1Greater(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=5)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 5, 10, 'plus')
 
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=11)
-        hit2.get_genome_contig_end = MagicMock(return_value=15)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig1", 11, 15, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -696,19 +495,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertEqual([15], [x.get_genome_contig_end() for x in return_list[1]], "Should have correct contig ends")
 
     def testTwoPartitionsHit2EdgeHit1GreaterMinus(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=5)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit1 = self._create_hit("contig1", 5, 10, 'plus')
 
-        hit2 = AMRHitHSP(None, None)
-
-        hit2.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit2.get_genome_contig_start = MagicMock(return_value=15)
-        hit2.get_genome_contig_end = MagicMock(return_value=11)
-        hit2.get_genome_contig_strand = MagicMock(return_value='minus')
+        hit2 = self._create_hit("contig1", 15, 11, 'minus')
 
         parts = BlastHitPartitions()
 
@@ -732,19 +521,9 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertEqual([11], [x.get_genome_contig_end() for x in return_list[1]], "Should have correct contig ends")
 
     def testTwoPartitionsDifferentContigNames(self):
-        hit1 = AMRHitHSP(None, None)
-
-        hit1.get_genome_contig_id = MagicMock(return_value="contig1")
-        hit1.get_genome_contig_start = MagicMock(return_value=1)
-        hit1.get_genome_contig_end = MagicMock(return_value=10)
-        hit1.get_genome_contig_strand = MagicMock(return_value='plus')
-
-        hit2 = AMRHitHSP(None, None)
+        hit1 = self._create_hit("contig1", 1, 10, 'plus')
 
-        hit2.get_genome_contig_id = MagicMock(return_value="contig2")
-        hit2.get_genome_contig_start = MagicMock(return_value=1)
-        hit2.get_genome_contig_end = MagicMock(return_value=10)
-        hit2.get_genome_contig_strand = MagicMock(return_value='plus')
+        hit2 = self._create_hit("contig2", 1, 10, 'plus')
 
         parts = BlastHitPartitions()
 
@@ -766,3 +545,42 @@ class BlastHitPartitionsTest(unittest.TestCase):
         self.assertEqual([1], [x.get_genome_contig_start() for x in return_list[1]],
                          "Should have correct contig starts")
         self.assertEqual([10], [x.get_genome_contig_end() for x in return_list[1]], "Should have correct contig ends")
+
+    def testBridgingHitMergesPartitions(self):
+        hits = []
+        for contig, start, end in [('contig1', 1, 20), ('contig2', 1, 10), ('contig1', 30, 50), ('contig1', 60, 70),
+                                   ('contig1', 15, 35)]:
+            hits.append(self._create_hit(contig, start, end, 'plus'))
+
+        parts = BlastHitPartitions()
+
+        for hit in hits:
+            parts.append(hit)
+
+        return_list = parts.get_hits_nonoverlapping_regions()
+        self.assertEqual(3, len(return_list), "Should be three partitions")
+        self.assertEqual([hits[0], hits[2], hits[4]], return_list[0], "Bridging hit should merge partitions")
+        self.assertEqual([hits[3]], return_list[1], "Should have correct second partition on contig1")
+        self.assertEqual([hits[1]], return_list[2], "Should have correct partition on contig2")
+
+    def testGetPartitionNumbers(self):
+        groups = np.array([0, 0, 0, 0, 1, 0])
+        starts = np.array([1, 5, 10, 30, 5, 15])
+        ends = np.array([10, 8, 20, 40, 8, 25])
+
+        partition_numbers = BlastHitPartitions.get_partition_numbers(groups, starts, ends)
+
+        self.assertEqual(partition_numbers[0], partition_numbers[1], "Contained hit should be in the same partition")
+        self.assertNotEqual(partition_numbers[0], partition_numbers[2], "Hits sharing an end should not overlap")
+        self.assertEqual(partition_numbers[2], partition_numbers[5], "Overlapping hits should be in the same partition")
+        self.assertNotEqual(partition_numbers[5], partition_numbers[3], "Separate hits should be in separate partitions")
+        self.assertNotEqual(partition_numbers[1], partition_numbers[4], "Hits on other contigs should be separate")
+        self.assertEqual(4, len(set(partition_numbers.tolist())), "Wrong number of partitions")
+
+    def testGetPartitionNumbersBridgingHit(self):
+        partition_numbers = BlastHitPartitions.get_partition_numbers(np.array([0, 0, 0]), np.array([1, 30, 15]),
+                                                                     np.array([20, 50, 35]))
+
+        self.assertEqual([0, 0, 0], partition_numbers.tolist(), "Bridging hit should merge partitions")
+        self.assertEqual(0, len(BlastHitPartitions.get_partition_numbers(np.array([]), np.array([]), np.array([]))),
+                         "Should be no partitions")
@@ -0,0 +1,70 @@
+import random
+import tempfile
+import unittest
+from os import path
+
+from Bio.Seq import reverse_complement
+
+from staramr.blast.results.IndexedFasta import IndexedFasta
+
+
+class IndexedFastaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fasta_dir = tempfile.TemporaryDirectory()
+
+        random.seed(42)
+        self.contig1 = ''.join(random.choice('ACGT') for i in range(250))
+        self.contig2 = ''.join(random.choice('ACGT') for i in range(30))
+
+    def tearDown(self):
+        self.fasta_dir.cleanup()
+
+    def _write_file(self, name, contents):
+        file = path.join(self.fasta_dir.name, name)
+        with open(file, 'w', newline='') as fh:
+            fh.write(contents)
+        return file
+
+    def _wrap(self, sequence, width, newline='\n'):
+        return newline.join(sequence[i:i + width] for i in range(0, len(sequence), width)) + newline
+
+    def testFetch(self):
+        fasta_file = self._write_file('genome.fasta', '>contig1 description\n' + self._wrap(self.contig1, 60) +
+                                      '>contig2\n' + self._wrap(self.contig2, 60))
+
+        with IndexedFasta(fasta_file) as indexed_fasta:
+            self.assertEqual(250, indexed_fasta.get_length('contig1'), 'Wrong length')
+            self.assertEqual(30, indexed_fasta.get_length('contig2'), 'Wrong length')
+            self.assertEqual(self.contig1, indexed_fasta.fetch('contig1', 1, 250), 'Wrong sequence')
+            self.assertEqual(self.contig1[55:130], indexed_fasta.fetch('contig1', 56, 130),
+                             'Wrong sequence across lines')
+            self.assertEqual(self.contig1[59:61], indexed_fasta.fetch('contig1', 60, 61), 'Wrong sequence at line end')
+            self.assertEqual(reverse_complement(self.contig1[55:130]),
+                             indexed_fasta.fetch('contig1', 56, 130, 'minus'), 'Wrong minus strand sequence')
+            self.assertEqual(self.contig2[4:10], indexed_fasta.fetch('contig2', 5, 10), 'Wrong sequence')
+
+    def testFetchWindowsNewlines(self):
+        fasta_file = self._write_file('genome.fasta', '>contig1\r\n' + self._wrap(self.contig1, 70, '\r\n'))
+
+        with IndexedFasta(fasta_file) as indexed_fasta:
+            self.assertEqual(self.contig1[65:200], indexed_fasta.fetch('contig1', 66, 200), 'Wrong sequence')
+
+    def testFetchIrregularLines(self):
+        fasta_file = self._write_file('genome.fasta', '>contig1\n' + self.contig1[:10] + '\n' + self.contig1[10:100] +
+                                      '\n' + self.contig1[100:] + '\n>contig2\n' + self.contig2 + '\n')
+
+        with IndexedFasta(fasta_file) as indexed_fasta:
+            self.assertEqual(self.contig1[5:150], indexed_fasta.fetch('contig1', 6, 150), 'Wrong sequence')
+            self.assertEqual(self.contig2, indexed_fasta.fetch('contig2', 1, 30), 'Wrong sequence')
+
+    def testFetchInvalid(self):
+        fasta_file = self._write_file('genome.fasta', '>contig1\n' + self._wrap(self.contig1, 60))
+
+        with IndexedFasta(fasta_file) as indexed_fasta:
+            self.assertRaises(Exception, indexed_fasta.fetch, 'contig1', 200, 251)
+            self.assertRaises(Exception, indexed_fasta.fetch, 'contig3', 1, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
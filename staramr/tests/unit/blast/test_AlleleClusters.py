@@ -0,0 +1,72 @@
+import random
+import tempfile
+import unittest
+from os import path
+
+import Bio.SeqIO
+
+from staramr.blast.AlleleClusters import AlleleClusters
+
+
+class AlleleClustersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clusters_dir = tempfile.TemporaryDirectory()
+        self.allele_clusters = AlleleClusters(path.join(self.clusters_dir.name, 'allele-clusters'))
+
+        random.seed(42)
+        self.allele_a = self._random_sequence(800)
+        self.allele_b = self._random_sequence(800)
+
+    def tearDown(self):
+        self.clusters_dir.cleanup()
+
+    def _random_sequence(self, length):
+        return ''.join(random.choice('ACGT') for i in range(length))
+
+    def _write_file(self, name, contents):
+        file = path.join(self.clusters_dir.name, name)
+        with open(file, 'w') as fh:
+            fh.write(contents)
+        return file
+
+    def _mutate(self, sequence, positions):
+        sequence = list(sequence)
+        for position in positions:
+            sequence[position] = {'A': 'C', 'C': 'G', 'G': 'T', 'T': 'A'}[sequence[position]]
+        return ''.join(sequence)
+
+    def testBuild(self):
+        fasta_file = self._write_file('beta-lactam.fsa', '>blaA_1\n' + self.allele_a[:700] + '\n' +
+                                      '>blaA_2\n' + self._mutate(self.allele_a, [100]) + '\n' +
+                                      '>blaA_3\n' + self.allele_a + '\n' +
+                                      '>blaB_1\n' + self.allele_b + '\n')
+
+        representative_files = self.allele_clusters.build({'beta-lactam': fasta_file})
+
+        self.assertTrue(self.allele_clusters.exists(), 'Clusters should exist')
+        self.assertEqual(['blaA_2', 'blaB_1'],
+                         sorted(record.id for record in Bio.SeqIO.parse(representative_files['beta-lactam'], 'fasta')),
+                         'Wrong representatives')
+        self.assertEqual(path.join(self.clusters_dir.name, 'allele-clusters', 'beta-lactam'),
+                         self.allele_clusters.get_representatives_path('beta-lactam'), 'Wrong representatives path')
+
+        self.assertEqual(['blaA_1', 'blaA_3'],
+                         sorted(record.id for record in self.allele_clusters.get_members('beta-lactam', {'blaA_2'})),
+                         'Wrong members')
+        self.assertEqual([], self.allele_clusters.get_members('beta-lactam', {'blaB_1'}), 'Wrong members')
+
+    def testBuildDissimilarAlleles(self):
+        fasta_file = self._write_file('beta-lactam.fsa', '>blaA_1\n' + self.allele_a + '\n' +
+                                      '>blaA_2\n' + self._mutate(self.allele_a, range(0, 800, 50)) + '\n')
+
+        representative_files = self.allele_clusters.build({'beta-lactam': fasta_file})
+
+        self.assertEqual(['blaA_1', 'blaA_2'],
+                         sorted(record.id for record in Bio.SeqIO.parse(representative_files['beta-lactam'], 'fasta')),
+                         'Alleles below the cluster identity should be separate representatives')
+        self.assertEqual([], self.allele_clusters.get_members('beta-lactam', {'blaA_1', 'blaA_2'}), 'Wrong members')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,604 @@
+import os
+import tempfile
+import threading
+import unittest
+from collections import OrderedDict
+from unittest.mock import MagicMock
+from os import path
+
+import numpy as np
+import pandas as pd
+from Bio import SeqIO
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+from staramr.blast.BlastHandler import BlastHandler
+from staramr.blast.BlastResultsCache import BlastResultsCache
+
+
+class BlastHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.blast_out = tempfile.TemporaryDirectory()
+        self.blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                          genomes_per_database=2)
+
+    def tearDown(self):
+        self.blast_handler.reset()
+        self.blast_out.cleanup()
+
+    def _write_file(self, name, contents):
+        file = path.join(self.blast_out.name, name)
+        with open(file, 'w') as fh:
+            fh.write(contents)
+        return file
+
+    def testPackInputFiles(self):
+        files = [self._write_file('genome1.fasta', '>contig1\nATCG\n>contig_2 description\nGGCC\n'),
+                 self._write_file('genome2.fasta', '>contig1\nTTAA\n'),
+                 self._write_file('genome3.fasta', '>1\nCCCC\n')]
+
+        pack_files = self.blast_handler._pack_input_files(self.blast_out.name, files)
+
+        self.assertEqual(2, len(pack_files), 'Wrong number of packs')
+        self.assertEqual(['0_contig1', '0_contig_2', '1_contig1'],
+                         [r.id for r in SeqIO.parse(pack_files[0], 'fasta')], 'Wrong ids in first pack')
+        self.assertEqual(['0_1'], [r.id for r in SeqIO.parse(pack_files[1], 'fasta')], 'Wrong ids in second pack')
+        self.assertEqual({'0': 'genome1.fasta', '1': 'genome2.fasta'},
+                         dict(self.blast_handler._packed_genomes[path.basename(pack_files[0])]),
+                         'Wrong packed genomes')
+
+    def testSplitPackedBlastOutput(self):
+        blast_out = self._write_file('pack.blast.tsv',
+                                     'gene_1_A\t0_contig_2\t100.0\n'
+                                     'gene_1_A\t1_contig1\t99.0\n'
+                                     'gene_2_B\t0_contig1\t98.0\n')
+        genome_blast_outs = {'0': path.join(self.blast_out.name, 'genome1.blast.tsv'),
+                             '1': path.join(self.blast_out.name, 'genome2.blast.tsv'),
+                             '2': path.join(self.blast_out.name, 'genome3.blast.tsv')}
+
+        self.blast_handler._split_packed_blast_output(blast_out, genome_blast_outs)
+
+        with open(genome_blast_outs['0']) as fh:
+            self.assertEqual('gene_1_A\tcontig_2\t100.0\ngene_2_B\tcontig1\t98.0\n', fh.read(),
+                             'Wrong results for genome1')
+        with open(genome_blast_outs['1']) as fh:
+            self.assertEqual('gene_1_A\tcontig1\t99.0\n', fh.read(), 'Wrong results for genome2')
+        with open(genome_blast_outs['2']) as fh:
+            self.assertEqual('', fh.read(), 'Should be no results for genome3')
+
+    def testSplitPackedBlastTable(self):
+        blast_table = pd.DataFrame([['gene_1_A', '0_contig_2', 100.0],
+                                    ['gene_1_A', '1_contig1', 99.0],
+                                    ['gene_2_B', '0_contig1', 98.0]], columns=['qseqid', 'sseqid', 'pident'])
+
+        genome_blast_tables = self.blast_handler._split_packed_blast_table(blast_table, ['0', '1', '2'])
+
+        self.assertEqual(['contig_2', 'contig1'], genome_blast_tables['0']['sseqid'].tolist(),
+                         'Wrong results for genome1')
+        self.assertEqual(['gene_1_A', 'gene_2_B'], genome_blast_tables['0']['qseqid'].tolist(),
+                         'Wrong results for genome1')
+        self.assertEqual(['contig1'], genome_blast_tables['1']['sseqid'].tolist(), 'Wrong results for genome2')
+        self.assertEqual(0, len(genome_blast_tables['2']), 'Should be no results for genome3')
+
+    def testRunBlastWithoutWritingOutputs(self):
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     genomes_per_database=2, write_blast_outputs=False)
+        blast_database = MagicMock()
+        blast_database.get_name.return_value = 'resfinder'
+        blast_table = pd.DataFrame([['gene_1_A', '0_contig1'], ['gene_1_A', '1_contig1']],
+                                   columns=['qseqid', 'sseqid'])
+        blast_handler._launch_blast = MagicMock(return_value=blast_table)
+        blast_handler._packed_genomes = {'pack': OrderedDict([('0', 'genome1'), ('1', 'genome2')])}
+
+        self.assertIsNone(blast_handler._get_blast_out('pack', 'beta-lactam', blast_database),
+                          'Should not have a blast output file')
+        blast_handler._get_blast_map('resfinder').update({'genome1': {'beta-lactam': None},
+                                                          'genome2': {'beta-lactam': None}})
+        blast_handler._run_blast('pack', blast_database, 'beta-lactam', 'beta-lactam.fsa', None,
+                                 OrderedDict([('0', None), ('1', None)]))
+
+        blast_map = blast_handler._get_blast_map('resfinder')
+        self.assertEqual(['contig1'], blast_map['genome1']['beta-lactam']['sseqid'].tolist(),
+                         'Wrong results for genome1')
+        self.assertEqual(['contig1'], blast_map['genome2']['beta-lactam']['sseqid'].tolist(),
+                         'Wrong results for genome2')
+        self.assertEqual([], [f for f in os.listdir(self.blast_out.name) if f.endswith('.blast.tsv')],
+                         'Should not write blast outputs')
+        blast_handler.reset()
+
+    def testRunBlastSkippedByKmerPrescreen(self):
+        kmer_prescreen = MagicMock()
+        kmer_prescreen.should_search.return_value = False
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     write_blast_outputs=False, kmer_prescreen=kmer_prescreen)
+        blast_database = MagicMock()
+        blast_database.get_name.return_value = 'resfinder'
+        blast_database.get_prebuilt_name.return_value = 'beta-lactam'
+        blast_handler._launch_blast = MagicMock()
+        blast_handler._get_blast_map('resfinder').update({'genome1': {'beta-lactam': None}})
+
+        blast_handler._run_blast('genome1', blast_database, 'beta-lactam', 'beta-lactam.fsa', None, None)
+
+        kmer_prescreen.should_search.assert_called_once_with('genome1', 'resfinder', 'beta-lactam')
+        blast_handler._launch_blast.assert_not_called()
+        blast_table = blast_handler._get_blast_map('resfinder')['genome1']['beta-lactam']
+        self.assertEqual(0, len(blast_table), 'Should have no results')
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, blast_table.columns.tolist(), 'Wrong columns')
+        self.assertEqual(1, blast_handler.get_number_skipped_blasts(), 'Wrong number of skipped jobs')
+        blast_handler.reset()
+
+    def testRunBlastReplacedByExactMatches(self):
+        exact_match_table = pd.DataFrame([['blaA_1_X1', 'contig1', 100.0, 100, 1, 100, 1, 100, 200, 100, 'plus', 'A' * 100,
+                                           'A' * 100]], columns=BlastHandler.BLAST_COLUMNS)
+        exact_match_fast_path = MagicMock()
+        exact_match_fast_path.get_hits.return_value = exact_match_table
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     write_blast_outputs=False, exact_match_fast_path=exact_match_fast_path)
+        blast_database = MagicMock()
+        blast_database.get_name.return_value = 'resfinder'
+        blast_database.get_prebuilt_name.return_value = 'beta-lactam'
+        blast_handler._launch_blast = MagicMock()
+        blast_handler._get_blast_map('resfinder').update({'genome1': {'beta-lactam': None}})
+
+        blast_handler._run_blast('genome1', blast_database, 'beta-lactam', 'beta-lactam.fsa', None, None)
+
+        exact_match_fast_path.get_hits.assert_called_once_with('genome1', 'beta-lactam')
+        blast_handler._launch_blast.assert_not_called()
+        blast_table = blast_handler._get_blast_map('resfinder')['genome1']['beta-lactam']
+        self.assertEqual(['blaA_1_X1'], blast_table['qseqid'].tolist(), 'Wrong results')
+        self.assertEqual(1, blast_handler.get_number_exact_match_blasts(), 'Wrong number of replaced jobs')
+        blast_handler.reset()
+
+    def testSubmitBlastJobsCached(self):
+        blast_results_cache = BlastResultsCache(path.join(self.blast_out.name, 'cache'))
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     write_blast_outputs=False, blast_results_cache=blast_results_cache,
+                                     database_commits={'resfinder': 'abc'})
+        blast_database = MagicMock()
+        blast_database.get_name.return_value = 'resfinder'
+        genome1 = self._write_file('genome1.fasta', '>contig1\nATCG\n')
+        genome2 = self._write_file('genome2.fasta', '>contig1\nGGCC\n')
+        query = self._write_file('beta-lactam.fsa', '>gene_1\nATCG\n')
+        blast_table = BlastHandler.read_blast_table(
+            self._write_file('genome1.blast.tsv',
+                             'gene_1\tcontig1\t100.0\t4\t1\t4\t1\t4\t4\t4\tplus\tATCG\tATCG\n'))
+        blast_results_cache.put(blast_handler._get_cache_key(genome1, blast_database, 'beta-lactam', query),
+                                blast_table)
+
+        blast_handler._make_blast_db = MagicMock()
+        blast_handler._launch_blast = MagicMock(return_value=blast_table.iloc[0:0])
+        blast_handler._get_blast_map('resfinder').update({'genome1.fasta': {'beta-lactam': None},
+                                                          'genome2.fasta': {'beta-lactam': None}})
+        blast_handler._submit_blast_jobs([genome1, genome2], [
+            (10, 'resfinder', (genome1, blast_database, 'beta-lactam', query, None, None)),
+            (10, 'resfinder', (genome2, blast_database, 'beta-lactam', query, None, None))])
+        blast_map = blast_handler.get_resfinder_outputs()
+        blast_handler.reset()
+
+        blast_handler._make_blast_db.assert_called_once_with(genome2)
+        blast_handler._launch_blast.assert_called_once_with(query, genome2, None, 1, {}, BlastHandler.BLAST_COLUMNS,
+                                                            None)
+        self.assertEqual(['gene_1'], blast_map['genome1.fasta']['beta-lactam']['qseqid'].tolist(),
+                         'Should use cached results for genome1')
+        self.assertEqual(0, len(blast_map['genome2.fasta']['beta-lactam']), 'Wrong results for genome2')
+        self.assertTrue(
+            blast_results_cache.contains(blast_handler._get_cache_key(genome2, blast_database, 'beta-lactam', query)),
+            'Results for genome2 should be cached')
+        self.assertNotEqual(blast_handler._get_cache_key(genome1, blast_database, 'beta-lactam', query),
+                            blast_handler._get_cache_key(genome1, blast_database, 'aminoglycoside', query),
+                            'Cache keys should differ by database name')
+
+    def testGetThresholdOptions(self):
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     pid_threshold=98.0, plength_thresholds={'resfinder': 60.0, 'pointfinder': 95.0})
+        blast_database = MagicMock()
+        blast_database.get_name.return_value = 'pointfinder'
+
+        options = blast_handler._get_threshold_options(blast_database)
+
+        self.assertAlmostEqual(97.99, options['perc_identity'], msg='Wrong perc_identity')
+        self.assertAlmostEqual(93.09, options['qcov_hsp_perc'], msg='Wrong qcov_hsp_perc')
+        self.assertEqual({}, self.blast_handler._get_threshold_options(blast_database),
+                         'Should not pass thresholds to BLAST when they are not set')
+
+    def testLaunchBlastPrebuiltGenomeQueryOptions(self):
+        genome_file = self._write_file('genome1.fasta', '>contig1\n' + 'A' * 1000 + '\n>contig2\n' + 'C' * 500 + '\n')
+        self.blast_handler._get_database_sequence_lengths = MagicMock(return_value=np.array([861, 800, 1200]))
+        self.blast_handler._run_blast_command = MagicMock(
+            return_value=BlastHandler._empty_blast_table([BlastHandler.EVALUE_COLUMN]))
+
+        blast_table = self.blast_handler._launch_blast_prebuilt(genome_file, 'beta-lactam', None)
+
+        blastn_command = str(self.blast_handler._run_blast_command.call_args[0][0])
+        self.assertIn('-max_target_seqs 3', blastn_command, 'Should report all alleles for each contig')
+        self.assertIn('-searchsp 1200000', blastn_command,
+                      'Should use the search space of the genome for the shortest allele')
+        self.assertIn('-dust no', blastn_command, 'Should not mask the genome')
+        self.assertIn(' evalue"', blastn_command, 'Should report e-values')
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, blast_table.columns.tolist(), 'Should not return the e-values')
+
+    def testLaunchBlastPrebuiltAlleleEvalues(self):
+        genome_file = self._write_file('genome1.fasta', '>contig1\n' + 'A' * 1000 + '\n')
+        self.blast_handler._get_database_sequence_lengths = MagicMock(return_value=np.array([100, 400]))
+        self.blast_handler._run_blast_command = MagicMock(
+            return_value=BlastHandler._empty_blast_table([BlastHandler.EVALUE_COLUMN]))
+        blast_table = pd.DataFrame([['contig1', 'gene_1_A', 100.0, 10, 1, 10, 1, 10, 100, 1000, 'plus', '', '', 8e-4],
+                                    ['contig1', 'gene_2_B', 100.0, 10, 1, 10, 1, 10, 400, 1000, 'plus', '', '', 2e-4],
+                                    ['contig1', 'gene_3_C', 100.0, 10, 1, 10, 1, 10, 400, 1000, 'plus', '', '', 3e-4]],
+                                   columns=BlastHandler.BLAST_COLUMNS + [BlastHandler.EVALUE_COLUMN])
+
+        self.blast_handler._launch_blast_prebuilt(genome_file, 'beta-lactam', None)
+        hit_filter = self.blast_handler._run_blast_command.call_args[0][1]
+
+        self.assertEqual(['gene_1_A', 'gene_2_B'], hit_filter(blast_table)['sseqid'].tolist(),
+                         'Should leave out hits above the e-value cutoff for the length of their allele')
+
+    def testLaunchBlastClusteredSecondStage(self):
+        genome_file = self._write_file('genome1.fasta', '>contig1\n' + 'A' * 1000 + '\n>contig2\n' + 'C' * 500 + '\n')
+        representatives_table = pd.DataFrame(
+            [['gene_1_AB1', 'contig1', 100.0, 10, 1, 10, 101, 110, 10, 1000, 'plus', '', '']],
+            columns=BlastHandler.BLAST_COLUMNS)
+        allele_clusters = MagicMock()
+        allele_clusters.get_members.return_value = [SeqRecord(Seq('A' * 10), id='gene_2_AB2')]
+        self.blast_handler._resfinder_allele_clusters = allele_clusters
+        self.blast_handler._launch_blast_prebuilt = MagicMock(return_value=representatives_table)
+        self.blast_handler._make_blast_db = MagicMock()
+        self.blast_handler._run_blast_command = MagicMock(return_value=BlastHandler._empty_blast_table())
+
+        self.blast_handler._launch_blast_clustered(genome_file, 'beta-lactam', None, blast_threads=2)
+
+        self.assertEqual(1, self.blast_handler._make_blast_db.call_count,
+                         'Should make a database of the regions around the hits')
+        blastn_command = str(self.blast_handler._run_blast_command.call_args[0][0])
+        self.assertIn('-db ' + self.blast_handler._make_blast_db.call_args[0][0], blastn_command,
+                      'Should search the database of the regions')
+        self.assertNotIn('-subject', blastn_command, 'Should not search the regions as a subject')
+        self.assertIn('-num_threads 2', blastn_command, 'Should use the BLAST threads')
+        self.assertIn('-dbsize 1500', blastn_command, 'Should use the length of the input file as the database size')
+
+    def testLaunchBlastPrebuiltNoQueryCoverage(self):
+        genome_file = self._write_file('genome1.fasta', '>contig1\n' + 'A' * 1000 + '\n')
+        self.blast_handler._get_database_sequence_lengths = MagicMock(return_value=np.array([100]))
+        self.blast_handler._run_blast_command = MagicMock(
+            return_value=BlastHandler._empty_blast_table([BlastHandler.EVALUE_COLUMN]))
+        hit_filter = MagicMock()
+
+        self.blast_handler._launch_blast_prebuilt(genome_file, 'beta-lactam', None,
+                                                  threshold_options={'perc_identity': 97.99, 'qcov_hsp_perc': 50.0},
+                                                  hit_filter=hit_filter)
+
+        blastn_command = str(self.blast_handler._run_blast_command.call_args[0][0])
+        self.assertIn('-perc_identity 97.99', blastn_command, 'Should pass perc_identity to BLAST')
+        self.assertNotIn('-qcov_hsp_perc', blastn_command, 'Should not filter on coverage of the input file')
+        self.blast_handler._run_blast_command.call_args[0][1](BlastHandler._empty_blast_table(
+            [BlastHandler.EVALUE_COLUMN]))
+        self.assertEqual(1, hit_filter.call_count, 'Should filter hits as they are read')
+
+    def testLaunchBlastHitFilter(self):
+        self.blast_handler._run_blast_command = MagicMock(return_value=BlastHandler._empty_blast_table())
+        hit_filter = MagicMock()
+
+        self.blast_handler._launch_blast('beta-lactam.fsa', 'genome1.fasta', None, hit_filter=hit_filter)
+
+        self.assertIs(hit_filter, self.blast_handler._run_blast_command.call_args[0][1],
+                      'Should filter hits as they are read')
+
+    def testGetHitFilter(self):
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     pid_threshold=98.0, plength_thresholds={'resfinder': 60.0, 'pointfinder': 95.0},
+                                     genes_to_exclude=['gene_3_AB3'])
+        blast_database = MagicMock()
+        blast_database.get_name.return_value = 'resfinder'
+        blast_table = pd.DataFrame([['gene_1_AB1', 'contig1', 100.0, 60, 1, 60, 1, 60, 1000, 100, 'plus', '', ''],
+                                    ['gene_2_AB2', 'contig1', 100.0, 59, 1, 59, 1, 59, 1000, 100, 'plus', '', ''],
+                                    ['gene_3_AB3', 'contig1', 100.0, 100, 1, 100, 1, 100, 1000, 100, 'plus', '', ''],
+                                    ['gene_4_AB4', 'contig1', 97.9, 100, 1, 100, 1, 100, 1000, 100, 'plus', '', '']],
+                                   columns=BlastHandler.BLAST_COLUMNS)
+
+        self.assertEqual(['gene_1_AB1'], blast_handler._get_hit_filter(blast_database)(blast_table)['qseqid'].tolist(),
+                         'Should only keep hits passing the thresholds')
+        self.assertEqual(['gene_1_AB1'], BlastHandler.reorient_genome_query_table(
+            blast_handler._get_hit_filter(blast_database, genome_query=True)(
+                BlastHandler.reorient_genome_query_table(blast_table)))['qseqid'].tolist(),
+                         'Should only keep hits passing the thresholds with the input file as the query')
+        self.assertIsNone(self.blast_handler._get_hit_filter(blast_database),
+                          'Should keep every hit when thresholds are not set')
+
+    def testReadBlastTable(self):
+        blast_out = self._write_file('genome.blast.tsv',
+                                     '1\tcontig1\t99.0\t4\t1\t4\t11\t14\t100\t4\tplus\tATCG\tATCG\n')
+
+        blast_table = BlastHandler.read_blast_table(blast_out)
+
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, blast_table.columns.tolist(), 'Wrong columns')
+        self.assertEqual('1', blast_table['qseqid'].iloc[0], 'qseqid should be a string')
+        self.assertEqual(0, len(BlastHandler.read_blast_table(self._write_file('empty.blast.tsv', ''))),
+                         'Should be no results')
+
+    def testReadBlastTableWithoutSequences(self):
+        blast_out = self._write_file('genome.blast.tsv', 'gene_1\tcontig1\t99.0\t4\t1\t4\t11\t14\t100\t4\tplus\n')
+
+        blast_table = BlastHandler.read_blast_table(blast_out)
+
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, blast_table.columns.tolist(), 'Wrong columns')
+        self.assertEqual('plus', blast_table['sstrand'].iloc[0], 'Wrong sstrand')
+        self.assertEqual('', blast_table['sseq'].iloc[0], 'sseq should be empty')
+        self.assertEqual('', blast_table['qseq'].iloc[0], 'qseq should be empty')
+
+    def testReadBlastTableFilteredChunks(self):
+        blast_out = self._write_file('genome.blast.tsv', 'gene_1\tcontig1\t99.0\t4\t1\t4\t11\t14\t100\t4\tplus\n'
+                                                         'gene_2\tcontig1\t90.0\t4\t1\t4\t21\t24\t100\t4\tplus\n'
+                                                         'gene_3\tcontig2\t98.0\t4\t1\t4\t14\t11\t100\t4\tminus\n')
+
+        blast_table = BlastHandler.read_blast_table(blast_out, hit_filter=lambda chunk: chunk[chunk.pident > 95],
+                                                    chunk_size=2)
+
+        self.assertEqual(['gene_1', 'gene_3'], blast_table['qseqid'].tolist(), 'Wrong hits kept')
+        self.assertEqual(['contig1', 'contig2'], blast_table['sseqid'].tolist(), 'Wrong contigs')
+        self.assertEqual(np.int32, blast_table['sstart'].dtype, 'Coordinates should be compact')
+        self.assertEqual(object, blast_table['qseqid'].dtype, 'Ids should be strings')
+        self.assertEqual(0, len(BlastHandler.read_blast_table(blast_out, hit_filter=lambda chunk: chunk[
+            chunk.pident > 99.5])), 'Should be no hits kept')
+
+    def testGetBlastColumns(self):
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     blast_sequences={'resfinder': False, 'pointfinder': True})
+
+        self.assertEqual(BlastHandler.BLAST_COLUMNS[:-2], blast_handler.get_blast_columns('resfinder'),
+                         'Should not report sequences for resfinder')
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, blast_handler.get_blast_columns('pointfinder'),
+                         'Should report sequences for pointfinder')
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, self.blast_handler.get_blast_columns('resfinder'),
+                         'Should report sequences by default')
+
+    def testGetBlastThreads(self):
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 8, self.blast_out.name)
+
+        self.assertEqual(8, blast_handler._get_blast_threads(1), 'A single job should use all threads')
+        self.assertEqual(2, blast_handler._get_blast_threads(3), 'Threads should be split between jobs')
+        self.assertEqual(1, blast_handler._get_blast_threads(8), 'Should use one thread per job')
+        self.assertEqual(1, blast_handler._get_blast_threads(100), 'Should use one thread per job')
+        blast_handler.reset()
+
+    def testSubmitBlastJobsLongestFirst(self):
+        jobs_run = []
+        self.blast_handler._make_blast_db = MagicMock()
+        self.blast_handler._run_blast = MagicMock(side_effect=lambda *args, **kwargs: jobs_run.append(args[0]))
+
+        self.blast_handler._submit_blast_jobs(['small', 'large', 'medium'],
+                                              [(10, 'resfinder', ('small',)),
+                                               (1000, 'resfinder', ('large',)),
+                                               (100, 'pointfinder', ('medium',))])
+        self.blast_handler.get_resfinder_outputs()
+        for future_blast in self.blast_handler._get_future_blasts_from_map('pointfinder'):
+            future_blast.result()
+
+        self.assertEqual(['large', 'medium', 'small'], jobs_run, 'Jobs should be run in order of cost')
+
+    def testSubmitBlastJobsBeforeAllDatabasesMade(self):
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 2, self.blast_out.name)
+        genome1_blasted = threading.Event()
+
+        def make_blast_db(file):
+            if file == 'genome2' and not genome1_blasted.wait(timeout=10):
+                raise Exception("genome1 was not blasted while making database for genome2")
+
+        def run_blast(file, *args, **kwargs):
+            if file == 'genome1':
+                genome1_blasted.set()
+
+        blast_handler._make_blast_db = MagicMock(side_effect=make_blast_db)
+        blast_handler._run_blast = MagicMock(side_effect=run_blast)
+
+        blast_handler._submit_blast_jobs(['genome1', 'genome2'],
+                                         [(10, 'resfinder', ('genome1',)),
+                                          (10, 'resfinder', ('genome2',))])
+        blast_handler.get_resfinder_outputs()
+        blast_handler.reset()
+
+        self.assertTrue(genome1_blasted.is_set(), 'genome1 should be blasted before all databases are made')
+        self.assertEqual(2, blast_handler._run_blast.call_count, 'Wrong number of blasts')
+
+    def testSubmitBlastJobsMakeBlastDbError(self):
+        self.blast_handler._make_blast_db = MagicMock(side_effect=Exception('makeblastdb failed'))
+        self.blast_handler._run_blast = MagicMock()
+
+        self.blast_handler._submit_blast_jobs(['genome1'], [(10, 'resfinder', ('genome1',))])
+
+        self.assertRaisesRegex(Exception, 'makeblastdb failed', self.blast_handler.get_resfinder_outputs)
+        self.blast_handler._run_blast.assert_not_called()
+
+    def testAsCompletedFiles(self):
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 4, self.blast_out.name)
+        genome1_release = threading.Event()
+        blast_handler._make_blast_db = MagicMock()
+        blast_handler._run_blast = MagicMock(
+            side_effect=lambda file, *args, **kwargs: file != 'genome1' or genome1_release.wait(timeout=10))
+        blast_handler._packed_genomes = {'pack': OrderedDict([('0', 'genome2'), ('1', 'genome3')])}
+
+        blast_handler._submit_blast_jobs(['genome1', 'pack'],
+                                         [(10, 'resfinder', ('genome1',)),
+                                          (10, 'pointfinder', ('genome1',)),
+                                          (10, 'resfinder', ('pack',))])
+        completed_files = blast_handler.as_completed_files()
+
+        self.assertEqual(['genome2', 'genome3'], [next(completed_files), next(completed_files)],
+                         'Genomes in the pack should complete first')
+        genome1_release.set()
+        self.assertEqual(['genome1'], list(completed_files), 'genome1 should complete last')
+        blast_handler.reset()
+
+    def testReorientGenomeQueryTablePlus(self):
+        blast_table = pd.DataFrame([['contig1', 'gene_1_AB1', 99.0, 4, 11, 14, 1, 4, 4, 100, 'plus', 'ATCG',
+                                     'ATCG']], columns=BlastHandler.BLAST_COLUMNS)
+
+        reoriented = BlastHandler.reorient_genome_query_table(blast_table)
+
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, reoriented.columns.tolist(), 'Wrong columns')
+        hit = reoriented.iloc[0]
+        self.assertEqual('gene_1_AB1', hit['qseqid'], 'Wrong qseqid')
+        self.assertEqual('contig1', hit['sseqid'], 'Wrong sseqid')
+        self.assertEqual(1, hit['qstart'], 'Wrong qstart')
+        self.assertEqual(4, hit['qend'], 'Wrong qend')
+        self.assertEqual(11, hit['sstart'], 'Wrong sstart')
+        self.assertEqual(14, hit['send'], 'Wrong send')
+        self.assertEqual(4, hit['qlen'], 'Wrong qlen')
+        self.assertEqual(100, hit['slen'], 'Wrong slen')
+        self.assertEqual('plus', hit['sstrand'], 'Wrong sstrand')
+        self.assertEqual('ATCG', hit['qseq'], 'Wrong qseq')
+        self.assertEqual('ATCG', hit['sseq'], 'Wrong sseq')
+
+    def testReorientGenomeQueryTableMinus(self):
+        blast_table = pd.DataFrame([['contig1', 'gene_1_AB1', 80.0, 5, 11, 14, 5, 1, 5, 100, 'minus', 'CG-AT',
+                                     'CGTTT']], columns=BlastHandler.BLAST_COLUMNS)
+
+        reoriented = BlastHandler.reorient_genome_query_table(blast_table)
+
+        hit = reoriented.iloc[0]
+        self.assertEqual('gene_1_AB1', hit['qseqid'], 'Wrong qseqid')
+        self.assertEqual(1, hit['qstart'], 'Wrong qstart')
+        self.assertEqual(5, hit['qend'], 'Wrong qend')
+        self.assertEqual(14, hit['sstart'], 'Wrong sstart')
+        self.assertEqual(11, hit['send'], 'Wrong send')
+        self.assertEqual(5, hit['qlen'], 'Wrong qlen')
+        self.assertEqual('minus', hit['sstrand'], 'Wrong sstrand')
+        self.assertEqual('AT-CG', hit['qseq'], 'Wrong qseq')
+        self.assertEqual('AAACG', hit['sseq'], 'Wrong sseq')
+
+    def testReorientGenomeQueryTableEmpty(self):
+        blast_table = pd.DataFrame([], columns=BlastHandler.BLAST_COLUMNS)
+
+        reoriented = BlastHandler.reorient_genome_query_table(blast_table)
+
+        self.assertEqual(0, len(reoriented.index), 'Should be empty')
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, reoriented.columns.tolist(), 'Wrong columns')
+
+    def testReadBlastTableExtraColumns(self):
+        blast_out = self._write_file('genome.blast.tsv', 'gene_1\tcontig1\t99.0\t4\t1\t4\t11\t14\t100\t4\tplus\t2e-05\n')
+
+        blast_table = BlastHandler.read_blast_table(blast_out, extra_columns=[BlastHandler.EVALUE_COLUMN])
+
+        self.assertEqual(BlastHandler.BLAST_COLUMNS + [BlastHandler.EVALUE_COLUMN], blast_table.columns.tolist(),
+                         'Wrong columns')
+        self.assertEqual('plus', blast_table['sstrand'].iloc[0], 'Wrong sstrand')
+        self.assertEqual('', blast_table['sseq'].iloc[0], 'sseq should be empty')
+        self.assertAlmostEqual(2e-05, blast_table[BlastHandler.EVALUE_COLUMN].iloc[0], msg='Wrong evalue')
+
+    def testSplitPackedBlastOutputEvalues(self):
+        blast_out = self._write_file('pack.blast.tsv',
+                                     'gene_1_A\t0_contig_2\t100.0\t0.0004\n'
+                                     'gene_1_A\t1_contig1\t99.0\t0.0004\n'
+                                     'gene_2_B\t1_contig1\t98.0\t0.0002\n')
+        genome_blast_outs = {'0': path.join(self.blast_out.name, 'genome1.blast.tsv'),
+                             '1': path.join(self.blast_out.name, 'genome2.blast.tsv')}
+
+        self.blast_handler._split_packed_blast_output(blast_out, genome_blast_outs, {'0': 1.0, '1': 4.0})
+
+        with open(genome_blast_outs['0']) as fh:
+            self.assertEqual('gene_1_A\tcontig_2\t100.0\n', fh.read(), 'Wrong results for genome1')
+        with open(genome_blast_outs['1']) as fh:
+            self.assertEqual('gene_2_B\tcontig1\t98.0\n', fh.read(),
+                             'Should leave out hits above the e-value cutoff for genome2')
+
+    def _simulate_blast_command(self, hits):
+        """
+        Simulates BLAST of AMR genes against a database of an input file (or pack of input files), where the e-values
+        are proportional to the database size.
+        :param hits: A map of {'contig_id': [('gene_id', evalue_per_base)]} of the hits in the input files.
+        :return: A function in place of BlastHandler._run_blast_command.
+        """
+
+        def run_blast_command(blastn_command, hit_filter=None, blast_columns=None):
+            arguments = str(blastn_command).split()
+            records = list(SeqIO.parse(arguments[arguments.index('-db') + 1], 'fasta'))
+            if '-dbsize' in arguments:
+                dbsize = int(arguments[arguments.index('-dbsize') + 1])
+            else:
+                dbsize = sum(len(record.seq) for record in records)
+
+            rows = []
+            for record in records:
+                contig = record.id.split(BlastHandler.PACK_SEPARATOR, 1)[-1]
+                for gene, evalue_per_base in hits.get(contig, []):
+                    rows.append([gene, record.id, 100.0, 10, 1, 10, 1, 10, len(record.seq), 10, 'plus', '', '',
+                                 evalue_per_base * dbsize])
+            blast_table = pd.DataFrame(rows, columns=BlastHandler.BLAST_COLUMNS + [BlastHandler.EVALUE_COLUMN])
+            blast_table = blast_table[blast_table[BlastHandler.EVALUE_COLUMN] <= BlastHandler.BLAST_EVALUE]
+            if blast_columns is None or BlastHandler.EVALUE_COLUMN not in blast_columns:
+                blast_table = blast_table.drop(columns=BlastHandler.EVALUE_COLUMN)
+            return blast_table.reset_index(drop=True)
+
+        return run_blast_command
+
+    def testRunBlastPackedSameAsUnpacked(self):
+        files = [self._write_file('genome1.fasta', '>contigA\n' + 'A' * 1000 + '\n'),
+                 self._write_file('genome2.fasta', '>contigB\n' + 'C' * 3000 + '\n>contigC\n' + 'G' * 1000 + '\n')]
+        run_blast_command = self._simulate_blast_command({'contigA': [('gene_1_A', 8e-07)],
+                                                          'contigB': [('gene_1_A', 8e-07), ('gene_2_B', 2e-07)],
+                                                          'contigC': [('gene_3_C', 1e-07)]})
+        blast_database = MagicMock()
+        blast_database.get_name.return_value = 'resfinder'
+
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     write_blast_outputs=False)
+        blast_handler._run_blast_command = MagicMock(side_effect=run_blast_command)
+        for file in files:
+            blast_handler._get_blast_map('resfinder')[path.basename(file)] = {}
+            blast_handler._run_blast(file, blast_database, 'beta-lactam', 'beta-lactam.fsa', None, None)
+        unpacked_map = blast_handler._get_blast_map('resfinder')
+        blast_handler.reset()
+
+        blast_handler = BlastHandler({'resfinder': None, 'pointfinder': None}, 1, self.blast_out.name,
+                                     genomes_per_database=2, write_blast_outputs=False)
+        blast_handler._run_blast_command = MagicMock(side_effect=run_blast_command)
+        pack_file = blast_handler._pack_input_files(blast_handler._genome_packs_tmp_dir, files)[0]
+        for file in files:
+            blast_handler._get_blast_map('resfinder')[path.basename(file)] = {}
+        blast_handler._run_blast(pack_file, blast_database, 'beta-lactam', 'beta-lactam.fsa', None,
+                                 OrderedDict([('0', None), ('1', None)]))
+        packed_map = blast_handler._get_blast_map('resfinder')
+
+        self.assertIn('-dbsize 1000', str(blast_handler._run_blast_command.call_args[0][0]),
+                      'Should search the pack with the database size of its shortest genome')
+        self.assertEqual(['gene_1_A'], unpacked_map['genome1.fasta']['beta-lactam']['qseqid'].tolist(),
+                         'Wrong unpacked results for genome1')
+        self.assertEqual(['gene_2_B', 'gene_3_C'], unpacked_map['genome2.fasta']['beta-lactam']['qseqid'].tolist(),
+                         'Wrong unpacked results for genome2')
+        for file_name in ['genome1.fasta', 'genome2.fasta']:
+            pd.testing.assert_frame_equal(unpacked_map[file_name]['beta-lactam'].reset_index(drop=True),
+                                          packed_map[file_name]['beta-lactam'].reset_index(drop=True),
+                                          check_dtype=False)
+        blast_handler.reset()
+
+
+    def testGetHitRegions(self):
+        blast_table = pd.DataFrame([['gene_1_AB1', 'contig1', 100.0, 10, 1, 10, 101, 110, 10, 1000, 'plus', '', ''],
+                                    ['gene_2_AB2', 'contig1', 100.0, 10, 1, 10, 125, 116, 10, 1000, 'minus', '', ''],
+                                    ['gene_3_AB3', 'contig1', 100.0, 10, 1, 10, 501, 510, 10, 1000, 'plus', '', ''],
+                                    ['gene_1_AB1', 'contig2', 100.0, 10, 1, 10, 5, 14, 10, 20, 'plus', '', '']],
+                                   columns=BlastHandler.BLAST_COLUMNS)
+
+        regions = BlastHandler.get_hit_regions(blast_table, 20)
+
+        self.assertEqual({'contig1': [(81, 145), (481, 530)], 'contig2': [(1, 34)]}, dict(regions),
+                         'Wrong regions')
+
+    def testRemapRegionTable(self):
+        blast_table = pd.DataFrame([['gene_1_AB1', 'region1', 100.0, 4, 1, 4, 21, 24, 4, 65, 'plus', 'ATCG', 'ATCG'],
+                                    ['gene_2_AB2', 'region0', 100.0, 4, 1, 4, 8, 5, 4, 34, 'minus', 'ATCG', 'ATCG']],
+                                   columns=BlastHandler.BLAST_COLUMNS)
+
+        remapped = BlastHandler.remap_region_table(blast_table, {'region0': ('contig2', 0, 20),
+                                                                 'region1': ('contig1', 80, 1000)})
+
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, remapped.columns.tolist(), 'Wrong columns')
+        self.assertEqual(['contig1', 'contig2'], remapped['sseqid'].tolist(), 'Wrong sseqid')
+        self.assertEqual([101, 8], remapped['sstart'].tolist(), 'Wrong sstart')
+        self.assertEqual([104, 5], remapped['send'].tolist(), 'Wrong send')
+        self.assertEqual([1000, 20], remapped['slen'].tolist(), 'Wrong slen')
+        self.assertEqual(['gene_1_AB1', 'gene_2_AB2'], remapped['qseqid'].tolist(), 'Wrong qseqid')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from collections import OrderedDict
+from os import path
+
+import pandas as pd
+
+from staramr.blast.BlastHandler import BlastHandler
+from staramr.blast.BlastHitsArchive import BlastHitsArchive
+
+
+class BlastHitsArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.archive_file = path.join(self.archive_dir.name, 'hits.zip')
+
+    def tearDown(self):
+        self.archive_dir.cleanup()
+
+    def _blast_table(self, qseqid, sseqid):
+        return pd.DataFrame([[qseqid, sseqid, 100.0, 4, 1, 4, 1, 4, 100, 4, 'plus', 'ACGT', 'ACGT']],
+                            columns=BlastHandler.BLAST_COLUMNS)
+
+    def testWriteRead(self):
+        blast_file = path.join(self.archive_dir.name, 'beta-lactam_file2.fasta.blast.tsv')
+        self._blast_table('blaTEM-1_1_AB1', '2').to_csv(blast_file, sep='\t', header=False, index=False)
+
+        resfinder_map = OrderedDict([('file1.fasta', {'beta-lactam': self._blast_table('blaTEM-1_1_AB1', 'contig1'),
+                                                      'macrolide': self._blast_table('mph(A)_1_AB2', 'contig2')}),
+                                     ('file2.fasta', {'beta-lactam': blast_file}),
+                                     ('file3.fasta', {'beta-lactam': pd.DataFrame(
+                                         columns=BlastHandler.BLAST_COLUMNS)})])
+        pointfinder_map = OrderedDict([('file1.fasta', {'gyrA': self._blast_table('gyrA', 'contig3')}),
+                                       ('file2.fasta', {}), ('file3.fasta', {})])
+
+        BlastHitsArchive(self.archive_file).write(['file1.fasta', 'file2.fasta', 'file3.fasta'],
+                                                  {'resfinder': resfinder_map, 'pointfinder': pointfinder_map},
+                                                  {'resfinder_db_commit': 'abc', 'pointfinder_organism': 'salmonella'})
+
+        blast_hits_archive = BlastHitsArchive(self.archive_file)
+        self.assertEqual({'resfinder_db_commit': 'abc', 'pointfinder_organism': 'salmonella'},
+                         dict(blast_hits_archive.get_settings()), 'Wrong settings')
+        self.assertEqual(['file1.fasta', 'file2.fasta', 'file3.fasta'], blast_hits_archive.get_files(),
+                         'Wrong files')
+
+        resfinder_hits = blast_hits_archive.get_blast_map('resfinder')
+        self.assertEqual(['file1.fasta', 'file2.fasta', 'file3.fasta'], list(resfinder_hits), 'Wrong files')
+        self.assertEqual({'beta-lactam', 'macrolide'}, set(resfinder_hits['file1.fasta']), 'Wrong databases')
+        self.assertEqual(['mph(A)_1_AB2'], resfinder_hits['file1.fasta']['macrolide']['qseqid'].tolist(),
+                         'Wrong hits')
+        self.assertEqual(['2'], resfinder_hits['file2.fasta']['beta-lactam']['sseqid'].tolist(),
+                         'sseqid should be read as a string')
+        self.assertEqual(BlastHandler.BLAST_COLUMNS, resfinder_hits['file2.fasta']['beta-lactam'].columns.tolist(),
+                         'Wrong columns')
+        self.assertEqual({}, resfinder_hits['file3.fasta'], 'Should have no hits')
+
+        pointfinder_hits = blast_hits_archive.get_blast_map('pointfinder')
+        self.assertEqual(['gyrA'], pointfinder_hits['file1.fasta']['gyrA']['qseqid'].tolist(), 'Wrong hits')
+        self.assertEqual({}, pointfinder_hits['file2.fasta'], 'Should have no hits')
@@ -0,0 +1,66 @@
+import threading
+import unittest
+
+from staramr.blast.BlastJobScheduler import BlastJobScheduler
+
+
+class BlastJobSchedulerTest(unittest.TestCase):
+
+    def testSubmitPriorityOrder(self):
+        jobs_run = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(timeout=10)
+
+        scheduler = BlastJobScheduler(1)
+        scheduler.submit((0,), block)
+        started.wait(timeout=10)
+        scheduler.submit((1, -10), jobs_run.append, 'small')
+        scheduler.submit((1, -1000), jobs_run.append, 'large')
+        scheduler.submit((0,), jobs_run.append, 'first')
+        scheduler.submit((1, -10), jobs_run.append, 'small2')
+        release.set()
+        scheduler.shutdown()
+
+        self.assertEqual(['first', 'large', 'small', 'small2'], jobs_run, 'Jobs run in wrong order')
+
+    def testSubmitResult(self):
+        scheduler = BlastJobScheduler(2)
+        future = scheduler.submit(0, lambda x, y=1: x + y, 1, y=2)
+
+        self.assertEqual(3, future.result(timeout=10), 'Wrong result')
+        scheduler.shutdown()
+
+    def testSubmitAfter(self):
+        jobs_run = []
+        release = threading.Event()
+
+        scheduler = BlastJobScheduler(2)
+        dependency = scheduler.submit(0, lambda: release.wait(timeout=10) and jobs_run.append('dependency'))
+        future = scheduler.submit_after(dependency, 0, jobs_run.append, 'dependent')
+        self.assertFalse(future.done(), 'Dependent job should not have run')
+        release.set()
+        future.result(timeout=10)
+        scheduler.shutdown()
+
+        self.assertEqual(['dependency', 'dependent'], jobs_run, 'Jobs run in wrong order')
+
+    def testSubmitAfterFailedDependency(self):
+        jobs_run = []
+
+        def fail():
+            raise Exception('dependency failed')
+
+        scheduler = BlastJobScheduler(1)
+        dependency = scheduler.submit(0, fail)
+        future = scheduler.submit_after(dependency, 0, jobs_run.append, 'dependent')
+
+        self.assertRaisesRegex(Exception, 'dependency failed', future.result, 10)
+        scheduler.shutdown()
+        self.assertEqual([], jobs_run, 'Dependent job should not have run')
+
+    def testInvalidThreads(self):
+        self.assertRaises(Exception, BlastJobScheduler, 0)
@@ -0,0 +1,79 @@
+import gzip
+import os
+import tempfile
+import unittest
+from os import path
+
+import pandas as pd
+
+from staramr.blast.BlastResultsCache import BlastResultsCache
+
+
+class BlastResultsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.blast_results_cache = BlastResultsCache(path.join(self.cache_dir.name, 'cache'))
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def _read_cached(self, key):
+        with gzip.open(self.blast_results_cache.get(key), 'rt') as fh:
+            return fh.read()
+
+    def testGetKey(self):
+        key = self.blast_results_cache.get_key(['genome=abc', 'database=resfinder'])
+
+        self.assertEqual(key, self.blast_results_cache.get_key(['genome=abc', 'database=resfinder']),
+                         'Keys should be the same for the same components')
+        self.assertNotEqual(key, self.blast_results_cache.get_key(['genome=abc', 'database=pointfinder']),
+                            'Keys should differ for different components')
+        self.assertNotEqual(self.blast_results_cache.get_key(['a', 'bc']),
+                            self.blast_results_cache.get_key(['ab', 'c']), 'Keys should differ for different components')
+
+    def testPutGet(self):
+        key = self.blast_results_cache.get_key(['genome'])
+        self.assertFalse(self.blast_results_cache.contains(key), 'Should not contain results')
+        self.assertIsNone(self.blast_results_cache.get(key), 'Should not get results')
+
+        self.blast_results_cache.put(key, pd.DataFrame([['gene_1', 'contig1', 99.0]]))
+
+        self.assertTrue(self.blast_results_cache.contains(key), 'Should contain results')
+        self.assertEqual('gene_1\tcontig1\t99.0\n', self._read_cached(key), 'Wrong cached results')
+
+    def testPutFile(self):
+        key = self.blast_results_cache.get_key(['genome'])
+        blast_file = path.join(self.cache_dir.name, 'genome.blast.tsv')
+        with open(blast_file, 'w') as fh:
+            fh.write('gene_1\tcontig1\t99.000\n')
+
+        self.blast_results_cache.put_file(key, blast_file)
+
+        self.assertEqual('gene_1\tcontig1\t99.000\n', self._read_cached(key), 'Wrong cached results')
+        self.assertEqual([], [f for root, dirs, files in os.walk(self.blast_results_cache.get_cache_dir()) for f in
+                              files if f.endswith('.tmp')], 'Should not leave temporary files')
+
+    def testPruneLeastRecentlyUsed(self):
+        keys = [self.blast_results_cache.get_key([str(i)]) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.blast_results_cache.put(key, pd.DataFrame([['gene_' + str(i)] * 100]))
+            os.utime(self.blast_results_cache.get(key), (i * 10, i * 10))
+        entry_size = path.getsize(self.blast_results_cache.get(keys[0]))
+        os.utime(self.blast_results_cache.get(keys[0]), (100, 100))
+
+        removed = self.blast_results_cache.prune(entry_size * 2)
+
+        self.assertEqual(1, removed, 'Wrong number of results removed')
+        self.assertTrue(self.blast_results_cache.contains(keys[0]), 'Recently used results should be kept')
+        self.assertFalse(self.blast_results_cache.contains(keys[1]), 'Least recently used results should be removed')
+        self.assertTrue(self.blast_results_cache.contains(keys[2]), 'Recently used results should be kept')
+
+    def testInfoClear(self):
+        self.blast_results_cache.put(self.blast_results_cache.get_key(['genome']), pd.DataFrame([['gene_1']]))
+
+        self.assertEqual('1', self.blast_results_cache.info()['cache_entries'], 'Wrong number of entries')
+
+        self.blast_results_cache.clear()
+
+        self.assertEqual('0', self.blast_results_cache.info()['cache_entries'], 'Wrong number of entries')
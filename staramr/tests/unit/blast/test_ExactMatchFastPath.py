@@ -0,0 +1,119 @@
+import random
+import tempfile
+import unittest
+from os import path
+
+from Bio.Seq import reverse_complement
+
+from staramr.blast.ExactMatchFastPath import ExactMatchFastPath
+from staramr.blast.KmerIndex import KmerIndex
+from staramr.blast.resfinder.ResfinderBlastDatabase import ResfinderBlastDatabase
+
+
+class ExactMatchFastPathTest(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+
+        random.seed(42)
+        self.allele_a = self._random_sequence(800)
+        self.allele_b = self._random_sequence(600)
+        self.allele_c = self._random_sequence(900)
+        self.resfinder_database = self._build_database({
+            'beta-lactam': '>blaA_1_X1\n' + self.allele_a + '\n>blaB_1_X2\n' + self.allele_b + '\n',
+            'macrolide': '>mphC_1_X3\n' + self.allele_c + '\n'})
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _random_sequence(self, length):
+        return ''.join(random.choice('ACGT') for i in range(length))
+
+    def _mutate(self, sequence, positions):
+        sequence = list(sequence)
+        for position in positions:
+            sequence[position] = {'A': 'C', 'C': 'G', 'G': 'T', 'T': 'A'}[sequence[position]]
+        return ''.join(sequence)
+
+    def _write_file(self, file, contents):
+        with open(file, 'w') as fh:
+            fh.write(contents)
+        return file
+
+    def _build_database(self, databases):
+        database_dir = tempfile.mkdtemp(dir=self.test_dir.name)
+        fasta_files = {name: self._write_file(path.join(database_dir, name + '.fsa'), contents) for name, contents in
+                       databases.items()}
+        self.kmer_index = KmerIndex(path.join(self.test_dir.name, 'blastdb-' + path.basename(database_dir)))
+        self.kmer_index.build(fasta_files)
+        return ResfinderBlastDatabase(database_dir)
+
+    def _write_genome(self, *contigs, name='genome.fasta'):
+        return self._write_file(path.join(self.test_dir.name, name), ''.join(
+            '>contig' + str(i) + ' description\n' + contig + '\n' for i, contig in enumerate(contigs)))
+
+    def testExactMatches(self):
+        fast_path = ExactMatchFastPath(self.resfinder_database, self.kmer_index, 98.0, 60.0)
+        genome = self._write_genome(self._random_sequence(1000) + self.allele_a + self._random_sequence(1000),
+                                    self._random_sequence(500) + reverse_complement(self.allele_c).lower())
+
+        hits = fast_path.get_hits(genome, 'beta-lactam')
+        self.assertEqual(1, len(hits), 'Wrong number of hits')
+        self.assertEqual(['blaA_1_X1', 'contig0', 100.0, 800, 1, 800, 1001, 1800, 2800, 800, 'plus'],
+                         hits.iloc[0].tolist()[0:11], 'Wrong plus strand hit')
+        self.assertEqual(self.allele_a, hits.iloc[0]['sseq'], 'Wrong hit sequence')
+
+        hits = fast_path.get_hits(genome, 'macrolide')
+        self.assertEqual(['mphC_1_X3', 'contig1', 100.0, 900, 1, 900, 1400, 501, 1400, 900, 'minus'],
+                         hits.iloc[0].tolist()[0:11], 'Wrong minus strand hit')
+        self.assertEqual(self.allele_c, hits.iloc[0]['sseq'], 'Wrong hit sequence')
+
+        hits = fast_path.get_hits(genome, ResfinderBlastDatabase.COMBINED_DATABASE_NAME)
+        self.assertEqual(['blaA_1_X1', 'mphC_1_X3'], sorted(hits['qseqid'].tolist()), 'Wrong combined hits')
+
+    def testNoMatches(self):
+        fast_path = ExactMatchFastPath(self.resfinder_database, self.kmer_index, 98.0, 60.0)
+        genome = self._write_genome(self._random_sequence(5000))
+
+        self.assertEqual(0, len(fast_path.get_hits(genome, 'beta-lactam')), 'Should have no hits')
+
+    def testOtherHitOutsideExactMatch(self):
+        fast_path = ExactMatchFastPath(self.resfinder_database, self.kmer_index, 98.0, 60.0)
+        mutated_b = self._mutate(self.allele_b, range(25, 600, 50))
+        genome = self._write_genome(self.allele_a + self._random_sequence(1000) + mutated_b,
+                                    self._random_sequence(100) + self.allele_c)
+
+        self.assertIsNone(fast_path.get_hits(genome, 'beta-lactam'), 'Should need BLAST for the mutated allele')
+        self.assertIsNone(fast_path.get_hits(genome, ResfinderBlastDatabase.COMBINED_DATABASE_NAME),
+                          'Should need BLAST for the combined database')
+        self.assertEqual(['mphC_1_X3'], fast_path.get_hits(genome, 'macrolide')['qseqid'].tolist(),
+                         'Wrong hits for other drug class')
+
+    def testOtherHitExcluded(self):
+        fast_path = ExactMatchFastPath(self.resfinder_database, self.kmer_index, 98.0, 60.0,
+                                       genes_to_exclude=['blaB_1_X2'])
+        mutated_b = self._mutate(self.allele_b, range(25, 600, 50))
+        genome = self._write_genome(self.allele_a + self._random_sequence(1000) + mutated_b + self.allele_b)
+
+        self.assertEqual(['blaA_1_X1'], fast_path.get_hits(genome, 'beta-lactam')['qseqid'].tolist(),
+                         'Should ignore hits to excluded genes')
+
+    def testLongerAllele(self):
+        resfinder_database = self._build_database({
+            'beta-lactam': '>blaA_1_X1\n' + self.allele_a + '\n>blaA_2_X4\n' + self.allele_a + 'ACGTACGTACGTACGT\n'})
+        fast_path = ExactMatchFastPath(resfinder_database, self.kmer_index, 98.0, 60.0)
+        genome = self._write_genome(self._random_sequence(1000) + self.allele_a + self._random_sequence(1000))
+
+        self.assertIsNone(fast_path.get_hits(genome, 'beta-lactam'),
+                          'Should need BLAST when a longer allele could be reported instead')
+
+    def testNearbyExactMatches(self):
+        fast_path = ExactMatchFastPath(self.resfinder_database, self.kmer_index, 98.0, 60.0)
+
+        genome = self._write_genome(self.allele_a + self._random_sequence(500) + self.allele_b)
+        self.assertIsNone(fast_path.get_hits(genome, 'beta-lactam'),
+                          'Should need BLAST when a hit could join exact matches into one region')
+
+        genome = self._write_genome(self.allele_a + self._random_sequence(5000) + self.allele_b, name='genome2.fasta')
+        self.assertEqual(['blaA_1_X1', 'blaB_1_X2'], fast_path.get_hits(genome, 'beta-lactam')['qseqid'].tolist(),
+                         'Wrong hits')
@@ -0,0 +1,96 @@
+import random
+import tempfile
+import unittest
+from os import path
+
+import numpy as np
+from Bio.Seq import reverse_complement
+
+from staramr.blast.KmerIndex import KmerIndex
+
+
+class KmerIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index_dir = tempfile.TemporaryDirectory()
+        self.kmer_index = KmerIndex(path.join(self.index_dir.name, 'blastdb'))
+
+        random.seed(42)
+        self.allele_a = self._random_sequence(800)
+        self.allele_b = self._random_sequence(800)
+        self.fasta_files = {'beta-lactam': self._write_file('beta-lactam.fsa', '>blaA_1\n' + self.allele_a + '\n'),
+                            'macrolide': self._write_file('macrolide.fsa', '>mphB_1\n' + self.allele_b + '\n')}
+        self.kmer_index.build(self.fasta_files)
+
+    def tearDown(self):
+        self.index_dir.cleanup()
+
+    def _random_sequence(self, length):
+        return ''.join(random.choice('ACGT') for i in range(length))
+
+    def _write_file(self, name, contents):
+        file = path.join(self.index_dir.name, name)
+        with open(file, 'w') as fh:
+            fh.write(contents)
+        return file
+
+    def _mutate(self, sequence, positions):
+        sequence = list(sequence)
+        for position in positions:
+            sequence[position] = {'A': 'C', 'C': 'G', 'G': 'T', 'T': 'A'}[sequence[position]]
+        return ''.join(sequence)
+
+    def _get_genome_kmers(self, *contigs):
+        return KmerIndex.get_file_kmers(self._write_file('genome.fasta', ''.join(
+            '>contig' + str(i) + '\n' + contig + '\n' for i, contig in enumerate(contigs))))
+
+    def testGetSequenceKmersReverseComplement(self):
+        sequence = self._random_sequence(100) + 'N' + self._random_sequence(50)
+
+        kmers, number_ambiguous = KmerIndex.get_sequence_kmers(sequence)
+        reverse_kmers, reverse_number_ambiguous = KmerIndex.get_sequence_kmers(reverse_complement(sequence))
+
+        self.assertEqual(151 - KmerIndex.KMER_SIZE + 1 - KmerIndex.KMER_SIZE, len(kmers), 'Wrong number of k-mers')
+        self.assertEqual(KmerIndex.KMER_SIZE, number_ambiguous, 'Wrong number of ambiguous k-mers')
+        self.assertEqual(sorted(kmers), sorted(reverse_kmers), 'Should have the same k-mers on both strands')
+
+    def testGetDatabasesWithHits(self):
+        self.assertEqual({'beta-lactam', 'macrolide'}, self.kmer_index.get_database_names(), 'Wrong databases')
+
+        # 98% identity spread evenly across the allele, on the reverse strand within a larger contig
+        mutated_a = self._mutate(self.allele_a, range(25, 800, 50))
+        genome_kmers = self._get_genome_kmers(
+            self._random_sequence(1000) + reverse_complement(mutated_a) + self._random_sequence(1000))
+
+        self.assertEqual({'beta-lactam'}, self.kmer_index.get_databases_with_hits(genome_kmers, 98.0, 60.0),
+                         'Wrong databases with hits')
+
+    def testGetDatabasesWithHitsPartial(self):
+        genome_kmers = self._get_genome_kmers(self.allele_a[0:250], self.allele_b[0:600])
+
+        self.assertEqual({'macrolide'}, self.kmer_index.get_databases_with_hits(genome_kmers, 98.0, 60.0),
+                         'Alleles sharing too little sequence with the genome should not have hits')
+
+    def testGetDatabasesWithHitsNoGuarantee(self):
+        genome_kmers = self._get_genome_kmers(self._random_sequence(1000))
+
+        self.assertEqual(set(), self.kmer_index.get_databases_with_hits(genome_kmers, 98.0, 60.0),
+                         'Should have no hits')
+        self.assertEqual({'beta-lactam', 'macrolide'},
+                         self.kmer_index.get_databases_with_hits(genome_kmers, 90.0, 60.0),
+                         'Should search all databases when the k-mers cannot rule out hits')
+
+    def testGetMinSharedKmers(self):
+        min_shared_kmers = KmerIndex.get_min_shared_kmers(np.array([800, 10]), 98.0, 60.0)
+
+        self.assertEqual([311, 0], min_shared_kmers.tolist(), 'Wrong minimum shared k-mers')
+
+    def testGetSharedKmers(self):
+        allele_ids, allele_lengths = self.kmer_index.get_alleles('beta-lactam')
+        genome_kmers = np.sort(KmerIndex.get_sequence_kmers(self.allele_a[0:400])[0])
+
+        self.assertEqual(['blaA_1'], allele_ids.tolist(), 'Wrong alleles')
+        self.assertEqual([800], allele_lengths.tolist(), 'Wrong allele lengths')
+        self.assertEqual([400 - KmerIndex.KMER_SIZE + 1],
+                         self.kmer_index.get_shared_kmers('beta-lactam', genome_kmers).tolist(),
+                         'Wrong number of shared k-mers')
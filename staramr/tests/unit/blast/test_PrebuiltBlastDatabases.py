@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from os import path
+from unittest.mock import MagicMock
+
+from staramr.blast.PrebuiltBlastDatabases import PrebuiltBlastDatabases
+
+
+class PrebuiltBlastDatabasesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.database_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.database_dir.cleanup()
+
+    def testFindFastaFiles(self):
+        os.mkdir(path.join(self.database_dir.name, 'salmonella'))
+        os.mkdir(path.join(self.database_dir.name, '.git'))
+        for file in ['beta-lactam.fsa', 'notes.txt', path.join('salmonella', 'gyrA.fsa'),
+                     path.join('.git', 'ignored.fsa')]:
+            open(path.join(self.database_dir.name, file), 'w').close()
+
+        fasta_files = PrebuiltBlastDatabases.find_fasta_files(self.database_dir.name)
+
+        self.assertEqual({'beta-lactam': path.join(self.database_dir.name, 'beta-lactam.fsa'),
+                          path.join('salmonella', 'gyrA'): path.join(self.database_dir.name, 'salmonella',
+                                                                     'gyrA.fsa')}, fasta_files,
+                         'Wrong fasta files')
+
+    def testNotBuilt(self):
+        prebuilt_databases = PrebuiltBlastDatabases(path.join(self.database_dir.name, 'blastdb'))
+
+        self.assertFalse(prebuilt_databases.is_at_commit('abc'), 'Should not be built')
+        self.assertRaises(Exception, prebuilt_databases.get_path, 'beta-lactam')
+
+    def testBuildAlleleClusters(self):
+        blastdb_dir = path.join(self.database_dir.name, 'blastdb')
+        os.mkdir(blastdb_dir)
+        fasta_file = path.join(self.database_dir.name, 'beta-lactam.fsa')
+        with open(fasta_file, 'w') as fasta_handle:
+            fasta_handle.write('>blaA_1_X1\n' + 'ACGT' * 50 + '\n>blaA_2_X2\n' + 'ACGT' * 49 + 'ACGA\n')
+        prebuilt_databases = PrebuiltBlastDatabases(blastdb_dir)
+        prebuilt_databases._make_blast_db = MagicMock()
+
+        self.assertFalse(prebuilt_databases.get_allele_clusters().exists(), 'Clusters should not exist')
+
+        allele_clusters = prebuilt_databases.build_allele_clusters({'beta-lactam': fasta_file})
+
+        self.assertTrue(allele_clusters.exists(), 'Clusters should exist')
+        self.assertEqual(1, prebuilt_databases._make_blast_db.call_count,
+                         'Should make a BLAST database of the representatives')
+        self.assertTrue(path.exists(allele_clusters.get_representatives_path('beta-lactam') + '.fsa'),
+                        'No representatives')
+        self.assertEqual([PrebuiltBlastDatabases.CLUSTERS_DIR], os.listdir(blastdb_dir),
+                         'Should not leave temporary directories')
+
+
+if __name__ == '__main__':
+    unittest.main()
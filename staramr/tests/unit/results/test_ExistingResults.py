@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+from os import path
+
+import pandas as pd
+
+from staramr.results.ExistingResults import ExistingResults
+
+
+class ExistingResultsTest(unittest.TestCase):
+    RESFINDER_COLUMNS = ['Isolate ID', 'Gene', '%Identity', '%Overlap', 'HSP Length/Total Length', 'Contig', 'Start',
+                         'End', 'Accession']
+
+    def setUp(self):
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.output_files = {name: path.join(self.output_dir.name, name + '.tsv') for name in
+                             ['summary', 'resfinder', 'pointfinder']}
+        self.output_files['settings'] = path.join(self.output_dir.name, 'settings.txt')
+
+        self._write(self.output_files['resfinder'], pd.DataFrame(
+            [['file1', 'blaTEM-1B', 100.0, 100.0, '861/861', '1', 1, 861, 'JF910132']],
+            columns=self.RESFINDER_COLUMNS).set_index('Isolate ID'))
+        self._write(self.output_files['summary'], pd.DataFrame(
+            [['file1', 'blaTEM-1B'], ['file3', 'None']], columns=['Isolate ID', 'Genotype']).set_index('Isolate ID'))
+        with open(self.output_files['settings'], 'w') as fh:
+            fh.write('resfinder_db_commit = abc\npid_threshold       = 98.0\n')
+
+        self.existing_results = ExistingResults(self.output_files)
+
+    def tearDown(self):
+        self.output_dir.cleanup()
+
+    def _write(self, file, dataframe):
+        with open(file, 'w') as fh:
+            dataframe.to_csv(fh, sep="\t", float_format="%0.2f", na_rep='-')
+
+    def testGetSettings(self):
+        self.assertEqual({'resfinder_db_commit': 'abc', 'pid_threshold': '98.0'},
+                         dict(self.existing_results.get_settings()), 'Wrong settings')
+
+    def testGetIsolateIds(self):
+        self.assertEqual({'file1', 'file3'}, self.existing_results.get_isolate_ids(), 'Wrong isolate ids')
+        self.assertFalse(self.existing_results.has_pointfinder(), 'Should not have PointFinder results')
+
+    def testMerge(self):
+        resfinder_dataframe = pd.DataFrame(
+            [['file2', 'sul1', 99.5, 100.0, '840/840', 'contig2', 100, 939, 'U12338'],
+             ['file0', 'aadA1', 100.0, 100.0, '792/792', 'contig1', 5, 796, 'JQ414041']],
+            columns=self.RESFINDER_COLUMNS).set_index('Isolate ID')
+        summary_dataframe = pd.DataFrame([['file0', 'aadA1'], ['file2', 'sul1']],
+                                         columns=['Isolate ID', 'Genotype']).set_index('Isolate ID')
+
+        resfinder_merged, pointfinder_merged, summary_merged = self.existing_results.merge(resfinder_dataframe, None,
+                                                                                           summary_dataframe)
+
+        self.assertEqual(['file0', 'file1', 'file2'], resfinder_merged.index.tolist(), 'Wrong resfinder isolates')
+        self.assertEqual(['aadA1', 'blaTEM-1B', 'sul1'], resfinder_merged['Gene'].tolist(), 'Wrong genes')
+        self.assertEqual(1, resfinder_merged.loc['file1', 'Start'], 'Start should be numeric')
+        self.assertEqual('1', resfinder_merged.loc['file1', 'Contig'], 'Contig should be a string')
+        self.assertIsNone(pointfinder_merged, 'Should not have PointFinder results')
+        self.assertEqual(['file0', 'file1', 'file2', 'file3'], summary_merged.index.tolist(), 'Wrong summary isolates')
+        self.assertEqual(['aadA1', 'blaTEM-1B', 'sul1', 'None'], summary_merged['Genotype'].tolist(),
+                         'Wrong genotypes')
+
+    def testMergeDifferentColumns(self):
+        resfinder_dataframe = pd.DataFrame([['file2', 'sul1', 'sulfisoxazole']],
+                                           columns=['Isolate ID', 'Gene', 'Predicted Phenotype']).set_index(
+            'Isolate ID')
+
+        with self.assertRaisesRegex(Exception, 'do not match'):
+            self.existing_results.merge(resfinder_dataframe, None, resfinder_dataframe)
@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from os import path
+
+import numpy as np
+
+from staramr.results.ResultsJournal import ResultsJournal
+
+
+class ResultsJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.journal_dir = tempfile.TemporaryDirectory()
+        self.journal_file = path.join(self.journal_dir.name, 'journal.jsonl')
+        self.settings = {'resfinder_db_commit': 'abc', 'pid_threshold': '98.0'}
+
+    def tearDown(self):
+        self.journal_dir.cleanup()
+
+    def _write_journal(self):
+        results_journal = ResultsJournal(self.journal_file, self.settings)
+        results_journal.open()
+        results_journal.add('file1.fasta', [['file1', 'blaTEM-1', 100.0, np.float64(99.5), np.int64(10)]], [])
+        results_journal.add('file2.fasta', [], [['file2', 'gyrA (S83F)', 'codon', 83]])
+        results_journal.close()
+
+    def testAddResume(self):
+        self._write_journal()
+
+        results_journal = ResultsJournal(self.journal_file, self.settings)
+        results_journal.open(resume=True)
+
+        self.assertEqual({'file1.fasta', 'file2.fasta'}, results_journal.get_completed_files(), 'Wrong completed files')
+        self.assertEqual(([['file1', 'blaTEM-1', 100.0, 99.5, 10]], []), results_journal.get_results('file1.fasta'),
+                         'Wrong results')
+        self.assertEqual(([], [['file2', 'gyrA (S83F)', 'codon', 83]]), results_journal.get_results('file2.fasta'),
+                         'Wrong results')
+
+        results_journal.add('file3.fasta', [], [])
+        results_journal.close()
+
+        results_journal = ResultsJournal(self.journal_file, self.settings)
+        results_journal.open(resume=True)
+        results_journal.close()
+        self.assertEqual({'file1.fasta', 'file2.fasta', 'file3.fasta'}, results_journal.get_completed_files(),
+                         'Wrong completed files')
+
+    def testResumeIncompleteEntry(self):
+        self._write_journal()
+        with open(self.journal_file, 'a') as fh:
+            fh.write('{"file": "file3.fasta", "resf')
+
+        results_journal = ResultsJournal(self.journal_file, self.settings)
+        results_journal.open(resume=True)
+        results_journal.add('file3.fasta', [], [])
+        results_journal.close()
+
+        results_journal = ResultsJournal(self.journal_file, self.settings)
+        results_journal.open(resume=True)
+        results_journal.close()
+        self.assertEqual({'file1.fasta', 'file2.fasta', 'file3.fasta'}, results_journal.get_completed_files(),
+                         'Incomplete entry should be replaced')
+
+    def testResumeDifferentSettings(self):
+        self._write_journal()
+
+        results_journal = ResultsJournal(self.journal_file, {'resfinder_db_commit': 'abc', 'pid_threshold': '90.0'})
+        with self.assertRaisesRegex(Exception, 'pid_threshold'):
+            results_journal.open(resume=True)
+
+    def testResumeIgnoredSettings(self):
+        self._write_journal()
+
+        results_journal = ResultsJournal(self.journal_file, {'resfinder_db_commit': 'abc', 'pid_threshold': '98.0',
+                                                             'genome_pack_size': '10'})
+        results_journal.open(resume=True, ignored_settings=['genome_pack_size'])
+        results_journal.close()
+        self.assertEqual({'file1.fasta', 'file2.fasta'}, results_journal.get_completed_files(),
+                         'Should load results with different ignored settings')
+
+        results_journal = ResultsJournal(self.journal_file, {'resfinder_db_commit': 'abc', 'pid_threshold': '90.0'})
+        with self.assertRaisesRegex(Exception, 'pid_threshold'):
+            results_journal.open(resume=True, ignored_settings=['genome_pack_size'])
+
+    def testExistsWithoutResume(self):
+        self._write_journal()
+
+        with self.assertRaisesRegex(Exception, 'already exists'):
+            ResultsJournal(self.journal_file, self.settings).open()
@@ -0,0 +1,53 @@
+import argparse
+import multiprocessing
+import tempfile
+import unittest
+from collections import OrderedDict
+from os import path
+from unittest.mock import MagicMock, patch
+
+from staramr.subcommand.Reanalyze import Reanalyze
+
+
+class ReanalyzeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = argparse.ArgumentParser()
+        self.parser.add_argument('--verbose', action='store_true', dest='verbose', required=False)
+        self.reanalyze = Reanalyze(self.parser.add_subparsers(dest='command'), 'staramr', '0.4.0')
+
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.archive = path.join(self.output_dir.name, 'hits.zip')
+        open(self.archive, 'w').close()
+
+        self.reanalyze._get_database_repos = MagicMock()
+        self.reanalyze._get_settings = MagicMock(return_value=OrderedDict())
+        self.reanalyze._write_results = MagicMock()
+
+    def tearDown(self):
+        self.output_dir.cleanup()
+
+    def _run(self, command_line):
+        args = self.parser.parse_args(command_line)
+        with patch('staramr.subcommand.Reanalyze.BlastHitsArchive') as blast_hits_archive, \
+                patch('staramr.subcommand.Reanalyze.AMRDetectionFactory') as amr_detection_factory:
+            blast_hits_archive.return_value.get_settings.return_value = {}
+            args.run_command(args)
+            return amr_detection_factory.return_value.build.call_args[1]
+
+    def testRunDefaultNprocs(self):
+        build_kwargs = self._run(['reanalyze', '-o', path.join(self.output_dir.name, 'out'), self.archive])
+
+        self.assertEqual(multiprocessing.cpu_count(), build_kwargs['parse_processes'],
+                         'Should parse with all processing cores by default')
+        self.assertTrue(self.reanalyze._write_results.called, 'Should write results')
+
+    def testRunNprocs(self):
+        build_kwargs = self._run(['reanalyze', '--nprocs', '2', '-o', path.join(self.output_dir.name, 'out'),
+                                  self.archive])
+
+        self.assertEqual(2, build_kwargs['parse_processes'], 'Should parse with --nprocs processes')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import argparse
+import unittest
+from collections import OrderedDict
+from unittest.mock import MagicMock
+
+from staramr.exceptions.CommandParseException import CommandParseException
+from staramr.subcommand.Search import Search
+
+
+class SearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = argparse.ArgumentParser()
+        self.parser.add_argument('--verbose', action='store_true', dest='verbose', required=False)
+        self.search = Search(self.parser.add_subparsers(dest='command'), 'staramr', '0.4.0')
+
+        self.database_repos = MagicMock()
+        self.database_repos.info.return_value = OrderedDict([('resfinder_db_commit', 'abc'),
+                                                             ('pointfinder_db_commit', 'def')])
+
+    def _get_existing_results(self, args, genes_to_exclude):
+        existing_settings = OrderedDict(self.database_repos.info.return_value)
+        existing_settings.update(self.search._get_reporting_settings(args, args.pointfinder_organism,
+                                                                     genes_to_exclude))
+        existing_results = MagicMock()
+        existing_results.has_pointfinder.return_value = args.pointfinder_organism is not None
+        existing_results.get_settings.return_value = existing_settings
+        return existing_results
+
+    def testCheckExistingSettingsSame(self):
+        args = self.parser.parse_args(['search', '--pointfinder-organism', 'salmonella', 'genome.fasta'])
+        existing_results = self._get_existing_results(args, ['gene1'])
+
+        self.search._check_existing_settings(existing_results, self.database_repos,
+                                             self.search._get_reporting_settings(args, 'salmonella', ['gene1']),
+                                             'salmonella')
+
+    def testCheckExistingSettingsDifferentReportingOptionsFail(self):
+        existing_args = self.parser.parse_args(['search', '--pointfinder-organism', 'salmonella', 'genome.fasta'])
+        existing_results = self._get_existing_results(existing_args, ['gene1'])
+
+        for search_args, pointfinder_organism, genes_to_exclude in [
+            (['--exclude-negatives'], 'salmonella', ['gene1']),
+            (['--exclude-resistance-phenotypes'], 'salmonella', ['gene1']),
+            ([], 'campylobacter', ['gene1']),
+            ([], 'salmonella', []),
+        ]:
+            args = self.parser.parse_args(['search', '--pointfinder-organism', pointfinder_organism] + search_args +
+                                          ['genome.fasta'])
+            settings = self.search._get_reporting_settings(args, pointfinder_organism, genes_to_exclude)
+            self.assertRaises(CommandParseException, self.search._check_existing_settings, existing_results,
+                              self.database_repos, settings, pointfinder_organism)
+
+    def testResultsJournalBlastSettings(self):
+        args = self.parser.parse_args(['search', '--genome-pack-size', '10', 'genome.fasta'])
+        settings = self.search._get_results_journal_settings(args, self.database_repos, [])
+
+        self.assertEqual('10', settings['genome_pack_size'], 'Wrong genome pack size')
+        self.assertTrue(set(Search.RESULTS_JOURNAL_BLAST_SETTINGS).issubset(settings),
+                        'BLAST settings ignored for --incremental should be in the journal settings')
+        self.assertIn('exclude_negatives', settings, 'Reporting options should be in the journal settings')
+
+    def testSplitProcessingCores(self):
+        self.assertEqual((1, 1), self.search._split_processing_cores(1), 'Wrong split of 1 core')
+        self.assertEqual((1, 3), self.search._split_processing_cores(4), 'Should parse in this process')
+        self.assertEqual((4, 12), self.search._split_processing_cores(16),
+                         'Parsing and BLAST should share the processing cores')